@@ -0,0 +1,150 @@
+import argparse
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# ELOT 743-style Greek -> Latin, applied after accents are folded; digraphs first
+GREEK_DIGRAPHS = [("ου", "ou"), ("ευ", "ev"), ("αυ", "av"), ("γγ", "ng"), ("θ", "th"), ("χ", "ch"), ("ψ", "ps")]
+GREEK_LETTERS = str.maketrans({
+    "α": "a", "β": "v", "γ": "g", "δ": "d", "ε": "e", "ζ": "z", "η": "i", "ι": "i", "κ": "k", "λ": "l", "μ": "m",
+    "ν": "n", "ξ": "x", "ο": "o", "π": "p", "ρ": "r", "σ": "s", "ς": "s", "τ": "t", "υ": "y", "φ": "f", "ω": "o",
+})
+
+UNIT_FAMILY = {
+    "kg": "mass", "kgr": "mass", "kilo": "mass", "κιλο": "mass", "g": "mass", "gr": "mass", "γρ": "mass",
+    "lt": "volume", "l": "volume", "ltr": "volume", "λιτ": "volume", "ml": "volume",
+    "pcs": "count", "pc": "count", "τεμ": "count", "τμχ": "count", "piece": "count", "pieces": "count",
+}
+PACK_TOKEN = re.compile(r"(?<![\w.,])(\d+(?:[.,]\d+)?)\s*(kgr|kg|gr|g|ltr|lt|ml|l|pcs|pc|τεμ|τμχ|γρ|λιτ)(?![\w])", re.IGNORECASE)
+MULTI_TOKEN = re.compile(r"(?<![\w])x\s*\d+(?![\w])|(?<![\w])\d+\s*x(?![\w])", re.IGNORECASE)
+
+NGRAM = 3
+MIN_SCORE = 0.3
+PACK_MISMATCH_FACTOR = 0.8
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def strip_accents(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+
+def fold(s) -> str:
+    """Lowercase, drop accents and transliterate Greek, so 'Πατάτες Κύπρου' and 'patates kyprou' meet."""
+    s = strip_accents(str(s or "").lower())
+    for g, lat in GREEK_DIGRAPHS:
+        s = s.replace(g, lat)
+    s = s.translate(GREEK_LETTERS)
+    s = re.sub(r"[^\w%]+", " ", s)
+    return " ".join(s.split())
+
+
+def pack_family(unit) -> str:
+    return UNIT_FAMILY.get(strip_accents(str(unit or "").strip().lower().rstrip(".")), "")
+
+
+def split_pack(name):
+    """('mozzarella', 'mass') from 'Mozzarella 1kg': pack/multiplier tokens leave the text and give the unit family."""
+    s = str(name or "")
+    m = PACK_TOKEN.search(s)
+    family = pack_family(m.group(2)) if m else ""
+    s = MULTI_TOKEN.sub(" ", PACK_TOKEN.sub(" ", s))
+    return s, family
+
+
+def ngrams(folded: str):
+    padded = f" {folded} "
+    return {padded[i:i + NGRAM] for i in range(max(1, len(padded) - NGRAM + 1))}
+
+
+def build_index(catalog):
+    """Trigram inverted index over catalog canonical names and aliases (accent-folded, transliterated, packs stripped)."""
+    items = catalog.get("items", []) if isinstance(catalog, dict) else catalog or []
+    entries, postings, seen = [], {}, set()
+    for item in items:
+        pid = item.get("product_id")
+        if not pid:
+            continue
+        for alias in [item.get("canonical_name", "")] + list(item.get("aliases", []) or []):
+            text, _ = split_pack(alias)
+            key = fold(text)
+            if not key or (pid, key) in seen:
+                continue
+            seen.add((pid, key))
+            grams = ngrams(key)
+            eid = len(entries)
+            entries.append({
+                "product_id": pid,
+                "alias": alias,
+                "key": key,
+                "tokens": sorted(set(key.split())),
+                "ngrams": len(grams),
+                "family": pack_family(item.get("base_unit")),
+                "name": item.get("canonical_name", ""),
+            })
+            for g in grams:
+                postings.setdefault(g, []).append(eid)
+    return {"entries": entries, "postings": postings}
+
+
+def suggest(index, name, pack_unit=None, k=3, min_score=MIN_SCORE):
+    """Top-k products for a raw description: [{"product_id", "name", "alias", "score"}], best alias per product.
+
+    Only aliases sharing a trigram with the query are scored (posting lists), so cost follows the overlap, not the catalog.
+    """
+    text, fam_from_name = split_pack(name)
+    key = fold(text)
+    if not key:
+        return []
+    family = pack_family(pack_unit) or fam_from_name
+    grams = ngrams(key)
+    shared = {}
+    for g in grams:
+        for eid in index["postings"].get(g, ()):
+            shared[eid] = shared.get(eid, 0) + 1
+    tokens = set(key.split())
+    best = {}
+    for eid, n in shared.items():
+        e = index["entries"][eid]
+        dice = 2.0 * n / (len(grams) + e["ngrams"])
+        et = set(e["tokens"])
+        jacc = len(tokens & et) / len(tokens | et) if tokens or et else 0.0
+        score = 0.7 * dice + 0.3 * jacc
+        if family and e["family"] and family != e["family"]:
+            score *= PACK_MISMATCH_FACTOR
+        score = round(score, 4)
+        if score < min_score:
+            continue
+        cur = best.get(e["product_id"])
+        if cur is None or score > cur["score"]:
+            best[e["product_id"]] = {"product_id": e["product_id"], "name": e["name"], "alias": e["alias"], "score": score}
+    return sorted(best.values(), key=lambda x: (-x["score"], x["product_id"]))[:k]
+
+
+def format_suggestion(s):
+    """CSV cell for suggestion_1..3: product_id first so it can be copied into set_product_id."""
+    return f"{s['product_id']} | {s['name']} | {s['score']:.2f}" if s else ""
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Approximate catalog match for raw descriptions (accent/transliteration folded, pack aware)")
+    p.add_argument("--catalog", default=str(ROOT / "data" / "catalog.json"))
+    p.add_argument("--name", action="append", required=True, help="raw description (repeatable)")
+    p.add_argument("--pack-unit", default=None)
+    p.add_argument("--top", type=int, default=3)
+    args = p.parse_args(argv)
+
+    index = build_index(load_json(Path(args.catalog), {"items": []}))
+    out = {n: suggest(index, n, args.pack_unit, k=args.top) for n in args.name}
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import argparse
+import concurrent.futures
+import json
+import statistics
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+AUDIT_LOG = ROOT / "audit" / "mapping_persist_log.jsonl"
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import alias_match  # noqa: E402
+import lookup_index  # noqa: E402
+import normalize_import_batch  # noqa: E402
+
+# confidence = weighted evidence: a perfect name with everything else unknown scores 0.75, and a pack or price band
+# that disagrees caps it at 0.80, both below the default threshold
+WEIGHTS = {"name": 0.5, "pack": 0.2, "category": 0.1, "price": 0.2}
+THRESHOLD = 0.85
+MARGIN = 0.05
+CANDIDATES = 5
+# price plausibility: ratio of the row's price per base unit to the product's reference median
+PRICE_BAND = 2.0
+PRICE_BAND_WIDE = 4.0
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_json(path: Path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def append_jsonl(path: Path, row):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def price_bands(offers):
+    """product_id -> median price per base unit over mapped reference offers (other suppliers, earlier runs)."""
+    by_pid = {}
+    for o in offers or []:
+        pid, ppu = o.get("product_id"), o.get("price_per_base_unit")
+        try:
+            ppu = float(ppu)
+        except (TypeError, ValueError):
+            continue
+        if pid and ppu > 0:
+            by_pid.setdefault(pid, []).append(ppu)
+    return {pid: statistics.median(v) for pid, v in by_pid.items()}
+
+
+def row_signature(r):
+    """(base unit, price per base unit) of a raw import row, normalized the way normalize_import_batch does it."""
+    unit = normalize_import_batch.base_unit(r.get("pack_unit", ""))
+    if unit is None:
+        return None, None
+    try:
+        size = normalize_import_batch.to_base_size(r.get("pack_size", 1), r.get("pack_unit", ""))
+        price = float(r.get("price") or 0)
+    except (TypeError, ValueError):
+        return unit, None
+    return unit, (price / size if size and price > 0 else None)
+
+
+def _pack_score(unit, product):
+    base = normalize_import_batch.base_unit(product.get("base_unit", ""))
+    if not unit or not base:
+        return 0.5
+    return 1.0 if unit == base else 0.0
+
+
+def _category_score(row_category, product_category):
+    if row_category in (None, "unknown") or product_category in (None, "unknown"):
+        return 0.5
+    return 1.0 if row_category == product_category else 0.0
+
+
+def _price_score(ppu, ref):
+    if not ppu or not ref:
+        return 0.5
+    ratio = max(ppu / ref, ref / ppu)
+    if ratio <= PRICE_BAND:
+        return 1.0
+    return 0.5 if ratio <= PRICE_BAND_WIDE else 0.0
+
+
+def score_row(r, lookup, bands):
+    """Candidates for one raw row, best first: [{"product_id", "name", "score", "evidence": {...}}].
+
+    Name similarity comes from an exact alias hit (1.0) or the trigram matcher; pack, category and price band
+    are each 1.0 agree / 0.0 disagree / 0.5 unknown.
+    """
+    name = r.get("product_name", "")
+    exact = lookup["alias_index"].get(lookup_index.norm(name), [])
+    names = {pid: 1.0 for pid in exact if pid}
+    for s in alias_match.suggest(lookup["fuzzy"], name, r.get("pack_unit"), k=CANDIDATES):
+        names.setdefault(s["product_id"], s["score"])
+    unit, ppu = row_signature(r)
+    row_category = lookup_index.canonical_category(r.get("category", "")) if r.get("category") else None
+    out = []
+    for pid, name_score in names.items():
+        product = lookup["item_by_pid"].get(pid, {})
+        evidence = {
+            "name": round(name_score, 4),
+            "pack": _pack_score(unit, product),
+            "category": _category_score(row_category, lookup["categories"].get(pid)),
+            "price": _price_score(ppu, bands.get(pid)),
+        }
+        out.append({
+            "product_id": pid,
+            "name": product.get("canonical_name", ""),
+            "score": round(sum(WEIGHTS[k] * v for k, v in evidence.items()), 4),
+            "evidence": evidence,
+        })
+    out.sort(key=lambda x: (-x["score"], x["product_id"]))
+    return out[:CANDIDATES]
+
+
+def decide(candidates, threshold=THRESHOLD, margin=MARGIN):
+    """(product_id or None, reason): accept only a clear winner above the threshold."""
+    if not candidates:
+        return None, "no_candidate"
+    best = candidates[0]
+    if best["score"] < threshold:
+        return None, "below_threshold"
+    if len(candidates) > 1 and best["score"] - candidates[1]["score"] < margin:
+        return None, "ambiguous"
+    return best["product_id"], "accepted"
+
+
+# per-worker state for workers>1: lookup and price bands are shipped once per process
+_POOL = {}
+
+
+def _pool_init(lookup, bands):
+    _POOL["lookup"] = lookup
+    _POOL["bands"] = bands
+
+
+def _pool_score(rows):
+    return [score_row(r, _POOL["lookup"], _POOL["bands"]) for r in rows]
+
+
+def bootstrap(rows, lookup, bands, threshold=THRESHOLD, margin=MARGIN, workers=1):
+    """Match every raw row of a supplier catalog. Returns (accepted, residue, already_mapped).
+
+    Rows whose supplier::sku is already in a SKU map are left alone; within the batch the first row of a SKU decides.
+    Rows without a supplier_sku (OCR / PDF imports) have nothing to persist a mapping under: they are scored for
+    suggestions and go to the residue as `no_sku`.
+    """
+    todo, already, seen = [], [], set()
+    for r in rows:
+        key = f"{r.get('supplier', '')}::{r.get('supplier_sku', '')}"
+        if not r.get("supplier_sku"):
+            todo.append(r)
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        if key in lookup["sku_map"]:
+            already.append({"offer_id": r.get("offer_id"), "sku_key": key, "product_id": lookup["sku_map"][key]})
+        else:
+            todo.append(r)
+
+    workers = min(int(workers or 1), max(1, len(todo) // 200))
+    if workers <= 1:
+        scored = [score_row(r, lookup, bands) for r in todo]
+    else:
+        size = -(-len(todo) // (workers * 4))
+        chunks = [todo[i:i + size] for i in range(0, len(todo), size)]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_pool_init, initargs=(lookup, bands)) as pool:
+            scored = [c for part in pool.map(_pool_score, chunks) for c in part]
+
+    accepted, residue = [], []
+    for r, cands in zip(todo, scored):
+        pid, reason = decide(cands, threshold, margin) if r.get("supplier_sku") else (None, "no_sku")
+        base = {
+            "offer_id": r.get("offer_id"),
+            "supplier": r.get("supplier"),
+            "supplier_sku": r.get("supplier_sku", ""),
+            "product_name": r.get("product_name", ""),
+            "sku_key": f"{r.get('supplier', '')}::{r.get('supplier_sku', '')}",
+        }
+        if pid:
+            accepted.append({**base, "product_id": pid, "confidence": cands[0]["score"], "evidence": cands[0]["evidence"]})
+        else:
+            residue.append({**base, "reason": reason, "candidates": cands})
+    return accepted, residue, already
+
+
+def residue_needs(residue):
+    """needs_review rows for the `review` step; suggestion_scores carry the bootstrap confidence."""
+    return [{
+        "offer_id": x["offer_id"],
+        "product_name": x["product_name"],
+        "supplier": x["supplier"],
+        "supplier_sku": x["supplier_sku"],
+        "reason": f"bootstrap_{x['reason']}",
+        "suggestions": [c["product_id"] for c in x["candidates"][:3]],
+        "suggestion_scores": [{"product_id": c["product_id"], "name": c["name"], "score": c["score"]} for c in x["candidates"][:3]],
+        "action": "BLOCK_UNTIL_MAPPED",
+    } for x in residue]
+
+
+def persist(accepted, supplier_id, sku_map_path, audit_log):
+    """Add accepted rows to the supplier's SKU map (never overwriting a key) and log each one. Returns rows written."""
+    sku_map = load_json(Path(sku_map_path), {})
+    written = []
+    for a in accepted:
+        if a["sku_key"] in sku_map:
+            continue
+        sku_map[a["sku_key"]] = a["product_id"]
+        written.append(a)
+        append_jsonl(Path(audit_log), {
+            "severity": "INFO",
+            "code": "BOOTSTRAP-SKU-MAP-PERSISTED",
+            "offer_id": a["offer_id"],
+            "sku_key": a["sku_key"],
+            "product_id": a["product_id"],
+            "raw_desc": a["product_name"],
+            "supplier_id": supplier_id,
+            "confidence": a["confidence"],
+            "evidence": a["evidence"],
+            "reason": "bulk_bootstrap",
+            "ts": datetime.now(timezone.utc).isoformat(),
+        })
+    if written:
+        save_json(Path(sku_map_path), sku_map)
+    return written
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Bulk auto-map a new supplier catalog; only the residue goes to review")
+    p.add_argument("--raw", required=True, help="raw_merged.json from the supplier's import run")
+    p.add_argument("--supplier-id", required=True)
+    p.add_argument("--supplier", default=None, help="only rows with this supplier name")
+    p.add_argument("--offers", default=None, help="mapped offers for the price bands (e.g. offers_mapped.json)")
+    p.add_argument("--catalog", default=str(lookup_index.CATALOG_PATH))
+    p.add_argument("--sku-map", default=None, help="default mappings/supplier_sku_map/<supplier-id>.json")
+    p.add_argument("--audit-log", default=str(AUDIT_LOG))
+    p.add_argument("--threshold", type=float, default=THRESHOLD)
+    p.add_argument("--margin", type=float, default=MARGIN)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--out", required=True, help="bootstrap report json")
+    p.add_argument("--needs-review-out", required=True)
+    args = p.parse_args(argv)
+
+    rows = load_json(Path(args.raw), [])
+    if args.supplier:
+        rows = [r for r in rows if lookup_index.norm(r.get("supplier")) == lookup_index.norm(args.supplier)]
+    sku_map = args.sku_map or str(lookup_index.SKU_MAP_DIR / f"{args.supplier_id}.json")
+    # already-mapped skus are judged against the maps next to the one being written
+    lookup = lookup_index.load(catalog=args.catalog, sku_map_dir=Path(sku_map).parent)
+    bands = price_bands(load_json(Path(args.offers), []) if args.offers else [])
+    accepted, residue, already = bootstrap(rows, lookup, bands, args.threshold, args.margin, args.workers)
+    written = [] if args.dry_run else persist(accepted, args.supplier_id, sku_map, args.audit_log)
+    stats = {"rows": len(accepted) + len(residue) + len(already), "already_mapped": len(already),
+             "accepted": len(accepted), "persisted": len(written), "residue": len(residue),
+             "no_sku": sum(1 for x in residue if x["reason"] == "no_sku")}
+    save_json(Path(args.out), {"stats": stats, "accepted": accepted, "residue": residue, "already_mapped": already})
+    save_json(Path(args.needs_review_out), residue_needs(residue))
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -99,7 +99,7 @@ def build_from_text(lines, autofill_portions=None):
     }
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Build deterministic Recipe skeletons from text or items json")
     p.add_argument("--text", default=None)
     p.add_argument("--items-json", default=None)
@@ -107,7 +107,7 @@ def main():
     p.add_argument("--out-recipes", required=True)
     p.add_argument("--out-summary", required=True)
     p.add_argument("--out-reply", required=True)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     if bool(args.text) == bool(args.items_json):
         raise RuntimeError("recipe-skeleton requires exactly one of --text or --items-json")
@@ -1,9 +1,16 @@
 import argparse
+import concurrent.futures
 import json
 import math
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT / "scripts") not in sys.path:
+    sys.path.insert(0, str(ROOT / "scripts"))
+
+import price_history  # noqa: E402
 
 BASE_UNITS = {"kg", "lt", "pcs"}
 SUPPORTED_INPUT_UNITS = {"g", "kg", "ml", "lt", "pcs"}
@@ -66,22 +73,19 @@ def has_block(issues):
     return any(i.get("severity") == "BLOCK" for i in issues)
 
 
-def main():
-    p = argparse.ArgumentParser(description="Phase-1 cost recipe using sourcing decisions as source of truth")
-    p.add_argument("--recipe", required=True)
-    p.add_argument("--offers", required=True, help="mapped offers json")
-    p.add_argument("--decisions", required=True, help="sourcing decisions json")
-    p.add_argument("--defaults", required=True)
-    p.add_argument("--out", required=True, help="cost_breakdown json out")
-    p.add_argument("--issues-out", required=True, help="issues json out")
-    p.add_argument("--confirm-stale", action="store_true", help="explicit confirmation to allow 15-28 day prices")
-    args = p.parse_args()
+def build_index(offers, decisions):
+    """offer_by_id / chosen_by_product lookups; build once and pass to cost_recipe when costing many recipes."""
+    return {
+        "offer_by_id": {o.get("offer_id"): o for o in offers},
+        "chosen_by_product": {
+            d.get("product_id"): d.get("chosen_offer_id")
+            for d in decisions
+            if d.get("product_id") and d.get("chosen_offer_id")
+        },
+    }
 
-    recipe = json.loads(Path(args.recipe).read_text(encoding="utf-8"))
-    offers = json.loads(Path(args.offers).read_text(encoding="utf-8"))
-    decisions = json.loads(Path(args.decisions).read_text(encoding="utf-8"))
-    defaults = json.loads(Path(args.defaults).read_text(encoding="utf-8"))
 
+def cost_recipe(recipe, offers, decisions, defaults, confirm_stale=False, now=None, index=None):
     validity = defaults.get("phase1_price_validity", {})
     max_age_days = int(validity.get("max_age_days", 14))
     block_after_days = int(validity.get("block_after_days", 28))
@@ -96,14 +100,11 @@ def main():
     if not ingredients:
         add_issue(issues, "BLOCK", "COST-NO-INGREDIENTS", "Recipe has no ingredients", recipe_id=recipe.get("recipe_id"))
 
-    offer_by_id = {o.get("offer_id"): o for o in offers}
-    chosen_by_product = {
-        d.get("product_id"): d.get("chosen_offer_id")
-        for d in decisions
-        if d.get("product_id") and d.get("chosen_offer_id")
-    }
+    index = index or build_index(offers, decisions)
+    offer_by_id = index["offer_by_id"]
+    chosen_by_product = index["chosen_by_product"]
 
-    now = datetime.now(timezone.utc)
+    now = now or datetime.now(timezone.utc)
 
     lines = []
     food_total = 0.0
@@ -159,7 +160,7 @@ def main():
 
         if age > max_age_days:
             add_issue(issues, "WARNING", "COST-PRICE-STALE", "Chosen price age is 15-28 days; explicit confirmation required", line_id=line_id, chosen_offer_id=chosen_offer_id, age_days=round(age, 2))
-            if not args.confirm_stale:
+            if not confirm_stale:
                 add_issue(issues, "BLOCK", "COST-STALE-NOT-CONFIRMED", "Stale price used without explicit confirm", line_id=line_id, chosen_offer_id=chosen_offer_id)
                 continue
 
@@ -271,6 +272,67 @@ def main():
         "status": "BLOCKED" if has_block(issues) else "OK",
     }
 
+    return result, issues
+
+
+# per-worker state for cost_recipes(workers>1): offers/decisions are shipped and indexed once per process
+_POOL = {}
+
+
+def _pool_init(offers, decisions, defaults, confirm_stale, now):
+    _POOL.update({
+        "index": build_index(offers, decisions),
+        "defaults": defaults,
+        "confirm_stale": confirm_stale,
+        "now": now,
+    })
+
+
+def _pool_cost(recipe):
+    return cost_recipe(recipe, None, None, _POOL["defaults"], confirm_stale=_POOL["confirm_stale"], now=_POOL["now"], index=_POOL["index"])
+
+
+def cost_recipes(recipes, offers, decisions, defaults, confirm_stale=False, now=None, workers=1):
+    """Cost many recipes against one offers/decisions snapshot; returns [(result, issues)] in input order."""
+    recipes = list(recipes)
+    now = now or datetime.now(timezone.utc)
+    workers = min(int(workers or 1), len(recipes))
+    if workers <= 1:
+        index = build_index(offers, decisions)
+        return [cost_recipe(r, None, None, defaults, confirm_stale=confirm_stale, now=now, index=index) for r in recipes]
+    chunk = max(1, len(recipes) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_pool_init,
+        initargs=(offers, decisions, defaults, confirm_stale, now),
+    ) as pool:
+        return list(pool.map(_pool_cost, recipes, chunksize=chunk))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Phase-1 cost recipe using sourcing decisions as source of truth")
+    p.add_argument("--recipe", required=True)
+    p.add_argument("--offers", required=True, help="mapped offers json")
+    p.add_argument("--decisions", required=True, help="sourcing decisions json")
+    p.add_argument("--defaults", required=True)
+    p.add_argument("--out", required=True, help="cost_breakdown json out")
+    p.add_argument("--issues-out", required=True, help="issues json out")
+    p.add_argument("--confirm-stale", action="store_true", help="explicit confirmation to allow 15-28 day prices")
+    p.add_argument("--as-of", default=None, help="ISO time or YYYY-MM-DD to judge price age at (reproducible historical re-cost)")
+    args = p.parse_args(argv)
+    try:
+        as_of = price_history.parse_as_of(args.as_of) if args.as_of else None
+    except RuntimeError as e:
+        p.error(str(e))
+
+    recipe = json.loads(Path(args.recipe).read_text(encoding="utf-8"))
+    offers = json.loads(Path(args.offers).read_text(encoding="utf-8"))
+    decisions = json.loads(Path(args.decisions).read_text(encoding="utf-8"))
+    defaults = json.loads(Path(args.defaults).read_text(encoding="utf-8"))
+
+    result, issues = cost_recipe(recipe, offers, decisions, defaults, confirm_stale=args.confirm_stale, now=as_of)
+    lines = result["lines"]
+
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -0,0 +1,175 @@
+import argparse
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SNAPSHOT_DIR = ROOT / "state" / "import_snapshots"
+
+# fields whose change alters sourcing; a row differing only elsewhere (notes, offer_id, dates) is unchanged
+COMPARE_FIELDS = ["price", "pack_size", "pack_unit", "in_stock", "vat_rate", "currency"]
+
+
+def norm(s) -> str:
+    return " ".join(str(s or "").strip().lower().split())
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_json(path: Path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def row_key(r):
+    sku = norm(r.get("supplier_sku"))
+    if sku:
+        return f"sku:{sku}"
+    return f"desc:{norm(r.get('product_name'))}|{norm(r.get('pack_size'))}|{norm(r.get('pack_unit'))}"
+
+
+def _cmp_value(field, v):
+    if field in {"price", "pack_size", "vat_rate"}:
+        try:
+            return round(float(str(v).replace(",", ".")), 6)
+        except Exception:
+            return None
+    if field == "in_stock":
+        return v if isinstance(v, bool) else str(v).strip().lower() in {"1", "true", "yes", "y", "on"}
+    return norm(v)
+
+
+def index_rows(rows):
+    """key -> first row; later rows with the same key are counted as duplicates and ignored."""
+    idx = {}
+    dups = 0
+    for r in rows:
+        k = row_key(r)
+        if k in idx:
+            dups += 1
+            continue
+        idx[k] = r
+    return idx, dups
+
+
+def compute_delta(prev_rows, new_rows):
+    prev_idx, _ = index_rows(prev_rows or [])
+    new_idx, dups = index_rows(new_rows or [])
+    added, changed, unchanged = [], [], []
+    for k, r in new_idx.items():
+        old = prev_idx.get(k)
+        if old is None:
+            added.append({"key": k, "row": r})
+            continue
+        diff = [f for f in COMPARE_FIELDS if _cmp_value(f, old.get(f)) != _cmp_value(f, r.get(f))]
+        if diff:
+            changed.append({"key": k, "row": r, "prev": old, "changed_fields": diff})
+        else:
+            unchanged.append({"key": k, "row": r})
+    removed = [{"key": k, "prev": r} for k, r in prev_idx.items() if k not in new_idx]
+    return {"added": added, "removed": removed, "price_changed": changed, "unchanged": unchanged, "duplicates": dups}
+
+
+def price_events(delta, supplier_id, batch_id=None, prev_batch_id=None, ts=None):
+    ts = ts or datetime.now(timezone.utc).isoformat()
+    events = []
+
+    def ev(kind, k, row, old_price, new_price, **extra):
+        e = {
+            "event": kind,
+            "ts": ts,
+            "supplier_id": supplier_id,
+            "key": k,
+            "supplier_sku": str(row.get("supplier_sku", "") or ""),
+            "product_name": str(row.get("product_name", "") or ""),
+            "old_price": old_price,
+            "new_price": new_price,
+            "batch_id": batch_id,
+            "prev_batch_id": prev_batch_id,
+        }
+        if old_price not in (None, 0) and new_price is not None:
+            e["delta"] = round(new_price - old_price, 6)
+            e["delta_pct"] = round((new_price - old_price) / old_price * 100.0, 4)
+        e.update(extra)
+        events.append(e)
+
+    for x in delta["added"]:
+        ev("added", x["key"], x["row"], None, _cmp_value("price", x["row"].get("price")))
+    for x in delta["price_changed"]:
+        ev(
+            "price_changed",
+            x["key"],
+            x["row"],
+            _cmp_value("price", x["prev"].get("price")),
+            _cmp_value("price", x["row"].get("price")),
+            changed_fields=x["changed_fields"],
+            offer_id=x["row"].get("offer_id"),
+            prev_offer_id=x["prev"].get("offer_id"),
+        )
+    for x in delta["removed"]:
+        ev("removed", x["key"], x["prev"], _cmp_value("price", x["prev"].get("price")), None, prev_offer_id=x["prev"].get("offer_id"))
+    return events
+
+
+def snapshot_path(supplier_id, snapshot_dir=None):
+    return Path(snapshot_dir or SNAPSHOT_DIR) / f"{supplier_id}.json"
+
+
+def load_snapshot(supplier_id, snapshot_dir=None):
+    return load_json(snapshot_path(supplier_id, snapshot_dir), None)
+
+
+def save_snapshot(supplier_id, rows, batch_ids, source_hashes, snapshot_dir=None):
+    save_json(snapshot_path(supplier_id, snapshot_dir), {
+        "supplier_id": supplier_id,
+        "batch_ids": batch_ids,
+        "source_hashes": sorted(source_hashes),
+        "saved_at": datetime.now(timezone.utc).isoformat(),
+        "rows": rows,
+    })
+
+
+def delta_for_supplier(supplier_id, rows, batch_ids, source_hashes, snapshot_dir=None, update_snapshot=True):
+    """Diff `rows` against the stored snapshot for supplier_id; returns (delta, events, prev_snapshot)."""
+    prev = load_snapshot(supplier_id, snapshot_dir)
+    prev_rows = (prev or {}).get("rows", [])
+    prev_batch = ",".join((prev or {}).get("batch_ids", [])) or None
+    batch = ",".join(batch_ids) or None
+    if prev and sorted(source_hashes) == (prev.get("source_hashes") or []) and source_hashes:
+        # byte-identical source files: skip the row diff entirely
+        idx, dups = index_rows(rows)
+        delta = {"added": [], "removed": [], "price_changed": [], "unchanged": [{"key": k, "row": r} for k, r in idx.items()], "duplicates": dups}
+    else:
+        delta = compute_delta(prev_rows, rows)
+    events = price_events(delta, supplier_id, batch_id=batch, prev_batch_id=prev_batch)
+    if update_snapshot:
+        save_snapshot(supplier_id, rows, batch_ids, source_hashes, snapshot_dir)
+    return delta, events, prev
+
+
+def delta_counts(delta):
+    return {k: (len(v) if isinstance(v, list) else v) for k, v in delta.items()}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Diff two RawOffer[] batches by supplier_sku / description+pack")
+    p.add_argument("--prev", required=True)
+    p.add_argument("--new", required=True)
+    p.add_argument("--supplier-id", default="unknown")
+    p.add_argument("--out", required=True, help="delta json (added/removed/price_changed/unchanged)")
+    p.add_argument("--events-out", required=False, default=None, help="price_changes.json event log")
+    args = p.parse_args(argv)
+
+    delta = compute_delta(load_json(Path(args.prev), []), load_json(Path(args.new), []))
+    save_json(Path(args.out), delta)
+    if args.events_out:
+        save_json(Path(args.events_out), price_events(delta, args.supplier_id))
+    print(json.dumps(delta_counts(delta), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
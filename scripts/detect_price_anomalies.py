@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+STATS_ROOT = ROOT / "state" / "price_stats"
+
+# overridable from config/defaults.json "price_anomaly"
+DEFAULTS = {
+    "window": 30,             # unit prices kept per supplier product for the rolling median/MAD
+    "min_samples": 5,         # no median/MAD verdict below this many observations
+    "mad_z": 3.5,             # robust z-score (0.6745 * |x - median| / MAD) above which a price is an outlier
+    "mad_floor_pct": 2.0,     # MAD never below this % of the median, so a flat history does not flag cent changes
+    "jump_pct": 30.0,         # unit-price change vs the line's previous capture
+    "pack_outlier_ratio": 2.5,  # unit price vs the product's other pack sizes (x or 1/x)
+}
+
+
+def norm(s) -> str:
+    return " ".join(str(s or "").strip().lower().split())
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_json(path: Path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def load_config(defaults):
+    cfg = dict(DEFAULTS)
+    cfg.update((defaults or {}).get("price_anomaly", {}) if isinstance(defaults, dict) else {})
+    return cfg
+
+
+def _stats_path(supplier, root=None):
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in norm(supplier) or "unknown")
+    return Path(root or STATS_ROOT) / f"{safe}.json"
+
+
+def load_stats(supplier, root=None):
+    return load_json(_stats_path(supplier, root), {"products": {}, "lines": {}})
+
+
+def save_stats(supplier, stats, root=None):
+    p = _stats_path(supplier, root)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f"{p.stem}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(stats, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def product_key(r):
+    return f"pid:{r['product_id']}" if r.get("product_id") else f"name:{norm(r.get('product_name'))}"
+
+
+def line_key(r):
+    sku = norm(r.get("supplier_sku"))
+    if sku:
+        return f"sku:{sku}"
+    return f"desc:{norm(r.get('product_name'))}|{norm(r.get('pack_size'))}|{norm(r.get('pack_unit'))}"
+
+
+def pack_key(r):
+    return f"{norm(r.get('pack_size'))}|{norm(r.get('pack_unit'))}"
+
+
+def _median(xs):
+    s = sorted(xs)
+    n = len(s)
+    if not n:
+        return None
+    return s[n // 2] if n % 2 else (s[n // 2 - 1] + s[n // 2]) / 2.0
+
+
+def check_row(r, stats, cfg):
+    """Anomaly flags (+ reference values) for one quote against its supplier's stats, before the row is folded in."""
+    ppu = float(r.get("price_per_base_unit") or 0)
+    prod = stats["products"].get(product_key(r), {})
+    last = stats["lines"].get(line_key(r))
+    flags, ref = [], {}
+
+    if last and last.get("captured_at") != r.get("captured_at") and last.get("ppu", 0) > 0:
+        pct = (ppu - last["ppu"]) / last["ppu"] * 100.0
+        if abs(pct) >= cfg["jump_pct"]:
+            flags.append("PRICE_JUMP")
+            ref.update({"prev_price_per_base_unit": last["ppu"], "prev_captured_at": last.get("captured_at"), "jump_pct": round(pct, 2)})
+
+    window = prod.get("window", [])
+    if len(window) >= cfg["min_samples"]:
+        med = _median(window)
+        mad = max(_median([abs(x - med) for x in window]), med * cfg["mad_floor_pct"] / 100.0)
+        z = 0.6745 * (ppu - med) / mad if mad > 0 else 0.0
+        if abs(z) > cfg["mad_z"]:
+            flags.append("UNIT_PRICE_OUTLIER")
+            ref.update({"median": round(med, 6), "mad": round(mad, 6), "robust_z": round(z, 2)})
+
+    others = [v for k, v in prod.get("packs", {}).items() if k != pack_key(r)]
+    if others:
+        pref = _median(others)
+        ratio = ppu / pref if pref > 0 else 1.0
+        if ratio >= cfg["pack_outlier_ratio"] or ratio <= 1.0 / cfg["pack_outlier_ratio"]:
+            flags.append("PACK_UNIT_PRICE_OUTLIER")
+            ref.update({"other_packs_median": round(pref, 6), "pack_ratio": round(ratio, 3)})
+    return flags, ref
+
+
+def update_stats(r, stats, cfg):
+    """Fold one quote into the rolling stats; O(window). Re-importing the same capture is a no-op."""
+    ppu = float(r.get("price_per_base_unit") or 0)
+    lk = line_key(r)
+    last = stats["lines"].get(lk)
+    if last and last.get("captured_at") == r.get("captured_at") and last.get("ppu") == ppu:
+        return
+    prod = stats["products"].setdefault(product_key(r), {"window": [], "packs": {}})
+    prod["window"].append(ppu)
+    del prod["window"][: -int(cfg["window"])]
+    prod["packs"][pack_key(r)] = ppu
+    stats["lines"][lk] = {"ppu": ppu, "captured_at": r.get("captured_at")}
+
+
+def detect_anomalies(rows, cfg, stats_root=None, update=True):
+    """Tag rows in place with anomaly_flags; returns issues. Only the stats of the suppliers present are loaded."""
+    by_supplier = {}
+    issues = []
+    for r in rows:
+        ppu = float(r.get("price_per_base_unit") or 0)
+        if ppu <= 0:
+            continue
+        sup = str(r.get("supplier") or "unknown")
+        stats = by_supplier.get(sup)
+        if stats is None:
+            stats = by_supplier[sup] = load_stats(sup, stats_root)
+        flags, ref = check_row(r, stats, cfg)
+        if flags:
+            r["anomaly_flags"] = flags
+            issues.append({
+                "severity": "WARNING",
+                "code": "IMPORT-PRICE-ANOMALY",
+                "message": "Price deviates from this supplier's history: " + ",".join(flags),
+                "offer_id": r.get("offer_id"),
+                "supplier": r.get("supplier"),
+                "supplier_sku": r.get("supplier_sku", ""),
+                "product_name": r.get("product_name", ""),
+                "price_per_base_unit": ppu,
+                "anomaly_flags": flags,
+                "reference": ref,
+            })
+        update_stats(r, stats, cfg)
+    if update:
+        for sup, stats in by_supplier.items():
+            save_stats(sup, stats, stats_root)
+    return issues
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Tag PriceQuote[] with anomaly_flags against rolling per-supplier price stats")
+    p.add_argument("--input", required=True, help="price_quotes.json from normalize_import_batch.py")
+    p.add_argument("--out", required=True, help="tagged price quotes (may be --input)")
+    p.add_argument("--issues-out", required=False, default=None)
+    p.add_argument("--defaults", default=str(ROOT / "config" / "defaults.json"))
+    p.add_argument("--stats-dir", default=str(STATS_ROOT))
+    p.add_argument("--no-update", action="store_true", help="check only; do not fold this batch into the stats")
+    args = p.parse_args(argv)
+
+    rows = load_json(Path(args.input), [])
+    cfg = load_config(load_json(Path(args.defaults), {}))
+    issues = detect_anomalies(rows, cfg, args.stats_dir, update=not args.no_update)
+    save_json(Path(args.out), rows)
+    if args.issues_out:
+        save_json(Path(args.issues_out), issues)
+    print(json.dumps({"rows": len(rows), "anomalies": len(issues)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import json
+import math
+from pathlib import Path
+
+# tolerance for summed float quantities, so that 3 x 0.333334 kg does not buy an extra pack
+PACK_EPS = 1e-9
+
+
+def load_json(path, default):
+    p = Path(path)
+    if not p.exists():
+        return default
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+def save_json(path, data):
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _packs(needed, pack_size):
+    if pack_size <= 0:
+        return 0
+    return int(math.ceil(needed / pack_size - PACK_EPS))
+
+
+def _allocate(total, weights):
+    """Split `total` by `weights` rounded to 4 dp; the last share absorbs rounding so shares sum to total."""
+    wsum = sum(weights)
+    shares = [round(total * w / wsum, 4) if wsum > 0 else 0.0 for w in weights]
+    if shares:
+        shares[-1] = round(total - sum(shares[:-1]), 4)
+    return shares
+
+
+def aggregate_event(costs):
+    """Pool ingredient lines of all recipe cost breakdowns per product_id/chosen offer and round to packs once.
+
+    Returns {"items", "allocations", "totals"}; purchase cost (packs x pack x price) is allocated back to
+    recipes pro rata to actual_needed_base, leftover included.
+    """
+    items = {}
+    contrib = {}
+    for ri, cost in enumerate(costs or []):
+        for ln in cost.get("lines", []) or []:
+            pack_size = float(ln.get("pack_size") or 0)
+            ppu = float(ln.get("price_per_base_unit") or 0)
+            needed = float(ln.get("actual_needed_base") or 0)
+            key = (ln.get("product_id"), ln.get("chosen_offer_id"))
+            it = items.get(key)
+            if it is None:
+                it = items[key] = {
+                    "product_id": ln.get("product_id"),
+                    "chosen_offer_id": ln.get("chosen_offer_id"),
+                    "supplier": ln.get("supplier"),
+                    "supplier_sku": ln.get("supplier_sku"),
+                    "pack_size": ln.get("pack_size"),
+                    "pack_unit": ln.get("pack_unit") or ln.get("base_unit"),
+                    "price_per_base_unit": ppu,
+                    "needed_base": 0.0,
+                    "standalone_packs": 0,
+                    "recipes": [],
+                }
+                contrib[key] = []
+            it["needed_base"] += needed
+            it["standalone_packs"] += int(ln.get("packs_to_buy") or 0)
+            rid = cost.get("recipe_id", "UNKNOWN")
+            if rid not in it["recipes"]:
+                it["recipes"].append(rid)
+            contrib[key].append((ri, rid, ln.get("line_id"), needed))
+
+    alloc = {}
+    rows = []
+    for key, it in items.items():
+        pack_size = float(it["pack_size"] or 0)
+        ppu = it["price_per_base_unit"]
+        packs = _packs(it["needed_base"], pack_size)
+        bought = packs * pack_size
+        purchase_cost = bought * ppu
+        it.update({
+            "needed_base": round(it["needed_base"], 6),
+            "packs_to_buy": packs,
+            "bought_qty_base": round(bought, 6),
+            "leftover_qty_base": round(max(0.0, bought - it["needed_base"]), 6),
+            "consumed_cost": round(it["needed_base"] * ppu, 4),
+            "purchase_cost": round(purchase_cost, 4),
+            "standalone_cost": round(it["standalone_packs"] * pack_size * ppu, 4),
+        })
+        shares = _allocate(it["purchase_cost"], [c[3] for c in contrib[key]])
+        for (ri, rid, line_id, needed), share in zip(contrib[key], shares):
+            a = alloc.setdefault(ri, {"recipe_id": rid, "lines": []})
+            a["lines"].append({
+                "line_id": line_id,
+                "product_id": it["product_id"],
+                "chosen_offer_id": it["chosen_offer_id"],
+                "needed_base": round(needed, 6),
+                "allocated_cost": share,
+            })
+        rows.append(it)
+
+    allocations = []
+    for ri, cost in enumerate(costs or []):
+        a = alloc.get(ri, {"recipe_id": cost.get("recipe_id", "UNKNOWN"), "lines": []})
+        standalone = sum(
+            int(ln.get("packs_to_buy") or 0) * float(ln.get("pack_size") or 0) * float(ln.get("price_per_base_unit") or 0)
+            for ln in cost.get("lines", []) or []
+        )
+        allocations.append({
+            "recipe_id": a["recipe_id"],
+            "food_cost_total": cost.get("food_cost_total", 0.0),
+            "purchase_cost_allocated": round(sum(x["allocated_cost"] for x in a["lines"]), 4),
+            "standalone_purchase_cost": round(standalone, 4),
+            "lines": a["lines"],
+        })
+
+    rows.sort(key=lambda x: (str(x.get("supplier") or ""), str(x.get("product_id") or "")))
+    purchase_total = round(sum(x["purchase_cost"] for x in rows), 4)
+    standalone_total = round(sum(x["standalone_cost"] for x in rows), 4)
+    totals = {
+        "recipes": len(costs or []),
+        "products": len(rows),
+        "suppliers": len({str(x.get("supplier") or "") for x in rows}),
+        "packs": sum(x["packs_to_buy"] for x in rows),
+        "standalone_packs": sum(x["standalone_packs"] for x in rows),
+        "consumed_cost": round(sum(x["consumed_cost"] for x in rows), 4),
+        "purchase_cost": purchase_total,
+        "standalone_purchase_cost": standalone_total,
+        "pack_rounding_savings": round(standalone_total - purchase_total, 4),
+    }
+    return {"items": rows, "allocations": allocations, "totals": totals}
+
+
+def purchase_list(event):
+    """Per-supplier view of an aggregate_event() result: what to order from whom."""
+    by_supplier = {}
+    for it in event.get("items", []):
+        sup = it.get("supplier") or "UNKNOWN"
+        row = by_supplier.setdefault(sup, {"supplier": sup, "items": [], "total": 0.0})
+        row["items"].append({
+            "product_id": it.get("product_id"),
+            "chosen_offer_id": it.get("chosen_offer_id"),
+            "supplier_sku": it.get("supplier_sku"),
+            "packs_to_buy": it.get("packs_to_buy"),
+            "pack_size": it.get("pack_size"),
+            "pack_unit": it.get("pack_unit"),
+            "purchase_cost": it.get("purchase_cost"),
+        })
+        row["total"] += float(it.get("purchase_cost") or 0)
+    suppliers = []
+    for sup in sorted(by_supplier):
+        row = by_supplier[sup]
+        row["total"] = round(row["total"], 4)
+        suppliers.append(row)
+    return {
+        "suppliers": suppliers,
+        "total": round(sum(x["total"] for x in suppliers), 4),
+        "recipes": event.get("totals", {}).get("recipes", 0),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Consolidate recipe cost breakdowns into one event purchase list")
+    p.add_argument("--costs", required=True, help="recipes_cost_breakdown.json (list) or a single cost_breakdown.json")
+    p.add_argument("--out-event", required=True, help="event_purchase.json (items/allocations/totals)")
+    p.add_argument("--out-purchase-list", required=True, help="purchase_list.json grouped per supplier")
+    args = p.parse_args(argv)
+
+    costs = load_json(args.costs, [])
+    if isinstance(costs, dict):
+        costs = [costs]
+    event = aggregate_event(costs)
+    save_json(args.out_event, event)
+    save_json(args.out_purchase_list, purchase_list(event))
+    print(json.dumps(event["totals"], ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
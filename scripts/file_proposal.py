@@ -65,7 +65,7 @@ def _extract_version(name: str):
     return "v1"
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Deterministic proposal filing")
     p.add_argument("--run-dir", required=True)
     p.add_argument("--template-type", required=True)
@@ -73,7 +73,7 @@ def main():
     p.add_argument("--proposals-root", required=True)
     p.add_argument("--client", required=False, default=None)
     p.add_argument("--out", required=True)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     run_dir = Path(args.run_dir)
     req = json.loads(Path(args.proposal_request).read_text(encoding="utf-8"))
@@ -127,6 +127,7 @@ def main():
         "run_summary.txt",
         "decisions.json",
         "template_selection.json",
+        "cost_breakdown.json",
     ]:
         got = copy_if_exists(run_dir / name, target_dir)
         if got:
@@ -69,7 +69,7 @@ def fmt_money(v):
         return "n/a"
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Compact Telegram reply formatter")
     p.add_argument("--intake-summary", required=True)
     p.add_argument("--template-selection", required=False, default=None)
@@ -78,7 +78,7 @@ def main():
     p.add_argument("--offer-run-summary", required=False, default=None)
     p.add_argument("--out-txt", required=True)
     p.add_argument("--out-json", required=True)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     summary = load_json(args.intake_summary) or {}
     template_sel = load_json(args.template_selection) or {}
@@ -70,7 +70,7 @@ def is_empty(v):
     return False
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Phase-1 proposal payload pre-flight validation (no DOCX render)")
     p.add_argument("--request", required=True, help="proposal_request.json")
     p.add_argument("--cost", required=True, help="cost_breakdown.json")
@@ -78,7 +78,7 @@ def main():
     p.add_argument("--out", required=True, help="proposal_payload.json")
     p.add_argument("--validation-out", required=True, help="proposal_validation.json")
     p.add_argument("--issues-out", required=True, help="proposal_issues.json")
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     req = json.loads(Path(args.request).read_text(encoding="utf-8"))
     cost = json.loads(Path(args.cost).read_text(encoding="utf-8"))
@@ -0,0 +1,306 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+INDEX_PATH = ROOT / "state" / "impact_index.json"
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import generate_proposal_payload as payload_math  # noqa: E402
+
+# cost line fields kept per link: enough to re-cost the line for a new unit price without the recipe or offers
+LINE_FIELDS = ["line_id", "product_id", "chosen_offer_id", "supplier", "actual_needed_base", "price_per_base_unit", "line_cost"]
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _empty():
+    return {"products": {}, "recipes": {}, "proposals": {}}
+
+
+def load_index(path=None):
+    idx = load_json(Path(path or INDEX_PATH), None)
+    return idx if isinstance(idx, dict) and "products" in idx else _empty()
+
+
+def save_index(idx, path=None):
+    p = Path(path or INDEX_PATH)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f"{p.stem}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(idx, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def _rel(path):
+    p = Path(path).resolve()
+    try:
+        return p.relative_to(ROOT).as_posix()
+    except ValueError:
+        return p.as_posix()
+
+
+def _slim_lines(cost):
+    return [{k: ln.get(k) for k in LINE_FIELDS} for ln in cost.get("lines", []) or [] if ln.get("product_id")]
+
+
+def _link(idx, kind, key, old_pids, new_pids):
+    """Move `key` from products it no longer uses to the ones it now uses (kind: recipes|proposals)."""
+    for pid in old_pids - new_pids:
+        row = idx["products"].get(pid)
+        if row and key in row[kind]:
+            row[kind].remove(key)
+            if not row["recipes"] and not row["proposals"]:
+                del idx["products"][pid]
+    for pid in new_pids - old_pids:
+        row = idx["products"].setdefault(pid, {"recipes": [], "proposals": []})
+        row[kind].append(key)
+        row[kind].sort()
+
+
+def record_costs(idx, costs, source=None):
+    """Recipe -> product links from cost breakdowns; a recipe keeps the lines of its last costing."""
+    n = 0
+    for cost in costs or []:
+        if not isinstance(cost, dict) or not cost.get("lines"):
+            continue
+        rid = cost.get("recipe_id", "UNKNOWN")
+        prev = idx["recipes"].get(rid, {})
+        lines = _slim_lines(cost)
+        _link(idx, "recipes", rid, {x["product_id"] for x in prev.get("lines", [])}, {x["product_id"] for x in lines})
+        idx["recipes"][rid] = {
+            "recipe_id": rid,
+            "source": str(source) if source else None,
+            "costed_at": _now_iso(),
+            "food_cost_total": cost.get("food_cost_total", 0.0),
+            "total_cost": cost.get("total_cost", 0.0),
+            "per_portion": cost.get("per_portion", 0.0),
+            "lines": lines,
+            "proposals": prev.get("proposals", []),
+        }
+        n += 1
+    return n
+
+
+def record_proposal(idx, key, payload, cost, meta=None):
+    """Proposal -> recipe/product links; lines come from the cost breakdown the proposal was priced on."""
+    prev = idx["proposals"].get(key, {})
+    lines = _slim_lines(cost)
+    if not lines:
+        return False
+    rid = cost.get("recipe_id", "UNKNOWN")
+    pricing = (payload or {}).get("pricing") or {}
+    _link(idx, "proposals", key, {x["product_id"] for x in prev.get("lines", [])}, {x["product_id"] for x in lines})
+    idx["proposals"][key] = {
+        "key": key,
+        "proposal_id": (payload or {}).get("proposal_id"),
+        "template_type": (payload or {}).get("template_type"),
+        "guest_count": ((payload or {}).get("event") or {}).get("guest_count"),
+        "recipes": [rid],
+        "total_cost": cost.get("total_cost", 0.0),
+        "pricing": {k: pricing.get(k) for k in ("cost_total", "markup_pct", "discount_pct", "vat_rate", "round_to", "net_selling", "gross_total", "price_per_person")} if pricing else None,
+        "lines": lines,
+        **(meta or {}),
+    }
+    if rid not in idx["recipes"]:
+        record_costs(idx, [cost], source=key)
+    props = idx["recipes"][rid].setdefault("proposals", [])
+    if key not in props:
+        props.append(key)
+        props.sort()
+    return True
+
+
+def filed_entry_files(folder, entry):
+    """(payload path, cost breakdown path) of one manifest entry, resolved inside `folder`; None if either is missing."""
+    folder = Path(folder)
+    names = [str(x).replace("\\", "/").rsplit("/", 1)[-1] for x in entry.get("filed_artifacts") or []]
+    payload = next((n for n in names if n.startswith("proposal_payload")), None)
+    cost = next((n for n in names if n.startswith("cost_breakdown")), None)
+    if not payload or not cost or not (folder / payload).exists() or not (folder / cost).exists():
+        return None
+    return folder / payload, folder / cost
+
+
+def record_filed_entry(idx, folder, entry):
+    """Link one manifest entry of a filed proposal folder; needs its proposal_payload*.json and cost_breakdown*.json."""
+    files = filed_entry_files(folder, entry)
+    if files is None:
+        return False
+    return record_proposal(idx, f"{_rel(folder)}/{files[0].name}", load_json(files[0], {}), load_json(files[1], {}), {
+        "dir": _rel(folder),
+        "filename": entry.get("filename"),
+        "compliance_status": entry.get("compliance_status"),
+    })
+
+
+def record_filed_dir(idx, folder):
+    """Link every manifest entry of a filed proposal folder; entries filed before cost_breakdown was kept are skipped."""
+    manifest = load_json(Path(folder) / "manifest.json", {})
+    return sum(1 for e in manifest.get("entries", []) if record_filed_entry(idx, folder, e)) if isinstance(manifest, dict) else 0
+
+
+def rebuild_proposals(idx, proposals_root):
+    """Drop and re-derive every proposal link from the filed library (manifest folders)."""
+    for key in list(idx["proposals"]):
+        _link(idx, "proposals", key, {x["product_id"] for x in idx["proposals"][key].get("lines", [])}, set())
+        del idx["proposals"][key]
+    for r in idx["recipes"].values():
+        r["proposals"] = []
+    return sum(record_filed_dir(idx, mp.parent) for mp in sorted(Path(proposals_root).glob("**/manifest.json")))
+
+
+def _recost(lines, product_id, new_ppu, supplier=None):
+    """(old, new, qty_base, old unit prices) over the lines of product_id (optionally only those sourced from supplier)."""
+    old = new = qty = 0.0
+    prices = set()
+    for ln in lines:
+        if ln.get("product_id") != product_id:
+            continue
+        if supplier and str(ln.get("supplier") or "").lower() != supplier.lower():
+            continue
+        need = float(ln.get("actual_needed_base") or 0)
+        old += float(ln.get("line_cost") or 0)
+        new += need * new_ppu
+        qty += need
+        prices.add(ln.get("price_per_base_unit"))
+    return old, new, qty, sorted(p for p in prices if p is not None)
+
+
+def requote_totals(cost_total, pricing):
+    q = payload_math.q
+    net = q(cost_total) * (Decimal("1") + q(pricing.get("markup_pct") or 0) / Decimal("100"))
+    net = net - net * (q(pricing.get("discount_pct") or 0) / Decimal("100"))
+    gross = net + net * q(pricing.get("vat_rate") or 0)
+    step = q(pricing.get("round_to") or 0.5)
+    return float(payload_math.round_to_step(net, step)), float(payload_math.round_to_step(gross, step))
+
+
+def impact(idx, product_id, new_ppu, supplier=None):
+    """Cost and margin deltas of every recipe/proposal using product_id if its unit price became new_ppu."""
+    t0 = time.perf_counter()
+    links = idx["products"].get(product_id, {"recipes": [], "proposals": []})
+    recipes = []
+    for rid in links["recipes"]:
+        r = idx["recipes"][rid]
+        old, new, qty, prices = _recost(r["lines"], product_id, new_ppu, supplier)
+        if not qty:
+            continue
+        delta = new - old
+        total = float(r.get("total_cost") or 0)
+        recipes.append({
+            "recipe_id": rid,
+            "qty_base": round(qty, 6),
+            "old_price_per_base_unit": prices,
+            "line_cost_old": round(old, 4),
+            "line_cost_new": round(new, 4),
+            "total_cost_old": round(total, 4),
+            "total_cost_new": round(total + delta, 4),
+            "cost_delta": round(delta, 4),
+            "cost_delta_pct": round(delta / total * 100.0, 4) if total else None,
+            "per_portion_delta": round(delta * float(r.get("per_portion") or 0) / total, 6) if total else None,
+            "costed_at": r.get("costed_at"),
+            "proposals": r.get("proposals", []),
+        })
+    proposals = []
+    for key in links["proposals"]:
+        pr = idx["proposals"][key]
+        old, new, qty, prices = _recost(pr["lines"], product_id, new_ppu, supplier)
+        if not qty:
+            continue
+        delta = new - old
+        total = float(pr.get("total_cost") or 0)
+        row = {
+            "key": key,
+            "proposal_id": pr.get("proposal_id"),
+            "recipes": pr.get("recipes", []),
+            "qty_base": round(qty, 6),
+            "cost_total_old": round(total, 4),
+            "cost_total_new": round(total + delta, 4),
+            "cost_delta": round(delta, 4),
+            "net_selling": None,
+            "margin_old": None,
+            "margin_new": None,
+            "margin_delta": None,
+        }
+        pricing = pr.get("pricing")
+        if pricing and pricing.get("net_selling") is not None:
+            # the filed price is fixed; a cost move lands on the margin
+            net = float(pricing["net_selling"])
+            row.update({
+                "net_selling": net,
+                "margin_old": round(net - total, 4),
+                "margin_new": round(net - total - delta, 4),
+                "margin_delta": round(-delta, 4),
+                "margin_pct_old": round((net - total) / net * 100.0, 4) if net else None,
+                "margin_pct_new": round((net - total - delta) / net * 100.0, 4) if net else None,
+            })
+            row["requote_net_selling"], row["requote_gross_total"] = requote_totals(total + delta, pricing)
+        proposals.append(row)
+    return {
+        "product_id": product_id,
+        "new_price_per_base_unit": new_ppu,
+        "supplier": supplier,
+        "recipes": recipes,
+        "proposals": proposals,
+        "totals": {
+            "recipes": len(recipes),
+            "proposals": len(proposals),
+            "recipe_cost_delta": round(sum(x["cost_delta"] for x in recipes), 4),
+            "proposal_cost_delta": round(sum(x["cost_delta"] for x in proposals), 4),
+            "proposal_margin_delta": round(sum(x["margin_delta"] for x in proposals if x["margin_delta"] is not None), 4),
+        },
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Reverse index product -> recipes -> filed proposals, and price-move impact")
+    p.add_argument("--index", default=str(INDEX_PATH))
+    p.add_argument("--record-costs", default=None, help="cost_breakdown.json or recipes_cost_breakdown.json to link")
+    p.add_argument("--record-filed", default=None, help="filed proposal folder (proposal_payload*.json + cost_breakdown*.json)")
+    p.add_argument("--rebuild-proposals", default=None, help="proposals root: re-derive all proposal links from the library")
+    p.add_argument("--product", default=None)
+    p.add_argument("--new-price", type=float, default=None, help="new price_per_base_unit for --product")
+    p.add_argument("--supplier", default=None, help="only lines currently sourced from this supplier")
+    args = p.parse_args(argv)
+
+    idx = load_index(args.index)
+    changed = False
+    if args.record_costs:
+        costs = load_json(Path(args.record_costs), [])
+        record_costs(idx, costs if isinstance(costs, list) else [costs], source=args.record_costs)
+        changed = True
+    if args.record_filed:
+        record_filed_dir(idx, args.record_filed)
+        changed = True
+    if args.rebuild_proposals:
+        rebuild_proposals(idx, args.rebuild_proposals)
+        changed = True
+    if changed:
+        save_index(idx, args.index)
+    if args.product:
+        if args.new_price is None:
+            raise RuntimeError("--product requires --new-price")
+        print(json.dumps(impact(idx, args.product, args.new_price, args.supplier), ensure_ascii=False, indent=2))
+        return
+    print(json.dumps({"products": len(idx["products"]), "recipes": len(idx["recipes"]), "proposals": len(idx["proposals"])}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
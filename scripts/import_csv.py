@@ -57,14 +57,14 @@ def infer_pack_from_name(name: str, assume_per_kg: bool):
     return 1.0, "", "RULE_NO_PACK"
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Import supplier CSV -> RawOffer[]")
     p.add_argument("--input", required=True)
     p.add_argument("--supplier-profile", required=True)
     p.add_argument("--captured-at", default=None)
     p.add_argument("--out", required=True)
     p.add_argument("--batch-out", required=True)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     profile = json.loads(Path(args.supplier_profile).read_text(encoding="utf-8"))
     cmap = profile.get("column_map", {})
@@ -21,7 +21,7 @@ def to_float(v, default=None):
         return default
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="OCR import stub (provider-agnostic deterministic interface)")
     p.add_argument("--input", required=True, help="OCR structured rows json (stub input)")
     p.add_argument("--supplier-profile", required=True)
@@ -30,7 +30,7 @@ def main():
     p.add_argument("--batch-out", required=True)
     p.add_argument("--needs-review", required=False, default=None)
     p.add_argument("--issues-out", required=False, default=None)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     profile = json.loads(Path(args.supplier_profile).read_text(encoding="utf-8"))
     defaults = profile.get("defaults", {})
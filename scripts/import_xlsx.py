@@ -50,15 +50,18 @@ def col_to_idx(cell_ref: str):
     return n - 1
 
 
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
 def parse_shared_strings(z):
     if "xl/sharedStrings.xml" not in z.namelist():
         return []
-    root = ET.fromstring(z.read("xl/sharedStrings.xml"))
-    ns = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
     out = []
-    for si in root.findall("x:si", ns):
-        parts = [t.text or "" for t in si.findall(".//x:t", ns)]
-        out.append("".join(parts))
+    with z.open("xl/sharedStrings.xml") as f:
+        for _, el in ET.iterparse(f, events=("end",)):
+            if el.tag == NS_MAIN + "si":
+                out.append("".join(t.text or "" for t in el.iter(NS_MAIN + "t")))
+                el.clear()
     return out
 
 
@@ -85,37 +88,78 @@ def get_sheet_path(z, sheet_name=None):
     raise RuntimeError("XLSX relationship for sheet not found")
 
 
-def parse_sheet_rows(z, sheet_path, shared_strings):
-    root = ET.fromstring(z.read(sheet_path))
-    ns = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
-    rows = []
-    for r in root.findall(".//x:sheetData/x:row", ns):
-        vals = {}
-        for c in r.findall("x:c", ns):
-            ref = c.get("r")
-            idx = col_to_idx(ref)
-            t = c.get("t")
-            v = c.find("x:v", ns)
-            if t == "inlineStr":
-                it = c.find("x:is/x:t", ns)
-                val = (it.text if it is not None else "") or ""
-            elif v is None:
-                val = ""
+def _cell_value(c, shared_strings):
+    t = c.get("t")
+    if t == "inlineStr":
+        it = c.find(f"{NS_MAIN}is/{NS_MAIN}t")
+        return (it.text if it is not None else "") or ""
+    v = c.find(NS_MAIN + "v")
+    if v is None:
+        return ""
+    raw = v.text or ""
+    if t == "s":
+        return shared_strings[int(raw)] if raw.isdigit() and int(raw) < len(shared_strings) else ""
+    return raw
+
+
+def iter_sheet_rows(z, sheet_path, shared_strings, skip=0, limit=None):
+    """Stream non-empty sheet rows as value lists; skips the first `skip` rows and stops after `limit` yielded rows.
+
+    Parsed <row> elements are dropped as soon as they are yielded, so memory stays flat on large catalogs.
+    """
+    seen = 0
+    emitted = 0
+    if limit is not None and limit <= 0:
+        return
+    with z.open(sheet_path) as f:
+        sheet_data = None
+        for event, el in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if el.tag == NS_MAIN + "sheetData":
+                    sheet_data = el
+                continue
+            if el.tag != NS_MAIN + "row":
+                continue
+            vals = {}
+            for c in el.findall(NS_MAIN + "c"):
+                vals[col_to_idx(c.get("r"))] = _cell_value(c, shared_strings)
+            if sheet_data is not None:
+                sheet_data.clear()
             else:
-                raw = v.text or ""
-                if t == "s":
-                    val = shared_strings[int(raw)] if raw.isdigit() and int(raw) < len(shared_strings) else ""
-                else:
-                    val = raw
-            vals[idx] = val
-        if vals:
+                el.clear()
+            if not vals:
+                continue
+            seen += 1
+            if seen <= skip:
+                continue
             max_idx = max(vals.keys())
-            row_vals = [vals.get(i, "") for i in range(max_idx + 1)]
-            rows.append(row_vals)
-    return rows
+            yield [vals.get(i, "") for i in range(max_idx + 1)]
+            emitted += 1
+            if limit is not None and emitted >= limit:
+                return
 
 
-def main():
+def parse_sheet_rows(z, sheet_path, shared_strings):
+    return list(iter_sheet_rows(z, sheet_path, shared_strings))
+
+
+def iter_xlsx_rows(path, sheet_name=None, skip=0, limit=None):
+    """Open the workbook and stream rows of one sheet; the archive stays open only while the generator runs."""
+    with zipfile.ZipFile(path, "r") as z:
+        shared = parse_shared_strings(z)
+        sheet_path = get_sheet_path(z, sheet_name)
+        yield from iter_sheet_rows(z, sheet_path, shared, skip=skip, limit=limit)
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def main(argv=None):
     p = argparse.ArgumentParser(description="Import supplier XLSX -> RawOffer[]")
     p.add_argument("--input", required=True)
     p.add_argument("--supplier-profile", required=True)
@@ -124,7 +168,9 @@ def main():
     p.add_argument("--batch-out", required=True)
     p.add_argument("--needs-review", required=False, default=None)
     p.add_argument("--issues-out", required=False, default=None)
-    args = p.parse_args()
+    p.add_argument("--max-rows", type=int, default=None, help="stop after this many data rows")
+    p.add_argument("--count-rows", action="store_true", help="read past a stop rule so stats.rows_in counts every data row")
+    args = p.parse_args(argv)
 
     profile = json.loads(Path(args.supplier_profile).read_text(encoding="utf-8"))
     xcfg = profile.get("xlsx", {})
@@ -137,19 +183,19 @@ def main():
     valid_until = captured + timedelta(days=catalog_valid_days)
 
     inp = Path(args.input)
-    source_hash = hashlib.sha1(inp.read_bytes()).hexdigest()[:10]
-
-    with zipfile.ZipFile(inp, "r") as z:
-        shared = parse_shared_strings(z)
-        sheet_path = get_sheet_path(z, xcfg.get("sheet"))
-        rows_all = parse_sheet_rows(z, sheet_path, shared)
+    source_hash = file_sha1(inp)[:10]
 
     header_row = int(xcfg.get("header_row", 1))
-    if len(rows_all) < header_row:
+    # rows before header_row are skipped by the reader; --max-rows bounds data rows (header + N are parsed)
+    rows_iter = iter_xlsx_rows(inp, xcfg.get("sheet"), skip=header_row - 1, limit=None if args.max_rows is None else args.max_rows + 1)
+    header = next(rows_iter, None)
+    if header is None:
         raise RuntimeError("XLSX header_row out of range")
 
-    headers = [str(x).strip() if x is not None else "" for x in rows_all[header_row - 1]]
-    data_rows = rows_all[header_row:]
+    headers = [str(x).strip() if x is not None else "" for x in header]
+    # data rows read: with a stop rule this ends at stopped_at unless --count-rows reads the rest (schemas/import_batch.json)
+    rows_in = 0
+    stopped_at = None
 
     stop_rules = xcfg.get("stop_rules", {})
     stop_on_blank_name = bool(stop_rules.get("blank_product_name", False))
@@ -164,7 +210,8 @@ def main():
     if missing_cols:
         add_issue(issues, "BLOCK", "XLSX-MISSING-COLUMNS", "Required XLSX columns missing", missing_columns=missing_cols)
 
-    for i, row in enumerate(data_rows, start=1):
+    for i, row in enumerate(rows_iter, start=1):
+        rows_in = i
         if all(v is None or str(v).strip() == "" for v in row):
             continue
         r = {headers[j]: row[j] for j in range(min(len(headers), len(row)))}
@@ -178,6 +225,10 @@ def main():
         price = r.get(cmap.get("price", "price"), None)
 
         if stop_on_blank_name and (name is None or str(name).strip() == ""):
+            # the rest of the sheet is only read when the caller asked for the full row count
+            stopped_at = i
+            if args.count_rows:
+                rows_in += sum(1 for _ in rows_iter)
             break
 
         offer_id = f"OFF-{profile.get('supplier_code','SUP')}-{captured.strftime('%Y%m%d')}-{i:04d}"
@@ -248,6 +299,7 @@ def main():
             "in_stock": to_bool(r.get(cmap.get("in_stock", "in_stock"), True)),
             "notes": "",
         })
+    rows_iter.close()
 
     Path(args.out).parent.mkdir(parents=True, exist_ok=True)
     Path(args.out).write_text(json.dumps(out_rows, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -262,11 +314,13 @@ def main():
         "catalog_valid_days": catalog_valid_days,
         "files": [{"path": str(args.input), "kind": "xlsx"}],
         "stats": {
-            "rows_in": len(data_rows),
+            "rows_in": rows_in,
             "rows_out": len(out_rows),
             "rows_needs_review": len(needs_review),
         },
     }
+    if stopped_at is not None:
+        batch["stats"]["stopped_at_row"] = stopped_at
     Path(args.batch_out).write_text(json.dumps(batch, ensure_ascii=False, indent=2), encoding="utf-8")
 
     if args.needs_review:
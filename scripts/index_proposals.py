@@ -71,13 +71,13 @@ def load_existing_jsonl(path: Path):
     return out
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Build/update proposal library index from manifests")
     p.add_argument("--proposals-root", default="skills/evochia-ops/proposals")
     p.add_argument("--index-dir", default="skills/evochia-ops/proposals/index")
     p.add_argument("--out-jsonl", default=None)
     p.add_argument("--out-json", default=None)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     proposals_root = Path(args.proposals_root)
     index_dir = Path(args.index_dir)
@@ -113,7 +113,7 @@ def select_template(service_word_val, event_style, hint):
     return "A", "RULE_A_DEFAULT"
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Offer intake wizard (deterministic, Telegram-first)")
     p.add_argument("--text", required=True)
     p.add_argument("--defaults", required=True)
@@ -122,7 +122,7 @@ def main():
     p.add_argument("--transcript-out", required=True)
     p.add_argument("--template-selection-out", required=True)
     p.add_argument("--channel", default="telegram")
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     text = str(args.text)
     defaults = json.loads(Path(args.defaults).read_text(encoding="utf-8"))
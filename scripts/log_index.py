@@ -0,0 +1,265 @@
+import argparse
+import bisect
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+INDEX_ROOT = ROOT / "state" / "log_index"
+
+# the snapshot is rewritten once this many lines have piled up in the tail; lookups read at most that much raw log
+COMPACT_EVERY = 256
+CHECKPOINT_BYTES = 256
+FORMAT = 2
+
+# one snapshot per log per process; load() re-checks it against the log on every call
+_MEMO = {}
+# raw log handles lookups read records through; load() drops a log's handle so a rewritten file is reopened
+_FILES = {}
+
+
+def norm(s) -> str:
+    return " ".join(str(s or "").strip().lower().split())
+
+
+def _sku_keys(rec):
+    return [rec["sku_key"]] if rec.get("sku_key") else []
+
+
+def _supplier_sku_keys(rec):
+    if rec.get("supplier_sku"):
+        return [str(rec["supplier_sku"])]
+    sku_key = str(rec.get("sku_key") or "")
+    return [sku_key.split("::", 1)[1]] if "::" in sku_key else []
+
+
+def _product_keys(rec):
+    # conflict entries carry both sides instead of product_id
+    return list(dict.fromkeys(x for x in (rec.get("product_id"), rec.get("new_product_id"), rec.get("existing_product_id")) if x))
+
+
+def _field(name, fold=None):
+    return lambda rec: [fold(rec[name]) if fold else str(rec[name])] if rec.get(name) else []
+
+
+# log name -> raw log path and the secondary keys each record is filed under
+LOGS = {
+    "mapping_persist": {
+        "path": ROOT / "audit" / "mapping_persist_log.jsonl",
+        "keys": {"sku": _sku_keys, "supplier_sku": _supplier_sku_keys, "product_id": _product_keys,
+                 "offer_id": _field("offer_id"), "supplier_id": _field("supplier_id")},
+    },
+    "source_registry": {
+        "path": ROOT / "audit" / "source_registry_log.jsonl",
+        "keys": {"source_key": _field("key"), "run_id": _field("run_id")},
+    },
+    "catalog_aliases": {
+        "path": ROOT / "mappings" / "catalog_aliases.jsonl",
+        "keys": {"supplier_sku": _supplier_sku_keys, "product_id": _product_keys, "raw_desc": _field("raw_desc", norm),
+                 "supplier_id": _field("supplier_id")},
+    },
+}
+
+
+def _spec(name):
+    if name not in LOGS:
+        raise RuntimeError(f"unknown log '{name}' (expected one of {', '.join(LOGS)})")
+    return LOGS[name]
+
+
+def _checkpoint(f, offset):
+    """Hash of the bytes just before `offset`: a rewritten or truncated log no longer matches its snapshot."""
+    start = max(0, offset - CHECKPOINT_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+def _empty(name, path):
+    return {"format": FORMAT, "log": name, "path": str(path), "offset": 0, "checkpoint": None, "lines": 0, "bad_lines": 0,
+            "records": [], "index": {field: {"keys": [], "postings": []} for field in _spec(name)["keys"]}}
+
+
+def _merge(idx, fresh):
+    """Fold {key: [record ids]} into the sorted key array; a big batch (first read) re-sorts once instead of inserting."""
+    if len(fresh) > 64:
+        merged = dict(zip(idx["keys"], idx["postings"]))
+        for k, rids in fresh.items():
+            merged.setdefault(k, []).extend(rids)
+        idx["keys"] = sorted(merged)
+        idx["postings"] = [merged[k] for k in idx["keys"]]
+        return
+    for k, rids in fresh.items():
+        i = bisect.bisect_left(idx["keys"], k)
+        if i < len(idx["keys"]) and idx["keys"][i] == k:
+            idx["postings"][i].extend(rids)
+        else:
+            idx["keys"].insert(i, k)
+            idx["postings"].insert(i, rids)
+
+
+def _scan(snap, f, offset):
+    """File every complete line after `offset` into the snapshot; returns lines read. A torn last line waits for the next call.
+
+    A record is kept as [byte offset, line number] into the raw log, not copied: lookups read back only the lines they hit.
+    """
+    keyfns = _spec(snap["log"])["keys"]
+    fresh = {field: {} for field in keyfns}
+    f.seek(offset)
+    n = 0
+    for raw in f:
+        if not raw.endswith(b"\n"):
+            break
+        start = offset
+        offset += len(raw)
+        snap["lines"] += 1
+        n += 1
+        if not raw.strip():
+            continue
+        try:
+            rec = json.loads(raw)
+        except ValueError:
+            snap["bad_lines"] += 1
+            continue
+        if not isinstance(rec, dict):
+            snap["bad_lines"] += 1
+            continue
+        rid = len(snap["records"])
+        snap["records"].append([start, snap["lines"]])
+        for field, fn in keyfns.items():
+            for k in dict.fromkeys(fn(rec)):
+                fresh[field].setdefault(k, []).append(rid)
+    for field, keys in fresh.items():
+        _merge(snap["index"][field], keys)
+    snap["offset"] = offset
+    return n
+
+
+def _index_path(name, path, index_dir):
+    key = hashlib.sha1(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:12]
+    return Path(index_dir or INDEX_ROOT) / f"{name}.{key}.json"
+
+
+def save(snap, index_path):
+    p = Path(index_path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    snap["compacted_at"] = datetime.now(timezone.utc).isoformat()
+    tmp = p.with_name(f"{p.stem}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(snap, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def load(name, path=None, index_dir=None, compact=False, stats=None):
+    """Snapshot of a log brought up to date with its tail.
+
+    The raw log stays the source of truth: the snapshot remembers how far it read (offset) and a checkpoint of the
+    bytes before it. A log that shrank or changed underneath is re-read from the start; otherwise only the appended
+    tail is parsed, and the snapshot is rewritten once the tail reaches COMPACT_EVERY lines (or on `compact`).
+    `stats`, when given, receives {"rebuilt", "tail_lines", "compacted", "path"}.
+    """
+    path = Path(path or _spec(name)["path"])
+    index_path = _index_path(name, path, index_dir)
+    snap = _MEMO.get(index_path)
+    if snap is None:
+        try:
+            snap = json.loads(index_path.read_text(encoding="utf-8")) if index_path.exists() else None
+        except ValueError:
+            snap = None
+    if not isinstance(snap, dict) or snap.get("format") != FORMAT:
+        snap = None
+
+    rebuilt, tail = False, 0
+    size = path.stat().st_size if path.exists() else 0
+    stale = _FILES.pop(str(path), None)
+    if stale is not None:
+        stale.close()
+    with (path.open("rb") if path.exists() else open(os.devnull, "rb")) as f:
+        if snap is not None and (size < snap["offset"] or (snap["offset"] and _checkpoint(f, snap["offset"]) != snap["checkpoint"])):
+            snap = None
+        if snap is None:
+            snap, rebuilt = _empty(name, path), True
+        pending = snap.pop("_pending", 0)
+        if size > snap["offset"]:
+            tail = _scan(snap, f, snap["offset"])
+        snap["checkpoint"] = _checkpoint(f, snap["offset"]) if snap["offset"] else None
+    pending += tail
+    compacted = bool(rebuilt or compact or pending >= COMPACT_EVERY)
+    if compacted:
+        save(snap, index_path)
+    elif pending:
+        snap["_pending"] = pending
+    _MEMO[index_path] = snap
+    if stats is not None:
+        stats.update({"rebuilt": rebuilt, "tail_lines": tail, "compacted": compacted, "path": str(index_path)})
+    return snap
+
+
+def read(snap, rids):
+    """Records `rids` (record ids, as held in the postings) read back from the raw log, each with its `_line`."""
+    if not rids:
+        return []
+    f = _FILES.get(snap["path"])
+    if f is None:
+        f = _FILES[snap["path"]] = open(snap["path"], "rb")
+    out = []
+    for r in rids:
+        offset, line = snap["records"][r]
+        f.seek(offset)
+        out.append({**json.loads(f.readline()), "_line": line})
+    return out
+
+
+def lookup(snap, field, key):
+    """Records filed under `key` in log order (oldest first): one bisect over the sorted keys."""
+    idx = snap["index"].get(field)
+    if idx is None:
+        raise RuntimeError(f"log '{snap['log']}' has no '{field}' index (expected one of {', '.join(snap['index'])})")
+    i = bisect.bisect_left(idx["keys"], key)
+    if i == len(idx["keys"]) or idx["keys"][i] != key:
+        return []
+    return read(snap, idx["postings"][i])
+
+
+def prefix(snap, field, start):
+    """Records for every key starting with `start` (e.g. every sku of one supplier: 'Alios::'), grouped by key."""
+    idx = snap["index"][field]
+    i = bisect.bisect_left(idx["keys"], start)
+    out = {}
+    while i < len(idx["keys"]) and idx["keys"][i].startswith(start):
+        out[idx["keys"][i]] = read(snap, idx["postings"][i])
+        i += 1
+    return out
+
+
+def format_decision(rec):
+    """'2026-02-12 REVIEW-SKU-MAP-PERSISTED PROD-X' — one prior decision as a CSV / reply cell."""
+    pid = rec.get("product_id") or rec.get("new_product_id") or rec.get("diff_summary") or ""
+    label = rec.get("code") or rec.get("action") or ("CATALOG-ALIAS" if "raw_desc" in rec else "")
+    return " ".join(x for x in (str(rec.get("ts") or "")[:10], label, pid) if x)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Compacted, key-indexed view of the append-only audit/alias logs")
+    p.add_argument("--log", choices=sorted(LOGS), required=True)
+    p.add_argument("--path", default=None, help="raw log (default: the log's usual location)")
+    p.add_argument("--index-dir", default=str(INDEX_ROOT))
+    p.add_argument("--field", default=None, help="secondary key to look up (e.g. sku, product_id, source_key)")
+    p.add_argument("--key", default=None)
+    p.add_argument("--prefix", default=None)
+    p.add_argument("--compact", action="store_true", help="rewrite the snapshot now")
+    args = p.parse_args(argv)
+
+    stats = {}
+    snap = load(args.log, args.path, args.index_dir, compact=args.compact, stats=stats)
+    out = {**stats, "records": len(snap["records"]), "lines": snap["lines"], "bad_lines": snap["bad_lines"],
+           "keys": {f: len(v["keys"]) for f, v in snap["index"].items()}}
+    if args.field and args.key is not None:
+        out["matches"] = lookup(snap, args.field, args.key)
+    elif args.field and args.prefix is not None:
+        out["matches"] = prefix(snap, args.field, args.prefix)
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
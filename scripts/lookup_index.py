@@ -0,0 +1,232 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+INDEX_ROOT = ROOT / "state" / "lookup_index"
+CATALOG_PATH = ROOT / "data" / "catalog.json"
+SKU_MAP_DIR = ROOT / "mappings" / "supplier_sku_map"
+RECIPE_ALIASES_PATH = ROOT / "mappings" / "catalog_aliases.json"
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import alias_match  # noqa: E402
+
+# the compiled shape follows this code: a change here or in alias_match invalidates every artifact
+CODE_FILES = ("lookup_index.py", "alias_match.py")
+FORMAT = 1
+
+# one lookup per source set per process; load() re-validates it against the sources on every call
+_MEMO = {}
+
+
+def norm(s: str) -> str:
+    return " ".join((s or "").strip().lower().split())
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def canonical_category(v: str):
+    s = norm(v)
+    if s in {"produce", "λαχανικά", "οπωροπωλείο", "φρούτα", "vegetables", "fruit"}:
+        return "produce"
+    if s in {"seafood", "ψάρια", "ιχθυηρά", "fish", "fish/seafood"}:
+        return "seafood"
+    if s in {"frozen", "κατεψυγμένα", "frozen products"}:
+        return "frozen"
+    if s in {"dry", "παντοπωλείο", "ξηρά", "dry products"}:
+        return "dry"
+    if s in {"sauces", "σάλτσες"}:
+        return "sauces"
+    if s in {"condiments", "καρυκεύματα", "μπαχαρικά"}:
+        return "condiments"
+    return "unknown"
+
+
+def sku_map_files(sku_map_dir):
+    d = Path(sku_map_dir)
+    return sorted(d.glob("*.json")) if d.exists() else []
+
+
+def merge_sku_maps(files):
+    """supplier::sku -> product_id over every per-supplier map; unreadable files are skipped, later files win."""
+    merged = {}
+    for f in files:
+        try:
+            obj = json.loads(Path(f).read_text(encoding="utf-8"))
+            if isinstance(obj, dict):
+                merged.update(obj)
+        except Exception:
+            continue
+    return merged
+
+
+def build_lookup(catalog, sku_map=None, recipe_aliases=None):
+    """Every lookup the mapping stages need, from the catalog, the merged SKU map and the recipe alias file.
+
+    alias_index keeps one entry per (item, alias) hit, so an alias listed twice on one item still reads as ambiguous,
+    exactly as map_offers always resolved it.
+    """
+    items = catalog.get("items", []) if isinstance(catalog, dict) else catalog or []
+    alias_index, item_by_pid, categories = {}, {}, {}
+    for item in items:
+        pid = item.get("product_id")
+        if pid:
+            item_by_pid[pid] = item
+            if "category" in item:
+                categories[pid] = canonical_category(item["category"])
+        for a in set(item.get("aliases", []) + [item.get("canonical_name", "")]):
+            k = norm(a)
+            if not k:
+                continue
+            alias_index.setdefault(k, []).append(pid)
+    return {
+        "alias_index": alias_index,
+        "item_by_pid": item_by_pid,
+        "categories": categories,
+        "sku_map": dict(sku_map or {}),
+        "recipe_aliases": dict(recipe_aliases) if isinstance(recipe_aliases, dict) else {},
+        "fuzzy": alias_match.build_index({"items": items}),
+    }
+
+
+def _sources(catalog, sku_map_dir, recipe_aliases):
+    """role -> path for every file the artifact is compiled from (SKU maps as one role per file)."""
+    out = {"catalog": Path(catalog), "recipe_aliases": Path(recipe_aliases)}
+    for f in sku_map_files(sku_map_dir):
+        out[f"sku_map/{f.name}"] = f
+    for f in CODE_FILES:
+        out[f"code/{f}"] = SCRIPTS / f
+    return out
+
+
+def _sha1(path: Path):
+    return hashlib.sha1(path.read_bytes()).hexdigest() if path.exists() else None
+
+
+def _stamp(path: Path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _index_path(catalog, sku_map_dir, recipe_aliases, index_dir):
+    key = hashlib.sha1("\n".join(str(Path(p).resolve()) for p in (catalog, sku_map_dir, recipe_aliases)).encode("utf-8")).hexdigest()[:16]
+    return Path(index_dir or INDEX_ROOT) / f"{key}.json"
+
+
+def _check(manifest, sources):
+    """(stale reason or None, manifest with refreshed stamps). A moved mtime costs one hash; only a new hash is stale."""
+    if sorted(manifest) != sorted(sources):
+        return "source set changed", manifest
+    fresh, touched = {}, False
+    for role, path in sources.items():
+        rec = manifest[role]
+        stamp = _stamp(path)
+        if stamp == rec.get("stamp"):
+            fresh[role] = rec
+            continue
+        digest = _sha1(path)
+        if digest != rec.get("sha1"):
+            return f"{role} changed", manifest
+        fresh[role] = {"stamp": stamp, "sha1": digest}
+        touched = True
+    return None, fresh if touched else manifest
+
+
+def _save(path: Path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load(catalog=None, sku_map_dir=None, recipe_aliases=None, index_dir=None, rebuild=False, stats=None):
+    """Compiled lookup for these sources: the persisted artifact in one read when nothing changed, else rebuilt and saved.
+
+    `stats`, when given, receives {"rebuilt", "reason", "path"}.
+    """
+    catalog = Path(catalog or CATALOG_PATH)
+    sku_map_dir = Path(sku_map_dir or SKU_MAP_DIR)
+    recipe_aliases = Path(recipe_aliases or RECIPE_ALIASES_PATH)
+    path = _index_path(catalog, sku_map_dir, recipe_aliases, index_dir)
+    sources = _sources(catalog, sku_map_dir, recipe_aliases)
+
+    art = None if rebuild else _MEMO.get(path)
+    if art is None and not rebuild:
+        try:
+            art = load_json(path, None)
+        except ValueError:
+            art = None
+    reason = "forced" if rebuild else "missing"
+    if isinstance(art, dict) and art.get("format") == FORMAT:
+        reason, manifest = _check(art.get("sources", {}), sources)
+        if reason is None:
+            if manifest is not art["sources"]:
+                art["sources"] = manifest
+                _save(path, art)
+            _MEMO[path] = art
+            if stats is not None:
+                stats.update({"rebuilt": False, "reason": None, "path": str(path)})
+            return art["lookup"]
+
+    manifest = {role: {"stamp": _stamp(p), "sha1": _sha1(p)} for role, p in sources.items()}
+    lookup = build_lookup(
+        load_json(catalog, {"items": []}),
+        merge_sku_maps(sku_map_files(sku_map_dir)),
+        load_json(recipe_aliases, {}),
+    )
+    # round-trip so a fresh build and a loaded artifact are the same plain-json shape
+    lookup = json.loads(json.dumps(lookup, ensure_ascii=False))
+    art = {"format": FORMAT, "built_at": datetime.now(timezone.utc).isoformat(), "sources": manifest, "lookup": lookup}
+    _save(path, art)
+    _MEMO[path] = art
+    if stats is not None:
+        stats.update({"rebuilt": True, "reason": reason, "path": str(path)})
+    return lookup
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Compiled catalog / SKU map / recipe alias lookup, rebuilt only when a source changes")
+    p.add_argument("--catalog", default=str(CATALOG_PATH))
+    p.add_argument("--sku-map-dir", default=str(SKU_MAP_DIR))
+    p.add_argument("--recipe-aliases", default=str(RECIPE_ALIASES_PATH))
+    p.add_argument("--index-dir", default=str(INDEX_ROOT))
+    p.add_argument("--rebuild", action="store_true")
+    p.add_argument("--verify", action="store_true", help="also compile from the sources and compare with the artifact")
+    args = p.parse_args(argv)
+
+    stats = {}
+    lookup = load(args.catalog, args.sku_map_dir, args.recipe_aliases, args.index_dir, rebuild=args.rebuild, stats=stats)
+    out = {
+        **stats,
+        "aliases": len(lookup["alias_index"]),
+        "products": len(lookup["item_by_pid"]),
+        "sku_map": len(lookup["sku_map"]),
+        "recipe_aliases": len(lookup["recipe_aliases"]),
+        "fuzzy_entries": len(lookup["fuzzy"]["entries"]),
+    }
+    if args.verify:
+        fresh = build_lookup(
+            load_json(Path(args.catalog), {"items": []}),
+            merge_sku_maps(sku_map_files(args.sku_map_dir)),
+            load_json(Path(args.recipe_aliases), {}),
+        )
+        out["verified"] = json.loads(json.dumps(fresh, ensure_ascii=False)) == lookup
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
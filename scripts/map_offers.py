@@ -3,6 +3,9 @@ import json
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+import alias_match
+import lookup_index
+
 
 def norm(s: str) -> str:
     return " ".join((s or "").strip().lower().split())
@@ -27,63 +30,21 @@ def parse_iso(dt: str):
 
 
 def load_supplier_sku_map(root: Path):
-    mdir = root / "mappings" / "supplier_sku_map"
-    merged = {}
-    if not mdir.exists():
-        return merged
-    for f in mdir.glob("*.json"):
-        try:
-            obj = json.loads(f.read_text(encoding="utf-8"))
-            if isinstance(obj, dict):
-                merged.update(obj)
-        except Exception:
-            continue
-    return merged
-
-
-def canonical_category(v: str):
-    s = norm(v)
-    if s in {"produce", "λαχανικά", "οπωροπωλείο", "φρούτα", "vegetables", "fruit"}:
-        return "produce"
-    if s in {"seafood", "ψάρια", "ιχθυηρά", "fish", "fish/seafood"}:
-        return "seafood"
-    if s in {"frozen", "κατεψυγμένα", "frozen products"}:
-        return "frozen"
-    if s in {"dry", "παντοπωλείο", "ξηρά", "dry products"}:
-        return "dry"
-    if s in {"sauces", "σάλτσες"}:
-        return "sauces"
-    if s in {"condiments", "καρυκεύματα", "μπαχαρικά"}:
-        return "condiments"
-    return "unknown"
-
-
-def main():
-    p = argparse.ArgumentParser(description="Manual-first mapping RawOffer -> PriceQuote with needs_review queue")
-    p.add_argument("--raw", required=True, help="raw offers json file")
-    p.add_argument("--catalog", required=True, help="catalog json file")
-    p.add_argument("--out", required=True, help="mapped quotes json file")
-    p.add_argument("--needs-review", required=True, help="needs review queue json file")
-    args = p.parse_args()
+    return lookup_index.merge_sku_maps(lookup_index.sku_map_files(root / "mappings" / "supplier_sku_map"))
 
-    raw_rows = load_json(Path(args.raw), [])
-    catalog = load_json(Path(args.catalog), {"items": []})
-    root = Path(__file__).resolve().parents[1]
-    sku_map = load_supplier_sku_map(root)
-    items = catalog.get("items", [])
-
-    alias_index = {}
-    item_by_pid = {}
-    for item in items:
-        pid = item.get("product_id")
-        if pid:
-            item_by_pid[pid] = item
-        aliases = set(item.get("aliases", []) + [item.get("canonical_name", "")])
-        for a in aliases:
-            k = norm(a)
-            if not k:
-                continue
-            alias_index.setdefault(k, []).append(pid)
+
+canonical_category = lookup_index.canonical_category
+
+
+def map_offers(raw_rows, catalog, sku_map, matcher=None, lookup=None):
+    """Exact alias / supplier::sku mapping; rows left for review carry up to 3 approximate-match suggestions.
+
+    `lookup` is a compiled lookup_index (catalog and sku_map are then ignored); without one it is built here.
+    """
+    lookup = lookup or lookup_index.build_lookup(catalog, sku_map)
+    alias_index = lookup["alias_index"]
+    sku_map = lookup["sku_map"]
+    matcher = matcher or lookup["fuzzy"]
 
     mapped = []
     needs_review = []
@@ -116,9 +77,9 @@ def main():
         if valid_until is None:
             valid_until = captured + timedelta(days=14)
 
-        item = item_by_pid.get(product_id) if product_id else None
-        cat_raw = (item or {}).get("category", r.get("category", ""))
-        cat_canonical = canonical_category(cat_raw)
+        cat_canonical = lookup["categories"].get(product_id) if product_id else None
+        if cat_canonical is None:
+            cat_canonical = canonical_category(r.get("category", ""))
 
         row = {
             "offer_id": r.get("offer_id"),
@@ -142,10 +103,14 @@ def main():
             "max_age_days": r.get("max_age_days", 14),
             "in_stock": bool(r.get("in_stock", True))
         }
+        if r.get("anomaly_flags"):
+            row["anomaly_flags"] = list(r["anomaly_flags"])
         mapped.append(row)
 
         if confidence != "high":
-            suggestions = candidate_pids[:3] if candidate_pids else []
+            scored = alias_match.suggest(matcher, name, r.get("pack_unit"))
+            # ambiguous exact hits first, then approximate matches by score
+            suggestions = list(dict.fromkeys(candidate_pids + [x["product_id"] for x in scored]))[:3]
             needs_review.append({
                 "offer_id": r.get("offer_id"),
                 "product_name": name,
@@ -153,9 +118,27 @@ def main():
                 "supplier_sku": r.get("supplier_sku", ""),
                 "reason": confidence,
                 "suggestions": suggestions,
+                "suggestion_scores": scored,
                 "action": "BLOCK_UNTIL_MAPPED"
             })
 
+    return mapped, needs_review
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Manual-first mapping RawOffer -> PriceQuote with needs_review queue")
+    p.add_argument("--raw", required=True, help="raw offers json file")
+    p.add_argument("--catalog", required=True, help="catalog json file")
+    p.add_argument("--out", required=True, help="mapped quotes json file")
+    p.add_argument("--needs-review", required=True, help="needs review queue json file")
+    p.add_argument("--sku-map-dir", default=str(lookup_index.SKU_MAP_DIR), help="supplier SKU maps")
+    args = p.parse_args(argv)
+
+    raw_rows = load_json(Path(args.raw), [])
+    lookup = lookup_index.load(catalog=args.catalog, sku_map_dir=args.sku_map_dir)
+
+    mapped, needs_review = map_offers(raw_rows, None, None, lookup=lookup)
+
     save_json(Path(args.out), mapped)
     save_json(Path(args.needs_review), needs_review)
 
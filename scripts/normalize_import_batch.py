@@ -24,13 +24,13 @@ def to_base_size(pack_size, pack_unit):
     return s
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Normalize imported RawOffer[] -> PriceQuote[]")
     p.add_argument("--input", required=True)
     p.add_argument("--out", required=True)
     p.add_argument("--needs-review", required=False, default=None)
     p.add_argument("--issues-out", required=False, default=None)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     rows = json.loads(Path(args.input).read_text(encoding="utf-8"))
     out_rows = []
@@ -4,35 +4,47 @@ import json
 from pathlib import Path
 
 
-def main():
-    p = argparse.ArgumentParser(description="Normalize supplier price rows (v0 scaffold)")
-    p.add_argument("--input", required=True)
-    p.add_argument("--out", required=True)
-    args = p.parse_args()
-
-    src = Path(args.input)
-    out = Path(args.out)
-
+def load_rows(src: Path):
     if src.suffix.lower() == ".json":
         rows = json.loads(src.read_text(encoding="utf-8"))
-        if rows and isinstance(rows[0], dict):
-            headers = list(rows[0].keys())
-        else:
-            headers = []
-    else:
-        with src.open("r", encoding="utf-8-sig", newline="") as f:
-            r = csv.DictReader(f)
-            rows = list(r)
-            headers = r.fieldnames or []
+        return rows, headers_for(rows)
+    with src.open("r", encoding="utf-8-sig", newline="") as f:
+        r = csv.DictReader(f)
+        rows = list(r)
+        return rows, r.fieldnames or []
+
+
+def headers_for(rows):
+    # union in first-seen order: optional fields (e.g. anomaly_flags) appear on some rows only
+    headers = {}
+    for r in rows or []:
+        if not isinstance(r, dict):
+            break
+        headers.update(dict.fromkeys(r))
+    return list(headers)
 
+
+def normalize_prices(rows, out: Path, headers=None):
+    headers = headers_for(rows) if headers is None else headers
     out.parent.mkdir(parents=True, exist_ok=True)
     with out.open("w", encoding="utf-8-sig", newline="") as f:
         w = csv.DictWriter(f, fieldnames=headers)
         w.writeheader()
         for row in rows:
             w.writerow(row)
+    return len(rows)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Normalize supplier price rows (v0 scaffold)")
+    p.add_argument("--input", required=True)
+    p.add_argument("--out", required=True)
+    args = p.parse_args(argv)
+
+    rows, headers = load_rows(Path(args.input))
+    n = normalize_prices(rows, Path(args.out), headers)
 
-    print(f"normalized_rows={len(rows)}")
+    print(f"normalized_rows={n}")
 
 
 if __name__ == "__main__":
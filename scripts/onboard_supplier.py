@@ -89,7 +89,7 @@ def build_profile(supplier_id: str, display_name: str):
     }
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Generate deterministic supplier onboarding skeleton")
     p.add_argument("--supplier-id", required=True)
     p.add_argument("--display-name", required=False, default=None)
@@ -100,7 +100,7 @@ def main():
     p.add_argument("--run-tests", action="store_true", default=True)
     p.add_argument("--no-run-tests", dest="run_tests", action="store_false")
     p.add_argument("--summary-out", required=False, default=None)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     sid = args.supplier_id.strip().lower()
     dname = args.display_name or sid.replace("_", " ").title()
@@ -161,6 +161,7 @@ def main():
         "- Fill real anchors/table pattern from real supplier docs\n"
         "- Adjust column_map for actual headers\n"
         "- Extend unit_map if new units appear\n"
+        f"- After the first import: run_pipeline.py bootstrap-mapping --supplier-id {sid} (auto-maps confident rows, review gets the rest)\n"
     )
     rep_path = write_text_no_overwrite(fx_root / "ONBOARDING_REPORT.md", report)
     created.append(str(rep_path))
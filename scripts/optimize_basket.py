@@ -0,0 +1,432 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import optimize_sourcing  # noqa: E402
+
+# exact branch-and-bound is abandoned for the local search once it has visited this many nodes
+EXACT_NODE_LIMIT = 200000
+# baskets with more products that have a real choice go straight to the local search
+EXACT_MAX_PRODUCTS = 200
+LOCAL_SEARCH_MAX_ROUNDS = 50
+# supplier sets are enumerated for local-search starts up to this many suppliers, else greedily dropped
+SUBSET_MAX_SUPPLIERS = 10
+
+
+def load_json(path, default):
+    p = Path(path)
+    if not p.exists():
+        return default
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+def save_json(path, data):
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def add_issue(issues, severity, code, message, **extra):
+    row = {"severity": severity, "code": code, "message": message}
+    row.update(extra)
+    issues.append(row)
+
+
+def load_supplier_terms(suppliers_dir):
+    """Lowercased supplier_id / supplier_name / supplier_code -> ordering terms from suppliers/*.json.
+
+    Profiles opt in with {"ordering": {"delivery_fee", "min_order_value", "free_delivery_over"}}; missing
+    values mean no fee, no minimum.
+    """
+    terms = {}
+    for f in sorted(Path(suppliers_dir).glob("*.json")):
+        try:
+            prof = json.loads(f.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        o = prof.get("ordering") or {}
+        row = {
+            "supplier_id": prof.get("supplier_id") or f.stem,
+            "delivery_fee": float(o.get("delivery_fee", 0) or 0),
+            "min_order_value": float(o.get("min_order_value", 0) or 0),
+            "free_delivery_over": float(o["free_delivery_over"]) if o.get("free_delivery_over") not in (None, "") else None,
+        }
+        for k in (prof.get("supplier_id"), prof.get("supplier_name"), prof.get("supplier_code"), f.stem):
+            if k:
+                terms.setdefault(str(k).strip().lower(), row)
+    return terms
+
+
+def _terms_for(terms, supplier):
+    return terms.get(str(supplier or "").strip().lower()) or {
+        "supplier_id": supplier, "delivery_fee": 0.0, "min_order_value": 0.0, "free_delivery_over": None,
+    }
+
+
+def supplier_charge(t, subtotal):
+    """(delivery fee, min-order padding) for one supplier order; an order below the minimum is padded up to it."""
+    fee = t["delivery_fee"]
+    if t["free_delivery_over"] is not None and subtotal >= t["free_delivery_over"]:
+        fee = 0.0
+    return fee, max(0.0, t["min_order_value"] - subtotal)
+
+
+def build_options(decisions, offers, demand):
+    """product_id -> {supplier: (line spend, offer_id, plan)} over each decision's candidates (post BAN).
+
+    LOCK decisions keep only the locked offer. Products without a demand are left out of the basket.
+    """
+    by_id = {o.get("offer_id"): o for o in offers or []}
+    options = {}
+    locked = set()
+    for d in decisions:
+        pid = d.get("product_id")
+        need = demand.get(str(pid))
+        if need is None:
+            continue
+        if d.get("rule_applied") == "LOCK":
+            ids = [d.get("chosen_offer_id")]
+            locked.add(pid)
+        else:
+            ids = [c.get("offer_id") for c in d.get("candidates", []) or []]
+        rows_by_supplier = {}
+        for oid in ids:
+            row = by_id.get(oid)
+            if row is None:
+                row = next((c for c in d.get("candidates", []) or [] if c.get("offer_id") == oid), None)
+            if row is not None:
+                rows_by_supplier.setdefault(row.get("supplier"), []).append(row)
+        opts = {}
+        for sup, rows in rows_by_supplier.items():
+            plan = optimize_sourcing.demand_plan(rows, need[0], need[1])
+            if plan is not None:
+                opts[sup] = (plan["spend"], plan["offer"].get("offer_id"), {k: v for k, v in plan.items() if k != "offer"})
+            else:
+                best = optimize_sourcing.best_lowest(rows)
+                opts[sup] = (round(need[0] * float(best.get("price_per_base_unit", 0) or 0), 4), best.get("offer_id"), None)
+        if opts:
+            options[pid] = opts
+    return options, locked
+
+
+def basket_total(assign, options, terms):
+    subtotals = {}
+    for pid, sup in assign.items():
+        subtotals[sup] = subtotals.get(sup, 0.0) + options[pid][sup][0]
+    total = 0.0
+    for sup, sub in subtotals.items():
+        fee, pad = supplier_charge(_terms_for(terms, sup), sub)
+        total += sub + fee + pad
+    return total
+
+
+def solve_exact(options, terms, node_limit=EXACT_NODE_LIMIT):
+    """Branch and bound over product -> supplier; None when the basket is too large or node_limit is exceeded."""
+    # single-option products (LOCKs, one candidate) are fixed, only real choices are branched on
+    fixed = {p: next(iter(o)) for p, o in options.items() if len(o) == 1}
+    pids = [p for p in options if p not in fixed]
+    if len(pids) > EXACT_MAX_PRODUCTS:
+        return None
+    pids.sort(key=lambda p: -(max(c[0] for c in options[p].values()) - min(c[0] for c in options[p].values())))
+    mins = [min(c[0] for c in options[p].values()) for p in pids]
+    rest = [0.0] * (len(pids) + 1)
+    for i in range(len(pids) - 1, -1, -1):
+        rest[i] = rest[i + 1] + mins[i]
+    best = {"total": None, "assign": None}
+    nodes = [0]
+    assign = dict(fixed)
+    fixed_lines = sum(options[p][s][0] for p, s in fixed.items())
+
+    def dfs(i, lines):
+        nodes[0] += 1
+        if nodes[0] > node_limit:
+            raise StopIteration
+        # fees and padding are >= 0, so line spend alone is a valid lower bound
+        if best["total"] is not None and lines + rest[i] >= best["total"] - 1e-9:
+            return
+        if i == len(pids):
+            total = basket_total(assign, options, terms)
+            if best["total"] is None or total < best["total"] - 1e-9:
+                best["total"], best["assign"] = total, dict(assign)
+            return
+        pid = pids[i]
+        for sup, (spend, _, _) in sorted(options[pid].items(), key=lambda kv: kv[1][0]):
+            assign[pid] = sup
+            dfs(i + 1, lines + spend)
+        del assign[pid]
+
+    try:
+        dfs(0, fixed_lines)
+    except StopIteration:
+        return None
+    return best["assign"]
+
+
+def _order_cost(terms, sup, subtotal, count):
+    if count <= 0:
+        return 0.0
+    fee, pad = supplier_charge(_terms_for(terms, sup), subtotal)
+    return subtotal + fee + pad
+
+
+def local_search(options, terms, start, max_rounds=LOCAL_SEARCH_MAX_ROUNDS):
+    """Improve `start` by closing whole supplier orders and by single-product moves until no move helps.
+
+    Per-supplier subtotals are kept up to date so a single move is priced in O(1).
+    """
+    assign = dict(start)
+    sub, cnt = {}, {}
+    for pid, sup in assign.items():
+        sub[sup] = sub.get(sup, 0.0) + options[pid][sup][0]
+        cnt[sup] = cnt.get(sup, 0) + 1
+
+    def move_delta(pid, a, b):
+        ca, cb = options[pid][a][0], options[pid][b][0]
+        before = _order_cost(terms, a, sub[a], cnt[a]) + _order_cost(terms, b, sub.get(b, 0.0), cnt.get(b, 0))
+        after = _order_cost(terms, a, sub[a] - ca, cnt[a] - 1) + _order_cost(terms, b, sub.get(b, 0.0) + cb, cnt.get(b, 0) + 1)
+        return after - before
+
+    def apply(pid, b):
+        a = assign[pid]
+        sub[a] -= options[pid][a][0]
+        cnt[a] -= 1
+        sub[b] = sub.get(b, 0.0) + options[pid][b][0]
+        cnt[b] = cnt.get(b, 0) + 1
+        assign[pid] = b
+
+    for _ in range(max_rounds):
+        improved = False
+        # close one supplier: move each of its products to the cheapest other supplier already in the basket
+        for sup in sorted({s for s, c in cnt.items() if c > 0}, key=str):
+            if cnt.get(sup, 0) <= 0:
+                continue
+            others = {s for s, c in cnt.items() if c > 0 and s != sup}
+            moves = {}
+            for pid, s in assign.items():
+                if s != sup:
+                    continue
+                alt = [(c[0], o) for o, c in options[pid].items() if o in others]
+                if not alt:
+                    moves = None
+                    break
+                moves[pid] = min(alt, key=lambda x: x[0])[1]
+            if not moves:
+                continue
+            trial = dict(assign)
+            trial.update(moves)
+            if basket_total(trial, options, terms) < basket_total(assign, options, terms) - 1e-9:
+                for pid, b in moves.items():
+                    apply(pid, b)
+                improved = True
+        # fill one supplier: pull products over in order of extra line spend, keep the best prefix
+        # (reaches free-delivery / minimum-order thresholds that no single move can)
+        for sup in sorted({x for opts in options.values() for x in opts}, key=str):
+            cands = sorted(
+                (options[pid][sup][0] - options[pid][cur][0], str(pid), pid)
+                for pid, cur in assign.items()
+                if cur != sup and sup in options[pid]
+            )
+            if not cands:
+                continue
+            tsub, tcnt = dict(sub), dict(cnt)
+            t = best_t = sum(_order_cost(terms, x, tsub[x], tcnt[x]) for x in tsub)
+            best_k = 0
+            for k, (_, _, pid) in enumerate(cands, start=1):
+                a = assign[pid]
+                before = _order_cost(terms, a, tsub[a], tcnt[a]) + _order_cost(terms, sup, tsub.get(sup, 0.0), tcnt.get(sup, 0))
+                tsub[a] -= options[pid][a][0]
+                tcnt[a] -= 1
+                tsub[sup] = tsub.get(sup, 0.0) + options[pid][sup][0]
+                tcnt[sup] = tcnt.get(sup, 0) + 1
+                t += _order_cost(terms, a, tsub[a], tcnt[a]) + _order_cost(terms, sup, tsub[sup], tcnt[sup]) - before
+                if t < best_t - 1e-9:
+                    best_k, best_t = k, t
+            if best_k:
+                for _, _, pid in cands[:best_k]:
+                    apply(pid, sup)
+                improved = True
+        # single moves, including into suppliers not yet used
+        for pid in sorted(assign, key=str):
+            for sup in options[pid]:
+                if sup != assign[pid] and move_delta(pid, assign[pid], sup) < -1e-9:
+                    apply(pid, sup)
+                    improved = True
+        if not improved:
+            break
+    return assign
+
+
+def _within(options, allowed):
+    """Each product on its cheapest supplier in `allowed`; None when some product has no supplier there."""
+    a = {}
+    for pid, opts in options.items():
+        inside = [s for s in opts if s in allowed]
+        if not inside:
+            return None
+        a[pid] = min(inside, key=lambda s: opts[s][0])
+    return a
+
+
+def supplier_set_starts(options, terms, keep=3):
+    """Best `keep` assignments of the form "cheapest option within supplier set T"."""
+    suppliers = sorted({s for opts in options.values() for s in opts}, key=str)
+    found = []
+    if len(suppliers) <= SUBSET_MAX_SUPPLIERS:
+        for mask in range(1, 1 << len(suppliers)):
+            a = _within(options, {s for i, s in enumerate(suppliers) if mask >> i & 1})
+            if a is not None:
+                found.append((basket_total(a, options, terms), mask, a))
+    else:
+        # greedy drop: remove the supplier whose removal lowers the total most, while that helps
+        allowed = set(suppliers)
+        a = _within(options, allowed)
+        total = basket_total(a, options, terms)
+        found.append((total, 0, a))
+        while True:
+            best = None
+            for s in sorted(allowed, key=str):
+                t = _within(options, allowed - {s})
+                if t is not None:
+                    tt = basket_total(t, options, terms)
+                    if tt < total - 1e-9 and (best is None or tt < best[0]):
+                        best = (tt, s, t)
+            if best is None:
+                break
+            total, dropped, a = best
+            allowed.discard(dropped)
+            found.append((total, len(found), a))
+    found.sort(key=lambda x: (x[0], x[1]))
+    return [a for _, _, a in found[:keep]]
+
+
+def optimize_basket(decisions, offers, demand, terms, node_limit=EXACT_NODE_LIMIT, max_rounds=LOCAL_SEARCH_MAX_ROUNDS):
+    """Reassign demanded products across suppliers to minimize line spend + delivery fees + min-order padding.
+
+    Only each decision's post-BAN candidates are eligible and LOCK decisions stay on their locked offer.
+    Returns (basket report, basket decisions, issues).
+    """
+    issues = []
+    options, locked = build_options(decisions, offers, demand)
+    by_pid = {d.get("product_id"): d for d in decisions}
+    current = {}
+    for pid, opts in options.items():
+        sup = by_pid[pid].get("selected_supplier")
+        current[pid] = sup if sup in opts else min(opts, key=lambda s: opts[s][0])
+    cheapest = {pid: min(opts, key=lambda s: opts[s][0]) for pid, opts in options.items()}
+
+    method = "exact"
+    assign = solve_exact(options, terms, node_limit) if options else {}
+    if assign is None:
+        method = "local_search"
+        starts = [cheapest, current] + supplier_set_starts(options, terms)
+        results = [local_search(options, terms, st, max_rounds) for st in starts]
+        assign = min(results, key=lambda a: basket_total(a, options, terms))
+
+    def supplier_rows(a):
+        rows = {}
+        for pid, sup in a.items():
+            r = rows.setdefault(sup, {"supplier": sup, "products": 0, "subtotal": 0.0})
+            r["products"] += 1
+            r["subtotal"] += options[pid][sup][0]
+        out = []
+        for sup in sorted(rows, key=str):
+            r = rows[sup]
+            t = _terms_for(terms, sup)
+            fee, pad = supplier_charge(t, r["subtotal"])
+            out.append({
+                "supplier": sup,
+                "supplier_id": t["supplier_id"],
+                "products": r["products"],
+                "subtotal": round(r["subtotal"], 4),
+                "delivery_fee": round(fee, 4),
+                "min_order_value": t["min_order_value"],
+                "min_order_padding": round(pad, 4),
+                "total": round(r["subtotal"] + fee + pad, 4),
+            })
+        return out
+
+    suppliers = supplier_rows(assign)
+    for r in suppliers:
+        if r["min_order_padding"] > 0:
+            add_issue(issues, "WARNING", "BASKET-MIN-ORDER-PADDED", "Order below supplier minimum; padded up to min_order_value",
+                      supplier=r["supplier"], subtotal=r["subtotal"], min_order_value=r["min_order_value"])
+
+    assignments = []
+    basket_decisions = []
+    for d in decisions:
+        pid = d.get("product_id")
+        if pid not in assign:
+            basket_decisions.append(d)
+            continue
+        sup = assign[pid]
+        spend, offer_id, plan = options[pid][sup]
+        changed = offer_id != d.get("chosen_offer_id")
+        assignments.append({
+            "product_id": pid,
+            "supplier": sup,
+            "offer_id": offer_id,
+            "line_spend": spend,
+            "decision_offer_id": d.get("chosen_offer_id"),
+            "changed": changed,
+            "locked": pid in locked,
+        })
+        nd = dict(d)
+        if changed:
+            nd.update({"chosen_offer_id": offer_id, "selected_supplier": sup, "reason_codes": list(d.get("reason_codes", [])) + ["BASKET_REASSIGNED"]})
+        nd["basket_line_spend"] = spend
+        if plan is not None:
+            nd["demand_plan"] = plan
+        basket_decisions.append(nd)
+
+    total = basket_total(assign, options, terms)
+    baseline = basket_total(current, options, terms)
+    report = {
+        "method": method,
+        "products": len(options),
+        "locked": len(locked),
+        "suppliers_used": len(suppliers),
+        "baseline_suppliers_used": len(set(current.values())),
+        "total": round(total, 4),
+        "baseline_total": round(baseline, 4),
+        "savings": round(baseline - total, 4),
+        "reassigned": sum(1 for a in assignments if a["changed"]),
+        "suppliers": suppliers,
+        "assignments": assignments,
+    }
+    return report, basket_decisions, issues
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Basket-level supplier assignment with delivery fees and minimum orders")
+    p.add_argument("--decisions", required=True)
+    p.add_argument("--offers", required=True, help="offers_mapped.json (pack sizes for real spend)")
+    p.add_argument("--demand", required=True, help="event_purchase.json, recipes json or {product_id: qty}")
+    p.add_argument("--suppliers-dir", default=str(ROOT / "suppliers"))
+    p.add_argument("--out", required=True, help="basket.json report")
+    p.add_argument("--decisions-out", required=True, help="decisions with basket reassignments applied")
+    p.add_argument("--issues-out", required=True)
+    p.add_argument("--node-limit", type=int, default=EXACT_NODE_LIMIT, help="exact search budget before local search")
+    args = p.parse_args(argv)
+
+    report, decisions, issues = optimize_basket(
+        load_json(args.decisions, []),
+        load_json(args.offers, []),
+        optimize_sourcing.load_demand(args.demand),
+        load_supplier_terms(args.suppliers_dir),
+        node_limit=args.node_limit,
+    )
+    save_json(args.out, report)
+    save_json(args.decisions_out, decisions)
+    save_json(args.issues_out, issues)
+    print(json.dumps({k: report[k] for k in ("method", "products", "total", "baseline_total", "savings", "suppliers_used")}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
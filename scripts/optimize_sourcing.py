@@ -1,6 +1,8 @@
 import argparse
+import hashlib
 import json
-from datetime import datetime, timezone
+import math
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 
@@ -21,6 +23,141 @@ def best_lowest(rows):
     return min(rows, key=lambda x: float(x.get("price_per_base_unit", 1e18) or 1e18))
 
 
+# demand-aware sourcing: quantities are compared on a 0.001 base-unit grid (1 g / 1 ml / 0.001 pcs)
+DEMAND_SCALE = 1000
+# largest covering table per supplier; beyond it each pack size is only bought on its own
+DEMAND_GRID_MAX = 200000
+RECIPE_BASE_UNITS = {"g": ("kg", 0.001), "kg": ("kg", 1.0), "ml": ("lt", 0.001), "lt": ("lt", 1.0), "pcs": ("pcs", 1.0)}
+
+
+def load_demand(path):
+    """product_id -> (needed base qty, base unit or None) from an event_purchase.json, a recipe list/recipe,
+    recipes_cost_breakdown.json or a plain {product_id: qty} map."""
+    obj = json.loads(Path(path).read_text(encoding="utf-8"))
+    demand = {}
+
+    def add(pid, qty, unit=None):
+        if not pid or qty in (None, ""):
+            return
+        q, u = demand.get(str(pid), (0.0, unit))
+        demand[str(pid)] = (q + float(qty), u or unit)
+
+    if isinstance(obj, dict) and isinstance(obj.get("items"), list):
+        for it in obj["items"]:
+            add(it.get("product_id"), it.get("needed_base"), (it.get("pack_unit") or "").lower() or None)
+        return demand
+    if isinstance(obj, dict) and not any(k in obj for k in ("ingredients", "lines")):
+        for pid, qty in obj.items():
+            add(pid, qty)
+        return demand
+    for r in obj if isinstance(obj, list) else [obj]:
+        for ln in r.get("lines", []) or []:
+            add(ln.get("product_id"), ln.get("actual_needed_base"), (ln.get("base_unit") or "").lower() or None)
+        for ing in r.get("ingredients", []) or []:
+            base = RECIPE_BASE_UNITS.get((ing.get("unit") or "").lower())
+            if not base or ing.get("gross_qty") in (None, 0):
+                continue
+            waste_pct = float(ing.get("waste_pct", 0) or 0)
+            if waste_pct >= 100:
+                continue
+            net = float(ing["gross_qty"]) * base[1] * (float(ing.get("yield_pct", 100) or 100) / 100.0)
+            add(ing.get("product_id"), net / (1.0 - waste_pct / 100.0), base[0])
+    return demand
+
+
+def _pack_options(rows, unit):
+    """(offer, pack size on the grid, pack price) for offers with a usable pack; unit filters pack_unit when known."""
+    opts = []
+    for r in rows:
+        if unit and (r.get("pack_unit") or "").lower() != unit:
+            continue
+        try:
+            size = float(r.get("pack_size") or 0)
+            ppu = float(r.get("price_per_base_unit") or 0)
+        except (TypeError, ValueError):
+            continue
+        grid = int(round(size * DEMAND_SCALE))
+        if grid <= 0 or ppu <= 0:
+            continue
+        opts.append((r, grid, size * ppu))
+    return opts
+
+
+def cheapest_packs(need, opts):
+    """Minimum spend covering `need` with whole packs, mixing the given pack options; (spend, [(offer, count)])."""
+    need_grid = max(0, int(math.ceil(need * DEMAND_SCALE - 1e-6)))
+    if need_grid == 0:
+        return 0.0, []
+    g = 0
+    for _, size, _ in opts:
+        g = math.gcd(g, size)
+    n = -(-need_grid // g)
+    if len(opts) == 1 or n > DEMAND_GRID_MAX:
+        best = None
+        for o, size, price in opts:
+            cnt = -(-need_grid // size)
+            if best is None or cnt * price < best[0]:
+                best = (cnt * price, [(o, cnt)])
+        return best
+    steps = [(i, size // g, price) for i, (_, size, price) in enumerate(opts)]
+    # cost[q]: cheapest spend covering at least q grid steps
+    cost = [0.0] + [math.inf] * n
+    pick = [-1] * (n + 1)
+    for q in range(1, n + 1):
+        for i, step, price in steps:
+            c = cost[q - step if q > step else 0] + price
+            if c < cost[q] - 1e-9:
+                cost[q] = c
+                pick[q] = i
+    counts = [0] * len(opts)
+    q = n
+    while q > 0:
+        i = pick[q]
+        counts[i] += 1
+        q = q - steps[i][1] if q > steps[i][1] else 0
+    return cost[n], [(opts[i][0], c) for i, c in enumerate(counts) if c]
+
+
+def demand_plan(rows, need, unit=None):
+    """Cheapest real purchase of `need` base units among rows, pack sizes mixed within one supplier; None when no
+    row has a usable pack_size / price_per_base_unit."""
+    by_supplier = {}
+    for o in _pack_options(rows, unit):
+        by_supplier.setdefault(o[0].get("supplier"), []).append(o)
+    best = None
+    for supplier, opts in by_supplier.items():
+        spend, mix = cheapest_packs(need, opts)
+        bought = sum(float(o.get("pack_size")) * c for o, c in mix)
+        # ties: smaller leftover, then supplier first seen in the offers
+        if best is None or (round(spend, 6), round(bought, 6)) < (round(best["spend"], 6), round(best["bought_base"], 6)):
+            best = {"supplier": supplier, "spend": spend, "bought_base": bought, "mix": mix}
+    if best is None:
+        return None
+    main_offer = max(best["mix"], key=lambda x: float(x[0].get("pack_size")) * x[1])[0] if best["mix"] else best_lowest(rows)
+    return {
+        "offer": main_offer,
+        "supplier": best["supplier"],
+        "spend": round(best["spend"], 4),
+        "bought_base": round(best["bought_base"], 6),
+        "leftover_base": round(max(0.0, best["bought_base"] - need), 6),
+        "packs": [
+            {"offer_id": o.get("offer_id"), "pack_size": o.get("pack_size"), "pack_unit": o.get("pack_unit"), "count": c,
+             "pack_price": round(float(o.get("pack_size")) * float(o.get("price_per_base_unit")), 4)}
+            for o, c in best["mix"]
+        ],
+    }
+
+
+def _pick(rows, need):
+    """(offer, score, plan): lowest price_per_base_unit, or cheapest real spend when a demand is known."""
+    if need is not None:
+        plan = demand_plan(rows, need[0], need[1])
+        if plan is not None:
+            return plan["offer"], plan["spend"], plan
+    best = best_lowest(rows)
+    return best, float(best.get("price_per_base_unit", 1e18) or 1e18), None
+
+
 def add_issue(issues, severity, code, message, **extra):
     row = {"severity": severity, "code": code, "message": message}
     row.update(extra)
@@ -44,236 +181,632 @@ def selectors_match(rule, service_tag: str, tier: str):
     return s_ok and t_ok
 
 
-def main():
-    p = argparse.ArgumentParser(description="Sourcing optimizer with Phase-1 safe defaults and Phase-2 BAN/PREFER toggle")
-    p.add_argument("--offers", required=True)
-    p.add_argument("--overrides", required=True)
-    p.add_argument("--defaults", required=True)
-    p.add_argument("--out", required=True)
-    p.add_argument("--issues-out", required=True)
-    p.add_argument("--phase", type=int, default=1)
-    p.add_argument("--enable-phase2-rules", action="store_true")
-    p.add_argument("--enable-production-overrides", action="store_true")
-    p.add_argument("--rollout-categories", default="")
-    p.add_argument("--policies", required=False, default=None)
-    p.add_argument("--service-tag", required=False, default="CAT")
-    args = p.parse_args()
-
-    offers = json.loads(Path(args.offers).read_text(encoding="utf-8"))
-    overrides = json.loads(Path(args.overrides).read_text(encoding="utf-8")).get("overrides", [])
-    if args.policies:
-        pobj = json.loads(Path(args.policies).read_text(encoding="utf-8"))
-        overrides = pobj.get("policies", overrides)
-    defaults = json.loads(Path(args.defaults).read_text(encoding="utf-8"))
-
-    phase2_active = args.enable_phase2_rules or args.phase >= 2
-    production_overrides_active = bool(args.enable_production_overrides)
-    rollout_categories = {x.strip().lower() for x in str(args.rollout_categories or "").split(",") if x.strip()}
-
+def decisions_valid_until(offers, defaults, now):
+    """Earliest instant after `now` at which an offer crosses STALE / TOO-OLD / valid_until; None if never."""
     vcfg = defaults.get("phase1_price_validity", {})
     max_age = int(vcfg.get("max_age_days", 14))
     block_after = int(vcfg.get("block_after_days", 28))
-
-    locks = {}
-    bans = []
-    prefers = []
-
-    for r in overrides:
-        rule = (r.get("rule") or "").upper()
-        if rule == "LOCK" and r.get("product_id") and r.get("supplier"):
-            locks[r["product_id"]] = r
-        elif rule == "BAN":
-            bans.append(r)
-        elif rule == "PREFER":
-            prefers.append(r)
-
-    now = datetime.now(timezone.utc)
-    by_product = {}
-    issues = []
-
+    edges = []
     for off in offers:
-        pid = off.get("product_id")
-        if not pid:
-            add_issue(issues, "BLOCK", "SRC-UNMAPPED", "Offer has no product_id (needs mapping)", offer_id=off.get("offer_id"))
+        if not off.get("product_id"):
             continue
-
         cap = parse_dt(off.get("captured_at"))
-        vul = parse_dt(off.get("valid_until"))
         if not cap:
-            add_issue(issues, "BLOCK", "SRC-NO-CAPTURED-AT", "Missing/invalid captured_at", offer_id=off.get("offer_id"))
             continue
+        edges.extend([cap + timedelta(days=max_age), cap + timedelta(days=block_after)])
+        vul = parse_dt(off.get("valid_until"))
+        if vul:
+            edges.append(vul)
+    future = [e for e in edges if e > now]
+    return min(future) if future else None
 
-        ad = age_days(cap, now)
-        if ad > block_after:
-            add_issue(issues, "BLOCK", "SRC-PRICE-TOO-OLD", f"Price older than {block_after} days", offer_id=off.get("offer_id"), product_id=pid, age_days=round(ad, 2))
-            continue
-        if ad > max_age:
-            add_issue(issues, "WARNING", "SRC-PRICE-STALE", f"Price older than {max_age} days", offer_id=off.get("offer_id"), product_id=pid, age_days=round(ad, 2))
-        if vul and now > vul:
-            add_issue(issues, "WARNING", "SRC-VALID-UNTIL-PASSED", "valid_until has passed", offer_id=off.get("offer_id"), product_id=pid)
 
-        by_product.setdefault(pid, []).append(off)
+def load_overrides(overrides_path, policies_path=None):
+    overrides = json.loads(Path(overrides_path).read_text(encoding="utf-8")).get("overrides", [])
+    if policies_path:
+        pobj = json.loads(Path(policies_path).read_text(encoding="utf-8"))
+        overrides = pobj.get("policies", overrides)
+    return overrides
 
-    decisions = []
-    for pid, group in by_product.items():
-        in_stock = [g for g in group if g.get("in_stock", True)]
-        if not in_stock:
-            add_issue(issues, "BLOCK", "SRC-NO-INSTOCK", "No in-stock offers", product_id=pid)
-            continue
 
-        candidates = in_stock[:]
-        rule_applied = "LOWEST"
-        override_ref = None
-        reason_codes = []
-        policy_hits = []
-        tier = str(candidates[0].get("tier", "standard"))
-
-        # LOCK always active
-        lock_rule = locks.get(pid)
-        if lock_rule and selectors_match(lock_rule, args.service_tag, tier):
-            lock_supplier = lock_rule.get("supplier")
-            lock_sku = lock_rule.get("supplier_sku")
-            lock_matches = [g for g in candidates if g.get("supplier") == lock_supplier]
-            if lock_sku:
-                lock_matches = [g for g in lock_matches if str(g.get("supplier_sku", "")) == str(lock_sku)]
-            if not lock_matches:
-                add_issue(issues, "BLOCK", "SRC-LOCK-NOT-FOUND", f"LOCK supplier '{lock_supplier}' has no available offer", product_id=pid)
+def _compile_rule(order, r, service_tag):
+    sel = r.get("selectors") or {}
+    if "service_type" in sel:
+        allowed = sel.get("service_type")
+        if not isinstance(allowed, list):
+            allowed = [allowed]
+        if str(service_tag or "").upper() not in {str(x).upper() for x in allowed}:
+            return None
+    tiers = None
+    if "tier" in sel:
+        allowed_t = sel.get("tier")
+        if not isinstance(allowed_t, list):
+            allowed_t = [allowed_t]
+        tiers = {str(x).lower() for x in allowed_t}
+    return {
+        "order": order,
+        "policy": r,
+        "scope": (r.get("scope") or "").lower(),
+        "match": str(r.get("match") or "").lower(),
+        "match_raw": str(r.get("match")),
+        "supplier": r.get("supplier") or r.get("supplier_id"),
+        "tiers": tiers,
+        "max_premium_pct": float(r.get("max_premium_pct", 0) or 0),
+    }
+
+
+def compile_policies(bans, prefers, service_tag):
+    """Index BAN/PREFER rules by scope key with selectors pre-normalized; service_type is resolved once per run.
+
+    category and supplier_id keys are lowercased match values, product_id keys the raw match, as the evaluators compare them.
+    Rules with any other scope never filter a BAN and always apply as PREFER, so PREFER keeps them under "any".
+    """
+    compiled = {}
+    for kind, rules in (("ban", bans), ("prefer", prefers)):
+        idx = {"category": {}, "product_id": {}, "supplier_id": {}, "any": []}
+        for order, r in enumerate(rules):
+            e = _compile_rule(order, r, service_tag)
+            if e is None:
                 continue
-            chosen = best_lowest(lock_matches)
-            rule_applied = "LOCK"
-            override_ref = lock_rule
-            policy_hits.append({"rule": "LOCK", "policy": lock_rule})
-            reason_codes.append("LOCK_ENFORCED")
-        else:
-            if phase2_active:
-                product_category = str(candidates[0].get("category", "") or "").lower()
-                category_known = product_category not in {"", "unknown", "none", "null"}
-
-                # when production overrides are enabled, rollout allowlist controls category-scoped rules
-                category_in_rollout = (not production_overrides_active) or (product_category in rollout_categories)
+            if e["scope"] in ("category", "supplier_id"):
+                idx[e["scope"]].setdefault(e["match"], []).append(e)
+            elif e["scope"] == "product_id":
+                idx["product_id"].setdefault(e["match_raw"], []).append(e)
+            elif kind == "prefer":
+                idx["any"].append(e)
+        compiled[kind] = idx
+    return compiled
+
+
+def _applicable(idx, candidates, pid):
+    """Rules that can touch this group, in original policy order."""
+    found = {}
+    for e in idx["product_id"].get(str(pid), ()):
+        found[e["order"]] = e
+    if idx["category"]:
+        for cat in {str(c.get("category", "")).lower() for c in candidates}:
+            for e in idx["category"].get(cat, ()):
+                found[e["order"]] = e
+    if idx["supplier_id"]:
+        for sup in {str(c.get("supplier")) for c in candidates}:
+            for e in idx["supplier_id"].get(sup, ()):
+                found[e["order"]] = e
+    for e in idx["any"]:
+        found[e["order"]] = e
+    return [found[k] for k in sorted(found)]
+
+
+def _decide(pid, group, ctx, issues):
+    """One product group (age-eligible offers) -> decision dict, or None with a BLOCK issue appended."""
+    locks, compiled = ctx["locks"], ctx["compiled"]
+    phase2_active = ctx["phase2_active"]
+    production_overrides_active = ctx["production_overrides_active"]
+    rollout_categories = ctx["rollout_categories"]
+    service_tag = ctx["service_tag"]
+
+    in_stock = [g for g in group if g.get("in_stock", True)]
+    if not in_stock:
+        add_issue(issues, "BLOCK", "SRC-NO-INSTOCK", "No in-stock offers", product_id=pid)
+        return None
 
-                # BAN
-                for b in bans:
-                    if not selectors_match(b, args.service_tag, tier):
+    candidates = in_stock[:]
+    rule_applied = "LOWEST"
+    override_ref = None
+    reason_codes = []
+    policy_hits = []
+    tier = str(candidates[0].get("tier", "standard"))
+    tier_l = str(tier or "").lower()
+    need = ctx["demand"].get(str(pid))
+    plan = None
+
+    # LOCK always active
+    lock_rule = locks.get(pid)
+    if lock_rule and selectors_match(lock_rule, service_tag, tier):
+        lock_supplier = lock_rule.get("supplier")
+        lock_sku = lock_rule.get("supplier_sku")
+        lock_matches = [g for g in candidates if g.get("supplier") == lock_supplier]
+        if lock_sku:
+            lock_matches = [g for g in lock_matches if str(g.get("supplier_sku", "")) == str(lock_sku)]
+        if not lock_matches:
+            add_issue(issues, "BLOCK", "SRC-LOCK-NOT-FOUND", f"LOCK supplier '{lock_supplier}' has no available offer", product_id=pid)
+            return None
+        chosen, _, plan = _pick(lock_matches, need)
+        rule_applied = "LOCK"
+        override_ref = lock_rule
+        policy_hits.append({"rule": "LOCK", "policy": lock_rule})
+        reason_codes.append("LOCK_ENFORCED")
+    else:
+        if phase2_active:
+            product_category = str(candidates[0].get("category", "") or "").lower()
+            category_known = product_category not in {"", "unknown", "none", "null"}
+
+            # when production overrides are enabled, rollout allowlist controls category-scoped rules
+            category_in_rollout = (not production_overrides_active) or (product_category in rollout_categories)
+
+            # BAN: only rules indexed under this group's categories / product_id / suppliers, in policy order
+            for e in _applicable(compiled["ban"], candidates, pid):
+                if e["tiers"] is not None and tier_l not in e["tiers"]:
+                    continue
+                scope = e["scope"]
+                match = e["match"]
+                supplier = e["supplier"]
+                if production_overrides_active and scope == "category" and not category_in_rollout:
+                    continue
+                before = len(candidates)
+                if scope == "category":
+                    candidates = [c for c in candidates if not (c.get("supplier") == supplier and str(c.get("category", "")).lower() == match)]
+                elif scope == "product_id":
+                    candidates = [c for c in candidates if not (c.get("supplier") == supplier and str(c.get("product_id")) == e["match_raw"])]
+                elif scope == "supplier_id":
+                    candidates = [c for c in candidates if str(c.get("supplier")) != match]
+                if len(candidates) < before:
+                    reason_codes.append("BAN_FILTERED")
+                    policy_hits.append({"rule": "BAN", "policy": e["policy"]})
+
+            if not candidates:
+                add_issue(issues, "BLOCK", "SRC-ALL-BANNED", "All candidate offers filtered by BAN rules", product_id=pid)
+                return None
+
+            # PREFER (soft)
+            # with a demand, baseline/premium compare real pack spend instead of unit price
+            baseline, baseline_price, baseline_plan = _pick(candidates, need)
+            preferred_pick = None
+            preferred_rule = None
+
+            if not category_known:
+                reason_codes.append("CATEGORY_UNKNOWN_FALLBACK_LOWEST")
+            else:
+                for e in _applicable(compiled["prefer"], candidates, pid):
+                    if e["tiers"] is not None and tier_l not in e["tiers"]:
                         continue
-                    scope = (b.get("scope") or "").lower()
-                    match = str(b.get("match") or "").lower()
-                    supplier = b.get("supplier") or b.get("supplier_id")
+                    scope = e["scope"]
+                    match = e["match"]
+                    supplier = e["supplier"]
+                    max_premium_pct = e["max_premium_pct"]
+
                     if production_overrides_active and scope == "category" and not category_in_rollout:
                         continue
-                    before = len(candidates)
+
+                    pool = candidates
                     if scope == "category":
-                        candidates = [c for c in candidates if not (c.get("supplier") == supplier and str(c.get("category", "")).lower() == match)]
+                        pool = [c for c in candidates if str(c.get("category", "")).lower() == match and c.get("supplier") == supplier]
                     elif scope == "product_id":
-                        candidates = [c for c in candidates if not (c.get("supplier") == supplier and str(c.get("product_id")) == str(b.get("match")))]
+                        pool = [c for c in candidates if str(c.get("product_id")) == e["match_raw"] and c.get("supplier") == supplier]
                     elif scope == "supplier_id":
-                        candidates = [c for c in candidates if str(c.get("supplier")) != str(match)]
-                    if len(candidates) < before:
-                        reason_codes.append("BAN_FILTERED")
-                        policy_hits.append({"rule": "BAN", "policy": b})
+                        pool = [c for c in candidates if str(c.get("supplier")) == match]
 
-                if not candidates:
-                    add_issue(issues, "BLOCK", "SRC-ALL-BANNED", "All candidate offers filtered by BAN rules", product_id=pid)
-                    continue
+                    if not pool:
+                        continue
 
-                # PREFER (soft)
-                baseline = best_lowest(candidates)
-                baseline_price = float(baseline.get("price_per_base_unit", 1e18) or 1e18)
-                preferred_pick = None
-                preferred_rule = None
-
-                if not category_known:
-                    reason_codes.append("CATEGORY_UNKNOWN_FALLBACK_LOWEST")
-                else:
-                    for pref in prefers:
-                        if not selectors_match(pref, args.service_tag, tier):
-                            continue
-                        scope = (pref.get("scope") or "").lower()
-                        match = str(pref.get("match") or "").lower()
-                        supplier = pref.get("supplier") or pref.get("supplier_id")
-                        max_premium_pct = float(pref.get("max_premium_pct", 0) or 0)
-
-                        if production_overrides_active and scope == "category" and not category_in_rollout:
-                            continue
-
-                        pool = candidates
-                        if scope == "category":
-                            pool = [c for c in candidates if str(c.get("category", "")).lower() == match and c.get("supplier") == supplier]
-                        elif scope == "product_id":
-                            pool = [c for c in candidates if str(c.get("product_id")) == str(pref.get("match")) and c.get("supplier") == supplier]
-                        elif scope == "supplier_id":
-                            pool = [c for c in candidates if str(c.get("supplier")) == str(match)]
-
-                        if not pool:
-                            continue
-
-                        cand = best_lowest(pool)
-                        cand_price = float(cand.get("price_per_base_unit", 1e18) or 1e18)
-                        if baseline_price <= 0:
-                            continue
-                        premium_pct = ((cand_price - baseline_price) / baseline_price) * 100
-                        if premium_pct <= max_premium_pct:
-                            preferred_pick = cand
-                            preferred_rule = pref
-                            break
-
-                if preferred_pick is not None:
-                    chosen = preferred_pick
-                    rule_applied = "PREFER"
-                    override_ref = preferred_rule
-                    policy_hits.append({"rule": "PREFER", "policy": preferred_rule})
-                    reason_codes.append("PREFER_APPLIED")
-                else:
-                    chosen = baseline
-                    rule_applied = "LOWEST"
+                    cand, cand_price, cand_plan = _pick(pool, need)
+                    if baseline_price <= 0:
+                        continue
+                    premium_pct = ((cand_price - baseline_price) / baseline_price) * 100
+                    if premium_pct <= max_premium_pct:
+                        preferred_pick = cand
+                        preferred_rule = e["policy"]
+                        plan = cand_plan
+                        break
+
+            if preferred_pick is not None:
+                chosen = preferred_pick
+                rule_applied = "PREFER"
+                override_ref = preferred_rule
+                policy_hits.append({"rule": "PREFER", "policy": preferred_rule})
+                reason_codes.append("PREFER_APPLIED")
             else:
-                chosen = best_lowest(candidates)
-
-        cp = float(chosen.get("price_per_base_unit", 0) or 0)
-        lowest = best_lowest(candidates)
-        lowest_price = float(lowest.get("price_per_base_unit", 0) or 0)
-
-        candidates_view = []
-        alternatives = []
-        for g in candidates:
-            gp = float(g.get("price_per_base_unit", 0) or 0)
-            entry = {
-                "supplier": g.get("supplier"),
-                "offer_id": g.get("offer_id"),
-                "price_per_base_unit": gp,
-                "captured_at": g.get("captured_at"),
-                "price_unit": g.get("price_unit") or g.get("pack_unit"),
+                chosen = baseline
+                plan = baseline_plan
+                rule_applied = "LOWEST"
+        else:
+            chosen, _, plan = _pick(candidates, need)
+
+    cp = float(chosen.get("price_per_base_unit", 0) or 0)
+    lowest = best_lowest(candidates)
+    lowest_price = float(lowest.get("price_per_base_unit", 0) or 0)
+
+    candidates_view = []
+    alternatives = []
+    for g in candidates:
+        gp = float(g.get("price_per_base_unit", 0) or 0)
+        entry = {
+            "supplier": g.get("supplier"),
+            "offer_id": g.get("offer_id"),
+            "price_per_base_unit": gp,
+            "captured_at": g.get("captured_at"),
+            "price_unit": g.get("price_unit") or g.get("pack_unit"),
+        }
+        candidates_view.append(entry)
+        if g.get("offer_id") != chosen.get("offer_id"):
+            diff = None if cp == 0 else ((gp - cp) / cp) * 100
+            alternatives.append({
+                **entry,
+                "diff_pct": None if diff is None else round(diff, 2),
+            })
+
+    decision_key = "supplier_sku" if str(chosen.get("supplier_sku", "")).strip() else "desc_pack_exact"
+    if decision_key == "desc_pack_exact":
+        reason_codes.append("NO_SKU_KEY")
+
+    demand_fields = {}
+    if need is not None:
+        unit_price_plan = demand_plan([lowest], need[0], need[1])
+        if plan is None:
+            reason_codes.append("DEMAND_NO_PACK_DATA")
+        elif len(plan["packs"]) > 1 or chosen.get("offer_id") != lowest.get("offer_id"):
+            reason_codes.append("DEMAND_PACK_OPTIMIZED")
+        demand_fields = {
+            "demand_base": round(need[0], 6),
+            "demand_plan": None if plan is None else {k: v for k, v in plan.items() if k != "offer"},
+            "demand_spend": None if plan is None else plan["spend"],
+            "lowest_unit_price_spend": None if unit_price_plan is None else unit_price_plan["spend"],
+        }
+
+    return {
+        "product_id": pid,
+        "chosen_offer_id": chosen.get("offer_id"),
+        "selected_supplier": chosen.get("supplier"),
+        "decision_key": decision_key,
+        "rule_applied": rule_applied,
+        "candidates": candidates_view,
+        "candidates_considered": candidates_view[:5],
+        "policy_hits": policy_hits,
+        "alternatives": alternatives,
+        "override_ref": override_ref,
+        "reason_codes": reason_codes,
+        "lowest_global_offer_id": lowest.get("offer_id"),
+        "lowest_global_price_per_base_unit": lowest_price,
+        "chosen_price_per_base_unit": cp,
+        "savings_vs_lowest_global_per_base_unit": round(lowest_price - cp, 6),
+        **demand_fields,
+        "decision_ts": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _policy_ctx(overrides, defaults, phase=1, enable_phase2_rules=False, enable_production_overrides=False,
+                rollout_categories="", service_tag="CAT", demand=None):
+    vcfg = defaults.get("phase1_price_validity", {})
+    ctx = {
+        "phase2_active": enable_phase2_rules or phase >= 2,
+        "production_overrides_active": bool(enable_production_overrides),
+        "rollout_categories": {x.strip().lower() for x in str(rollout_categories or "").split(",") if x.strip()},
+        "service_tag": service_tag,
+        "demand": demand or {},
+        "max_age": int(vcfg.get("max_age_days", 14)),
+        "block_after": int(vcfg.get("block_after_days", 28)),
+        "locks": {},
+        "bans": [],
+        "prefers": [],
+    }
+    ctx["stale_td"] = timedelta(days=ctx["max_age"])
+    ctx["block_td"] = timedelta(days=ctx["block_after"])
+    for r in overrides:
+        rule = (r.get("rule") or "").upper()
+        if rule == "LOCK" and r.get("product_id") and r.get("supplier"):
+            ctx["locks"][r["product_id"]] = r
+        elif rule == "BAN":
+            ctx["bans"].append(r)
+        elif rule == "PREFER":
+            ctx["prefers"].append(r)
+    ctx["compiled"] = compile_policies(ctx["bans"], ctx["prefers"], service_tag)
+    return ctx
+
+
+def _check_age(off, pid, ctx, now, issues, edges=None):
+    """Append age issues for one mapped offer; True when the offer may be sourced.
+
+    When `edges` is given, the offer's earliest STALE / TOO-OLD / valid_until edge after `now` is folded into edges[pid].
+    """
+    max_age, block_after = ctx["max_age"], ctx["block_after"]
+    cap = parse_dt(off.get("captured_at"))
+    vul = parse_dt(off.get("valid_until"))
+    if not cap:
+        add_issue(issues, "BLOCK", "SRC-NO-CAPTURED-AT", "Missing/invalid captured_at", offer_id=off.get("offer_id"))
+        return False
+
+    if edges is not None:
+        edge = cap + ctx["stale_td"]
+        if edge <= now:
+            edge = cap + ctx["block_td"]
+            if edge <= now:
+                edge = None
+        if vul is not None and vul > now and (edge is None or vul < edge):
+            edge = vul
+        if edge is not None and (pid not in edges or edge < edges[pid]):
+            edges[pid] = edge
+
+    ad = age_days(cap, now)
+    if ad > block_after:
+        add_issue(issues, "BLOCK", "SRC-PRICE-TOO-OLD", f"Price older than {block_after} days", offer_id=off.get("offer_id"), product_id=pid, age_days=round(ad, 2))
+        return False
+    if ad > max_age:
+        add_issue(issues, "WARNING", "SRC-PRICE-STALE", f"Price older than {max_age} days", offer_id=off.get("offer_id"), product_id=pid, age_days=round(ad, 2))
+    if vul and now > vul:
+        add_issue(issues, "WARNING", "SRC-VALID-UNTIL-PASSED", "valid_until has passed", offer_id=off.get("offer_id"), product_id=pid)
+    return True
+
+
+# offer fields a sourcing decision depends on; a re-import that changes any of them re-sources the product.
+# Age fields (captured_at, valid_until, ...) are left out: re-imports restamp them, and all a decision depends on
+# is whether each offer is still age-eligible, which the digest records instead.
+OFFER_DIGEST_FIELDS = ("supplier", "supplier_sku", "tier", "category", "pack_size", "pack_unit", "price_unit", "price",
+                       "price_per_base_unit", "in_stock", "vat_rate", "anomaly_flags")
+
+
+def offer_key(off):
+    """Identity of an offer across imports (offer ids are rebuilt per import): supplier::supplier_sku, else its offer_id."""
+    sku = str(off.get("supplier_sku") or "").strip()
+    return f"{off.get('supplier')}::{sku}" if sku else f"id:{off.get('offer_id')}"
+
+
+def group_digest(group, eligible):
+    """Content digest of a product's offers (key, age-eligibility, decision-relevant fields), in group order."""
+    ok = {id(o) for o in eligible}
+    rows = [[offer_key(o), id(o) in ok] + [o.get(f) for f in OFFER_DIGEST_FIELDS] for o in group]
+    return hashlib.sha1(json.dumps(rows, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _stamp(decision, group, eligible, edge):
+    # what incremental mode needs to decide whether this decision can be carried forward
+    decision["group_offer_ids"] = [o.get("offer_id") for o in group]
+    decision["group_offer_keys"] = [offer_key(o) for o in group]
+    decision["group_digest"] = group_digest(group, eligible)
+    decision["recheck_after"] = edge.isoformat() if edge else None
+    return decision
+
+
+def _rebind(x, new_by_old):
+    """Copy of a carried decision/issue pointing at this run's offers: *offer_id values are swapped for the new ids
+    and captured_at is refreshed next to a swapped offer_id, as a full pass over the current offers writes them."""
+    if isinstance(x, list):
+        return [_rebind(v, new_by_old) for v in x]
+    if not isinstance(x, dict):
+        return x
+    y = {}
+    for k, v in x.items():
+        if k.endswith("offer_id") and isinstance(v, str) and v in new_by_old:
+            y[k] = new_by_old[v].get("offer_id")
+        else:
+            y[k] = _rebind(v, new_by_old)
+    off = new_by_old.get(x.get("offer_id"))
+    if off is not None and "captured_at" in y:
+        y["captured_at"] = off.get("captured_at")
+    return y
+
+
+def optimize_sourcing(offers, overrides, defaults, phase=1, enable_phase2_rules=False, enable_production_overrides=False,
+                      rollout_categories="", service_tag="CAT", now=None, demand=None):
+    """demand: product_id -> (qty, base unit) from load_demand(); those products are sourced by cheapest pack spend."""
+    ctx = _policy_ctx(overrides, defaults, phase, enable_phase2_rules, enable_production_overrides, rollout_categories, service_tag, demand)
+    now = now or datetime.now(timezone.utc)
+    issues = []
+    by_product, all_by_product, edges = _group_offers(offers, ctx, now, issues)
+    decisions = []
+    for pid, group in by_product.items():
+        d = _decide(pid, group, ctx, issues)
+        if d is not None:
+            decisions.append(_stamp(d, all_by_product[pid], group, edges.get(pid)))
+
+    return decisions, issues
+
+
+def _group_offers(offers, ctx, now, issues):
+    """Mapping/age validation: (age-eligible offers per product, all offers per product, recheck edges)."""
+    by_product = {}
+    all_by_product = {}
+    edges = {}
+    for off in offers:
+        pid = off.get("product_id")
+        if not pid:
+            add_issue(issues, "BLOCK", "SRC-UNMAPPED", "Offer has no product_id (needs mapping)", offer_id=off.get("offer_id"))
+            continue
+        all_by_product.setdefault(pid, []).append(off)
+        if _check_age(off, pid, ctx, now, issues, edges):
+            by_product.setdefault(pid, []).append(off)
+    return by_product, all_by_product, edges
+
+
+def optimize_sourcing_presets(offers, presets, defaults, phase=1, enable_phase2_rules=False, enable_production_overrides=False,
+                              rollout_categories="", service_tag="CAT", now=None, demand=None):
+    """presets: name -> overrides list. Offers are grouped and age-checked once, then every preset decides over
+    the shared groups; returns name -> (decisions, issues), each equal to optimize_sourcing() with that preset."""
+    now = now or datetime.now(timezone.utc)
+    flags = (phase, enable_phase2_rules, enable_production_overrides, rollout_categories, service_tag, demand)
+    offer_issues = []
+    by_product, all_by_product, edges = _group_offers(offers, _policy_ctx([], defaults, *flags), now, offer_issues)
+    results = {}
+    for name, overrides in presets.items():
+        ctx = _policy_ctx(overrides, defaults, *flags)
+        product_issues = []
+        decisions = []
+        for pid, group in by_product.items():
+            d = _decide(pid, group, ctx, product_issues)
+            if d is not None:
+                decisions.append(_stamp(d, all_by_product[pid], group, edges.get(pid)))
+        results[name] = (decisions, [dict(x) for x in offer_issues] + product_issues)
+    return results
+
+
+def _decision_cost(d):
+    return d["demand_spend"] if d.get("demand_spend") is not None else float(d.get("chosen_price_per_base_unit", 0) or 0)
+
+
+def preset_comparison(results):
+    """Report for optimize_sourcing_presets(): per-product choice differences and basket cost deltas vs the first preset.
+
+    Basket cost sums demand_spend where a demand was given, else chosen price_per_base_unit, over the products
+    every preset could decide, so totals stay comparable when a preset blocks a product.
+    """
+    names = list(results)
+    by_name = {n: {d.get("product_id"): d for d in results[n][0]} for n in names}
+    pids = []
+    seen = set()
+    for n in names:
+        for d in results[n][0]:
+            pid = d.get("product_id")
+            if pid not in seen:
+                seen.add(pid)
+                pids.append(pid)
+    common = [pid for pid in pids if all(pid in by_name[n] for n in names)]
+    cost_basis = "demand_spend" if any(d.get("demand_spend") is not None for n in names for d in results[n][0]) else "price_per_base_unit"
+
+    per_preset = {}
+    for n in names:
+        decs, issues = results[n]
+        rules = {}
+        for d in decs:
+            rules[d.get("rule_applied")] = rules.get(d.get("rule_applied"), 0) + 1
+        per_preset[n] = {
+            "decisions": len(decs),
+            "blocked_products": len({x.get("product_id") for x in issues if x.get("severity") == "BLOCK" and x.get("product_id")}),
+            "rule_counts": rules,
+            "undecided": [pid for pid in pids if pid not in by_name[n]],
+            "basket_cost": round(sum(_decision_cost(by_name[n][pid]) for pid in common), 6),
+        }
+    base = names[0] if names else None
+    for n in names:
+        per_preset[n]["delta_vs_base"] = round(per_preset[n]["basket_cost"] - per_preset[base]["basket_cost"], 6)
+
+    differences = []
+    for pid in pids:
+        chosen = {n: (by_name[n][pid].get("chosen_offer_id") if pid in by_name[n] else None) for n in names}
+        if len(set(chosen.values())) <= 1:
+            continue
+        choices = {}
+        for n in names:
+            d = by_name[n].get(pid)
+            choices[n] = None if d is None else {
+                "chosen_offer_id": d.get("chosen_offer_id"),
+                "selected_supplier": d.get("selected_supplier"),
+                "rule_applied": d.get("rule_applied"),
+                "cost": _decision_cost(d),
             }
-            candidates_view.append(entry)
-            if g.get("offer_id") != chosen.get("offer_id"):
-                diff = None if cp == 0 else ((gp - cp) / cp) * 100
-                alternatives.append({
-                    **entry,
-                    "diff_pct": None if diff is None else round(diff, 2),
-                })
-
-        decision_key = "supplier_sku" if str(chosen.get("supplier_sku", "")).strip() else "desc_pack_exact"
-        if decision_key == "desc_pack_exact":
-            reason_codes.append("NO_SKU_KEY")
-
-        decisions.append({
-            "product_id": pid,
-            "chosen_offer_id": chosen.get("offer_id"),
-            "selected_supplier": chosen.get("supplier"),
-            "decision_key": decision_key,
-            "rule_applied": rule_applied,
-            "candidates": candidates_view,
-            "candidates_considered": candidates_view[:5],
-            "policy_hits": policy_hits,
-            "alternatives": alternatives,
-            "override_ref": override_ref,
-            "reason_codes": reason_codes,
-            "lowest_global_offer_id": lowest.get("offer_id"),
-            "lowest_global_price_per_base_unit": lowest_price,
-            "chosen_price_per_base_unit": cp,
-            "savings_vs_lowest_global_per_base_unit": round(lowest_price - cp, 6),
-            "decision_ts": datetime.now(timezone.utc).isoformat(),
-        })
+        row = {"product_id": pid, "choices": choices}
+        if choices.get(base) is not None:
+            row["cost_delta_vs_base"] = {n: None if c is None else round(c["cost"] - choices[base]["cost"], 6) for n, c in choices.items()}
+        differences.append(row)
+
+    return {
+        "presets": names,
+        "base": base,
+        "cost_basis": cost_basis,
+        "products": len(pids),
+        "comparable_products": len(common),
+        "differing_products": len(differences),
+        "per_preset": per_preset,
+        "differences": differences,
+    }
+
+
+OFFER_ISSUE_CODES = {"SRC-UNMAPPED", "SRC-NO-CAPTURED-AT", "SRC-PRICE-TOO-OLD", "SRC-PRICE-STALE", "SRC-VALID-UNTIL-PASSED"}
+
+
+def optimize_sourcing_incremental(offers, prev_decisions, prev_issues, overrides, defaults, changed_offer_ids=(), changed_product_ids=(),
+                                  phase=1, enable_phase2_rules=False, enable_production_overrides=False, rollout_categories="",
+                                  service_tag="CAT", now=None, demand=None):
+    """Recompute only product groups that changed since prev_decisions; carry the rest forward.
+
+    Offers are matched across runs by offer_key() (supplier::supplier_sku), not offer_id: importers rebuild ids
+    and captured_at on every import. Mapping and age checks always run over all offers (they are cheap and depend
+    on `now`); only per-product decisions are carried. A product is recomputed when it is listed in
+    changed_product_ids, owns a changed offer_id, its offer keys differ from the carried decision's
+    group_offer_keys, or its digest (decision-relevant fields plus each offer's age-eligibility) differs from the
+    carried group_digest. changed_offer_ids is therefore a hint, not a requirement. Carried decisions and their
+    product issues are rebound to the current offer ids. Policies and flags must match the previous run.
+    Output equals optimize_sourcing() for the same inputs apart from carried decision_ts values.
+    """
+    ctx = _policy_ctx(overrides, defaults, phase, enable_phase2_rules, enable_production_overrides, rollout_categories, service_tag, demand)
+    now = now or datetime.now(timezone.utc)
+    changed_offer_ids = {str(x) for x in changed_offer_ids or ()}
+    changed_product_ids = {str(x) for x in changed_product_ids or ()}
+    prev_by_pid = {d.get("product_id"): d for d in prev_decisions or []}
+    prev_product_issues = {}
+    for x in prev_issues or []:
+        if x.get("code") not in OFFER_ISSUE_CODES and x.get("product_id"):
+            prev_product_issues.setdefault(x.get("product_id"), []).append(x)
+
+    offer_issues = []
+    by_product, all_by_product, edges = _group_offers(offers, ctx, now, offer_issues)
+    decisions = []
+    product_issues = []
+    stats = {"products": len(all_by_product), "recomputed": 0, "carried": 0}
+    for pid, group in by_product.items():
+        full = all_by_product[pid]
+        prev = prev_by_pid.get(pid)
+        carry = (
+            prev is not None
+            and str(pid) not in changed_product_ids
+            and not any(str(o.get("offer_id")) in changed_offer_ids for o in full)
+            and prev.get("group_offer_keys") == [offer_key(o) for o in full]
+            and len(prev.get("group_offer_ids") or []) == len(full)
+            and prev.get("group_digest") == group_digest(full, group)
+        )
+        if not carry:
+            stats["recomputed"] += 1
+            d = _decide(pid, group, ctx, product_issues)
+            if d is not None:
+                decisions.append(_stamp(d, full, group, edges.get(pid)))
+            continue
+        stats["carried"] += 1
+        new_by_old = dict(zip(prev["group_offer_ids"], full))
+        d = _rebind(prev, new_by_old)
+        d["group_offer_ids"] = [o.get("offer_id") for o in full]
+        d["recheck_after"] = edges[pid].isoformat() if edges.get(pid) else None
+        decisions.append(d)
+        product_issues.extend(_rebind(prev_product_issues.get(pid, []), new_by_old))
+    # products left without an age-eligible offer are settled by the age checks alone
+    stats["recomputed"] += len(set(all_by_product) - set(by_product))
+    return decisions, offer_issues + product_issues, stats
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Sourcing optimizer with Phase-1 safe defaults and Phase-2 BAN/PREFER toggle")
+    p.add_argument("--offers", required=True)
+    p.add_argument("--overrides", required=True)
+    p.add_argument("--defaults", required=True)
+    p.add_argument("--out", required=True)
+    p.add_argument("--issues-out", required=True)
+    p.add_argument("--phase", type=int, default=1)
+    p.add_argument("--enable-phase2-rules", action="store_true")
+    p.add_argument("--enable-production-overrides", action="store_true")
+    p.add_argument("--rollout-categories", default="")
+    p.add_argument("--policies", required=False, default=None)
+    p.add_argument("--service-tag", required=False, default="CAT")
+    p.add_argument("--prev-decisions", required=False, default=None, help="incremental mode: decisions.json of a run with the same policies/flags")
+    p.add_argument("--prev-issues", required=False, default=None)
+    p.add_argument("--changed-offer-ids", required=False, default="", help="comma-separated offer_ids whose content changed")
+    p.add_argument("--changed-product-ids", required=False, default="")
+    p.add_argument("--demand", required=False, default=None, help="event_purchase.json, recipes json or {product_id: qty}: source by cheapest pack spend")
+    args = p.parse_args(argv)
+
+    offers = json.loads(Path(args.offers).read_text(encoding="utf-8"))
+    overrides = load_overrides(args.overrides, args.policies)
+    defaults = json.loads(Path(args.defaults).read_text(encoding="utf-8"))
+    flags = dict(
+        phase=args.phase,
+        enable_phase2_rules=args.enable_phase2_rules,
+        enable_production_overrides=args.enable_production_overrides,
+        rollout_categories=args.rollout_categories,
+        service_tag=args.service_tag,
+        demand=load_demand(args.demand) if args.demand else None,
+    )
+
+    stats = None
+    if args.prev_decisions:
+        prev_issues = json.loads(Path(args.prev_issues).read_text(encoding="utf-8")) if args.prev_issues else []
+        decisions, issues, stats = optimize_sourcing_incremental(
+            offers,
+            json.loads(Path(args.prev_decisions).read_text(encoding="utf-8")),
+            prev_issues,
+            overrides,
+            defaults,
+            changed_offer_ids=[x.strip() for x in args.changed_offer_ids.split(",") if x.strip()],
+            changed_product_ids=[x.strip() for x in args.changed_product_ids.split(",") if x.strip()],
+            **flags,
+        )
+    else:
+        decisions, issues = optimize_sourcing(offers, overrides, defaults, **flags)
+    phase2_active = args.enable_phase2_rules or args.phase >= 2
 
     out = Path(args.out)
     out.parent.mkdir(parents=True, exist_ok=True)
@@ -283,7 +816,10 @@ def main():
     issues_out.parent.mkdir(parents=True, exist_ok=True)
     issues_out.write_text(json.dumps(issues, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    print(json.dumps({"decisions": len(decisions), "issues": len(issues), "phase2_active": phase2_active}, ensure_ascii=False))
+    res = {"decisions": len(decisions), "issues": len(issues), "phase2_active": phase2_active}
+    if stats is not None:
+        res.update({"recomputed": stats["recomputed"], "carried": stats["carried"]})
+    print(json.dumps(res, ensure_ascii=False))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,281 @@
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, time, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+HISTORY_ROOT = ROOT / "state" / "price_history"
+LOG_NAME = "offers.jsonl"
+INDEX_NAME = "index.json"
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import optimize_sourcing  # noqa: E402
+
+# in-memory index per log file, persisted to index.json:
+# {"offset": bytes consumed, "records": n, "keys": {key: [[ts, offset, fp], ...] sorted}, "products": {pid: [key, ...]}}
+_INDEX = {}
+
+
+def _log_path(root=None):
+    return Path(root or HISTORY_ROOT) / LOG_NAME
+
+
+def _index_path(root=None):
+    return Path(root or HISTORY_ROOT) / INDEX_NAME
+
+
+def _ts(v):
+    dt = v if isinstance(v, datetime) else optimize_sourcing.parse_dt(v)
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def parse_as_of(v):
+    """--as-of value -> aware datetime; a bare date means the end of that day (UTC)."""
+    s = str(v or "").strip()
+    if len(s) == 10:
+        try:
+            d = datetime.strptime(s, "%Y-%m-%d").date()
+        except ValueError:
+            raise RuntimeError(f"invalid --as-of: {v}")
+        return datetime.combine(d, time.max, tzinfo=timezone.utc)
+    dt = optimize_sourcing.parse_dt(s)
+    if dt is None:
+        raise RuntimeError(f"invalid --as-of: {v}")
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def history_key(row):
+    sku = str(row.get("supplier_sku") or "").strip() or f"offer:{row.get('offer_id')}"
+    return f"{row.get('product_id')}|{str(row.get('supplier') or '').strip()}|{sku}"
+
+
+def _fingerprint(row):
+    return hashlib.sha1(json.dumps(row, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _empty_index():
+    return {"offset": 0, "records": 0, "keys": {}, "products": {}}
+
+
+def _load_index(root=None):
+    """Index of the append-only log; only bytes appended since the persisted/in-memory offset are read."""
+    p = _log_path(root)
+    key = str(p)
+    if not p.exists():
+        _INDEX.pop(key, None)
+        return _empty_index()
+    idx = _INDEX.get(key)
+    if idx is None:
+        ip = _index_path(root)
+        try:
+            idx = json.loads(ip.read_text(encoding="utf-8")) if ip.exists() else _empty_index()
+        except Exception:
+            idx = _empty_index()
+    size = p.stat().st_size
+    if size < idx.get("offset", 0):
+        idx = _empty_index()
+    if size > idx["offset"]:
+        with p.open("rb") as f:
+            f.seek(idx["offset"])
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        pos = idx["offset"]
+        for raw in chunk[:end].splitlines(keepends=True):
+            try:
+                rec = json.loads(raw.decode("utf-8"))
+            except Exception:
+                pos += len(raw)
+                continue
+            entries = idx["keys"].get(rec["key"])
+            if entries is None:
+                entries = idx["keys"][rec["key"]] = []
+                idx["products"].setdefault(rec["product_id"], []).append(rec["key"])
+            bisect.insort(entries, [rec["ts"], pos, rec["fp"]])
+            idx["records"] += 1
+            pos += len(raw)
+        idx["offset"] += end
+        _save_index(idx, root)
+    _INDEX[key] = idx
+    return idx
+
+
+def _save_index(idx, root=None):
+    p = _index_path(root)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f"index.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(idx, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def record_offers(rows, source=None, root=None):
+    """Append mapped offers (product_id + captured_at) to the history; re-recording an identical observation is a no-op.
+
+    Returns {"added", "duplicates", "skipped"} (skipped = unmapped or without a parseable captured_at).
+    """
+    idx = _load_index(root)
+    stats = {"added": 0, "duplicates": 0, "skipped": 0}
+    now = datetime.now(timezone.utc).isoformat()
+    lines = []
+    pending = set()
+    for r in rows or []:
+        ts = _ts(r.get("captured_at"))
+        if not r.get("product_id") or ts is None:
+            stats["skipped"] += 1
+            continue
+        k = history_key(r)
+        fp = _fingerprint(r)
+        if (k, ts, fp) in pending or any(e[0] == ts and e[2] == fp for e in idx["keys"].get(k, [])):
+            stats["duplicates"] += 1
+            continue
+        pending.add((k, ts, fp))
+        lines.append(json.dumps({
+            "key": k,
+            "product_id": r.get("product_id"),
+            "supplier": r.get("supplier"),
+            "supplier_sku": r.get("supplier_sku", ""),
+            "captured_at": r.get("captured_at"),
+            "valid_until": r.get("valid_until"),
+            "ts": ts,
+            "fp": fp,
+            "source": source,
+            "recorded_at": now,
+            "offer": r,
+        }, ensure_ascii=False) + "\n")
+        stats["added"] += 1
+    if lines:
+        p = _log_path(root)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        # one O_APPEND write per batch so concurrent imports never interleave records
+        fd = os.open(str(p), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, "".join(lines).encode("utf-8"))
+        finally:
+            os.close(fd)
+        _load_index(root)
+    return stats
+
+
+def _read_records(idx, refs, root=None):
+    out = []
+    with _log_path(root).open("rb") as f:
+        for off in refs:
+            f.seek(off)
+            out.append(json.loads(f.readline().decode("utf-8")))
+    return out
+
+
+def _latest_refs(idx, keys, as_of_ts):
+    refs = []
+    for k in keys:
+        entries = idx["keys"].get(k, [])
+        # entries are sorted by (ts, offset): the last one at or before as_of is the observation in force
+        i = bisect.bisect_right(entries, [as_of_ts, float("inf"), ""])
+        if i:
+            refs.append(entries[i - 1][1])
+    return refs
+
+
+def price_at(product_id, as_of, root=None):
+    """One row per supplier/sku: the latest observation captured at or before as_of, flagged valid_at_as_of."""
+    idx = _load_index(root)
+    as_of_ts = _ts(as_of)
+    recs = _read_records(idx, _latest_refs(idx, idx["products"].get(product_id, []), as_of_ts), root)
+    out = []
+    for rec in sorted(recs, key=lambda x: (str(x.get("supplier") or ""), str(x.get("supplier_sku") or ""))):
+        off = rec["offer"]
+        vu = _ts(rec.get("valid_until"))
+        out.append({
+            "product_id": product_id,
+            "supplier": rec.get("supplier"),
+            "supplier_sku": rec.get("supplier_sku"),
+            "offer_id": off.get("offer_id"),
+            "price": off.get("price"),
+            "price_per_base_unit": off.get("price_per_base_unit"),
+            "pack_size": off.get("pack_size"),
+            "pack_unit": off.get("pack_unit"),
+            "in_stock": off.get("in_stock"),
+            "captured_at": rec.get("captured_at"),
+            "valid_until": rec.get("valid_until"),
+            "valid_at_as_of": vu is None or vu >= as_of_ts,
+            "source": rec.get("source"),
+        })
+    return out
+
+
+def offers_as_of(as_of, product_ids=None, root=None):
+    """Mapped offers as the history saw them at as_of (latest observation per product/supplier/sku)."""
+    idx = _load_index(root)
+    pids = sorted(idx["products"]) if product_ids is None else [p for p in product_ids if p in idx["products"]]
+    keys = [k for pid in pids for k in idx["products"][pid]]
+    recs = _read_records(idx, _latest_refs(idx, keys, _ts(as_of)), root)
+    recs.sort(key=lambda x: x["key"])
+    return [x["offer"] for x in recs]
+
+
+def decisions_as_of(as_of, overrides, defaults, root=None, product_ids=None, **flags):
+    """(offers, decisions, issues) re-sourced from the history with the clock set to as_of."""
+    offers = offers_as_of(as_of, product_ids, root)
+    decisions, issues = optimize_sourcing.optimize_sourcing(offers, overrides, defaults, now=as_of, **flags)
+    return offers, decisions, issues
+
+
+def stats(root=None):
+    idx = _load_index(root)
+    return {"records": idx["records"], "keys": len(idx["keys"]), "products": len(idx["products"]), "log": str(_log_path(root))}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Append-only price history: record mapped offers, query prices/decisions as of a date")
+    p.add_argument("--root", default=str(HISTORY_ROOT))
+    p.add_argument("--record", default=None, help="mapped offers json to append")
+    p.add_argument("--source", default=None, help="label stored with --record rows (e.g. run dir)")
+    p.add_argument("--as-of", default=None, help="ISO datetime or YYYY-MM-DD (end of day UTC)")
+    p.add_argument("--product", default=None, help="with --as-of: price of this product_id per supplier")
+    p.add_argument("--offers-out", default=None, help="with --as-of: mapped offers in force at that time")
+    p.add_argument("--decisions-out", default=None, help="with --as-of: sourcing decisions re-run at that time")
+    p.add_argument("--issues-out", default=None)
+    p.add_argument("--overrides", default=str(ROOT / "config" / "overrides.json"))
+    p.add_argument("--policies", default=None)
+    p.add_argument("--defaults", default=str(ROOT / "config" / "defaults.json"))
+    p.add_argument("--phase", type=int, default=1)
+    p.add_argument("--enable-phase2-rules", action="store_true")
+    p.add_argument("--service-tag", default="CAT")
+    args = p.parse_args(argv)
+
+    if args.record:
+        rows = json.loads(Path(args.record).read_text(encoding="utf-8"))
+        print(json.dumps(record_offers(rows, source=args.source or args.record, root=args.root), ensure_ascii=False))
+        return
+    if not args.as_of:
+        print(json.dumps(stats(args.root), ensure_ascii=False))
+        return
+    as_of = parse_as_of(args.as_of)
+    if args.product:
+        print(json.dumps(price_at(args.product, as_of, args.root), ensure_ascii=False, indent=2))
+    if args.offers_out or args.decisions_out:
+        overrides = optimize_sourcing.load_overrides(args.overrides, args.policies)
+        defaults = json.loads(Path(args.defaults).read_text(encoding="utf-8"))
+        offers, decisions, issues = decisions_as_of(
+            as_of, overrides, defaults, args.root,
+            phase=args.phase, enable_phase2_rules=args.enable_phase2_rules, service_tag=args.service_tag,
+        )
+        for path, obj in [(args.offers_out, offers), (args.decisions_out, decisions), (args.issues_out, issues)]:
+            if path:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                Path(path).write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(json.dumps({"as_of": as_of.isoformat(), "offers": len(offers), "decisions": len(decisions), "issues": len(issues)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
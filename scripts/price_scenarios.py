@@ -0,0 +1,270 @@
+import argparse
+import json
+import random
+import sys
+import time
+from itertools import repeat
+from operator import add, mul
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import cost_recipe  # noqa: E402
+
+FIELDS = ("category", "supplier", "product_id")
+PERCENTILES = (5, 50, 95)
+
+
+def norm(s) -> str:
+    return " ".join(str(s or "").strip().lower().split())
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _selector(field, value):
+    field = norm(field)
+    if field not in FIELDS:
+        raise RuntimeError(f"unknown shock field '{field}' (expected one of {', '.join(FIELDS)})")
+    return field, norm(value)
+
+
+def parse_shock(text):
+    """'category:Λαχανικά=-5, supplier:Alios=+8' -> [{"field", "value", "pct"}]."""
+    out = []
+    for part in [x for x in str(text or "").replace(";", ",").split(",") if x.strip()]:
+        sel, _, pct = part.rpartition("=")
+        field, _, value = sel.partition(":")
+        if not sel or not value:
+            raise RuntimeError(f"invalid shock '{part.strip()}' (expected field:value=pct)")
+        f, v = _selector(field, value)
+        out.append({"field": f, "value": v, "pct": float(pct)})
+    return out
+
+
+def parse_range(text):
+    """'category:Λαχανικά=-5..15' -> {"field", "value", "min", "max"} (uniform draw in pct)."""
+    sel, _, rng = str(text or "").rpartition("=")
+    field, _, value = sel.partition(":")
+    lo, sep, hi = rng.partition("..")
+    if not sel or not value or not sep:
+        raise RuntimeError(f"invalid range '{text}' (expected field:value=min..max)")
+    f, v = _selector(field, value)
+    return {"field": f, "value": v, "min": float(lo), "max": float(hi)}
+
+
+def catalog_categories(catalog):
+    items = catalog.get("items", []) if isinstance(catalog, dict) else catalog or []
+    return {x.get("product_id"): x.get("category") for x in items if x.get("product_id")}
+
+
+def build_matrix(costs, categories):
+    """Recipe x (product, supplier) per-portion cost matrix from cost breakdowns, stored by column.
+
+    Packaging and labor stay fixed under a price shock; only ingredient lines are columns.
+    """
+    recipes, cols, col_index = [], [], {}
+    for ri, c in enumerate(costs):
+        total = float(c.get("total_cost") or 0)
+        scale = float(c.get("per_portion") or 0) / total if total else 0.0
+        recipes.append({"recipe_id": c.get("recipe_id"), "status": c.get("status"), "per_portion": float(c.get("per_portion") or 0)})
+        if not scale:
+            continue
+        for ln in c.get("lines", []) or []:
+            pid = ln.get("product_id")
+            key = (pid, norm(ln.get("supplier")))
+            j = col_index.get(key)
+            if j is None:
+                j = col_index[key] = len(cols)
+                cols.append({"product_id": norm(pid), "supplier": key[1], "category": norm(categories.get(pid)), "rows": {}})
+            cols[j]["rows"][ri] = cols[j]["rows"].get(ri, 0.0) + float(ln.get("line_cost") or 0) * scale
+    return {"recipes": recipes, "columns": cols}
+
+
+def compile_classes(matrix, selectors):
+    """Collapse columns hit by the same set of selectors into one shock class: {rule ids: {recipe: per-portion cost}}.
+
+    Columns no selector touches never move and are dropped, so evaluation cost scales with classes, not products.
+    """
+    classes = {}
+    for col in matrix["columns"]:
+        hit = tuple(i for i, (f, v) in enumerate(selectors) if col[f] == v)
+        if not hit:
+            continue
+        rows = classes.setdefault(hit, {})
+        for ri, c in col["rows"].items():
+            rows[ri] = rows.get(ri, 0.0) + c
+    return classes
+
+
+def evaluate(matrix, selectors, vectors):
+    """Per-portion cost of every recipe under every shock vector (pct per selector): [recipe][scenario].
+
+    A class moves by prod(1 + pct/100) over its selectors; each recipe row is updated with whole-vector map() passes.
+    """
+    n = len(vectors)
+    out = [[r["per_portion"]] * n for r in matrix["recipes"]]
+    for hit, rows in compile_classes(matrix, selectors).items():
+        moves = []
+        for vec in vectors:
+            f = 1.0
+            for i in hit:
+                f *= 1.0 + vec[i] / 100.0
+            moves.append(f - 1.0)
+        for ri, c in rows.items():
+            out[ri] = list(map(add, out[ri], map(mul, moves, repeat(c))))
+    return out
+
+
+def random_vectors(ranges, n, seed=None, width=None):
+    """n shock vectors drawing each range's pct uniformly; selectors beyond the ranges stay at 0."""
+    rnd = random.Random(seed)
+    width = width or len(ranges)
+    out = []
+    for _ in range(int(n)):
+        vec = [0.0] * width
+        for i, r in enumerate(ranges):
+            vec[i] = rnd.uniform(r["min"], r["max"])
+        out.append(vec)
+    return out
+
+
+def _pct(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def run_scenarios(costs, categories, scenarios=None, ranges=None, n_random=0, seed=None):
+    """Named scenarios ([{"name", "shocks": [...]}]) plus n_random draws over `ranges`, evaluated in one pass.
+
+    Returns the report: per-recipe per-portion distribution (min/p5/p50/p95/max/mean, worst scenario)
+    and, for the named scenarios, the per-portion cost of each recipe.
+    """
+    t0 = time.perf_counter()
+    matrix = build_matrix(costs, categories)
+    scenarios = scenarios or []
+    ranges = ranges or []
+    # ranges take the leading selector slots so random_vectors can fill them positionally
+    selectors, sel_index = [], {}
+    for k in [(r["field"], r["value"]) for r in ranges] + [(sh["field"], sh["value"]) for s in scenarios for sh in s["shocks"]]:
+        if k not in sel_index:
+            sel_index[k] = len(selectors)
+            selectors.append(k)
+    if len({(r["field"], r["value"]) for r in ranges}) < len(ranges):
+        raise RuntimeError("duplicate range selector")
+
+    vectors, names = [], []
+    for s in scenarios:
+        vec = [0.0] * len(selectors)
+        for sh in s["shocks"]:
+            i = sel_index[(sh["field"], sh["value"])]
+            vec[i] = (1.0 + vec[i] / 100.0) * (1.0 + sh["pct"] / 100.0) * 100.0 - 100.0
+        vectors.append(vec)
+        names.append(s.get("name") or f"S{len(names) + 1}")
+    if n_random and ranges:
+        drawn = random_vectors(ranges, n_random, seed, width=len(selectors))
+        vectors.extend(drawn)
+        names.extend(f"R{i}" for i in range(1, len(drawn) + 1))
+    t_build = time.perf_counter()
+
+    values = evaluate(matrix, selectors, vectors) if vectors else [[] for _ in matrix["recipes"]]
+    t_eval = time.perf_counter()
+
+    rows = []
+    for r, vals in zip(matrix["recipes"], values):
+        s = sorted(vals)
+        row = {
+            "recipe_id": r["recipe_id"],
+            "status": r["status"],
+            "per_portion_base": round(r["per_portion"], 6),
+            "min": round(s[0], 6) if s else None,
+            "max": round(s[-1], 6) if s else None,
+            "mean": round(sum(s) / len(s), 6) if s else None,
+        }
+        for p in PERCENTILES:
+            v = _pct(s, p)
+            row[f"p{p}"] = round(v, 6) if v is not None else None
+        if s:
+            worst = max(range(len(vals)), key=vals.__getitem__)
+            row["worst_scenario"] = names[worst]
+            row["worst_delta_pct"] = round((vals[worst] - r["per_portion"]) / r["per_portion"] * 100.0, 4) if r["per_portion"] else None
+        rows.append(row)
+    named = [
+        {"name": names[i], "shocks": scenarios[i]["shocks"],
+         "per_portion": {r["recipe_id"]: round(values[ri][i], 6) for ri, r in enumerate(matrix["recipes"])}}
+        for i in range(len(scenarios))
+    ]
+    return {
+        "selectors": [{"field": f, "value": v} for f, v in selectors],
+        "scenarios": len(vectors),
+        "named_scenarios": named,
+        "random_scenarios": len(vectors) - len(scenarios),
+        "seed": seed,
+        "recipes": rows,
+        "matrix": {"recipes": len(matrix["recipes"]), "columns": len(matrix["columns"])},
+        "build_ms": round((t_build - t0) * 1000.0, 3),
+        "eval_ms": round((t_eval - t_build) * 1000.0, 3),
+    }
+
+
+def load_scenarios(path):
+    """Scenario file: {"scenarios": [{"name", "shocks": [{"field", "value", "pct"}] | "field:value=pct, ..."}],
+    "random": {"n", "seed", "ranges": [{"field", "value", "min", "max"}] | ["field:value=min..max"]}}."""
+    obj = load_json(Path(path), {})
+    scenarios = []
+    for s in obj.get("scenarios", []):
+        shocks = parse_shock(s["shocks"]) if isinstance(s.get("shocks"), str) else [
+            {**dict(zip(("field", "value"), _selector(x["field"], x["value"]))), "pct": float(x["pct"])} for x in s.get("shocks", [])
+        ]
+        scenarios.append({"name": s.get("name"), "shocks": shocks})
+    rnd = obj.get("random") or {}
+    ranges = [parse_range(x) if isinstance(x, str) else {**dict(zip(("field", "value"), _selector(x["field"], x["value"]))), "min": float(x["min"]), "max": float(x["max"])}
+              for x in rnd.get("ranges", [])]
+    return scenarios, ranges, int(rnd.get("n", 0) or 0), rnd.get("seed")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Price-shock scenarios: per-portion cost distribution per recipe")
+    p.add_argument("--recipes-mapped", required=True, help="mapped recipe list (or a single recipe) json")
+    p.add_argument("--offers", required=True)
+    p.add_argument("--decisions", required=True)
+    p.add_argument("--defaults", default=str(ROOT / "config" / "defaults.json"))
+    p.add_argument("--catalog", default=str(ROOT / "data" / "catalog.json"))
+    p.add_argument("--scenarios", default=None, help="scenario file (named scenarios and/or a random block)")
+    p.add_argument("--shock", action="append", default=[], help="named scenario, e.g. 'category:Λαχανικά=-5,supplier:Alios=+8' (repeatable)")
+    p.add_argument("--range", action="append", default=[], help="random draw range, e.g. 'category:Λαχανικά=-5..15' (repeatable)")
+    p.add_argument("--random", type=int, default=0, help="number of random scenarios over --range")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--confirm-stale", action="store_true")
+    p.add_argument("--out", required=True)
+    args = p.parse_args(argv)
+
+    recipes = load_json(Path(args.recipes_mapped), [])
+    recipes = recipes if isinstance(recipes, list) else [recipes]
+    costs = [c for c, _ in cost_recipe.cost_recipes(
+        recipes, load_json(Path(args.offers), []), load_json(Path(args.decisions), []), load_json(Path(args.defaults), {}),
+        confirm_stale=args.confirm_stale,
+    )]
+    scenarios, ranges, n, seed = load_scenarios(args.scenarios) if args.scenarios else ([], [], 0, None)
+    scenarios += [{"name": s, "shocks": parse_shock(s)} for s in args.shock]
+    ranges += [parse_range(r) for r in args.range]
+    report = run_scenarios(costs, catalog_categories(load_json(Path(args.catalog), {})), scenarios, ranges,
+                           args.random or n, args.seed if args.seed is not None else seed)
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(json.dumps({"scenarios": report["scenarios"], "recipes": len(report["recipes"]), "eval_ms": report["eval_ms"]}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
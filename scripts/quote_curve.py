@@ -0,0 +1,234 @@
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import cost_recipe  # noqa: E402
+import event_purchase  # noqa: E402
+import generate_proposal_payload as payload_math  # noqa: E402
+
+COST_BASES = ("purchase", "consumed")
+CSV_FIELDS = [
+    "guests", "food_cost", "packaging_cost", "labor_cost", "cost_total", "cost_per_person",
+    "net_selling", "vat_value", "gross_total", "price_per_person", "packs", "break_point",
+]
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def headcounts(start, stop, step):
+    start, stop, step = int(start), int(stop), int(step)
+    if start <= 0 or stop < start or step <= 0:
+        raise RuntimeError(f"invalid headcount range {start}..{stop} step {step}")
+    out = list(range(start, stop + 1, step))
+    if out[-1] != stop:
+        out.append(stop)
+    return out
+
+
+def _packs(needed, pack_size):
+    return int(math.ceil(needed / pack_size - event_purchase.PACK_EPS)) if pack_size > 0 else 0
+
+
+def _first_guest_over(packs, it):
+    """Smallest headcount whose need no longer fits in `packs` packs of this item."""
+    g = int(math.floor(packs * it["pack_size"] / it["need_per_guest"])) + 1
+    while g > 1 and _packs(it["need_per_guest"] * (g - 1), it["pack_size"]) > packs:
+        g -= 1
+    while _packs(it["need_per_guest"] * g, it["pack_size"]) <= packs:
+        g += 1
+    return g
+
+
+def per_guest_model(recipes, costs, defaults):
+    """Split one costing of the recipe set into per-guest product needs, per-guest extras and fixed event cost.
+
+    Ingredient needs and packaging_items scale with portions (one portion per guest unless the recipe sets
+    portions_per_guest), consumables scale with guests; packaging_event_items and prep labor are per event.
+    """
+    hourly_rate = float(defaults.get("costing", {}).get("hourly_rate", 16.0) or 16.0)
+    items = {}
+    per_guest = fixed = labor = 0.0
+    for recipe, cost in zip(recipes, costs):
+        portions = float(recipe.get("portions") or 0)
+        if not portions:
+            continue
+        ppg = float(recipe.get("portions_per_guest", 1) or 1)
+        scale = ppg / portions
+        for ln in cost.get("lines", []) or []:
+            key = (ln.get("product_id"), ln.get("chosen_offer_id"))
+            it = items.get(key)
+            if it is None:
+                it = items[key] = {
+                    "product_id": ln.get("product_id"),
+                    "chosen_offer_id": ln.get("chosen_offer_id"),
+                    "supplier": ln.get("supplier"),
+                    "pack_size": float(ln.get("pack_size") or 0),
+                    "price_per_base_unit": float(ln.get("price_per_base_unit") or 0),
+                    "need_per_guest": 0.0,
+                }
+            it["need_per_guest"] += float(ln.get("actual_needed_base") or 0) * scale
+        for item in recipe.get("packaging_items", []) or []:
+            per_guest += float(item.get("qty", 0) or 0) * float(item.get("unit_cost", 0) or 0) * scale
+        per_guest += float(recipe.get("consumable_rate_per_person", 0) or 0) * ppg
+        for item in recipe.get("packaging_event_items", []) or []:
+            fixed += float(item.get("flat_cost", 0) or 0)
+        labor += float(recipe.get("prep_minutes", 0) or 0) / 60.0 * hourly_rate
+    return {"items": sorted(items.values(), key=lambda x: (str(x["product_id"]), str(x["chosen_offer_id"]))),
+            "packaging_per_guest": per_guest, "packaging_fixed": fixed, "labor": labor}
+
+
+def price_point(cost_total, guests, pricing):
+    """Same arithmetic as generate_proposal_payload.py for one guest count."""
+    q = payload_math.q
+    round_step = q(pricing.get("round_to", 0.5))
+    net = q(cost_total) * (Decimal("1") + q(pricing.get("markup_pct", 0)) / Decimal("100"))
+    net = net - net * (q(pricing.get("discount_pct", 0)) / Decimal("100"))
+    vat = net * q(pricing.get("vat_rate", 0))
+    gross_r = payload_math.round_to_step(net + vat, round_step)
+    return {
+        "net_selling": float(payload_math.round_to_step(net, round_step)),
+        "vat_value": float(payload_math.round_to_step(vat, round_step)),
+        "gross_total": float(gross_r),
+        "price_per_person": float(payload_math.round_to_step(gross_r / q(guests), q("0.01"))),
+    }
+
+
+def quote_curve(model, points, pricing, cost_basis="purchase"):
+    """Cost and price every headcount in one pass over the pooled items.
+
+    On the purchase basis a break-point is a sampled headcount at which some item needs more packs than at the
+    previous point; each opened item carries the exact headcount (at_guests) where its next pack starts.
+    """
+    if cost_basis not in COST_BASES:
+        raise RuntimeError(f"unknown cost basis '{cost_basis}' (expected one of {', '.join(COST_BASES)})")
+    rows, breaks = [], []
+    prev_packs = [0] * len(model["items"])
+    prev = None
+    for g in points:
+        food = 0.0
+        packs_now, opened = [], []
+        for i, it in enumerate(model["items"]):
+            need = it["need_per_guest"] * g
+            if cost_basis == "purchase":
+                n = _packs(need, it["pack_size"])
+                food += n * it["pack_size"] * it["price_per_base_unit"]
+                if prev is not None and n > prev_packs[i]:
+                    opened.append({"product_id": it["product_id"], "packs_from": prev_packs[i], "packs_to": n,
+                                   "at_guests": _first_guest_over(prev_packs[i], it)})
+                packs_now.append(n)
+            else:
+                food += need * it["price_per_base_unit"]
+                packs_now.append(0)
+        packaging = model["packaging_per_guest"] * g + model["packaging_fixed"]
+        total = food + packaging + model["labor"]
+        row = {
+            "guests": g,
+            "food_cost": round(food, 4),
+            "packaging_cost": round(packaging, 4),
+            "labor_cost": round(model["labor"], 4),
+            "cost_total": round(total, 4),
+            "cost_per_person": round(total / g, 4),
+            **price_point(round(total, 4), g, pricing),
+            "packs": sum(packs_now),
+            "break_point": False,
+        }
+        if opened:
+            row["break_point"] = True
+            breaks.append({
+                "guests": g,
+                "after_guests": prev["guests"],
+                "first_guests": min(x["at_guests"] for x in opened),
+                "cost_step": round(total - prev["cost_total"], 4),
+                "price_per_person_from": prev["price_per_person"],
+                "price_per_person_to": row["price_per_person"],
+                "price_per_person_rises": row["price_per_person"] > prev["price_per_person"],
+                "packs_opened": opened,
+            })
+        rows.append(row)
+        prev_packs, prev = packs_now, row
+    return rows, breaks
+
+
+def build_curve(recipes, offers, decisions, defaults, pricing, points, cost_basis="purchase", confirm_stale=False):
+    """Cost the recipe set once (indexes built once), then price every headcount. Returns the report and issues."""
+    t0 = time.perf_counter()
+    results = cost_recipe.cost_recipes(recipes, offers, decisions, defaults, confirm_stale=confirm_stale)
+    costs = [c for c, _ in results]
+    issues = [i for _, rows in results for i in rows]
+    model = per_guest_model(recipes, costs, defaults)
+    rows, breaks = quote_curve(model, points, pricing, cost_basis)
+    cheapest = min(rows, key=lambda r: (r["price_per_person"], r["guests"])) if rows else None
+    return {
+        "cost_basis": cost_basis,
+        "pricing": {k: pricing.get(k) for k in ("markup_pct", "discount_pct", "vat_rate", "round_to")},
+        "recipes": [{"recipe_id": c.get("recipe_id"), "status": c.get("status")} for c in costs],
+        "items": model["items"],
+        "points": rows,
+        "break_points": breaks,
+        "cheapest_per_person": {"guests": cheapest["guests"], "price_per_person": cheapest["price_per_person"]} if cheapest else None,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+    }, issues
+
+
+def write_csv(path: Path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: r.get(k) for k in CSV_FIELDS})
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Per-person quote across a headcount range for one recipe set")
+    p.add_argument("--recipes-mapped", required=True, help="mapped recipe list (or a single recipe) json")
+    p.add_argument("--request", required=True, help="proposal_request.json (pricing block: markup/discount/vat/round_to)")
+    p.add_argument("--offers", required=True)
+    p.add_argument("--decisions", required=True)
+    p.add_argument("--defaults", default=str(ROOT / "config" / "defaults.json"))
+    p.add_argument("--from", dest="start", type=int, required=True)
+    p.add_argument("--to", dest="stop", type=int, required=True)
+    p.add_argument("--step", type=int, default=10)
+    p.add_argument("--cost-basis", choices=COST_BASES, default="purchase")
+    p.add_argument("--confirm-stale", action="store_true")
+    p.add_argument("--out", required=True, help="quote_curve.json")
+    p.add_argument("--csv-out", default=None)
+    args = p.parse_args(argv)
+
+    recipes = load_json(Path(args.recipes_mapped), [])
+    recipes = recipes if isinstance(recipes, list) else [recipes]
+    report, issues = build_curve(
+        recipes,
+        load_json(Path(args.offers), []),
+        load_json(Path(args.decisions), []),
+        load_json(Path(args.defaults), {}),
+        load_json(Path(args.request), {}).get("pricing", {}),
+        headcounts(args.start, args.stop, args.step),
+        cost_basis=args.cost_basis,
+        confirm_stale=args.confirm_stale,
+    )
+    report["issues"] = issues
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.csv_out:
+        write_csv(Path(args.csv_out), report["points"])
+    print(json.dumps({"points": len(report["points"]), "break_points": len(report["break_points"]), "elapsed_ms": report["elapsed_ms"]}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
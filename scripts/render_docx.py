@@ -22,7 +22,7 @@ def extract_placeholders(xml_text):
     return set(PLACEHOLDER_RE.findall(xml_text or ""))
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Render DOCX with strict placeholder validation (no style reflow)")
     p.add_argument("--payload", required=True)
     p.add_argument("--template", required=True)
@@ -30,7 +30,7 @@ def main():
     p.add_argument("--placeholder-map", required=False, default=None)
     p.add_argument("--validation-out", required=True)
     p.add_argument("--issues-out", required=True)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     payload = json.loads(Path(args.payload).read_text(encoding="utf-8"))
     template = Path(args.template)
@@ -9,14 +9,14 @@ def add_issue(issues, severity, code, message, **extra):
     issues.append(row)
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Render Type C HTML with placeholder injection only")
     p.add_argument("--template", required=True)
     p.add_argument("--payload", required=True)
     p.add_argument("--out", required=True)
     p.add_argument("--validation-out", required=True)
     p.add_argument("--issues-out", required=True)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     template = Path(args.template)
     payload = json.loads(Path(args.payload).read_text(encoding="utf-8"))
@@ -0,0 +1,268 @@
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+PROPOSALS_ROOT = ROOT / "proposals"
+CACHE_PATH = ROOT / "state" / "requote_cache.json"
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import cost_recipe  # noqa: E402
+import impact_index  # noqa: E402
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_cache(path=None):
+    c = load_json(Path(path or CACHE_PATH), None)
+    return c if isinstance(c, dict) and "entries" in c else None
+
+
+def save_cache(cache, path=None):
+    p = Path(path or CACHE_PATH)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f"{p.stem}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(cache, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def _resolve_manifest(manifest_path, proposals_root):
+    """Index rows carry the path the index was built on (possibly another machine); re-anchor it under proposals_root."""
+    p = Path(str(manifest_path or ""))
+    if p.exists():
+        return p
+    parts = [x for x in str(manifest_path or "").replace("\\", "/").split("/") if x]
+    root = Path(proposals_root)
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i] == root.name:
+            return root.joinpath(*parts[i + 1:])
+    return None
+
+
+def _entry_number(row):
+    """1-based manifest entry number from entry_id ("<manifest_path>:<i>:<filename>")."""
+    rest = str(row.get("entry_id") or "")[len(str(row.get("manifest_path") or "")) + 1:]
+    try:
+        return int(rest.split(":", 1)[0])
+    except ValueError:
+        return None
+
+
+def library_tasks(index_rows, proposals_root):
+    """(tasks, skipped): one task per index row whose filing kept a payload and a cost breakdown."""
+    tasks, skipped = [], []
+    root = Path(proposals_root)
+    manifests = {}
+    for row in index_rows:
+        base = {"entry_id": row.get("entry_id"), "client_slug": row.get("client_slug"), "event_date": row.get("event_date")}
+        mp = _resolve_manifest(row.get("manifest_path"), root)
+        n = _entry_number(row)
+        if mp is None or not mp.exists() or n is None:
+            skipped.append({**base, "reason": "MANIFEST_NOT_FOUND"})
+            continue
+        if mp not in manifests:
+            m = load_json(mp, {})
+            manifests[mp] = m.get("entries", []) if isinstance(m, dict) else []
+        entries = manifests[mp]
+        files = impact_index.filed_entry_files(mp.parent, entries[n - 1]) if 0 < n <= len(entries) else None
+        if files is None:
+            skipped.append({**base, "reason": "NO_COST_BREAKDOWN"})
+            continue
+        try:
+            key = files[0].resolve().relative_to(root.resolve()).as_posix()
+        except ValueError:
+            key = files[0].resolve().as_posix()
+        tasks.append({**base, "key": key, "payload": str(files[0]), "cost": str(files[1])})
+    return tasks, skipped
+
+
+def current_prices(offers, decisions):
+    """product_id -> chosen offer (offer_id, supplier, price_per_base_unit) under the current sourcing decisions."""
+    index = cost_recipe.build_index(offers, decisions)
+    out = {}
+    for pid, oid in index["chosen_by_product"].items():
+        o = index["offer_by_id"].get(oid)
+        if o and o.get("price_per_base_unit") is not None:
+            out[pid] = {"offer_id": oid, "supplier": o.get("supplier"), "price_per_base_unit": float(o["price_per_base_unit"])}
+    return out
+
+
+def _files_sig(task):
+    st = [os.stat(task[k]) for k in ("payload", "cost")]
+    return [[s.st_mtime_ns, s.st_size] for s in st]
+
+
+def _prices_sig(products, prices):
+    cur = [[pid, prices.get(pid)] for pid in sorted(products)]
+    return hashlib.sha1(json.dumps(cur, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def requote_one(task, prices):
+    """Re-cost one filing's lines at today's chosen unit prices and re-quote it with its own pricing terms."""
+    payload = load_json(Path(task["payload"]), {})
+    cost = load_json(Path(task["cost"]), {})
+    pricing = payload.get("pricing") or {}
+    lines = [ln for ln in cost.get("lines", []) or [] if ln.get("product_id")]
+    delta = 0.0
+    moved, missing = [], []
+    for ln in lines:
+        pid = ln["product_id"]
+        cur = prices.get(pid)
+        if cur is None:
+            missing.append(pid)
+            continue
+        old = float(ln.get("line_cost") or 0)
+        new = float(ln.get("actual_needed_base") or 0) * cur["price_per_base_unit"]
+        if round(new - old, 4):
+            moved.append({
+                "line_id": ln.get("line_id"),
+                "product_id": pid,
+                "supplier_old": ln.get("supplier"),
+                "supplier_new": cur["supplier"],
+                "price_per_base_unit_old": ln.get("price_per_base_unit"),
+                "price_per_base_unit_new": cur["price_per_base_unit"],
+                "cost_delta": round(new - old, 4),
+            })
+        delta += new - old
+
+    cost_old = float(pricing.get("cost_total") if pricing.get("cost_total") is not None else cost.get("total_cost") or 0)
+    cost_new = cost_old + delta
+    row = {
+        "key": task["key"],
+        "proposal_id": payload.get("proposal_id"),
+        "client_slug": task.get("client_slug"),
+        "event_date": task.get("event_date"),
+        "products": sorted({ln["product_id"] for ln in lines}),
+        "cost_total_old": round(cost_old, 4),
+        "cost_total_new": round(cost_new, 4),
+        "cost_delta": round(delta, 4),
+        "lines_moved": moved,
+        "products_without_decision": sorted(set(missing)),
+        "gross_total_filed": None,
+        "gross_total_requote": None,
+        "gross_delta": None,
+        "price_per_person_filed": None,
+        "price_per_person_requote": None,
+        "price_per_person_delta": None,
+        "margin_pct_filed": None,
+        "margin_pct_now": None,
+        "margin_erosion": round(delta, 4),
+        "margin_erosion_pct": None,
+    }
+    if pricing.get("net_selling") is not None:
+        net = float(pricing["net_selling"])
+        row["requote_net_selling"], gross_new = impact_index.requote_totals(cost_new, pricing)
+        gross_old = float(pricing.get("gross_total") or 0)
+        row.update({
+            "gross_total_filed": gross_old,
+            "gross_total_requote": gross_new,
+            "gross_delta": round(gross_new - gross_old, 2),
+        })
+        if net:
+            # the filed price is fixed: the cost move comes straight out of the margin
+            row["margin_pct_filed"] = round((net - cost_old) / net * 100.0, 4)
+            row["margin_pct_now"] = round((net - cost_new) / net * 100.0, 4)
+            row["margin_erosion_pct"] = round(row["margin_pct_filed"] - row["margin_pct_now"], 4)
+        guests = float((payload.get("event") or {}).get("guest_count") or 0)
+        if guests:
+            pp_new = round(gross_new / guests, 2)
+            pp_old = pricing.get("price_per_person")
+            row.update({
+                "price_per_person_filed": pp_old,
+                "price_per_person_requote": pp_new,
+                "price_per_person_delta": round(pp_new - float(pp_old), 2) if pp_old is not None else None,
+            })
+    return row
+
+
+# per-worker state for workers>1: the price map is shipped once per process
+_POOL = {}
+
+
+def _pool_init(prices):
+    _POOL["prices"] = prices
+
+
+def _pool_requote(task):
+    return requote_one(task, _POOL["prices"])
+
+
+def _erosion_key(r):
+    return (-(r["margin_erosion_pct"] if r["margin_erosion_pct"] is not None else float("-inf")), -r["margin_erosion"], r["key"])
+
+
+def requote_library(tasks, prices, cache=None, workers=1):
+    """Re-quote every filing; filings whose files and ingredient prices are unchanged since `cache` are reused.
+
+    Returns (rows ranked by margin erosion, new cache, stats).
+    """
+    old = (cache or {}).get("entries", {})
+    entries, rows, todo = {}, [], []
+    for t in tasks:
+        c = old.get(t["key"])
+        files = _files_sig(t)
+        if c and c.get("files") == files and c.get("prices") == _prices_sig(c.get("products", []), prices):
+            entries[t["key"]] = c
+            rows.append(dict(c["result"], cached=True))
+        else:
+            todo.append((t, files))
+
+    workers = min(int(workers or 1), len(todo))
+    if workers <= 1:
+        fresh = [requote_one(t, prices) for t, _ in todo]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_pool_init, initargs=(prices,)) as pool:
+            fresh = list(pool.map(_pool_requote, [t for t, _ in todo], chunksize=max(1, len(todo) // (workers * 4))))
+    for (t, files), r in zip(todo, fresh):
+        entries[t["key"]] = {"files": files, "products": r["products"], "prices": _prices_sig(r["products"], prices), "result": r}
+        rows.append(dict(r, cached=False))
+
+    rows.sort(key=_erosion_key)
+    stats = {
+        "proposals": len(rows),
+        "requoted": len(todo),
+        "cached": len(rows) - len(todo),
+        "eroding": sum(1 for r in rows if r["margin_erosion"] > 0),
+        "margin_erosion_total": round(sum(r["margin_erosion"] for r in rows), 4),
+        "gross_delta_total": round(sum(r["gross_delta"] for r in rows if r["gross_delta"] is not None), 2),
+    }
+    return rows, {"updated_at": datetime.now(timezone.utc).isoformat(), "entries": entries}, stats
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Re-cost and re-quote every filed proposal against the current sourcing decisions")
+    p.add_argument("--index", default=str(PROPOSALS_ROOT / "index" / "proposals_index.json"))
+    p.add_argument("--proposals-root", default=str(PROPOSALS_ROOT))
+    p.add_argument("--offers", required=True, help="mapped offers json")
+    p.add_argument("--decisions", required=True, help="sourcing decisions json")
+    p.add_argument("--cache", default=str(CACHE_PATH))
+    p.add_argument("--no-cache", action="store_true")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--out", required=True)
+    args = p.parse_args(argv)
+
+    idx = load_json(Path(args.index), {})
+    tasks, skipped = library_tasks(idx.get("rows", []) if isinstance(idx, dict) else [], args.proposals_root)
+    prices = current_prices(load_json(Path(args.offers), []), load_json(Path(args.decisions), []))
+    cache = None if args.no_cache else load_cache(args.cache)
+    rows, new_cache, stats = requote_library(tasks, prices, cache, args.workers)
+    save_cache(new_cache, args.cache)
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.out).write_text(json.dumps({"stats": {**stats, "skipped": len(skipped)}, "proposals": rows, "skipped": skipped}, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(json.dumps({**stats, "skipped": len(skipped)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,14 @@ from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 
+if str(ROOT / "scripts") not in sys.path:
+    sys.path.insert(0, str(ROOT / "scripts"))
+
+import alias_match  # noqa: E402
+import log_index  # noqa: E402
+import lookup_index  # noqa: E402
+import suggestion_ranker  # noqa: E402
+
 
 def load_json(path, default):
     p = Path(path)
@@ -37,7 +45,30 @@ def to_float(v, fallback=None):
         return fallback
 
 
-def export_csv_skeleton(needs, raw_rows, out_csv):
+def row_suggestions(n, rr, matcher):
+    """Scored suggestions for one needs_review row: the ones map_offers attached, else matched here."""
+    if n.get("suggestion_scores"):
+        return n["suggestion_scores"][:3]
+    if matcher is None:
+        return []
+    return alias_match.suggest(matcher, n.get("product_name", rr.get("product_name", "")), n.get("raw_unit", rr.get("pack_unit")))
+
+
+def prior_decisions(n, rr, history, supplier_id=None, k=3):
+    """Latest persisted decisions for this row's SKU, newest first: sku_map/conflict entries, then alias rows."""
+    if not history:
+        return []
+    supplier = n.get("supplier", rr.get("supplier", ""))
+    sku = n.get("supplier_sku", rr.get("supplier_sku", ""))
+    if not sku:
+        return []
+    rows = log_index.lookup(history["mapping_persist"], "sku", f"{supplier}::{sku}")
+    rows += [a for a in log_index.lookup(history["catalog_aliases"], "supplier_sku", str(sku))
+             if not supplier_id or a.get("supplier_id") in (None, supplier_id)]
+    return sorted(rows, key=lambda x: str(x.get("ts") or ""), reverse=True)[:k]
+
+
+def export_csv_skeleton(needs, raw_rows, out_csv, matcher=None, history=None, supplier_id=None, ranker=None):
     raw_by_offer = {r.get("offer_id"): r for r in raw_rows if r.get("offer_id")}
     cols = [
         "needs_review_id",
@@ -50,6 +81,8 @@ def export_csv_skeleton(needs, raw_rows, out_csv):
         "suggestion_1",
         "suggestion_2",
         "suggestion_3",
+        "prior_decisions",
+        "history_suggestion",
         "set_product_id",
         "set_unit",
         "set_pack_size",
@@ -64,6 +97,11 @@ def export_csv_skeleton(needs, raw_rows, out_csv):
         for n in needs:
             oid = n.get("offer_id", "")
             rr = raw_by_offer.get(oid, {})
+            sug = row_suggestions(n, rr, matcher) + [None] * 3
+            desc = n.get("product_name", rr.get("product_name", ""))
+            sku = n.get("supplier_sku", rr.get("supplier_sku", ""))
+            sku_key = f"{n.get('supplier', rr.get('supplier', ''))}::{sku}" if sku else None
+            chosen = suggestion_ranker.rank(ranker, desc, sku_key) if ranker else []
             w.writerow(
                 {
                     "needs_review_id": oid,
@@ -73,9 +111,11 @@ def export_csv_skeleton(needs, raw_rows, out_csv):
                     "unit_raw": n.get("raw_unit", rr.get("pack_unit", "")),
                     "net_price": rr.get("price", ""),
                     "issue_code": n.get("reason", n.get("code", "UNKNOWN")),
-                    "suggestion_1": "",
-                    "suggestion_2": "",
-                    "suggestion_3": "",
+                    "suggestion_1": suggestion_ranker.annotate(alias_match.format_suggestion(sug[0]), (sug[0] or {}).get("product_id"), chosen),
+                    "suggestion_2": suggestion_ranker.annotate(alias_match.format_suggestion(sug[1]), (sug[1] or {}).get("product_id"), chosen),
+                    "suggestion_3": suggestion_ranker.annotate(alias_match.format_suggestion(sug[2]), (sug[2] or {}).get("product_id"), chosen),
+                    "prior_decisions": " ; ".join(log_index.format_decision(x) for x in prior_decisions(n, rr, history, supplier_id)),
+                    "history_suggestion": suggestion_ranker.format_history(chosen[0] if chosen else None),
                     "set_product_id": "",
                     "set_unit": "",
                     "set_pack_size": "",
@@ -127,7 +167,7 @@ def build_template_patch(needs):
     return template_patch
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Review + resolve needs_review rows with deterministic patch")
     p.add_argument("--needs-review", required=True)
     p.add_argument("--raw", required=True, help="raw_merged.json from import run")
@@ -146,7 +186,8 @@ def main():
     p.add_argument("--catalog-aliases", required=False, default=str(ROOT / "mappings" / "catalog_aliases.jsonl"))
     p.add_argument("--audit-log", required=False, default=str(ROOT / "audit" / "mapping_persist_log.jsonl"))
     p.add_argument("--audit-out", required=False, default=None)
-    args = p.parse_args()
+    p.add_argument("--catalog", required=False, default=str(ROOT / "data" / "catalog.json"), help="for suggestion_1..3 in the CSV skeleton")
+    args = p.parse_args(argv)
 
     needs = load_json(args.needs_review, [])
     raw = load_json(args.raw, [])
@@ -158,7 +199,9 @@ def main():
             args.unit_rules = str(ROOT / "mappings" / "unit_rules" / f"{args.supplier_id}.json")
 
     if args.export_csv_skeleton:
-        export_csv_skeleton(needs, raw, args.export_csv_skeleton)
+        history = {name: log_index.load(name, path) for name, path in (("mapping_persist", args.audit_log), ("catalog_aliases", args.catalog_aliases))}
+        ranker = suggestion_ranker.load(args.audit_log, args.catalog_aliases)
+        export_csv_skeleton(needs, raw, args.export_csv_skeleton, lookup_index.load(catalog=args.catalog)["fuzzy"], history, args.supplier_id, ranker)
 
     if args.apply_csv:
         if not args.supplier_id:
@@ -278,6 +321,7 @@ def main():
                 "offer_id": oid,
                 "sku_key": sku_key,
                 "product_id": product_id,
+                "raw_desc": base.get("product_name", ""),
                 "supplier_id": args.supplier_id,
                 "reason": row_patch.get("reason", ""),
             }
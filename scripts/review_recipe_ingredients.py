@@ -1,11 +1,19 @@
 import argparse
 import csv
 import json
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 
+if str(ROOT / "scripts") not in sys.path:
+    sys.path.insert(0, str(ROOT / "scripts"))
+
+import alias_match  # noqa: E402
+import lookup_index  # noqa: E402
+import suggestion_ranker  # noqa: E402
+
 
 def load_json(path, default):
     p = Path(path)
@@ -32,10 +40,10 @@ def norm_alias(s):
     return " ".join(str(s or "").strip().lower().split())
 
 
-def export_skeleton(needs, out_csv):
+def export_skeleton(needs, out_csv, matcher=None, ranker=None):
     fields = [
         "recipe_id", "line_id", "raw_ingredient", "qty", "unit",
-        "suggestion_1", "suggestion_2", "suggestion_3",
+        "suggestion_1", "suggestion_2", "suggestion_3", "history_suggestion",
         "set_product_id", "persist_mode", "reason",
     ]
     Path(out_csv).parent.mkdir(parents=True, exist_ok=True)
@@ -43,22 +51,25 @@ def export_skeleton(needs, out_csv):
         w = csv.DictWriter(f, fieldnames=fields)
         w.writeheader()
         for n in needs:
+            sug = (alias_match.suggest(matcher, n.get("raw_ingredient", ""), n.get("unit")) if matcher else []) + [None] * 3
+            chosen = suggestion_ranker.rank(ranker, n.get("raw_ingredient", "")) if ranker else []
             w.writerow({
                 "recipe_id": n.get("recipe_id"),
                 "line_id": n.get("line_id"),
                 "raw_ingredient": n.get("raw_ingredient", ""),
                 "qty": n.get("gross_qty"),
                 "unit": n.get("unit"),
-                "suggestion_1": "",
-                "suggestion_2": "",
-                "suggestion_3": "",
+                "suggestion_1": suggestion_ranker.annotate(alias_match.format_suggestion(sug[0]), (sug[0] or {}).get("product_id"), chosen),
+                "suggestion_2": suggestion_ranker.annotate(alias_match.format_suggestion(sug[1]), (sug[1] or {}).get("product_id"), chosen),
+                "suggestion_3": suggestion_ranker.annotate(alias_match.format_suggestion(sug[2]), (sug[2] or {}).get("product_id"), chosen),
+                "history_suggestion": suggestion_ranker.format_history(chosen[0] if chosen else None),
                 "set_product_id": "",
                 "persist_mode": "",
                 "reason": "",
             })
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Review recipe ingredient mappings deterministically")
     p.add_argument("--recipes", required=True)
     p.add_argument("--export-csv-skeleton", default=None)
@@ -69,15 +80,16 @@ def main():
     p.add_argument("--out-needs", required=True)
     p.add_argument("--out-issues", required=True)
     p.add_argument("--out-summary", required=True)
-    args = p.parse_args()
+    p.add_argument("--catalog", default=str(ROOT / "data" / "catalog.json"), help="for suggestion_1..3 in the CSV skeleton")
+    args = p.parse_args(argv)
 
     recipes = load_json(args.recipes, [])
     issues = []
     needs = []
 
-    aliases = load_json(args.catalog_aliases, {})
-    if not isinstance(aliases, dict):
-        aliases = {}
+    # one read of the compiled lookup; a catalog_alias persist below rewrites the alias file, which invalidates it
+    lookup = lookup_index.load(catalog=args.catalog, recipe_aliases=args.catalog_aliases)
+    aliases = dict(lookup["recipe_aliases"])
 
     for r in recipes:
         rid = r.get("recipe_id")
@@ -100,7 +112,7 @@ def main():
 
     export_path = args.export_csv_skeleton
     if export_path:
-        export_skeleton(needs, export_path)
+        export_skeleton(needs, export_path, lookup["fuzzy"], suggestion_ranker.load(recipe_aliases=args.catalog_aliases))
 
     if not isinstance(aliases, dict):
         aliases = {}
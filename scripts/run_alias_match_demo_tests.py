@@ -0,0 +1,118 @@
+import csv
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def csv_rows(path: Path):
+    with path.open("r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def match(*args):
+    return json.loads(run([sys.executable, str(S / "alias_match.py")] + list(args)))
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "alias_match_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    # accents, case and Greek/Latin script are folded; pack tokens do not count against the name
+    res = match("--name", "ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 5kg", "--name", "patates kiprou", "--name", "ντοματες", "--name", "Mozarella 1kg", "--name", "onion red")
+    assert (res["ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 5kg"][0]["product_id"], res["ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 5kg"][0]["score"]) == ("PROD-POTATO-STD", 1.0), res
+    assert res["patates kiprou"][0]["product_id"] == "PROD-POTATO-STD", res
+    assert res["ντοματες"][0]["product_id"] == "PROD-TOMATO-STD" and res["ντοματες"][0]["score"] == 1.0, res
+    assert res["Mozarella 1kg"][0]["product_id"] == "PROD-MOZZARELLA-STD", res
+    assert [x["product_id"] for x in res["onion red"][:2]] == ["PROD-ONION-RED-STD", "PROD-ONION-YELLOW-STD"], res
+    assert match("--name", "xyz widget") == {"xyz widget": []}
+
+    # pack aware: a kg pack ranks a lt product lower than the same text sold in litres
+    lt = match("--name", "cream 35", "--pack-unit", "lt")["cream 35"][0]
+    kg = match("--name", "cream 35", "--pack-unit", "kg")["cream 35"][0]
+    assert lt["product_id"] == kg["product_id"] == "PROD-CREAM35-STD" and kg["score"] < lt["score"], (lt, kg)
+
+    # map_offers keeps exact-only mapping; rows left for review carry scored suggestions
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    raw = [
+        {"offer_id": f"OFF-AM-{i}", "supplier": "Alios", "supplier_sku": f"AM-{i}", "product_name": name, "category": "Λαχανικά",
+         "tier": "standard", "pack_size": 1, "pack_unit": unit, "price": 1.0, "price_per_base_unit": 1.0, "captured_at": cap, "in_stock": True}
+        for i, (name, unit) in enumerate([("patates kyprou", "kg"), ("PATATES KIPROU 5kg", "kg"), ("Ντομάτες Εγχώριες Α'", "kg"), ("xyz widget", "pcs")], start=1)
+    ]
+    raw_path = write(out / "raw_offers.json", raw)
+    d = pipeline("prices", "--raw", raw_path, "--no-history", "--no-cache")
+    needs = {n["offer_id"]: n for n in json.loads((d / "needs_review.json").read_text(encoding="utf-8"))}
+    mapped = {m["offer_id"]: m["product_id"] for m in json.loads((d / "offers_mapped.json").read_text(encoding="utf-8"))}
+    assert mapped["OFF-AM-1"] == "PROD-POTATO-STD" and "OFF-AM-1" not in needs, needs
+    assert mapped["OFF-AM-2"] is None and needs["OFF-AM-2"]["suggestions"][0] == "PROD-POTATO-STD", needs["OFF-AM-2"]
+    assert needs["OFF-AM-3"]["suggestion_scores"][0]["product_id"] == "PROD-TOMATO-STD", needs["OFF-AM-3"]
+    assert needs["OFF-AM-4"]["suggestions"] == [] and needs["OFF-AM-4"]["reason"] == "unmapped", needs["OFF-AM-4"]
+
+    # review CSV skeleton fills suggestion_1..3 (product_id first)
+    rv = pipeline("review", "--needs-review", str(d / "needs_review.json"), "--raw", raw_path, "--price-quotes", str(d / "offers_mapped.json"))
+    rows = {r["needs_review_id"]: r for r in csv_rows(rv / "review_patch_skeleton.csv")}
+    assert rows["OFF-AM-2"]["suggestion_1"].startswith("PROD-POTATO-STD | Πατάτες | "), rows["OFF-AM-2"]
+    assert rows["OFF-AM-3"]["suggestion_1"].startswith("PROD-TOMATO-STD | "), rows["OFF-AM-3"]
+    assert rows["OFF-AM-4"]["suggestion_1"] == "", rows["OFF-AM-4"]
+
+    # import-side needs (no suggestions attached) are matched at export time
+    import_needs = write(out / "import_needs.json", [{"offer_id": "OFF-AM-9", "product_name": "κρεμμύδια κόκκινα ξερά 10kg", "supplier": "Alios", "reason": "IMPORT-UNSUPPORTED-UNIT"}])
+    rv = pipeline("review", "--needs-review", import_needs, "--raw", raw_path, "--price-quotes", str(d / "offers_mapped.json"))
+    row = csv_rows(rv / "review_patch_skeleton.csv")[0]
+    assert row["suggestion_1"].startswith("PROD-ONION-RED-STD | ") and row["suggestion_2"].startswith("PROD-ONION-YELLOW-STD | "), row
+
+    # recipe ingredient review gets the same suggestions
+    recipes = write(out / "recipes.json", [{"recipe_id": "REC-AM-1", "portions": 10, "ingredients": [
+        {"line_id": "L1", "product_id": None, "raw_ingredient": "Μελιτζανες φλάσκες", "gross_qty": 500, "unit": "g"},
+        {"line_id": "L2", "product_id": None, "raw_ingredient": "spanaki", "gross_qty": 200, "unit": "g"},
+    ]}])
+    rr = pipeline("recipe-review", "--recipes", recipes)
+    rows = {r["line_id"]: r for r in csv_rows(rr / "recipe_review_skeleton.csv")}
+    assert rows["L1"]["suggestion_1"].startswith("PROD-EGGPLANT-STD | "), rows["L1"]
+    assert rows["L2"]["suggestion_1"].startswith("PROD-SPINACH-STD | "), rows["L2"]
+
+    # candidate retrieval only scores aliases sharing trigrams: the right item still surfaces among many decoys
+    big = json.loads((ROOT / "data" / "catalog.json").read_text(encoding="utf-8"))
+    big["items"] += [{"product_id": f"PROD-DECOY-{i}", "canonical_name": f"decoy item {i}", "category": "Ξηρά", "base_unit": "kg", "aliases": [f"qz{i:05d}"]}
+                     for i in range(20000)]
+    res = match("--catalog", write(out / "catalog_big.json", big), "--name", "ΣΠΑΝΑΚΙ 1kg", "--name", "qz01234")
+    assert res["ΣΠΑΝΑΚΙ 1kg"][0]["product_id"] == "PROD-SPINACH-STD", res
+    assert res["qz01234"][0]["product_id"] == "PROD-DECOY-1234", res
+
+    print("ALIAS_MATCH_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
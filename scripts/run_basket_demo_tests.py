@@ -0,0 +1,118 @@
+import json
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def basket(out: Path, tag: str, decisions: Path, extra=None):
+    d = out / tag
+    res = run([
+        sys.executable,
+        str(S / "optimize_basket.py"),
+        "--decisions", str(decisions),
+        "--offers", str(out / "offers_mapped.json"),
+        "--demand", str(out / "demand.json"),
+        "--suppliers-dir", str(out / "suppliers"),
+        "--out", str(d / "basket.json"),
+        "--decisions-out", str(d / "basket_decisions.json"),
+        "--issues-out", str(d / "basket_issues.json"),
+    ] + (extra or []))
+    assert json.loads(res.splitlines()[-1])["products"] >= 1, res
+    report = json.loads((d / "basket.json").read_text(encoding="utf-8"))
+    decs = {x["product_id"]: x for x in json.loads((d / "basket_decisions.json").read_text(encoding="utf-8"))}
+    return report, decs
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "basket_demo"
+    (out / "suppliers").mkdir(parents=True, exist_ok=True)
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    terms = {
+        "north": {"delivery_fee": 25.0, "min_order_value": 0},
+        "south": {"delivery_fee": 25.0, "min_order_value": 0, "free_delivery_over": 60},
+        "east": {"delivery_fee": 0.0, "min_order_value": 80},
+    }
+    for sid, o in terms.items():
+        (out / "suppliers" / f"{sid}.json").write_text(json.dumps({"supplier_id": sid, "supplier_name": sid.title(), "ordering": o}, indent=2), encoding="utf-8")
+
+    # per product, each supplier is a little cheaper somewhere -> per-product sourcing uses all three
+    prices = {
+        "P-B1": {"North": 10.0, "South": 11.0, "East": 12.0},
+        "P-B2": {"North": 21.0, "South": 20.0, "East": 22.0},
+        "P-B3": {"North": 16.0, "South": 15.5, "East": 15.0},
+        "P-B4": {"North": 30.0, "South": 31.0, "East": 33.0},
+        "P-B5": {"North": 9.0, "South": 9.5},
+    }
+    offers = []
+    for pid, by_sup in prices.items():
+        for sup, price in by_sup.items():
+            offers.append({"offer_id": f"{pid}-{sup}", "product_id": pid, "supplier": sup, "supplier_sku": f"{pid}-{sup}",
+                           "category": "dry", "tier": "standard", "pack_size": 1, "pack_unit": "kg",
+                           "price_per_base_unit": price, "captured_at": cap, "in_stock": True})
+    (out / "offers_mapped.json").write_text(json.dumps(offers, ensure_ascii=False, indent=2), encoding="utf-8")
+    (out / "demand.json").write_text(json.dumps({pid: 1 for pid in prices}), encoding="utf-8")
+    overrides = {"overrides": [{"rule": "LOCK", "product_id": "P-B4", "supplier": "East"}]}
+    (out / "overrides_lock.json").write_text(json.dumps(overrides, indent=2), encoding="utf-8")
+
+    for tag, ov in [("plain", ROOT / "config" / "overrides.json"), ("lock", out / "overrides_lock.json")]:
+        run([
+            sys.executable,
+            str(S / "optimize_sourcing.py"),
+            "--offers", str(out / "offers_mapped.json"),
+            "--overrides", str(ov),
+            "--defaults", str(ROOT / "config" / "defaults.json"),
+            "--demand", str(out / "demand.json"),
+            "--out", str(out / f"decisions_{tag}.json"),
+            "--issues-out", str(out / f"issues_{tag}.json"),
+        ])
+
+    report, decs = basket(out, "exact", out / "decisions_plain.json")
+    assert report["method"] == "exact", report
+    assert report["baseline_suppliers_used"] == 3, report
+    # baseline: 10 + 20 + 15 + 30 + 9 = 84 lines, North 49 + 25 fee, South 20 + 25 fee, East 15 below its 80 minimum
+    assert report["baseline_total"] == 84 + 25 + 25 + 65, report
+    # best: everything from South (11 + 20 + 15.5 + 31 + 9.5 = 87) which delivers free over 60;
+    # all-North would be 86 + 25 fee
+    assert report["suppliers_used"] == 1 and report["total"] == 87.0, report
+    assert all(d["selected_supplier"] == "South" for d in decs.values()), decs
+    assert "BASKET_REASSIGNED" in decs["P-B1"]["reason_codes"], decs["P-B1"]
+    assert "BASKET_REASSIGNED" not in decs["P-B2"]["reason_codes"], decs["P-B2"]
+
+    # LOCK on East is a hard constraint: P-B4 stays there and East's minimum order shapes the rest
+    report, decs = basket(out, "lock", out / "decisions_lock.json")
+    assert decs["P-B4"]["chosen_offer_id"] == "P-B4-East" and decs["P-B4"]["rule_applied"] == "LOCK", decs["P-B4"]
+    assert report["locked"] == 1, report
+    assert all(a["supplier"] == "East" for a in report["assignments"] if a["product_id"] == "P-B4"), report
+
+    # a zero node budget forces the local search; it must reach the same basket here
+    ls_report, _ = basket(out, "local_search", out / "decisions_plain.json", ["--node-limit", "0"])
+    assert ls_report["method"] == "local_search" and ls_report["total"] == 87.0, ls_report
+
+    # BAN: a supplier missing from a decision's candidates is never assigned
+    plain = json.loads((out / "decisions_plain.json").read_text(encoding="utf-8"))
+    for d in plain:
+        d["candidates"] = [c for c in d["candidates"] if c["supplier"] != "South"]
+        if d["selected_supplier"] == "South":
+            alt = min(d["candidates"], key=lambda c: c["price_per_base_unit"])
+            d["chosen_offer_id"], d["selected_supplier"] = alt["offer_id"], alt["supplier"]
+    (out / "decisions_banned.json").write_text(json.dumps(plain, ensure_ascii=False, indent=2), encoding="utf-8")
+    ban_report, ban_decs = basket(out, "ban", out / "decisions_banned.json")
+    assert all(a["supplier"] != "South" for a in ban_report["assignments"]), ban_report
+    assert ban_report["total"] <= ban_report["baseline_total"], ban_report
+
+    print("BASKET_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
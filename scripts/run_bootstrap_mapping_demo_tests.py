@@ -0,0 +1,142 @@
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "bootstrap_mapping_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+    sid = "zz_bootstrap_demo"
+    # the SKU map lives in a run-local map dir; the real mappings/supplier_sku_map is never touched
+    sku_map = out / "supplier_sku_map" / f"{sid}.json"
+    audit = out / "mapping_persist_log.jsonl"
+
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+
+    def row(i, name, size, unit, price, category="Λαχανικά"):
+        return {"offer_id": f"OFF-BS-{i}", "supplier": "Nova", "supplier_sku": f"NV-{i}", "product_name": name, "category": category,
+                "tier": "standard", "pack_size": size, "pack_unit": unit, "price": price, "captured_at": cap, "in_stock": True}
+
+    raw = [
+        row(1, "ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 10kg", 10, "kg", 8.0),        # name + pack + category + price band agree
+        row(2, "Ντομάτες εγχώριες", 1, "kg", 1.9),           # exact alias, everything agrees
+        row(3, "Σπανάκι", 1, "kg", 60.0),                    # price far outside the band
+        row(4, "κρεμμύδια", 1, "kg", 1.0),                   # red vs yellow: no clear winner
+        row(5, "xyz widget", 1, "pcs", 4.0),                 # nothing close
+        row(6, "Σπανάκι", 6, "pcs", 9.0),                    # pieces against a kg product
+        row(7, "ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 10kg", 10, "kg", 8.0),        # second sku for the same product
+    ]
+    raw.append({**raw[0], "offer_id": "OFF-BS-1b"})         # same sku twice in one import: decided once
+    raw.append({**row(8, "ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 10kg", 10, "kg", 8.0), "supplier_sku": ""})  # OCR row: nothing to map it under
+    raw_path = write(out / "raw_merged.json", raw)
+    offers = write(out / "reference_offers.json", [
+        {"offer_id": "REF-1", "product_id": "PROD-POTATO-STD", "supplier": "Alios", "price_per_base_unit": 0.9},
+        {"offer_id": "REF-2", "product_id": "PROD-TOMATO-STD", "supplier": "Alios", "price_per_base_unit": 1.8},
+        {"offer_id": "REF-3", "product_id": "PROD-SPINACH-STD", "supplier": "Alios", "price_per_base_unit": 3.0},
+        {"offer_id": "REF-4", "product_id": "PROD-ONION-RED-STD", "supplier": "Alios", "price_per_base_unit": 1.1},
+        {"offer_id": "REF-5", "product_id": "PROD-ONION-YELLOW-STD", "supplier": "Alios", "price_per_base_unit": 0.9},
+    ])
+    base = ["bootstrap-mapping", "--supplier-id", sid, "--raw", raw_path, "--offers", offers, "--audit-log", str(audit), "--sku-map", str(sku_map)]
+
+    # dry run reports but writes nothing
+    d = pipeline(*base, "--dry-run")
+    s = summary_map(d)
+    assert (s["rows"], s["accepted"], s["persisted"], s["residue"], s["no_sku"]) == ("8", "3", "0", "5", "1"), s
+    assert not sku_map.exists() and not audit.exists()
+
+    d = pipeline(*base)
+    s = summary_map(d)
+    assert (s["accepted"], s["persisted"], s["residue"], s["already_mapped"]) == ("3", "3", "5", "0"), s
+    assert json.loads(sku_map.read_text(encoding="utf-8")) == {
+        "Nova::NV-1": "PROD-POTATO-STD", "Nova::NV-2": "PROD-TOMATO-STD", "Nova::NV-7": "PROD-POTATO-STD"}
+    log = [json.loads(x) for x in audit.read_text(encoding="utf-8").splitlines()]
+    assert [x["sku_key"] for x in log] == ["Nova::NV-1", "Nova::NV-2", "Nova::NV-7"], log
+    assert all(x["code"] == "BOOTSTRAP-SKU-MAP-PERSISTED" and x["supplier_id"] == sid and x["confidence"] >= 0.85 for x in log), log
+
+    report = json.loads((d / "bootstrap_report.json").read_text(encoding="utf-8"))
+    residue = {x["offer_id"]: x for x in report["residue"]}
+    assert residue["OFF-BS-8"]["reason"] == "no_sku" and residue["OFF-BS-8"]["candidates"][0]["product_id"] == "PROD-POTATO-STD", residue["OFF-BS-8"]
+    assert residue["OFF-BS-3"]["reason"] == "below_threshold" and residue["OFF-BS-3"]["candidates"][0]["evidence"]["price"] == 0.0, residue["OFF-BS-3"]
+    assert residue["OFF-BS-4"]["reason"] == "below_threshold" and len(residue["OFF-BS-4"]["candidates"]) == 2, residue["OFF-BS-4"]
+    assert residue["OFF-BS-5"]["reason"] == "no_candidate", residue["OFF-BS-5"]
+    assert residue["OFF-BS-6"]["candidates"][0]["evidence"]["pack"] == 0.0, residue["OFF-BS-6"]
+
+    # a lower threshold still holds back a winner without a clear lead
+    loose = json.loads((pipeline(*base, "--dry-run", "--threshold", "0.8") / "bootstrap_report.json").read_text(encoding="utf-8"))
+    assert {x["offer_id"]: x["reason"] for x in loose["residue"]}["OFF-BS-4"] == "ambiguous", loose["residue"]
+
+    # the residue is a needs_review queue the review step takes as is
+    needs = json.loads((d / "needs_review.json").read_text(encoding="utf-8"))
+    assert sorted(n["offer_id"] for n in needs) == ["OFF-BS-3", "OFF-BS-4", "OFF-BS-5", "OFF-BS-6", "OFF-BS-8"], needs
+    assert s["next_action"].startswith("review --needs-review"), s
+    rv = pipeline("review", "--needs-review", str(d / "needs_review.json"), "--raw", raw_path, "--price-quotes", offers)
+    assert summary_map(rv)["remaining_needs_review"] == "5", summary_map(rv)
+
+    # re-running is idempotent: mapped skus are skipped, nothing is logged twice
+    s = summary_map(pipeline(*base))
+    assert (s["already_mapped"], s["accepted"], s["persisted"]) == ("3", "0", "0"), s
+    assert len(audit.read_text(encoding="utf-8").splitlines()) == 3
+
+    # the next prices run maps accepted skus through the SKU map
+    prices_raw = write(out / "prices_raw.json", [{**r, "price_per_base_unit": 1.0} for r in raw[:7]])
+    pr = pipeline("prices", "--raw", prices_raw, "--no-history", "--no-cache", "--sku-map-dir", str(sku_map.parent))
+    mapped = {m["offer_id"]: m["product_id"] for m in json.loads((pr / "offers_mapped.json").read_text(encoding="utf-8"))}
+    assert mapped["OFF-BS-7"] == "PROD-POTATO-STD" and mapped["OFF-BS-4"] is None, mapped
+
+    # without --raw the newest import run is bootstrapped
+    imp = pipeline("import", "--csv-input", str(ROOT / "data" / "imports" / "supplier_x_prices.csv"), "--no-anomaly")
+    s = summary_map(pipeline("bootstrap-mapping", "--supplier-id", sid, "--offers", offers, "--dry-run", "--sku-map", str(out / "import_map" / f"{sid}.json")))
+    imported = json.loads((imp / "raw_merged.json").read_text(encoding="utf-8"))
+    assert s["raw"] == str(imp / "raw_merged.json") and s["rows"] == str(len(imported)) and imported, s
+
+    # a large catalog is scored across processes with the same outcome as a sequential pass
+    big_map = str(out / "big_sku_map" / f"{sid}.json")
+    names = ["ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 10kg", "Ντομάτες εγχώριες", "Σπανάκι", "κρεμμύδια", "xyz widget"]
+    big = [row(i, names[i % len(names)], 1 + i % 3, "kg", 1.0 + (i % 3)) for i in range(2000)]
+    big_path = write(out / "raw_big.json", big)
+    seq = json.loads((pipeline("bootstrap-mapping", "--supplier-id", sid, "--raw", big_path, "--offers", offers, "--dry-run", "--workers", "1", "--sku-map", big_map)
+                      / "bootstrap_report.json").read_text(encoding="utf-8"))
+    par = json.loads((pipeline("bootstrap-mapping", "--supplier-id", sid, "--raw", big_path, "--offers", offers, "--dry-run", "--workers", "4", "--sku-map", big_map)
+                      / "bootstrap_report.json").read_text(encoding="utf-8"))
+    assert [(a["sku_key"], a["product_id"]) for a in seq["accepted"]] == [(a["sku_key"], a["product_id"]) for a in par["accepted"]]
+    assert len(seq["accepted"]) + len(seq["residue"]) == 2000 and seq["accepted"], len(seq["accepted"])
+    assert not (ROOT / "mappings" / "supplier_sku_map" / f"{sid}.json").exists()
+
+    print("BOOTSTRAP_MAPPING_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import json
+import shutil
 import subprocess
 import sys
 from pathlib import Path
@@ -14,26 +15,62 @@ def run(cmd):
     return r.stdout.strip()
 
 
+def comparable(path: Path):
+    # imports stamp captured_at at run time, so only the choice itself is compared
+    rows = json.loads(path.read_text(encoding="utf-8"))
+    keep = ("product_id", "chosen_offer_id", "selected_supplier", "rule_applied", "chosen_price_per_base_unit", "reason_codes", "group_offer_ids")
+    return [{k: r.get(k) for k in keep} for r in rows]
+
+
 def main():
+    out = ROOT / "runs" / "phase30-demo" / "daily_refresh_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    # run-local registry over the repo fixtures (config/daily_refresh_defaults.json points at operator machine paths)
+    alios = ROOT / "data" / "prices" / "alios"
+    defaults = out / "daily_refresh_defaults.json"
+    defaults.write_text(json.dumps({
+        "sources": {
+            "supplier_x": {"type": "csv", "supplier_id": "supplier_x", "paths": [str(ROOT / "data" / "imports" / "supplier_x_prices.csv")]},
+            "alios": {"type": "xlsx", "supplier_id": "alios", "paths": [str(alios / "alios_dry_sushi_2025_REAL.xlsx"), str(alios / "alios_frozen_sushi_2025_REAL.xlsx")]},
+        },
+        "flags": {"reindex_proposals": False, "run_health_checks": False, "reply": True, "file_proposal": False},
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def refresh(*extra):
+        return Path(run([
+            sys.executable, str(S / "run_pipeline.py"), "daily-refresh",
+            "--defaults", str(defaults),
+            "--no-reply",
+        ] + list(extra)).splitlines()[-1])
+
     # named defaults mode
-    out = Path(run([
-        sys.executable, str(S / "run_pipeline.py"), "daily-refresh",
-        "--sources", "themart",
-        "--sources", "alios",
-        "--no-reply",
-    ]))
-    sm = json.loads((out / "daily_refresh_summary.json").read_text(encoding="utf-8"))
-    if len(sm.get("suppliers", [])) < 2:
-        raise AssertionError("Expected TheMart+Alios in named-default daily refresh demo")
-    if not (out / "telegram_macros.txt").exists():
+    out1 = refresh("--sources", "supplier_x", "--sources", "alios")
+    sm = json.loads((out1 / "daily_refresh_summary.json").read_text(encoding="utf-8"))
+    if sm.get("status") != "PASS" or len(sm.get("suppliers", [])) < 2:
+        raise AssertionError(f"Expected supplier_x+alios in named-default daily refresh demo, got {sm}")
+    if not (out1 / "telegram_macros.txt").exists():
         raise AssertionError("Expected telegram_macros.txt")
 
+    # --jobs N refreshes the same suppliers, in the same order, with the same results as --jobs 1
+    seq = json.loads((refresh("--jobs", "1") / "daily_refresh_summary.json").read_text(encoding="utf-8"))
+    par = json.loads((refresh("--jobs", "3") / "daily_refresh_summary.json").read_text(encoding="utf-8"))
+    volatile = {"import_run", "prices_run", "decisions_changed"}
+    rows_seq = [{k: v for k, v in x.items() if k not in volatile} for x in seq["suppliers"]]
+    rows_par = [{k: v for k, v in x.items() if k not in volatile} for x in par["suppliers"]]
+    if seq["status"] != "PASS" or len(rows_seq) != 3 or rows_seq != rows_par:
+        raise AssertionError(f"--jobs 3 differs from --jobs 1:\n{rows_seq}\n{rows_par}")
+    runs_par = [x[k] for x in par["suppliers"] for k in ("import_run", "prices_run")]
+    if len(set(runs_par)) != len(runs_par):
+        raise AssertionError(f"Parallel workers shared a run dir: {runs_par}")
+    for a, b in zip(seq["suppliers"], par["suppliers"]):
+        if comparable(Path(a["prices_run"]) / "decisions.json") != comparable(Path(b["prices_run"]) / "decisions.json"):
+            raise AssertionError(f"Decisions differ between --jobs 1 and --jobs 3 for {a['source_path']}")
+
     # unknown named source -> clean BLOCK
-    out2 = Path(run([
-        sys.executable, str(S / "run_pipeline.py"), "daily-refresh",
-        "--sources", "unknown_supplier_key",
-        "--no-reply",
-    ]))
+    out2 = refresh("--sources", "unknown_supplier_key")
     sm2 = json.loads((out2 / "daily_refresh_summary.json").read_text(encoding="utf-8"))
     if sm2.get("status") != "BLOCKED":
         raise AssertionError("Expected BLOCKED on unknown named source")
@@ -0,0 +1,103 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+STATS = ROOT / "runs" / "phase30-demo" / "delta_import_demo" / "price_stats"
+SUPPLIER_ID = "delta_demo"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def import_delta(csv_path: Path, profile: Path):
+    out = run([
+        sys.executable,
+        str(S / "run_pipeline.py"),
+        "import",
+        "--csv-input",
+        str(csv_path),
+        "--csv-profile",
+        str(profile),
+        "--anomaly-stats-dir",
+        str(STATS),
+        "--delta",
+    ])
+    return Path(out.splitlines()[-1].strip())
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "delta_import_demo"
+    out.mkdir(parents=True, exist_ok=True)
+    snapshot = ROOT / "state" / "import_snapshots" / f"{SUPPLIER_ID}.json"
+    if snapshot.exists():
+        snapshot.unlink()
+
+    profile = json.loads((ROOT / "suppliers" / "supplier_x.json").read_text(encoding="utf-8"))
+    profile["supplier_id"] = SUPPLIER_ID
+    profile_path = out / f"{SUPPLIER_ID}.json"
+    profile_path.write_text(json.dumps(profile, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    lines = (ROOT / "data" / "prices" / "themart_round1.csv").read_text(encoding="utf-8").splitlines()
+    header, body = lines[0], lines[1:12]
+    v1 = out / "delta_v1.csv"
+    v1.write_text("\n".join([header] + body[:10]) + "\n", encoding="utf-8")
+    # v2: drop row 1, reprice row 3, add row 11
+    v2_rows = body[1:11]
+    cols = v2_rows[1].split(",")
+    cols[5] = f"{float(cols[5]) + 1:.2f}"
+    v2_rows[1] = ",".join(cols)
+    v2 = out / "delta_v2.csv"
+    v2.write_text("\n".join([header] + v2_rows) + "\n", encoding="utf-8")
+
+    try:
+        first_dir = import_delta(v1, profile_path)
+        first = summary_map(first_dir)
+        if first.get("delta_added") != "10":
+            raise AssertionError(f"Expected baseline import to add 10 rows, got {first.get('delta_added')}")
+
+        second_dir = import_delta(v2, profile_path)
+        sm = summary_map(second_dir)
+        got = (sm.get("delta_added"), sm.get("delta_removed"), sm.get("delta_price_changed"), sm.get("delta_unchanged"))
+        if got != ("1", "1", "1", "8"):
+            raise AssertionError(f"Expected added/removed/changed/unchanged=1/1/1/8, got {got}")
+
+        events = json.loads((second_dir / "price_changes.json").read_text(encoding="utf-8"))
+        changed = [e for e in events if e.get("event") == "price_changed"]
+        if len(changed) != 1 or round(changed[0].get("delta", 0), 2) != 1.0:
+            raise AssertionError("Expected one price_changed event with delta=+1.00")
+        raw_changed = json.loads((second_dir / "raw_changed.json").read_text(encoding="utf-8"))
+        if len(raw_changed) != 2:
+            raise AssertionError("Expected raw_changed.json to carry only added + repriced rows")
+
+        # raw_changed.json is a report; as an incremental --raw it would silently drop the unchanged products
+        prev = run([sys.executable, str(S / "run_pipeline.py"), "prices", "--raw", str(first_dir / "raw_merged.json"), "--no-cache", "--no-history"]).splitlines()[-1]
+        r = subprocess.run([sys.executable, str(S / "run_pipeline.py"), "prices", "--raw", str(second_dir / "raw_changed.json"),
+                            "--incremental-from", prev, "--no-cache", "--no-history"], capture_output=True, text=True)
+        if r.returncode == 0 or "raw_changed.json holds only added/repriced rows" not in r.stderr:
+            raise AssertionError(f"Expected prices to refuse raw_changed.json with --incremental-from: {r.stderr[-300:]}")
+        run([sys.executable, str(S / "run_pipeline.py"), "prices", "--raw", str(second_dir / "raw_merged.json"), "--incremental-from", prev, "--no-cache", "--no-history"])
+    finally:
+        if snapshot.exists():
+            snapshot.unlink()
+
+    print("DELTA_IMPORT_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import json
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def optimize(offers_path: Path, out_dir: Path, extra=None):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    run([
+        sys.executable,
+        str(S / "optimize_sourcing.py"),
+        "--offers", str(offers_path),
+        "--overrides", str(ROOT / "config" / "overrides.json"),
+        "--defaults", str(ROOT / "config" / "defaults.json"),
+        "--out", str(out_dir / "decisions.json"),
+        "--issues-out", str(out_dir / "issues.json"),
+    ] + (extra or []))
+    return {d["product_id"]: d for d in json.loads((out_dir / "decisions.json").read_text(encoding="utf-8"))}
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "demand_sourcing_demo"
+    out.mkdir(parents=True, exist_ok=True)
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+
+    def offer(oid, pid, sup, size, ppu, unit="kg"):
+        return {"offer_id": oid, "product_id": pid, "supplier": sup, "supplier_sku": oid, "pack_size": size,
+                "pack_unit": unit, "price_per_base_unit": ppu, "captured_at": cap, "in_stock": True}
+
+    offers = [
+        # 600 g of feta: the 5 kg tin is cheaper per kg but dearer to buy
+        offer("FETA-1KG", "P-FETA", "alpha", 1, 9.0),
+        offer("FETA-5KG", "P-FETA", "beta", 5, 7.0),
+        # 6 kg of rice: alpha mixes 5 kg + 1 kg packs; beta only sells 5 kg sacks
+        offer("RICE-A1", "P-RICE", "alpha", 1, 2.5),
+        offer("RICE-A5", "P-RICE", "alpha", 5, 1.6),
+        offer("RICE-B5", "P-RICE", "beta", 5, 1.5),
+        # no demand for oil: unit price decides as before
+        offer("OIL-1", "P-OIL", "alpha", 1, 6.0, "lt"),
+        offer("OIL-5", "P-OIL", "beta", 5, 5.0, "lt"),
+    ]
+    offers_path = out / "offers_mapped.json"
+    offers_path.write_text(json.dumps(offers, ensure_ascii=False, indent=2), encoding="utf-8")
+    recipes = [
+        {"recipe_id": "R-DEM-1", "portions": 10, "ingredients": [
+            {"line_id": "L1", "product_id": "P-FETA", "gross_qty": 600, "unit": "g"},
+            {"line_id": "L2", "product_id": "P-RICE", "gross_qty": 4, "unit": "kg"},
+        ]},
+        {"recipe_id": "R-DEM-2", "portions": 10, "ingredients": [
+            {"line_id": "L1", "product_id": "P-RICE", "gross_qty": 2000, "unit": "g"},
+        ]},
+    ]
+    recipes_path = out / "recipes_mapped.json"
+    recipes_path.write_text(json.dumps(recipes, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    plain = optimize(offers_path, out / "unit_price")
+    assert plain["P-FETA"]["chosen_offer_id"] == "FETA-5KG", plain["P-FETA"]
+    assert plain["P-RICE"]["chosen_offer_id"] == "RICE-B5", plain["P-RICE"]
+    assert "demand_plan" not in plain["P-FETA"], plain["P-FETA"]
+
+    dem = optimize(offers_path, out / "demand", ["--demand", str(recipes_path)])
+    feta, rice, oil = dem["P-FETA"], dem["P-RICE"], dem["P-OIL"]
+    assert feta["chosen_offer_id"] == "FETA-1KG" and feta["demand_spend"] == 9.0, feta
+    assert feta["lowest_unit_price_spend"] == 35.0, feta
+    assert "DEMAND_PACK_OPTIMIZED" in feta["reason_codes"], feta
+    assert rice["demand_base"] == 6.0 and rice["demand_spend"] == 10.5, rice
+    mix = sorted((p["offer_id"], p["count"]) for p in rice["demand_plan"]["packs"])
+    assert mix == [("RICE-A1", 1), ("RICE-A5", 1)], rice["demand_plan"]
+    assert rice["chosen_offer_id"] == "RICE-A5" and rice["demand_plan"]["supplier"] == "alpha", rice
+    assert oil["chosen_offer_id"] == "OIL-5" and "demand_plan" not in oil, oil
+
+    # event aggregate input gives the same answer as the recipes it was built from
+    event = {"items": [{"product_id": "P-FETA", "needed_base": 0.6, "pack_unit": "kg"}, {"product_id": "P-RICE", "needed_base": 6.0, "pack_unit": "kg"}]}
+    event_path = out / "event_purchase.json"
+    event_path.write_text(json.dumps(event, ensure_ascii=False, indent=2), encoding="utf-8")
+    ev = optimize(offers_path, out / "event", ["--demand", str(event_path)])
+    assert {k: v["chosen_offer_id"] for k, v in ev.items()} == {k: v["chosen_offer_id"] for k, v in dem.items()}, ev
+
+    print("DEMAND_SOURCING_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import json
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "event_purchase_demo"
+    out.mkdir(parents=True, exist_ok=True)
+    captured = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    offers = [
+        {"offer_id": "OFF-EV-SALMON", "product_id": "P-SALMON", "supplier": "fishco", "supplier_sku": "SAL-1", "pack_unit": "kg", "pack_size": 1, "price_per_base_unit": 20.0, "captured_at": captured},
+        {"offer_id": "OFF-EV-LEMON", "product_id": "P-LEMON", "supplier": "greens", "supplier_sku": "LEM-6", "pack_unit": "pcs", "pack_size": 6, "price_per_base_unit": 0.5, "captured_at": captured},
+    ]
+    decisions = [
+        {"product_id": "P-SALMON", "chosen_offer_id": "OFF-EV-SALMON"},
+        {"product_id": "P-LEMON", "chosen_offer_id": "OFF-EV-LEMON"},
+    ]
+    # salmon in three dishes: 3 x 400 g -> 3 packs per recipe on their own, 2 packs for the event
+    recipes = [
+        {"recipe_id": f"R-EV-{i}", "portions": 4, "ingredients": [
+            {"line_id": "L1", "product_id": "P-SALMON", "gross_qty": 400, "unit": "g"},
+            {"line_id": "L2", "product_id": "P-LEMON", "gross_qty": 1, "unit": "pcs"},
+        ]}
+        for i in range(1, 4)
+    ]
+    for name, obj in [("offers.json", offers), ("decisions.json", decisions), ("recipes_mapped.json", recipes)]:
+        (out / name).write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    rc_dir = Path(run([
+        sys.executable,
+        str(S / "run_pipeline.py"),
+        "recipe-cost",
+        "--recipes-mapped", str(out / "recipes_mapped.json"),
+        "--offers", str(out / "offers.json"),
+        "--decisions", str(out / "decisions.json"),
+    ]).splitlines()[-1].strip())
+    sm = summary_map(rc_dir)
+    assert sm.get("status") == "PASS", sm
+    assert Path(sm["purchase_list"]).exists() and Path(sm["event_purchase"]).exists(), sm
+
+    event = json.loads((rc_dir / "event_purchase.json").read_text(encoding="utf-8"))
+    items = {x["product_id"]: x for x in event["items"]}
+    salmon, lemon = items["P-SALMON"], items["P-LEMON"]
+    assert salmon["standalone_packs"] == 3 and salmon["packs_to_buy"] == 2, salmon
+    assert salmon["purchase_cost"] == 40.0 and salmon["standalone_cost"] == 60.0, salmon
+    assert lemon["standalone_packs"] == 3 and lemon["packs_to_buy"] == 1, lemon
+    assert event["totals"]["purchase_cost"] == 43.0, event["totals"]
+    assert event["totals"]["pack_rounding_savings"] == 26.0, event["totals"]
+    assert float(sm["pack_rounding_savings"]) == 26.0, sm
+
+    # purchase cost is allocated back to the recipes and sums to the event total
+    alloc = event["allocations"]
+    assert [a["recipe_id"] for a in alloc] == ["R-EV-1", "R-EV-2", "R-EV-3"], alloc
+    assert round(sum(a["purchase_cost_allocated"] for a in alloc), 4) == 43.0, alloc
+    assert all(a["standalone_purchase_cost"] == 23.0 for a in alloc), alloc
+    assert all(a["purchase_cost_allocated"] >= a["food_cost_total"] for a in alloc), alloc
+
+    plist = json.loads((rc_dir / "purchase_list.json").read_text(encoding="utf-8"))
+    assert [x["supplier"] for x in plist["suppliers"]] == ["fishco", "greens"], plist
+    assert plist["suppliers"][0]["items"][0]["packs_to_buy"] == 2, plist
+    assert plist["total"] == 43.0, plist
+
+    # standalone CLI on a single cost_breakdown.json (what offer does without --purchase-list)
+    costs = json.loads((rc_dir / "recipes_cost_breakdown.json").read_text(encoding="utf-8"))
+    one = out / "cost_breakdown_one.json"
+    one.write_text(json.dumps(costs[0], ensure_ascii=False, indent=2), encoding="utf-8")
+    run([
+        sys.executable,
+        str(S / "event_purchase.py"),
+        "--costs", str(one),
+        "--out-event", str(out / "event_one.json"),
+        "--out-purchase-list", str(out / "purchase_list_one.json"),
+    ])
+    single = json.loads((out / "purchase_list_one.json").read_text(encoding="utf-8"))
+    assert single["total"] == 23.0 and single["recipes"] == 1, single
+
+    print("EVENT_PURCHASE_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def recipe(rid, lines):
+    return {
+        "recipe_id": rid,
+        "name": rid,
+        "tier": "standard",
+        "portions": 10,
+        "ingredients": [
+            {"line_id": f"L{i}", "product_id": pid, "gross_qty": grams, "unit": "g", "yield_pct": 100, "waste_pct": 0}
+            for i, (pid, grams) in enumerate(lines, start=1)
+        ],
+    }
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "impact_index_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+    index = out / "impact_index.json"
+    props = out / "proposals"
+
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    raw = [
+        {"offer_id": f"OFF-IMP-{sku}", "supplier": "Alios", "supplier_sku": sku, "product_name": name, "category": "Λαχανικά",
+         "tier": "standard", "pack_size": 1, "pack_unit": "kg", "price": price, "price_per_base_unit": price, "captured_at": cap, "in_stock": True}
+        for sku, name, price in [("AL-POT", "patates kyprou", 0.8), ("AL-TOM", "ντομάτες εγχώριες", 1.5)]
+    ]
+    raw_path = write(out / "raw_offers.json", raw)
+    r1 = write(out / "recipe_r1.json", recipe("REC-IMP-1", [("PROD-POTATO-STD", 2000), ("PROD-TOMATO-STD", 1000)]))
+    r2 = write(out / "recipe_r2.json", recipe("REC-IMP-2", [("PROD-TOMATO-STD", 500)]))
+    request = json.loads((ROOT / "data" / "sample_proposal_request.json").read_text(encoding="utf-8"))
+    req_path = write(out / "request.json", request)
+
+    # filed proposal priced on REC-IMP-1; REC-IMP-2 costed on its own
+    offer_dir = pipeline(
+        "offer", "--template-type", "A", "--raw", raw_path, "--recipe", r1, "--request", req_path,
+        "--file-proposal", "--proposals-root", str(props), "--impact-index", str(index), "--no-history",
+    )
+    assert summary_map(offer_dir).get("filing_status") == "FILED", summary_map(offer_dir)
+    pipeline("cost", "--recipe", r2, "--offers", str(offer_dir / "offers_mapped.json"), "--decisions", str(offer_dir / "decisions.json"),
+             "--impact-index", str(index))
+
+    idx = json.loads(index.read_text(encoding="utf-8"))
+    assert idx["products"]["PROD-TOMATO-STD"]["recipes"] == ["REC-IMP-1", "REC-IMP-2"], idx["products"]
+    assert len(idx["products"]["PROD-TOMATO-STD"]["proposals"]) == 1, idx["products"]
+    assert idx["products"]["PROD-POTATO-STD"]["recipes"] == ["REC-IMP-1"], idx["products"]
+
+    # tomato 1.5 -> 2.1 EUR/kg: +0.6 on REC-IMP-1 (1 kg), +0.3 on REC-IMP-2 (0.5 kg), margin of the filed price -0.6
+    imp_dir = pipeline("impact", "--product", "PROD-TOMATO-STD", "--new-price", "2.1", "--impact-index", str(index))
+    sm = summary_map(imp_dir)
+    assert (sm["recipes"], sm["proposals"], sm["recipe_cost_delta"], sm["proposal_margin_delta"]) == ("2", "1", "0.9", "-0.6"), sm
+    assert float(sm["elapsed_ms"]) < 50, sm
+    res = json.loads((imp_dir / "impact.json").read_text(encoding="utf-8"))
+    by_recipe = {x["recipe_id"]: x for x in res["recipes"]}
+    assert by_recipe["REC-IMP-1"]["cost_delta"] == 0.6 and by_recipe["REC-IMP-1"]["qty_base"] == 1.0, by_recipe
+    assert by_recipe["REC-IMP-2"]["cost_delta"] == 0.3 and by_recipe["REC-IMP-2"]["total_cost_new"] == 1.05, by_recipe
+    prop = res["proposals"][0]
+    filed_payload = json.loads((offer_dir / "proposal_payload.json").read_text(encoding="utf-8"))
+    assert prop["net_selling"] == filed_payload["pricing"]["net_selling"] and prop["margin_delta"] == -0.6, prop
+    assert prop["margin_old"] == round(filed_payload["pricing"]["net_selling"] - filed_payload["pricing"]["cost_total"], 4), prop
+
+    # requote matches the payload generator on the re-costed breakdown
+    cost = json.loads((offer_dir / "cost_breakdown.json").read_text(encoding="utf-8"))
+    cost["total_cost"] = round(cost["total_cost"] + 0.6, 4)
+    run([
+        sys.executable, str(S / "generate_proposal_payload.py"),
+        "--request", req_path,
+        "--cost", write(out / "cost_requote.json", cost),
+        "--out", str(out / "payload_requote.json"),
+        "--validation-out", str(out / "validation_requote.json"),
+        "--issues-out", str(out / "issues_requote.json"),
+    ])
+    requote = json.loads((out / "payload_requote.json").read_text(encoding="utf-8"))["pricing"]
+    assert (prop["requote_net_selling"], prop["requote_gross_total"]) == (requote["net_selling"], requote["gross_total"]), (prop, requote)
+
+    # supplier filter and unknown products
+    none = json.loads(run([sys.executable, str(S / "impact_index.py"), "--index", str(index), "--product", "PROD-TOMATO-STD", "--new-price", "2.1", "--supplier", "TheMart"]))
+    assert none["totals"]["recipes"] == 0 and none["totals"]["proposals"] == 0, none
+    none = json.loads(run([sys.executable, str(S / "impact_index.py"), "--index", str(index), "--product", "PROD-NOPE", "--new-price", "1"]))
+    assert none["recipes"] == [] and none["proposals"] == [], none
+
+    # re-costing REC-IMP-1 without tomato moves its link; the filed proposal keeps the quantities it was priced on
+    r1b = write(out / "recipe_r1b.json", recipe("REC-IMP-1", [("PROD-POTATO-STD", 3000)]))
+    pipeline("cost", "--recipe", r1b, "--offers", str(offer_dir / "offers_mapped.json"), "--decisions", str(offer_dir / "decisions.json"),
+             "--impact-index", str(index))
+    res = json.loads(run([sys.executable, str(S / "impact_index.py"), "--index", str(index), "--product", "PROD-TOMATO-STD", "--new-price", "2.1"]))
+    assert [x["recipe_id"] for x in res["recipes"]] == ["REC-IMP-2"] and res["totals"]["proposal_margin_delta"] == -0.6, res
+    res = json.loads(run([sys.executable, str(S / "impact_index.py"), "--index", str(index), "--product", "PROD-POTATO-STD", "--new-price", "1.0"]))
+    assert res["recipes"][0]["qty_base"] == 3.0 and res["proposals"][0]["qty_base"] == 2.0, res
+
+    # the library can be re-derived from filed manifests
+    rebuilt = pipeline("impact", "--product", "PROD-TOMATO-STD", "--new-price", "2.1", "--impact-index", str(index),
+                       "--rebuild-proposals", "--proposals-root", str(props))
+    assert summary_map(rebuilt)["proposals"] == "1", summary_map(rebuilt)
+
+    print("IMPACT_INDEX_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
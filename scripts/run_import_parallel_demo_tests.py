@@ -0,0 +1,70 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+STATS = ROOT / "runs" / "phase30-demo" / "import_parallel_demo" / "price_stats"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def import_run(workers: int):
+    out = run([
+        sys.executable,
+        str(S / "run_pipeline.py"),
+        "import",
+        "--ocr-input",
+        str(ROOT / "data" / "imports" / "ocr_fixtures" / "4fsa_v1_complete.json"),
+        "--ocr-profile",
+        str(ROOT / "suppliers" / "4fsa.json"),
+        "--pdf-ocr-input",
+        str(ROOT / "data" / "imports" / "pdf_fixtures" / "alios_pdf_price_list_fixture.json"),
+        "--csv-input",
+        str(ROOT / "data" / "imports" / "missing_supplier_prices.csv"),
+        "--anomaly-stats-dir",
+        str(STATS),
+        "--workers",
+        str(workers),
+    ])
+    return Path(out.splitlines()[-1].strip())
+
+
+def main():
+    seq = import_run(1)
+    par = import_run(3)
+
+    raw_seq = json.loads((seq / "raw_merged.json").read_text(encoding="utf-8"))
+    raw_par = json.loads((par / "raw_merged.json").read_text(encoding="utf-8"))
+    if [r.get("offer_id") for r in raw_seq] != [r.get("offer_id") for r in raw_par]:
+        raise AssertionError("Parallel import must merge sources in the same order as sequential import")
+    if not raw_par:
+        raise AssertionError("Expected surviving sources to contribute rows")
+
+    sm = summary_map(par)
+    if sm.get("sources_failed") != "csv":
+        raise AssertionError(f"Expected failed csv source to be isolated, got sources_failed={sm.get('sources_failed')}")
+    failures = json.loads((par / "import_source_failures.json").read_text(encoding="utf-8"))
+    if not failures or failures[0].get("code") != "IMPORT-SOURCE-FAILED":
+        raise AssertionError("Expected IMPORT-SOURCE-FAILED record for the broken source")
+
+    print("IMPORT_PARALLEL_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
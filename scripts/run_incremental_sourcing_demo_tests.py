@@ -0,0 +1,160 @@
+import csv
+import json
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def optimize(offers_path: Path, out_dir: Path, extra=None):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    res = run([
+        sys.executable,
+        str(S / "optimize_sourcing.py"),
+        "--offers", str(offers_path),
+        "--overrides", str(ROOT / "config" / "overrides.json"),
+        "--defaults", str(ROOT / "config" / "defaults.json"),
+        "--policies", str(ROOT / "policies" / "sourcing_policies.json"),
+        "--phase", "3",
+        "--enable-phase2-rules",
+        "--out", str(out_dir / "decisions.json"),
+        "--issues-out", str(out_dir / "issues.json"),
+    ] + (extra or []))
+    return json.loads(res.splitlines()[-1])
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + [str(a) for a in args]).splitlines()[-1].strip())
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def comparable(path: Path):
+    rows = json.loads(path.read_text(encoding="utf-8"))
+    return [{k: v for k, v in r.items() if k != "decision_ts"} for r in rows]
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "incremental_sourcing_demo"
+    out.mkdir(parents=True, exist_ok=True)
+    now = datetime.now(timezone.utc)
+    offers = []
+    for i in range(40):
+        for j, sup in enumerate(["TheMart", "Alios"]):
+            cap = now - timedelta(days=(i % 20) + 0.5)
+            offers.append({
+                "offer_id": f"OFF-INC-{i:03d}-{j}",
+                "product_id": f"PROD-INC-{i:03d}",
+                "supplier": sup,
+                "supplier_sku": f"{i}{j}",
+                "category": ["dairy", "fish", "veg"][i % 3],
+                "tier": "standard",
+                "pack_unit": "kg",
+                "price_per_base_unit": 2.0 + i * 0.1 + j * 0.05,
+                "captured_at": cap.isoformat(),
+                "valid_until": (cap + timedelta(days=30)).isoformat(),
+                "in_stock": True,
+            })
+    v1 = out / "offers_v1.json"
+    v1.write_text(json.dumps(offers, ensure_ascii=False, indent=2), encoding="utf-8")
+    optimize(v1, out / "v1")
+
+    # one offer repriced, one product gains an offer, one offer disappears
+    offers[3]["price_per_base_unit"] = 0.5  # OFF-INC-001-1
+    offers.append(dict(offers[10], offer_id="OFF-INC-NEW-0", supplier="Pelagus", price_per_base_unit=0.1))
+    offers = [o for o in offers if o["offer_id"] != "OFF-INC-020-1"]
+    v2 = out / "offers_v2.json"
+    v2.write_text(json.dumps(offers, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    optimize(v2, out / "full")
+    res = optimize(v2, out / "inc", [
+        "--prev-decisions", str(out / "v1" / "decisions.json"),
+        "--prev-issues", str(out / "v1" / "issues.json"),
+        "--changed-offer-ids", "OFF-INC-001-1",
+    ])
+
+    if comparable(out / "full" / "decisions.json") != comparable(out / "inc" / "decisions.json"):
+        raise AssertionError("Incremental decisions must match a full recomputation")
+    full_issues = json.loads((out / "full" / "issues.json").read_text(encoding="utf-8"))
+    inc_issues = json.loads((out / "inc" / "issues.json").read_text(encoding="utf-8"))
+    if full_issues != inc_issues:
+        raise AssertionError("Incremental issues must match a full recomputation")
+    if res.get("recomputed") != 3 or res.get("carried") != 37:
+        raise AssertionError(f"Expected 3 recomputed / 37 carried product groups, got {res}")
+
+    # same offer ids, new content, no --changed-offer-ids: the group digest still catches the change
+    offers[5]["price_per_base_unit"] = 0.2  # OFF-INC-002-1
+    offers[8]["in_stock"] = False  # OFF-INC-004-0
+    v3 = out / "offers_v3.json"
+    v3.write_text(json.dumps(offers, ensure_ascii=False, indent=2), encoding="utf-8")
+    optimize(v3, out / "full3")
+    res = optimize(v3, out / "inc3", ["--prev-decisions", str(out / "full" / "decisions.json"), "--prev-issues", str(out / "full" / "issues.json")])
+    if comparable(out / "full3" / "decisions.json") != comparable(out / "inc3" / "decisions.json"):
+        raise AssertionError("Content changes under unchanged offer ids must be re-sourced")
+    if res.get("recomputed") != 2 or res.get("carried") != 38:
+        raise AssertionError(f"Expected 2 recomputed / 38 carried product groups, got {res}")
+
+    # real re-imports: offer ids are rebuilt from the row index and captured_at is restamped, yet unchanged
+    # products are carried (matched by supplier::supplier_sku) and the result equals a full pass
+    profile = json.loads((ROOT / "suppliers" / "supplier_x.json").read_text(encoding="utf-8"))
+    profile["supplier_id"] = "zz_incremental_demo"
+    profile_path = out / "incremental_profile.json"
+    profile_path.write_text(json.dumps(profile, ensure_ascii=False, indent=2), encoding="utf-8")
+    src = ROOT / "data" / "prices" / "themart_round1.csv"
+    lines = src.read_text(encoding="utf-8").splitlines()
+    header, body = lines[0], lines[1:41]
+    catalog = json.loads((ROOT / "data" / "catalog.json").read_text(encoding="utf-8"))["items"]
+    pids = [c["product_id"] for c in catalog[:8]]
+    map_dir = out / "sku_map"
+    map_dir.mkdir(exist_ok=True)
+    skus = [r["sku"] for r in csv.DictReader(lines[:41])]
+    (map_dir / "supplier_x.json").write_text(json.dumps({f"Supplier X::{sku}": pids[i % 8] for i, sku in enumerate(skus)}), encoding="utf-8")
+    cols = body[4].split(",")
+    cols[5] = f"{float(cols[5]) * 0.5:.2f}"  # repriced: its product (pids[4]) is re-sourced
+    csv_v1 = out / "import_v1.csv"
+    csv_v2 = out / "import_v2.csv"
+    csv_v1.write_text("\n".join([header] + body) + "\n", encoding="utf-8")
+    # a new first row shifts every offer id of the second import
+    csv_v2.write_text("\n".join([header, "ZZ-NEW,unmapped novelty,Οπωροπωλείο,1,kg,1.00,EUR,0.13,true"] + body[:4] + [",".join(cols)] + body[5:]) + "\n", encoding="utf-8")
+
+    def do_import(path):
+        return pipeline("import", "--csv-input", path, "--csv-profile", profile_path, "--delta", "--no-anomaly")
+
+    prices = ("--no-cache", "--no-history", "--sku-map-dir", map_dir)
+    imp1 = do_import(csv_v1)
+    p1 = pipeline("prices", "--raw", imp1 / "raw_merged.json", *prices)
+    imp2 = do_import(csv_v2)
+    assert summary_map(imp2)["delta_price_changed"] == "1" and summary_map(imp2)["delta_added"] == "1", summary_map(imp2)
+    full2 = pipeline("prices", "--raw", imp2 / "raw_merged.json", *prices)
+    for extra in ((), ("--changed-offer-ids", imp2 / "import_delta.json")):
+        inc2 = pipeline("prices", "--raw", imp2 / "raw_merged.json", "--incremental-from", p1, *prices, *extra)
+        assert summary_map(inc2)["sourcing_mode"] == "incremental recomputed=1 carried=7", summary_map(inc2)
+        if comparable(full2 / "decisions.json") != comparable(inc2 / "decisions.json"):
+            raise AssertionError("Carried decisions after a re-import must match a full pass over the new offers")
+        if json.loads((full2 / "issues.json").read_text(encoding="utf-8")) != json.loads((inc2 / "issues.json").read_text(encoding="utf-8")):
+            raise AssertionError("Carried issues after a re-import must match a full pass over the new offers")
+    new_ids = {o["offer_id"] for o in json.loads((imp2 / "raw_merged.json").read_text(encoding="utf-8"))}
+    assert all(d["chosen_offer_id"] in new_ids for d in json.loads((inc2 / "decisions.json").read_text(encoding="utf-8")))
+
+    print("INCREMENTAL_SOURCING_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
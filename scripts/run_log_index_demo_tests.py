@@ -0,0 +1,144 @@
+import csv
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def append(path: Path, rows, raw=""):
+    with path.open("a", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        f.write(raw)
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "log_index_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    log = out / "mapping_persist_log.jsonl"
+    shutil.copy(ROOT / "audit" / "mapping_persist_log.jsonl", log)
+    base_lines = len(log.read_text(encoding="utf-8").splitlines())
+    index_dir = out / "index"
+
+    def q(*extra):
+        return json.loads(run([sys.executable, str(S / "log_index.py"), "--log", "mapping_persist", "--path", str(log),
+                               "--index-dir", str(index_dir)] + list(extra)))
+
+    r = q("--field", "sku", "--key", "Alios::D0028")
+    assert r["rebuilt"] and r["compacted"] and r["records"] == base_lines, r
+    assert [x["product_id"] for x in r["matches"]] == ["PROD-ALI-ROUND1-D0028"], r["matches"]
+    r = q("--field", "sku", "--key", "Alios::D0028")
+    assert not r["rebuilt"] and r["tail_lines"] == 0 and not r["compacted"], r
+    assert q("--field", "sku", "--key", "Alios::NOPE")["matches"] == []
+
+    # appended lines are read from the tail; the snapshot on disk is not rewritten for a short tail
+    conflict = {"severity": "BLOCK", "code": "REVIEW-SKU-MAP-CONFLICT", "offer_id": "OFF-LI-1", "sku_key": "Alios::D0028",
+                "existing_product_id": "PROD-ALI-ROUND1-D0028", "new_product_id": "PROD-LI-NEW", "supplier_id": "alios", "ts": "2026-03-01T10:00:00+00:00"}
+    append(log, [conflict, {"severity": "INFO", "code": "REVIEW-SKU-MAP-PERSISTED", "sku_key": "Nova::N1", "product_id": "PROD-LI-NEW",
+                            "supplier_id": "nova", "ts": "2026-03-02T10:00:00+00:00"}], raw="not json\n")
+    r = q("--field", "sku", "--key", "Alios::D0028")
+    assert r["tail_lines"] == 3 and not r["compacted"] and r["bad_lines"] == 1, r
+    assert [x.get("code") for x in r["matches"]] == ["REVIEW-SKU-MAP-PERSISTED", "REVIEW-SKU-MAP-CONFLICT"], r["matches"]
+    snap = json.loads(Path(r["path"]).read_text(encoding="utf-8"))
+    assert snap["lines"] == base_lines and snap["offset"] < log.stat().st_size, (snap["lines"], snap["offset"])
+
+    # conflict rows are filed under both products; bare skus and supplier prefixes resolve too
+    assert [x["sku_key"] for x in q("--field", "product_id", "--key", "PROD-LI-NEW")["matches"]] == ["Alios::D0028", "Nova::N1"]
+    assert len(q("--field", "product_id", "--key", "PROD-ALI-ROUND1-D0028")["matches"]) == 2
+    assert q("--field", "supplier_sku", "--key", "N1")["matches"][0]["sku_key"] == "Nova::N1"
+    alios = q("--field", "sku", "--prefix", "Alios::")["matches"]
+    assert "Alios::D0028" in alios and all(k.startswith("Alios::") for k in alios), list(alios)[:5]
+
+    # a torn last line waits until it is complete
+    append(log, [], raw='{"code": "REVIEW-SKU-MAP-PERSISTED", "sku_key": "Nova::N2", "product_id": "PROD-LI-2"')
+    assert q("--field", "sku", "--key", "Nova::N2")["matches"] == []
+    append(log, [], raw="}\n")
+    assert q("--field", "sku", "--key", "Nova::N2")["matches"][0]["product_id"] == "PROD-LI-2"
+
+    # a long tail triggers compaction; --compact forces it
+    append(log, [{"code": "REVIEW-SKU-MAP-PERSISTED", "sku_key": f"Bulk::{i}", "product_id": "PROD-LI-BULK"} for i in range(300)])
+    r = q("--field", "sku", "--key", "Bulk::299")
+    assert r["compacted"] and not r["rebuilt"] and len(r["matches"]) == 1, r
+    r = q("--compact")
+    assert r["compacted"] and r["tail_lines"] == 0 and json.loads(Path(r["path"]).read_text(encoding="utf-8"))["offset"] == log.stat().st_size
+
+    # the raw log is the source of truth: a rewritten log is re-read from scratch
+    lines = log.read_text(encoding="utf-8").splitlines(keepends=True)
+    log.write_text("".join(lines[:10]), encoding="utf-8")
+    r = q("--field", "sku", "--key", "Bulk::1")
+    assert r["rebuilt"] and r["records"] == 10 and r["matches"] == [], r
+
+    # lookups are a bisect over the sorted keys: a large log answers many lookups without rescanning
+    big = out / "big_log.jsonl"
+    append(big, [{"code": "REVIEW-SKU-MAP-PERSISTED", "sku_key": f"S{i % 50}::{i}", "product_id": f"PROD-{i % 700}", "ts": f"2026-01-01T00:00:{i % 60:02d}"}
+                 for i in range(60000)])
+    timing = (
+        "import sys, time; sys.path.insert(0, sys.argv[1]); import log_index; "
+        "snap = log_index.load('mapping_persist', sys.argv[2], sys.argv[3]); t0 = time.perf_counter(); "
+        "hits = sum(len(log_index.lookup(snap, 'sku', f'S{i % 50}::{i}')) for i in range(0, 60000, 3)); "
+        "print(hits, round((time.perf_counter() - t0) * 1000, 3))"
+    )
+    hits, ms = run([sys.executable, "-c", timing, str(S), str(big), str(index_dir)]).split()
+    assert int(hits) == 20000 and float(ms) < 500, (hits, ms)
+    # the snapshot points into the raw log instead of copying it: smaller than the log, no record bodies
+    big_snap = Path(json.loads(run([sys.executable, str(S / "log_index.py"), "--log", "mapping_persist", "--path", str(big),
+                                    "--index-dir", str(index_dir)]))["path"])
+    assert big_snap.stat().st_size < big.stat().st_size, (big_snap.stat().st_size, big.stat().st_size)
+    assert "REVIEW-SKU-MAP-PERSISTED" not in big_snap.read_text(encoding="utf-8")
+    hits = json.loads(run([sys.executable, str(S / "log_index.py"), "--log", "mapping_persist", "--path", str(big), "--index-dir", str(index_dir),
+                           "--field", "product_id", "--key", "PROD-699"]))["matches"]
+    assert [x["_line"] for x in hits] == list(range(700, 60001, 700)) and {x["sku_key"] for x in hits} == {f"S{i % 50}::{i}" for i in range(699, 60000, 700)}, hits[:2]
+
+    # review skeleton shows prior decisions for the row's SKU
+    raw = write(out / "raw.json", [{"offer_id": "OFF-LI-9", "supplier": "Alios", "supplier_sku": "D0028", "product_name": "demo item",
+                                    "pack_size": 1, "pack_unit": "kg", "price": 2.0}])
+    needs = write(out / "needs.json", [{"offer_id": "OFF-LI-9", "supplier": "Alios", "supplier_sku": "D0028", "product_name": "demo item", "reason": "unmapped"}])
+    rv = pipeline("review", "--needs-review", needs, "--raw", raw, "--price-quotes", raw)
+    with (rv / "review_patch_skeleton.csv").open("r", encoding="utf-8", newline="") as f:
+        row = list(csv.DictReader(f))[0]
+    assert "REVIEW-SKU-MAP-PERSISTED PROD-ALI-ROUND1-D0028" in row["prior_decisions"], row
+
+    # decisions command: one query per key across the logs
+    d = pipeline("decisions", "--sku", "Alios::D0028", "--source-key", "demo-src-52")
+    s = summary_map(d)
+    assert s["matches_mapping_persist_sku"] == "1" and int(s["matches_source_registry_source_key"]) >= 1, s
+    reply = (d / "decisions_reply.txt").read_text(encoding="utf-8")
+    assert "PROD-ALI-ROUND1-D0028" in reply and "source_key=demo-src-52" in reply, reply
+
+    print("LOG_INDEX_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "lookup_index_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    # isolated copies of the sources so edits below never touch the tree
+    catalog = out / "catalog.json"
+    shutil.copy(ROOT / "data" / "catalog.json", catalog)
+    sku_dir = out / "supplier_sku_map"
+    shutil.copytree(ROOT / "mappings" / "supplier_sku_map", sku_dir)
+    aliases = out / "catalog_aliases.json"
+    write(aliases, {"σολομός": "PROD-POTATO-STD"})
+    index_dir = out / "index"
+
+    def lookup(*extra):
+        return json.loads(run([sys.executable, str(S / "lookup_index.py"), "--catalog", str(catalog), "--sku-map-dir", str(sku_dir),
+                               "--recipe-aliases", str(aliases), "--index-dir", str(index_dir)] + list(extra)))
+
+    first = lookup("--verify")
+    assert first["rebuilt"] and first["reason"] == "missing" and first["verified"], first
+    assert first["products"] == 16 and first["recipe_aliases"] == 1 and first["fuzzy_entries"] > first["products"], first
+    again = lookup("--verify")
+    assert not again["rebuilt"] and again["verified"] and again["path"] == first["path"], again
+
+    # a touched but identical file costs one hash, not a rebuild; the new stamp is kept
+    st = os.stat(catalog)
+    os.utime(catalog, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    assert not lookup()["rebuilt"]
+    manifest = json.loads(Path(first["path"]).read_text(encoding="utf-8"))["sources"]
+    assert manifest["catalog"]["stamp"][0] == st.st_mtime_ns + 5_000_000_000, manifest["catalog"]
+
+    # content changes rebuild: an edited SKU map, a new SKU map file, a removed one, the recipe alias file
+    alios = sku_dir / "alios.json"
+    m = json.loads(alios.read_text(encoding="utf-8"))
+    write(alios, {**m, "Alios::LK-NEW": "PROD-POTATO-STD"})
+    r = lookup("--verify")
+    assert r["rebuilt"] and r["reason"] == "sku_map/alios.json changed" and r["sku_map"] == again["sku_map"] + 1 and r["verified"], r
+    write(sku_dir / "newsupplier.json", {"New::1": "PROD-ONION-RED-STD"})
+    r = lookup()
+    assert r["rebuilt"] and r["reason"] == "source set changed" and r["sku_map"] == again["sku_map"] + 2, r
+    (sku_dir / "newsupplier.json").unlink()
+    r = lookup()
+    assert r["rebuilt"] and r["reason"] == "source set changed", r
+    write(aliases, {"σολομός": "PROD-POTATO-STD", "ρύζι": "PROD-POTATO-STD"})
+    r = lookup()
+    assert r["rebuilt"] and r["reason"] == "recipe_aliases changed" and r["recipe_aliases"] == 2, r
+    assert not lookup()["rebuilt"]
+
+    # a damaged artifact is rebuilt, never trusted
+    Path(first["path"]).write_text("{not json", encoding="utf-8")
+    r = lookup("--verify")
+    assert r["rebuilt"] and r["reason"] == "missing" and r["verified"], r
+
+    # mapping through the compiled lookup matches mapping straight from the sources
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    raw = [
+        {"offer_id": f"OFF-LK-{i}", "supplier": "Alios", "supplier_sku": f"LK-{i}", "product_name": name, "category": "Λαχανικά",
+         "tier": "standard", "pack_size": 1, "pack_unit": "kg", "price": 1.0, "price_per_base_unit": 1.0, "captured_at": cap, "in_stock": True}
+        for i, name in enumerate(["patates kyprou", "ντομάτες εγχώριες", "PATATES KIPROU 5kg", "xyz widget"], start=1)
+    ]
+    raw_path = write(out / "raw_offers.json", raw)
+    parity = (
+        "import json, sys; sys.path.insert(0, sys.argv[1]); import map_offers, lookup_index; from pathlib import Path; "
+        "raw = json.loads(Path(sys.argv[2]).read_text(encoding='utf-8')); root = Path(sys.argv[1]).parent; "
+        "cat = map_offers.load_json(root / 'data' / 'catalog.json', {'items': []}); "
+        "a = map_offers.map_offers(raw, cat, map_offers.load_supplier_sku_map(root)); "
+        "b = map_offers.map_offers(raw, None, None, lookup=lookup_index.load()); print(json.dumps(a == b))"
+    )
+    assert json.loads(run([sys.executable, "-c", parity, str(S), raw_path])) is True
+
+    # the prices stage picks up a SKU map edit on the next run and drops it once the file is gone
+    extra = ROOT / "mappings" / "supplier_sku_map" / "zz_lookup_demo.json"
+    try:
+        write(extra, {"Alios::LK-4": "PROD-SPINACH-STD"})
+        d = pipeline("prices", "--raw", raw_path, "--no-history", "--no-cache")
+        mapped = {x["offer_id"]: x["product_id"] for x in json.loads((d / "offers_mapped.json").read_text(encoding="utf-8"))}
+        assert mapped["OFF-LK-4"] == "PROD-SPINACH-STD" and mapped["OFF-LK-1"] == "PROD-POTATO-STD", mapped
+    finally:
+        extra.unlink()
+    d = pipeline("prices", "--raw", raw_path, "--no-history", "--no-cache")
+    mapped = {x["offer_id"]: x["product_id"] for x in json.loads((d / "offers_mapped.json").read_text(encoding="utf-8"))}
+    assert mapped["OFF-LK-4"] is None, mapped
+
+    print("LOOKUP_INDEX_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
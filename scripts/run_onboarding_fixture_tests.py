@@ -18,12 +18,12 @@ def load(path):
     return json.loads(Path(path).read_text(encoding="utf-8"))
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Supplier onboarding fixture tests")
     p.add_argument("--supplier-id", required=True)
     p.add_argument("--profile", required=False, default=None)
     p.add_argument("--fixtures-root", required=False, default=None)
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     sid = args.supplier_id
     profile_path = Path(args.profile) if args.profile else (ROOT / "suppliers" / f"{sid}.json")
@@ -1,9 +1,16 @@
 import argparse
+import concurrent.futures
+import contextlib
 import hashlib
+import importlib
+import io
+import itertools
 import json
+import os
 import re
 import subprocess
 import sys
+import traceback
 import unicodedata
 from urllib.parse import urlparse
 from datetime import datetime, timezone
@@ -14,8 +21,59 @@ SCRIPTS = ROOT / "scripts"
 TEMPLATES = ROOT / "templates"
 RUNS = ROOT / "runs"
 
+# inprocess (default): scripts/*.py stages run via their main(argv) inside this interpreter.
+# subprocess: legacy one-interpreter-per-stage fan-out.
+STAGE_MODE = os.environ.get("EVOCHIA_STAGE_MODE", "inprocess").strip().lower()
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import cost_recipe as stage_cost  # noqa: E402
+import bootstrap_mapping as stage_bootstrap  # noqa: E402
+import delta_import as stage_delta  # noqa: E402
+import event_purchase as stage_purchase  # noqa: E402
+import impact_index as stage_impact  # noqa: E402
+import requote_library as stage_requote  # noqa: E402
+import price_scenarios as stage_scenarios  # noqa: E402
+import quote_curve as stage_curve  # noqa: E402
+import map_offers as stage_map  # noqa: E402
+import log_index as stage_logs  # noqa: E402
+import lookup_index as stage_lookup  # noqa: E402
+import optimize_basket as stage_basket  # noqa: E402
+import normalize_prices as stage_normalize  # noqa: E402
+import optimize_sourcing as stage_sourcing  # noqa: E402
+import price_history as stage_history  # noqa: E402
+import run_registry  # noqa: E402
+import stage_cache  # noqa: E402
+
+
+def _is_stage_cmd(cmd):
+    if len(cmd) < 2 or cmd[0] != sys.executable:
+        return False
+    script = Path(cmd[1])
+    return script.suffix == ".py" and script.parent.resolve() == SCRIPTS.resolve()
+
+
+def _run_inprocess(cmd):
+    script = Path(cmd[1])
+    argv = [str(x) for x in cmd[2:]]
+    entry = main if script.name == "run_pipeline.py" else importlib.import_module(script.stem).main
+    out_buf, err_buf = io.StringIO(), io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out_buf), contextlib.redirect_stderr(err_buf):
+            entry(argv)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"Command failed: {' '.join(cmd)}\nSTDOUT:\n{out_buf.getvalue()}\nSTDERR:\n{err_buf.getvalue()}")
+    except Exception as e:
+        raise RuntimeError(f"Command failed: {' '.join(cmd)}\nSTDOUT:\n{out_buf.getvalue()}\nSTDERR:\n{err_buf.getvalue()}{traceback.format_exc()}") from e
+    return out_buf.getvalue().strip()
+
 
 def run(cmd):
+    _note_used(cmd[2:])
+    if STAGE_MODE != "subprocess" and _is_stage_cmd(cmd):
+        return _run_inprocess(cmd)
     r = subprocess.run(cmd, capture_output=True, text=True)
     if r.returncode != 0:
         raise RuntimeError(f"Command failed: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
@@ -23,12 +81,76 @@ def run(cmd):
 
 
 def now_run_dir(kind: str):
+    run_registry.ensure()
     ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-    out = RUNS / ts / kind
-    out.mkdir(parents=True, exist_ok=True)
+    # in-process stages finish within the same second; never share a run dir between two runs of one kind
+    for n in itertools.count(1):
+        out = RUNS / (ts if n == 1 else f"{ts}-{n:02d}") / kind
+        try:
+            out.mkdir(parents=True)
+        except FileExistsError:
+            continue
+        run_registry.record_start(out, kind)
+        _OPEN_RUNS.append(out)
+        return out
+
+
+# run dirs created by the command currently executing in this process (nested in-process commands stack up)
+_OPEN_RUNS = []
+# paths each executing command read or handed to a stage, one set per main() call; only those arguments are hashed
+_USED_INPUTS = []
+_AUDIT_HOOKED = False
+
+
+def _note_used(paths):
+    for used in _USED_INPUTS:
+        used.update(str(x) for x in paths)
+
+
+def _audit_open(event, a):
+    # ("open", (path, mode, flags)): builtins.open passes a mode string, os.open only flags
+    if event != "open" or not _USED_INPUTS or not isinstance(a[0], (str, os.PathLike)):
+        return
+    mode, flags = a[1], a[2] or 0
+    if ("r" in mode and "+" not in mode) if mode else not flags & (os.O_WRONLY | os.O_RDWR):
+        _note_used((a[0],))
+
+
+def _track_inputs():
+    global _AUDIT_HOOKED
+    if not _AUDIT_HOOKED:
+        sys.addaudithook(_audit_open)
+        _AUDIT_HOOKED = True
+    _USED_INPUTS.append(set())
+    return _USED_INPUTS[-1]
+
+
+def _input_hashes(args, used):
+    """Digest of each file-valued argument the command actually read (default profiles it never opened are skipped)."""
+    used = {os.path.abspath(p) for p in used}
+    out = {}
+    for k, v in sorted(vars(args).items()):
+        if k == "func" or not isinstance(v, str) or not v or len(v) > 1024:
+            continue
+        try:
+            p = Path(v)
+            if os.path.abspath(p) in used and p.is_file():
+                out[k] = run_registry.file_digest(p)
+        except (OSError, ValueError):
+            continue
     return out
 
 
+def _finish_runs(mark, args, used, failed=False):
+    inputs = None
+    while len(_OPEN_RUNS) > mark:
+        d = _OPEN_RUNS.pop()
+        if inputs is None:
+            inputs = _input_hashes(args, used)
+        status = "FAILED" if failed else (_read_run_summary_map(d / "run_summary.txt").get("status") or "DONE")
+        run_registry.record_finish(d, status=status, inputs=inputs)
+
+
 def load_json(path):
     p = Path(path)
     if not p.exists():
@@ -40,6 +162,287 @@ def write_summary(path: Path, lines):
     path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
 
+def _write_json(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+PRICES_CHAIN_ARTIFACTS = ["offers_normalized.csv", "offers_mapped.json", "needs_review.json", "decisions.json", "issues.json"]
+
+
+def _sku_map_dir(args):
+    return Path(getattr(args, "sku_map_dir", None) or stage_lookup.SKU_MAP_DIR)
+
+
+def _prices_chain_inputs(args):
+    """Everything the map -> optimize result depends on besides the clock."""
+    return {
+        "raw": stage_cache.file_digest(args.raw),
+        "catalog": stage_cache.file_digest(args.catalog),
+        "supplier_sku_map": stage_cache.dir_digest(_sku_map_dir(args)),
+        "overrides": stage_cache.file_digest(args.overrides),
+        "policies": stage_cache.file_digest(getattr(args, "policies", None)),
+        "defaults": stage_cache.file_digest(args.defaults),
+        "phase": int(args.phase),
+        "enable_phase2_rules": bool(args.enable_phase2_rules),
+        "enable_production_overrides": bool(getattr(args, "enable_production_overrides", False)),
+        "rollout_categories": str(getattr(args, "rollout_categories", "") or ""),
+        "service_tag": str(getattr(args, "service_tag", "CAT")),
+        "demand": stage_cache.file_digest(getattr(args, "demand", None)),
+        "code": [stage_cache.file_digest(SCRIPTS / f) for f in ("normalize_prices.py", "map_offers.py", "alias_match.py", "lookup_index.py", "optimize_sourcing.py")],
+    }
+
+
+def _refresh_issue_ages(issues, offers, now):
+    # cached issues carry age_days from store time; decisions are unchanged until expires_at, ages are not
+    cap_by_offer = {o.get("offer_id"): stage_sourcing.parse_dt(o.get("captured_at")) for o in offers}
+    for x in issues:
+        cap = cap_by_offer.get(x.get("offer_id"))
+        if "age_days" in x and cap:
+            x["age_days"] = round(stage_sourcing.age_days(cap, now), 2)
+    return issues
+
+
+def _changed_offer_ids(spec):
+    """--changed-offer-ids: comma list, a JSON list of ids, or an import_delta.json from `import --delta`."""
+    if not spec:
+        return []
+    p = Path(spec)
+    if p.suffix.lower() == ".json" and p.exists():
+        obj = load_json(p)
+        ids = []
+        for x in obj if isinstance(obj, list) else []:
+            if isinstance(x, dict):
+                ids.extend(x.get("changed_offer_ids", []) + x.get("removed_offer_ids", []))
+            else:
+                ids.append(x)
+        return [str(i) for i in ids if i]
+    return [x.strip() for x in str(spec).split(",") if x.strip()]
+
+
+def _incremental_base(args, inputs):
+    """(prev_decisions, prev_issues) from --incremental-from when its sourcing context matches; else None."""
+    args.sourcing_mode = "full"
+    prev_dir = getattr(args, "incremental_from", None)
+    if not prev_dir:
+        return None
+    prev_dir = Path(prev_dir)
+    prev_ctx = load_json(prev_dir / "sourcing_context.json")
+    cur_ctx = {k: v for k, v in inputs.items() if k != "raw"}
+    if not isinstance(prev_ctx, dict) or {k: v for k, v in prev_ctx.items() if k != "raw"} != cur_ctx or not (prev_dir / "decisions.json").exists():
+        args.sourcing_mode = "full (context changed)"
+        return None
+    return load_json(prev_dir / "decisions.json"), load_json(prev_dir / "issues.json")
+
+
+def _prices_chain(args, normalized_csv, mapped_json, needs_review, decisions, issues):
+    """normalize -> map -> optimize for args.raw, served from state/stage_cache when inputs are unchanged."""
+    if getattr(args, "incremental_from", None) and Path(args.raw).name == "raw_changed.json":
+        # sourcing groups offers per product over --raw alone; unchanged rows must be in it to be carried
+        raise RuntimeError("--incremental-from needs the import's raw_merged.json: raw_changed.json holds only added/repriced rows and would drop every unchanged product")
+    args.stage_cache = "off"
+    args.sourcing_mode = "full"
+    inputs = _prices_chain_inputs(args) if Path(args.raw).exists() else {}
+    _write_json(normalized_csv.parent / "sourcing_context.json", inputs)
+    if getattr(args, "no_cache", False) or not inputs:
+        return _prices_chain_compute(args, normalized_csv, mapped_json, needs_review, decisions, issues, inputs)
+
+    now = datetime.now(timezone.utc)
+    key = stage_cache.cache_key(inputs)
+    # offer names the sourcing issues sourcing_issues.json; cache entries always use the prices names
+    targets = dict(zip(PRICES_CHAIN_ARTIFACTS, [normalized_csv, mapped_json, needs_review, decisions, issues]))
+    hit = stage_cache.lookup("prices_chain", key, now=now)
+    if hit:
+        _, entry = hit
+        for name, target in targets.items():
+            target.write_bytes((entry / name).read_bytes())
+        args.stage_cache = "hit"
+        chain = {
+            "offers": load_json(mapped_json),
+            "needs_review": load_json(needs_review),
+            "decisions": load_json(decisions),
+            "issues": load_json(issues),
+        }
+        _write_json(issues, _refresh_issue_ages(chain["issues"], chain["offers"], now))
+        return chain
+
+    chain = _prices_chain_compute(args, normalized_csv, mapped_json, needs_review, decisions, issues, inputs)
+    args.stage_cache = "miss"
+    # map_offers stamps rows without captured_at with the current time; such results are not reproducible
+    raw_rows, _ = stage_normalize.load_rows(Path(args.raw))
+    if all(stage_sourcing.parse_dt(r.get("captured_at")) for r in raw_rows):
+        defaults = load_json(args.defaults)
+        expires_at = stage_sourcing.decisions_valid_until(chain["offers"], defaults if isinstance(defaults, dict) else {}, now)
+        stage_cache.store(
+            "prices_chain",
+            key,
+            targets,
+            inputs,
+            expires_at=expires_at,
+        )
+    return chain
+
+
+def _prices_chain_compute(args, normalized_csv, mapped_json, needs_review, decisions, issues, inputs):
+    base = _incremental_base(args, inputs)
+    changed = _changed_offer_ids(getattr(args, "changed_offer_ids", None))
+    if STAGE_MODE == "subprocess":
+        run([sys.executable, str(SCRIPTS / "normalize_prices.py"), "--input", args.raw, "--out", str(normalized_csv)])
+        run([
+            sys.executable,
+            str(SCRIPTS / "map_offers.py"),
+            "--raw",
+            args.raw,
+            "--catalog",
+            args.catalog,
+            "--out",
+            str(mapped_json),
+            "--needs-review",
+            str(needs_review),
+            "--sku-map-dir",
+            str(_sku_map_dir(args)),
+        ])
+        run([
+            sys.executable,
+            str(SCRIPTS / "optimize_sourcing.py"),
+            "--offers",
+            str(mapped_json),
+            "--overrides",
+            args.overrides,
+            "--defaults",
+            args.defaults,
+            "--out",
+            str(decisions),
+            "--issues-out",
+            str(issues),
+            "--phase",
+            str(args.phase),
+            "--service-tag",
+            str(getattr(args, "service_tag", "CAT")),
+        ] + (["--policies", args.policies] if getattr(args, "policies", None) else [])
+          + (["--enable-phase2-rules"] if args.enable_phase2_rules else [])
+          + (["--enable-production-overrides"] if getattr(args, "enable_production_overrides", False) else [])
+          + (["--rollout-categories", args.rollout_categories] if getattr(args, "rollout_categories", None) else [])
+          + (["--demand", args.demand] if getattr(args, "demand", None) else [])
+          + ([
+              "--prev-decisions", str(Path(args.incremental_from) / "decisions.json"),
+              "--prev-issues", str(Path(args.incremental_from) / "issues.json"),
+              "--changed-offer-ids", ",".join(changed),
+          ] if base is not None else []))
+        if base is not None:
+            args.sourcing_mode = "incremental"
+        return {
+            "offers": load_json(mapped_json),
+            "needs_review": load_json(needs_review),
+            "decisions": load_json(decisions),
+            "issues": load_json(issues),
+        }
+
+    raw_rows, headers = stage_normalize.load_rows(Path(args.raw))
+    stage_normalize.normalize_prices(raw_rows, normalized_csv, headers)
+
+    lookup = stage_lookup.load(catalog=args.catalog, sku_map_dir=_sku_map_dir(args))
+    mapped, needs = stage_map.map_offers(raw_rows, None, None, lookup=lookup)
+    _write_json(mapped_json, mapped)
+    _write_json(needs_review, needs)
+
+    flags = dict(
+        phase=args.phase,
+        enable_phase2_rules=args.enable_phase2_rules,
+        enable_production_overrides=getattr(args, "enable_production_overrides", False),
+        rollout_categories=getattr(args, "rollout_categories", ""),
+        service_tag=getattr(args, "service_tag", "CAT"),
+        demand=stage_sourcing.load_demand(args.demand) if getattr(args, "demand", None) else None,
+    )
+    overrides = stage_sourcing.load_overrides(args.overrides, getattr(args, "policies", None))
+    if base is not None:
+        dec, iss, st = stage_sourcing.optimize_sourcing_incremental(
+            mapped, base[0], base[1], overrides, load_json(args.defaults), changed_offer_ids=changed, **flags
+        )
+        args.sourcing_mode = f"incremental recomputed={st['recomputed']} carried={st['carried']}"
+    else:
+        dec, iss = stage_sourcing.optimize_sourcing(mapped, overrides, load_json(args.defaults), **flags)
+    _write_json(decisions, dec)
+    _write_json(issues, iss)
+    return {"offers": mapped, "needs_review": needs, "decisions": dec, "issues": iss}
+
+
+def _record_history(args, rows, out: Path):
+    """Append this run's mapped offers to state/price_history; returns the summary line."""
+    if getattr(args, "no_history", False):
+        return ["price_history=off"]
+    st = stage_history.record_offers(rows, source=str(out), root=getattr(args, "history_dir", None))
+    return [f"price_history=added={st['added']} duplicates={st['duplicates']} skipped={st['skipped']}"]
+
+
+def _as_of_chain(args, mapped_json, needs_review, decisions, issues):
+    """--as-of: offers in force at that time from the price history, re-sourced with the clock set to it."""
+    as_of = stage_history.parse_as_of(args.as_of)
+    offers, dec, iss = stage_history.decisions_as_of(
+        as_of,
+        stage_sourcing.load_overrides(args.overrides, getattr(args, "policies", None)),
+        load_json(args.defaults),
+        root=getattr(args, "history_dir", None),
+        phase=args.phase,
+        enable_phase2_rules=args.enable_phase2_rules,
+        enable_production_overrides=getattr(args, "enable_production_overrides", False),
+        rollout_categories=getattr(args, "rollout_categories", ""),
+        service_tag=getattr(args, "service_tag", "CAT"),
+        demand=stage_sourcing.load_demand(args.demand) if getattr(args, "demand", None) else None,
+    )
+    if not offers:
+        raise RuntimeError(f"price history has no offers captured at or before {as_of.isoformat()}")
+    _write_json(mapped_json, offers)
+    _write_json(needs_review, [])
+    _write_json(decisions, dec)
+    _write_json(issues, iss)
+    args.stage_cache = "off"
+    args.sourcing_mode = f"as_of {as_of.isoformat()}"
+    return {"offers": offers, "needs_review": [], "decisions": dec, "issues": iss, "as_of": as_of}
+
+
+def _record_impact(args, costs=None, source=None, filed_dir=None):
+    """Keep state/impact_index.json current: recipe links from fresh costings, proposal links from a filing."""
+    path = getattr(args, "impact_index", None)
+    idx = stage_impact.load_index(path)
+    if costs:
+        stage_impact.record_costs(idx, costs, source=source)
+    if filed_dir:
+        manifest = load_json(Path(filed_dir) / "manifest.json")
+        entries = manifest.get("entries", []) if isinstance(manifest, dict) else []
+        if entries:
+            stage_impact.record_filed_entry(idx, filed_dir, entries[-1])
+    stage_impact.save_index(idx, path)
+
+
+def _basket(args, out: Path, chain):
+    """--basket: reassign demanded products across suppliers (delivery fees / minimum orders) on top of the chain.
+
+    Writes basket.json, basket_decisions.json, basket_issues.json; returns (decisions, summary lines).
+    """
+    if not getattr(args, "basket", False):
+        return chain["decisions"], []
+    if not getattr(args, "demand", None):
+        raise RuntimeError("--basket requires --demand")
+    report, decisions, issues = stage_basket.optimize_basket(
+        chain["decisions"],
+        chain["offers"],
+        stage_sourcing.load_demand(args.demand),
+        stage_basket.load_supplier_terms(args.suppliers_dir),
+    )
+    _write_json(out / "basket.json", report)
+    _write_json(out / "basket_decisions.json", decisions)
+    _write_json(out / "basket_issues.json", issues)
+    return decisions, [
+        f"basket_method={report['method']}",
+        f"basket_total={report['total']}",
+        f"basket_baseline_total={report['baseline_total']}",
+        f"basket_savings={report['savings']}",
+        f"basket_suppliers_used={report['suppliers_used']}",
+        f"basket_reassigned={report['reassigned']}",
+        f"basket={out / 'basket.json'}",
+    ]
+
+
 def _vat_summary(rows):
     c13 = sum(1 for r in rows if float(r.get("vat_rate", 0) or 0) == 0.13)
     c24 = sum(1 for r in rows if float(r.get("vat_rate", 0) or 0) == 0.24)
@@ -62,6 +465,86 @@ def _guard_active_dataset_name(path_str: str):
             raise RuntimeError(f"DATASET-NAME-NOT-ALLOWED: {path_str}")
 
 
+def _import_job(cmd):
+    """Process-pool entry: one importer run; failures are returned, not raised, so siblings survive."""
+    try:
+        run(cmd)
+        return True, ""
+    except Exception as e:
+        return False, str(e)
+
+
+def _run_import_jobs(cmds, workers=0):
+    """Run importer commands concurrently; results come back in `cmds` order regardless of completion order."""
+    if not cmds:
+        return []
+    workers = int(workers or 0) or min(len(cmds), os.cpu_count() or 1)
+    if workers <= 1 or len(cmds) == 1:
+        return [_import_job(c) for c in cmds]
+    # the pool's workers cannot report back what they read; their command lines are what this run used
+    for c in cmds:
+        _note_used(c[2:])
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(cmds))) as pool:
+        return list(pool.map(_import_job, cmds))
+
+
+def _import_delta(out: Path, jobs, results):
+    """Diff this import against the previous one per supplier_id; writes import_delta.json, price_changes.json, raw_changed.json.
+
+    raw_changed.json (added + repriced rows) is a report: `prices` still takes the full raw_merged.json, and
+    --incremental-from is what limits re-sourcing to the changed product groups.
+    """
+    by_supplier = {}
+    for (label, cmd, raw_out), (ok, _) in zip(jobs, results):
+        profile = load_json(cmd[cmd.index("--supplier-profile") + 1])
+        sid = profile.get("supplier_id", "unknown") if isinstance(profile, dict) else "unknown"
+        g = by_supplier.setdefault(sid, {"rows": [], "batch_ids": [], "source_hashes": [], "failed": False})
+        if not ok:
+            g["failed"] = True
+            continue
+        batch = load_json(cmd[cmd.index("--batch-out") + 1])
+        g["rows"].extend(load_json(raw_out))
+        if isinstance(batch, dict):
+            g["batch_ids"].append(batch.get("batch_id", ""))
+            g["source_hashes"].append(batch.get("source_hash", ""))
+
+    report = []
+    events = []
+    changed_rows = []
+    for sid, g in by_supplier.items():
+        if g["failed"]:
+            # a partial batch would read as mass removals; keep the previous snapshot as the baseline
+            report.append({"supplier_id": sid, "status": "SKIPPED", "reason": "IMPORT-SOURCE-FAILED"})
+            continue
+        delta, ev, prev = stage_delta.delta_for_supplier(sid, g["rows"], g["batch_ids"], g["source_hashes"])
+        events.extend(ev)
+        changed_rows.extend([x["row"] for x in delta["added"]] + [x["row"] for x in delta["price_changed"]])
+        report.append({
+            "supplier_id": sid,
+            "status": "BASELINE" if prev is None else "DELTA",
+            "counts": stage_delta.delta_counts(delta),
+            "added": [x["key"] for x in delta["added"]],
+            "removed": [x["key"] for x in delta["removed"]],
+            "price_changed": [{"key": x["key"], "changed_fields": x["changed_fields"], "offer_id": x["row"].get("offer_id")} for x in delta["price_changed"]],
+            "unchanged": [x["key"] for x in delta["unchanged"]],
+            "changed_offer_ids": [x["row"].get("offer_id") for x in delta["added"] + delta["price_changed"]],
+            "removed_offer_ids": [x["prev"].get("offer_id") for x in delta["removed"]],
+        })
+
+    _write_json(out / "import_delta.json", report)
+    _write_json(out / "price_changes.json", events)
+    _write_json(out / "raw_changed.json", changed_rows)
+    tot = {k: sum(int((r.get("counts") or {}).get(k, 0)) for r in report) for k in ("added", "removed", "price_changed", "unchanged")}
+    return [
+        f"delta_added={tot['added']}",
+        f"delta_removed={tot['removed']}",
+        f"delta_price_changed={tot['price_changed']}",
+        f"delta_unchanged={tot['unchanged']}",
+        f"price_changes={out / 'price_changes.json'}",
+        f"raw_changed={out / 'raw_changed.json'}",
+    ]
+
+
 def cmd_import(args):
     out = now_run_dir("prices")
     raw_csv_json = out / "raw_from_csv.json"
@@ -79,18 +562,17 @@ def cmd_import(args):
     pdf_needs = out / "needs_review_pdf_ocr.json"
     pdf_issues = out / "issues_pdf_ocr.json"
 
-    merged = []
-    files = []
-
+    # (label, argv, raw_out) in merge order: csv, csv_2, xlsx, ocr, pdf_ocr
+    jobs = []
     csv_pairs = []
     if args.csv_input:
-        csv_pairs.append((args.csv_input, args.csv_profile, raw_csv_json, batch_csv))
+        csv_pairs.append(("csv", args.csv_input, args.csv_profile, raw_csv_json, batch_csv))
     if args.csv_input_2:
-        csv_pairs.append((args.csv_input_2, args.csv_profile_2, out / "raw_from_csv_2.json", out / "import_batch_csv_2.json"))
+        csv_pairs.append(("csv_2", args.csv_input_2, args.csv_profile_2, out / "raw_from_csv_2.json", out / "import_batch_csv_2.json"))
 
-    for cinput, cprofile, raw_out, batch_out in csv_pairs:
+    for label, cinput, cprofile, raw_out, batch_out in csv_pairs:
         _guard_active_dataset_name(cinput)
-        run([
+        jobs.append((label, [
             sys.executable,
             str(SCRIPTS / "import_csv.py"),
             "--input",
@@ -101,16 +583,12 @@ def cmd_import(args):
             str(raw_out),
             "--batch-out",
             str(batch_out),
-        ])
-        merged.extend(load_json(raw_out))
-        files.append(str(raw_out))
+        ], raw_out))
 
     if getattr(args, "xlsx_input", None):
         raw_xlsx_json = out / "raw_from_xlsx.json"
         batch_xlsx = out / "import_batch_xlsx.json"
-        needs_xlsx = out / "needs_review_xlsx.json"
-        issues_xlsx = out / "issues_xlsx.json"
-        run([
+        jobs.append(("xlsx", [
             sys.executable,
             str(SCRIPTS / "import_xlsx.py"),
             "--input",
@@ -122,15 +600,13 @@ def cmd_import(args):
             "--batch-out",
             str(batch_xlsx),
             "--needs-review",
-            str(needs_xlsx),
+            str(xlsx_needs),
             "--issues-out",
-            str(issues_xlsx),
-        ])
-        merged.extend(load_json(raw_xlsx_json))
-        files.append(str(raw_xlsx_json))
+            str(xlsx_issues),
+        ], raw_xlsx_json))
 
     if args.ocr_input:
-        run([
+        jobs.append(("ocr", [
             sys.executable,
             str(SCRIPTS / "import_ocr.py"),
             "--input",
@@ -145,14 +621,12 @@ def cmd_import(args):
             str(ocr_needs),
             "--issues-out",
             str(ocr_issues),
-        ])
-        merged.extend(load_json(raw_ocr_json))
-        files.append(str(raw_ocr_json))
+        ], raw_ocr_json))
 
     if getattr(args, "pdf_ocr_input", None):
         raw_pdf_json = out / "raw_from_pdf_ocr.json"
         batch_pdf = out / "import_batch_pdf_ocr.json"
-        run([
+        jobs.append(("pdf_ocr", [
             sys.executable,
             str(SCRIPTS / "import_pdf_ocr.py"),
             "--input",
@@ -167,12 +641,37 @@ def cmd_import(args):
             str(pdf_needs),
             "--issues-out",
             str(pdf_issues),
-        ])
-        merged.extend(load_json(raw_pdf_json))
-        files.append(str(raw_pdf_json))
+        ], raw_pdf_json))
+
+    results = _run_import_jobs([cmd for _, cmd, _ in jobs], getattr(args, "workers", 0))
+
+    merged = []
+    files = []
+    failures = []
+    for (label, cmd, raw_out), (ok, detail) in zip(jobs, results):
+        if not ok:
+            failures.append({
+                "severity": "BLOCK",
+                "code": "IMPORT-SOURCE-FAILED",
+                "message": f"{label} importer failed; other sources were kept",
+                "source": label,
+                "input": cmd[cmd.index("--input") + 1],
+                "error": detail.strip().splitlines()[-1] if detail.strip() else "",
+            })
+            continue
+        merged.extend(load_json(raw_out))
+        files.append(str(raw_out))
+    if jobs and len(failures) == len(jobs):
+        raise RuntimeError(results[0][1])
+    if failures:
+        (out / "import_source_failures.json").write_text(json.dumps(failures, ensure_ascii=False, indent=2), encoding="utf-8")
 
     raw_merged.write_text(json.dumps(merged, ensure_ascii=False, indent=2), encoding="utf-8")
 
+    delta_lines = []
+    if getattr(args, "delta", False):
+        delta_lines = _import_delta(out, jobs, results)
+
     run([
         sys.executable,
         str(SCRIPTS / "normalize_import_batch.py"),
@@ -185,9 +684,34 @@ def cmd_import(args):
         "--issues-out",
         str(import_issues),
     ])
+    anomaly_issues = out / "anomaly_issues.json"
+    if getattr(args, "no_anomaly", False):
+        anomaly_mode = "off"
+    else:
+        anomaly_mode = "check_only" if getattr(args, "no_anomaly_update", False) else "updated"
+        run([
+            sys.executable,
+            str(SCRIPTS / "detect_price_anomalies.py"),
+            "--input",
+            str(price_quotes),
+            "--out",
+            str(price_quotes),
+            "--issues-out",
+            str(anomaly_issues),
+            "--stats-dir",
+            str(args.anomaly_stats_dir),
+        ] + (["--no-update"] if anomaly_mode == "check_only" else []))
 
     needs = load_json(needs_review)
     imp_issues = load_json(import_issues)
+    a_issues = load_json(anomaly_issues)
+    if a_issues:
+        # prices/daily-refresh map raw_merged.json; carry the flags there so cost reports them
+        flagged = {x.get("offer_id"): x.get("anomaly_flags") for x in a_issues if x.get("offer_id")}
+        for r in merged:
+            if r.get("offer_id") in flagged:
+                r["anomaly_flags"] = flagged[r["offer_id"]]
+        raw_merged.write_text(json.dumps(merged, ensure_ascii=False, indent=2), encoding="utf-8")
     o_needs = load_json(ocr_needs)
     o_issues = load_json(ocr_issues)
     x_needs = load_json(xlsx_needs)
@@ -219,9 +743,12 @@ def cmd_import(args):
         f"lines_needs_review={lines_needs}",
         f"vat_summary={_vat_summary(quotes)}",
         f"needs_review={lines_needs}",
-        f"issues={len(imp_issues) + len(o_issues) + len(x_issues) + len(p_issues)}",
+        f"issues={len(imp_issues) + len(o_issues) + len(x_issues) + len(p_issues) + len(a_issues) + len(failures)}",
+        f"flags_anomaly={len(a_issues)}",
+        f"anomaly_stats={anomaly_mode}",
+        f"sources_failed={','.join(x['source'] for x in failures) or 'none'}",
         (f"next_action=run review to resolve {lines_needs} lines" if lines_needs > 0 else "next_action=proceed to prices/offer"),
-    ]
+    ] + delta_lines
     write_summary(out / "run_summary.txt", summary)
     print(str(out))
 
@@ -288,6 +815,86 @@ def cmd_review(args):
     print(str(out))
 
 
+def cmd_bootstrap_mapping(args):
+    out = now_run_dir("bootstrap_mapping")
+    # import runs live under runs/<ts>/prices, so the newest raw_merged.json is found under that kind
+    raw = args.raw or _latest_run_file("prices", "raw_merged.json")
+    if not raw:
+        raise RuntimeError("bootstrap-mapping requires --raw or an existing import run")
+    # price bands: explicit mapped offers, else the newest prices run (missing -> price evidence stays neutral)
+    offers = args.offers or _latest_run_file("prices", "offers_mapped.json")
+    sku_map = Path(args.sku_map) if args.sku_map else ROOT / "mappings" / "supplier_sku_map" / f"{args.supplier_id}.json"
+
+    rows = load_json(raw)
+    if args.supplier:
+        rows = [r for r in rows if stage_lookup.norm(r.get("supplier")) == stage_lookup.norm(args.supplier)]
+    # already-mapped skus are judged against the maps next to the one being written
+    lookup = stage_lookup.load(catalog=args.catalog, sku_map_dir=sku_map.parent)
+    bands = stage_bootstrap.price_bands(load_json(offers) if offers else [])
+    accepted, residue, already = stage_bootstrap.bootstrap(
+        rows, lookup, bands, args.threshold, args.margin, args.workers or os.cpu_count() or 1,
+    )
+    written = [] if args.dry_run else stage_bootstrap.persist(accepted, args.supplier_id, sku_map, args.audit_log)
+
+    report_json = out / "bootstrap_report.json"
+    needs_review = out / "needs_review.json"
+    _write_json(report_json, {"raw": str(raw), "offers": str(offers) if offers else None, "threshold": args.threshold, "margin": args.margin,
+                              "accepted": accepted, "residue": residue, "already_mapped": already})
+    _write_json(needs_review, stage_bootstrap.residue_needs(residue))
+    summary = [
+        "run_type=bootstrap_mapping",
+        f"supplier_id={args.supplier_id}",
+        f"raw={raw}",
+        f"price_bands={offers or ''}",
+        f"rows={len(accepted) + len(residue) + len(already)}",
+        f"already_mapped={len(already)}",
+        f"accepted={len(accepted)}",
+        f"persisted={len(written)}",
+        f"residue={len(residue)}",
+        f"no_sku={sum(1 for x in residue if x['reason'] == 'no_sku')}",
+        f"dry_run={args.dry_run}",
+        f"sku_map={sku_map}",
+        f"report={report_json}",
+        f"needs_review={needs_review}",
+        f"next_action=review --needs-review {needs_review} --raw {raw} --supplier-id {args.supplier_id}" if residue else "next_action=prices",
+    ]
+    write_summary(out / "run_summary.txt", summary)
+    print(str(out))
+
+
+def cmd_decisions(args):
+    out = now_run_dir("decisions")
+    # (log, secondary key, value) for every filter given; the raw logs stay the source of truth, snapshots catch up on their tail
+    queries = [(log, field, value) for log, field, value in (
+        ("mapping_persist", "sku", args.sku),
+        ("mapping_persist", "supplier_sku", args.supplier_sku),
+        ("catalog_aliases", "supplier_sku", args.supplier_sku),
+        ("mapping_persist", "product_id", args.product_id),
+        ("catalog_aliases", "product_id", args.product_id),
+        ("source_registry", "source_key", args.source_key),
+    ) if value]
+    if not queries and not args.compact:
+        raise RuntimeError("decisions needs --sku, --supplier-sku, --product-id or --source-key (or --compact)")
+    snaps, stats = {}, {}
+    for log in (sorted(stage_logs.LOGS) if args.compact else sorted({q[0] for q in queries})):
+        stats[log] = {}
+        snaps[log] = stage_logs.load(log, compact=args.compact, stats=stats[log])
+    results = [{"log": log, "field": field, "key": value, "records": stage_logs.lookup(snaps[log], field, value)} for log, field, value in queries]
+
+    _write_json(out / "decisions.json", {"logs": stats, "queries": results})
+    lines = []
+    for r in results:
+        lines.append(f"{r['log']} {r['field']}={r['key']}: {len(r['records'])}")
+        lines += [f"  {stage_logs.format_decision(x)}" for x in r["records"][-args.top:][::-1]]
+    (out / "decisions_reply.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    summary = ["run_type=decisions"]
+    summary += [f"log_{log}=records:{len(snaps[log]['records'])} tail_lines:{st['tail_lines']} rebuilt:{st['rebuilt']} compacted:{st['compacted']}" for log, st in stats.items()]
+    summary += [f"matches_{r['log']}_{r['field']}={len(r['records'])}" for r in results]
+    summary.append(f"reply={out / 'decisions_reply.txt'}")
+    write_summary(out / "run_summary.txt", summary)
+    print(str(out))
+
+
 def cmd_prices(args):
     if getattr(args, "refresh_needed", False):
         out = now_run_dir("prices_refresh")
@@ -299,9 +906,8 @@ def cmd_prices(args):
         if args.raw:
             rows = load_json(args.raw)
         else:
-            candidates = list((ROOT / "runs").glob("*/prices/price_quotes.json"))
-            if candidates:
-                latest = sorted(candidates, key=lambda p: p.stat().st_mtime, reverse=True)[0]
+            latest = _latest_run_file("prices", "price_quotes.json")
+            if latest:
                 rows = load_json(latest)
 
         now = datetime.now(timezone.utc)
@@ -349,6 +955,8 @@ def cmd_prices(args):
 
     if not args.raw:
         raise RuntimeError("prices requires --raw unless --refresh-needed is used")
+    if getattr(args, "compare_presets", None):
+        return _prices_compare_presets(args)
 
     out = now_run_dir("prices")
     normalized_csv = out / "offers_normalized.csv"
@@ -357,44 +965,12 @@ def cmd_prices(args):
     decisions = out / "decisions.json"
     issues = out / "issues.json"
 
-    run([sys.executable, str(SCRIPTS / "normalize_prices.py"), "--input", args.raw, "--out", str(normalized_csv)])
-    run([
-        sys.executable,
-        str(SCRIPTS / "map_offers.py"),
-        "--raw",
-        args.raw,
-        "--catalog",
-        args.catalog,
-        "--out",
-        str(mapped_json),
-        "--needs-review",
-        str(needs_review),
-    ])
-    run([
-        sys.executable,
-        str(SCRIPTS / "optimize_sourcing.py"),
-        "--offers",
-        str(mapped_json),
-        "--overrides",
-        args.overrides,
-        "--defaults",
-        args.defaults,
-        "--out",
-        str(decisions),
-        "--issues-out",
-        str(issues),
-        "--phase",
-        str(args.phase),
-        "--service-tag",
-        str(getattr(args, "service_tag", "CAT")),
-    ] + (["--policies", args.policies] if getattr(args, "policies", None) else [])
-      + (["--enable-phase2-rules"] if args.enable_phase2_rules else [])
-      + (["--enable-production-overrides"] if getattr(args, "enable_production_overrides", False) else [])
-      + (["--rollout-categories", args.rollout_categories] if getattr(args, "rollout_categories", None) else []))
+    chain = _prices_chain(args, normalized_csv, mapped_json, needs_review, decisions, issues)
+    _, basket_lines = _basket(args, out, chain)
 
-    i = load_json(issues)
-    d = load_json(decisions)
-    needs = load_json(needs_review)
+    i = chain["issues"]
+    d = chain["decisions"]
+    needs = chain["needs_review"]
     locks_used = sum(1 for x in d if x.get("rule_applied") == "LOCK")
     themart_n = sum(1 for x in d if str(x.get("selected_supplier", "")).lower() == "themart")
     alios_n = sum(1 for x in d if str(x.get("selected_supplier", "")).lower() == "alios")
@@ -414,7 +990,83 @@ def cmd_prices(args):
         f"supplier_split: themart={themart_n}, alios={alios_n}",
         f"overlap_items_count={overlap_items_count}",
         f"savings_vs_lowest_global={round(savings_total, 6)}",
+        f"stage_cache={getattr(args, 'stage_cache', 'off')}",
+        f"sourcing_mode={getattr(args, 'sourcing_mode', 'full')}",
+        f"sourcing_demand={getattr(args, 'demand', None) or 'none'}",
+    ] + basket_lines + _record_history(args, chain["offers"], out)
+    write_summary(out / "run_summary.txt", summary)
+    print(str(out))
+
+
+def _resolve_preset(args, spec):
+    """(label, overrides) for a --compare-presets entry: 'current', a policies/presets/<name>.json name, or a path."""
+    if spec == "current":
+        return "current", stage_sourcing.load_overrides(args.overrides, getattr(args, "policies", None))
+    p = ROOT / "policies" / "presets" / f"{spec}.json"
+    if not p.exists():
+        p = Path(spec)
+    if not p.exists():
+        raise RuntimeError(f"preset not found: {spec} (expected policies/presets/{spec}.json or a file path)")
+    obj = load_json(p)
+    rules = obj.get("policies") if "policies" in obj else obj.get("overrides", [])
+    return p.stem, rules
+
+
+def _prices_compare_presets(args):
+    """prices --compare-presets a,b,c: normalize/map/group once, decide per preset, one comparison report."""
+    out = now_run_dir("prices_compare")
+    normalized_csv = out / "offers_normalized.csv"
+    mapped_json = out / "offers_mapped.json"
+    needs_review = out / "needs_review.json"
+
+    presets = {}
+    for spec in [x.strip() for x in str(args.compare_presets).split(",") if x.strip()]:
+        label, rules = _resolve_preset(args, spec)
+        while label in presets:
+            label = f"{label}_{len(presets) + 1}"
+        presets[label] = rules
+    if len(presets) < 2:
+        raise RuntimeError("--compare-presets needs at least two presets, e.g. balanced,conservative")
+
+    raw_rows, headers = stage_normalize.load_rows(Path(args.raw))
+    stage_normalize.normalize_prices(raw_rows, normalized_csv, headers)
+    lookup = stage_lookup.load(catalog=args.catalog, sku_map_dir=_sku_map_dir(args))
+    mapped, needs = stage_map.map_offers(raw_rows, None, None, lookup=lookup)
+    _write_json(mapped_json, mapped)
+    _write_json(needs_review, needs)
+
+    results = stage_sourcing.optimize_sourcing_presets(
+        mapped,
+        presets,
+        load_json(args.defaults),
+        phase=args.phase,
+        enable_phase2_rules=args.enable_phase2_rules,
+        enable_production_overrides=getattr(args, "enable_production_overrides", False),
+        rollout_categories=getattr(args, "rollout_categories", ""),
+        service_tag=getattr(args, "service_tag", "CAT"),
+        demand=stage_sourcing.load_demand(args.demand) if getattr(args, "demand", None) else None,
+    )
+    for label, (dec, iss) in results.items():
+        _write_json(out / f"decisions_{label}.json", dec)
+        _write_json(out / f"issues_{label}.json", iss)
+    report = stage_sourcing.preset_comparison(results)
+    report_json = out / "preset_comparison.json"
+    _write_json(report_json, report)
+
+    summary = [
+        "run_type=prices_compare",
+        f"presets={','.join(report['presets'])}",
+        f"mapped_json={mapped_json}",
+        f"needs_review={len(needs)}",
+        f"products={report['products']}",
+        f"differing_products={report['differing_products']}",
+        f"cost_basis={report['cost_basis']}",
     ]
+    for label in report["presets"]:
+        row = report["per_preset"][label]
+        summary.append(f"preset_{label}: decisions={row['decisions']} basket_cost={row['basket_cost']} delta_vs_{report['base']}={row['delta_vs_base']}")
+    summary.append(f"report={report_json}")
+    summary.extend(_record_history(args, mapped, out))
     write_summary(out / "run_summary.txt", summary)
     print(str(out))
 
@@ -424,22 +1076,32 @@ def cmd_cost(args):
     cost_json = out / "cost_breakdown.json"
     issues = out / "issues.json"
 
+    # --as-of: price ages are judged at that time; without --offers/--decisions both come from the price history
+    as_of = stage_history.parse_as_of(args.as_of) if args.as_of else None
+    offers, decisions = args.offers, args.decisions
+    if not (offers and decisions):
+        if as_of is None:
+            raise RuntimeError("cost requires --offers and --decisions unless --as-of is used")
+        offers, decisions = out / "offers_mapped.json", out / "decisions.json"
+        _as_of_chain(args, offers, out / "needs_review.json", decisions, out / "sourcing_issues.json")
+
     run([
         sys.executable,
         str(SCRIPTS / "cost_recipe.py"),
         "--recipe",
         args.recipe,
         "--offers",
-        args.offers,
+        str(offers),
         "--decisions",
-        args.decisions,
+        str(decisions),
         "--defaults",
         args.defaults,
         "--out",
         str(cost_json),
         "--issues-out",
         str(issues),
-    ] + (["--confirm-stale"] if args.confirm_stale else []))
+    ] + (["--confirm-stale"] if args.confirm_stale else [])
+      + (["--as-of", as_of.isoformat()] if as_of else []))
 
     i = load_json(issues)
     summary = [
@@ -448,7 +1110,89 @@ def cmd_cost(args):
         f"issues={len(i)}",
         f"flags_stale={sum(1 for x in i if 'STALE' in x.get('code',''))}",
         f"flags_anomaly={sum(1 for x in i if 'ANOMALY' in x.get('code',''))}",
+        f"as_of={as_of.isoformat() if as_of else 'now'}",
+    ]
+    if as_of is None:
+        _record_impact(args, [load_json(cost_json)], source=cost_json)
+    write_summary(out / "run_summary.txt", summary)
+    print(str(out))
+
+
+def cmd_impact(args):
+    out = now_run_dir("impact")
+    idx = stage_impact.load_index(args.impact_index)
+    if args.rebuild_proposals:
+        stage_impact.rebuild_proposals(idx, args.proposals_root)
+        stage_impact.save_index(idx, args.impact_index)
+    result = stage_impact.impact(idx, args.product, float(args.new_price), args.supplier)
+    impact_json = out / "impact.json"
+    _write_json(impact_json, result)
+    t = result["totals"]
+    summary = [
+        "run_type=impact",
+        f"product={args.product}",
+        f"new_price_per_base_unit={args.new_price}",
+        f"supplier={args.supplier or 'any'}",
+        f"recipes={t['recipes']}",
+        f"proposals={t['proposals']}",
+        f"recipe_cost_delta={t['recipe_cost_delta']}",
+        f"proposal_cost_delta={t['proposal_cost_delta']}",
+        f"proposal_margin_delta={t['proposal_margin_delta']}",
+        f"elapsed_ms={result['elapsed_ms']}",
+        f"impact={impact_json}",
+    ]
+    write_summary(out / "run_summary.txt", summary)
+    print(str(out))
+
+
+def cmd_requote_library(args):
+    out = now_run_dir("requote_library")
+    proposals_root = Path(args.proposals_root)
+    index_json = proposals_root / "index" / "proposals_index.json"
+    if args.reindex or not index_json.exists():
+        run([
+            sys.executable,
+            str(SCRIPTS / "index_proposals.py"),
+            "--proposals-root",
+            str(proposals_root),
+            "--index-dir",
+            str(proposals_root / "index"),
+        ])
+
+    # current prices: explicit snapshot, else the newest prices run
+    offers = args.offers or _latest_run_file("prices", "offers_mapped.json")
+    decisions = args.decisions or _latest_run_file("prices", "decisions.json")
+    if not (offers and decisions):
+        raise RuntimeError("requote-library needs --offers/--decisions or a previous prices run")
+
+    idx = load_json(index_json)
+    tasks, skipped = stage_requote.library_tasks(idx.get("rows", []) if isinstance(idx, dict) else [], proposals_root)
+    prices = stage_requote.current_prices(load_json(offers), load_json(decisions))
+    cache = None if args.no_cache else stage_requote.load_cache(args.cache)
+    rows, new_cache, stats = stage_requote.requote_library(tasks, prices, cache, args.workers or os.cpu_count() or 1)
+    stage_requote.save_cache(new_cache, args.cache)
+
+    report_json = out / "requote_library.json"
+    _write_json(report_json, {"offers": str(offers), "decisions": str(decisions), "stats": {**stats, "skipped": len(skipped)}, "proposals": rows, "skipped": skipped})
+    summary = [
+        "run_type=requote_library",
+        f"offers={offers}",
+        f"decisions={decisions}",
+        f"proposals={stats['proposals']}",
+        f"requoted={stats['requoted']}",
+        f"cached={stats['cached']}",
+        f"skipped={len(skipped)}",
+        f"skipped_no_cost={sum(1 for x in skipped if x['reason'] == 'NO_COST_BREAKDOWN')}",
+        f"eroding={stats['eroding']}",
+        f"margin_erosion_total={stats['margin_erosion_total']}",
+        f"gross_delta_total={stats['gross_delta_total']}",
     ]
+    for r in rows[: args.top]:
+        summary.append(
+            f"erosion: {r['key']} margin_pct={r['margin_pct_filed']}->{r['margin_pct_now']} "
+            f"cost_delta={r['cost_delta']} gross_delta={r['gross_delta']} per_person_delta={r['price_per_person_delta']}"
+        )
+    summary.append(f"report={report_json}")
     write_summary(out / "run_summary.txt", summary)
     print(str(out))
 
@@ -469,6 +1213,108 @@ def build_typec_payload(request_path, cost_path, out_payload):
     Path(out_payload).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
+def cmd_scenarios(args):
+    out = now_run_dir("scenarios")
+    offers = args.offers or _latest_run_file("prices", "offers_mapped.json")
+    decisions = args.decisions or _latest_run_file("prices", "decisions.json")
+    if not (offers and decisions):
+        raise RuntimeError("scenarios needs --offers/--decisions or a previous prices run")
+
+    scenarios, ranges, n, seed = stage_scenarios.load_scenarios(args.scenarios) if args.scenarios else ([], [], 0, None)
+    scenarios += [{"name": s, "shocks": stage_scenarios.parse_shock(s)} for s in args.shock]
+    ranges += [stage_scenarios.parse_range(r) for r in args.range]
+    if not scenarios and not (ranges and (args.random or n)):
+        raise RuntimeError("scenarios needs --shock, --range with --random, or --scenarios")
+
+    # the recipe x product matrix is built from one costing against the current decisions
+    recipes = load_json(args.recipes_mapped)
+    recipes = recipes if isinstance(recipes, list) else [recipes]
+    results = stage_cost.cost_recipes(recipes, load_json(offers), load_json(decisions), load_json(args.defaults), confirm_stale=args.confirm_stale)
+    costs = [c for c, _ in results]
+    _write_json(out / "cost_breakdown.json", costs)
+    _write_json(out / "issues.json", [i for _, rows in results for i in rows])
+    report = stage_scenarios.run_scenarios(
+        costs,
+        stage_scenarios.catalog_categories(load_json(args.catalog)),
+        scenarios,
+        ranges,
+        args.random or n,
+        args.seed if args.seed is not None else seed,
+    )
+    report_json = out / "scenarios.json"
+    _write_json(report_json, report)
+
+    summary = [
+        "run_type=scenarios",
+        f"offers={offers}",
+        f"decisions={decisions}",
+        f"recipes={len(report['recipes'])}",
+        f"blocked_recipes={sum(1 for r in report['recipes'] if r['status'] == 'BLOCKED')}",
+        f"scenarios={report['scenarios']}",
+        f"named_scenarios={len(report['named_scenarios'])}",
+        f"random_scenarios={report['random_scenarios']}",
+        f"selectors={len(report['selectors'])}",
+        f"build_ms={report['build_ms']}",
+        f"eval_ms={report['eval_ms']}",
+    ]
+    for r in report["recipes"]:
+        summary.append(f"recipe: {r['recipe_id']} base={r['per_portion_base']} p5={r['p5']} p50={r['p50']} p95={r['p95']} max={r['max']} worst={r.get('worst_scenario')}")
+    summary.append(f"report={report_json}")
+    write_summary(out / "run_summary.txt", summary)
+    print(str(out))
+
+
+def cmd_quote_curve(args):
+    out = now_run_dir("quote_curve")
+    offers = args.offers or _latest_run_file("prices", "offers_mapped.json")
+    decisions = args.decisions or _latest_run_file("prices", "decisions.json")
+    if not (offers and decisions):
+        raise RuntimeError("quote-curve needs --offers/--decisions or a previous prices run")
+
+    recipes = load_json(args.recipes_mapped)
+    recipes = recipes if isinstance(recipes, list) else [recipes]
+    req = load_json(args.request)
+    report, issues = stage_curve.build_curve(
+        recipes,
+        load_json(offers),
+        load_json(decisions),
+        load_json(args.defaults),
+        req.get("pricing", {}) if isinstance(req, dict) else {},
+        stage_curve.headcounts(args.start, args.stop, args.step),
+        cost_basis=args.cost_basis,
+        confirm_stale=args.confirm_stale,
+    )
+    curve_json = out / "quote_curve.json"
+    curve_csv = out / "quote_curve.csv"
+    _write_json(curve_json, report)
+    _write_json(out / "issues.json", issues)
+    stage_curve.write_csv(curve_csv, report["points"])
+
+    pts = report["points"]
+    summary = [
+        "run_type=quote_curve",
+        f"offers={offers}",
+        f"decisions={decisions}",
+        f"cost_basis={report['cost_basis']}",
+        f"recipes={len(report['recipes'])}",
+        f"blocked_recipes={sum(1 for r in report['recipes'] if r['status'] == 'BLOCKED')}",
+        f"issues={len(issues)}",
+        f"points={len(pts)}",
+        f"guests_range={pts[0]['guests']}..{pts[-1]['guests']}",
+        f"price_per_person_first={pts[0]['price_per_person']}",
+        f"price_per_person_last={pts[-1]['price_per_person']}",
+        f"cheapest_guests={report['cheapest_per_person']['guests']}",
+        f"cheapest_price_per_person={report['cheapest_per_person']['price_per_person']}",
+        f"break_points={len(report['break_points'])}",
+    ]
+    for b in report["break_points"]:
+        opened = ",".join(f"{x['product_id']}:{x['packs_from']}->{x['packs_to']}@{x['at_guests']}" for x in b["packs_opened"])
+        summary.append(f"break: guests={b['first_guests']}..{b['guests']} cost_step={b['cost_step']} per_person={b['price_per_person_from']}->{b['price_per_person_to']} packs={opened}")
+    summary += [f"elapsed_ms={report['elapsed_ms']}", f"quote_curve={curve_json}", f"quote_curve_csv={curve_csv}"]
+    write_summary(out / "run_summary.txt", summary)
+    print(str(out))
+
+
 def cmd_onboard_supplier(args):
     out = now_run_dir("onboarding")
     summary_json = out / "onboarding_summary.json"
@@ -752,6 +1598,8 @@ def cmd_recipe_cost(args):
     costs = out / "recipes_cost_breakdown.json"
     issues = out / "issues.json"
     summary_json = out / "recipe_cost_summary.json"
+    event = out / "event_purchase.json"
+    purchase_list = out / "purchase_list.json"
 
     cmd = [
         sys.executable,
@@ -760,6 +1608,8 @@ def cmd_recipe_cost(args):
         "--out-costs", str(costs),
         "--out-issues", str(issues),
         "--out-summary", str(summary_json),
+        "--out-event", str(event),
+        "--out-purchase-list", str(purchase_list),
         "--defaults", str(args.defaults),
     ]
     if args.offers:
@@ -768,8 +1618,11 @@ def cmd_recipe_cost(args):
         cmd.extend(["--decisions", args.decisions])
     if args.confirm_stale:
         cmd.append("--confirm-stale")
+    if int(getattr(args, "workers", 1) or 1) > 1:
+        cmd.extend(["--workers", str(args.workers)])
 
     run(cmd)
+    _record_impact(args, load_json(costs), source=costs)
     s = load_json(summary_json)
     write_summary(out / "run_summary.txt", [
         "run_type=recipe_cost",
@@ -779,15 +1632,16 @@ def cmd_recipe_cost(args):
         f"issues={s.get('issues', 0)}",
         f"costs={costs}",
         f"issues_json={issues}",
+        f"purchase_cost={s.get('purchase_cost', 0)}",
+        f"pack_rounding_savings={s.get('pack_rounding_savings', 0)}",
+        f"event_purchase={event}",
+        f"purchase_list={purchase_list}",
     ])
     print(str(out))
 
 
-def _latest_run_file(glob_pat: str):
-    c = list((ROOT / "runs").glob(glob_pat))
-    if not c:
-        return None
-    return str(sorted(c, key=lambda p: p.stat().st_mtime, reverse=True)[0])
+def _latest_run_file(kind: str, name: str):
+    return run_registry.latest_file(kind, name)
 
 
 def cmd_menu_offer(args):
@@ -896,7 +1750,7 @@ def cmd_menu_offer(args):
         print(str(out))
         return
 
-    raw = args.raw or _latest_run_file("*/prices/raw_merged.json")
+    raw = args.raw or _latest_run_file("prices", "raw_merged.json")
     if not raw:
         raise RuntimeError("menu-offer requires --raw or existing runs/*/prices/raw_merged.json")
 
@@ -911,7 +1765,7 @@ def cmd_menu_offer(args):
         "--enable-phase2-rules",
         "--policies",
         str(args.policies),
-    ])
+    ] + (["--demand", str(Path(recipe_review_dir) / "recipes_mapped.json")] if args.demand_sourcing else []))
     pointers["prices"] = prices_dir
 
     recipe_cost_dir = run([
@@ -962,7 +1816,11 @@ def cmd_menu_offer(args):
         "--enable-phase2-rules",
         "--policies",
         str(args.policies),
+        "--purchase-list",
+        str(Path(recipe_cost_dir) / "purchase_list.json"),
     ]
+    if args.demand_sourcing:
+        offer_cmd.extend(["--demand", str(Path(recipe_review_dir) / "recipes_mapped.json")])
     if args.template_hint:
         offer_cmd.extend(["--template-type", str(args.template_hint)])
     if args.file_proposal:
@@ -1004,6 +1862,7 @@ def cmd_menu_offer(args):
         f"recipe_review={recipe_review_dir}",
         f"recipe_cost={recipe_cost_dir}",
         f"offer={offer_dir}",
+        f"purchase_list={Path(recipe_cost_dir) / 'purchase_list.json'}",
         f"telegram_reply_txt={telegram_reply_txt}",
         f"telegram_reply_json={telegram_reply_json}",
     ])
@@ -1248,7 +2107,7 @@ def cmd_resume(args):
         print(str(out))
         return
 
-    raw = args.raw or pointers.get("raw") or _latest_run_file("*/prices/raw_merged.json")
+    raw = args.raw or pointers.get("raw") or _latest_run_file("prices", "raw_merged.json")
     policies = args.policies or pointers.get("policies") or str(ROOT / "policies" / "sourcing_policies.json")
 
     prices_dir = run([
@@ -1310,6 +2169,8 @@ def cmd_resume(args):
         "--enable-phase2-rules",
         "--policies",
         str(policies),
+        "--purchase-list",
+        str(Path(recipe_cost_dir) / "purchase_list.json"),
         "--file-proposal",
     ])
 
@@ -1782,6 +2643,31 @@ def cmd_source_status(args):
         print(str(out))
 
 
+def cmd_cache(args):
+    out = now_run_dir("cache")
+    if args.action == "clear":
+        removed = stage_cache.clear(expired_only=args.expired_only)
+        lines = [f"cache clear: removed={removed} expired_only={str(bool(args.expired_only)).lower()}"]
+        rows = stage_cache.stats()
+    else:
+        rows = stage_cache.stats()
+        lines = [f"cache stats: stages={len(rows)}"]
+    lines += [f"{r['stage']} | entries={r['entries']} expired={r['expired']} bytes={r['bytes']} | hits={r['hits']} misses={r['misses']} stores={r['stores']}" for r in rows]
+    (out / "cache_stats.json").write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+    (out / "cache_reply.txt").write_text("\n".join(lines[:12]) + "\n", encoding="utf-8")
+    write_summary(out / "run_summary.txt", [
+        "run_type=cache",
+        f"action={args.action}",
+        f"stages={len(rows)}",
+        f"entries={sum(r['entries'] for r in rows)}",
+        f"cache_stats_json={out / 'cache_stats.json'}",
+    ])
+    if args.reply:
+        print((out / "cache_reply.txt").read_text(encoding="utf-8").rstrip())
+    else:
+        print(str(out))
+
+
 def cmd_alias(args):
     out = now_run_dir("alias")
     alias_map = {
@@ -1991,6 +2877,58 @@ def cmd_add_web_source(args):
     print(str(out))
 
 
+def _daily_refresh_supplier(task):
+    """import + prices for one registry source; returns (row, None) or (None, blocked_entry). No shared state is written."""
+    sid, stype, path, supplier_id, policies = task
+    p = Path(path)
+    if not p.exists():
+        return None, {"supplier": sid, "code": "DAILY-SOURCE-NOT-FOUND", "path": path}
+
+    profile_path = ROOT / "suppliers" / f"{supplier_id}.json"
+    if not profile_path.exists():
+        return None, {"supplier": sid, "code": "DAILY-SUPPLIER-PROFILE-NOT-FOUND", "path": str(profile_path)}
+
+    if stype == "csv":
+        imp_dir = run([
+            sys.executable, str(SCRIPTS / "run_pipeline.py"), "import",
+            "--csv-input", str(p),
+            "--csv-profile", str(profile_path),
+        ])
+    elif stype == "xlsx":
+        imp_dir = run([
+            sys.executable, str(SCRIPTS / "run_pipeline.py"), "import",
+            "--xlsx-input", str(p),
+            "--xlsx-profile", str(profile_path),
+        ])
+    else:
+        return None, {"supplier": sid, "code": "DAILY-SOURCE-TYPE-NOT-SUPPORTED", "path": path}
+
+    raw = Path(imp_dir) / "raw_merged.json"
+    prices_dir = run([
+        sys.executable, str(SCRIPTS / "run_pipeline.py"), "prices",
+        "--raw", str(raw),
+        "--phase", "3",
+        "--enable-phase2-rules",
+        "--policies", str(policies),
+    ])
+
+    imp_sum = _read_run_summary_map(Path(imp_dir) / "run_summary.txt")
+    pr_sum = _read_run_summary_map(Path(prices_dir) / "run_summary.txt")
+    decisions = load_json(Path(prices_dir) / "decisions.json")
+    return {
+        "supplier": sid,
+        "source_type": stype,
+        "source_path": str(p),
+        "import_run": imp_dir,
+        "prices_run": prices_dir,
+        "rows_ok": int(imp_sum.get("lines_ok", 0) or 0),
+        "needs_review": int(imp_sum.get("needs_review", 0) or 0),
+        "issues_count": int(pr_sum.get("issues", 0) or 0),
+        "decisions": len(decisions),
+        "decisions_changed": None,
+    }, None
+
+
 def cmd_daily_refresh(args):
     out = now_run_dir("daily_refresh")
     pointers = []
@@ -2000,16 +2938,11 @@ def cmd_daily_refresh(args):
     defaults = load_json(args.defaults)
     dflags = defaults.get("flags", {}) if isinstance(defaults, dict) else {}
 
-    argv = sys.argv
-    reindex_set = ("--reindex-proposals" in argv) or ("--no-reindex-proposals" in argv)
-    health_set = ("--run-health-checks" in argv) or ("--no-run-health-checks" in argv)
-    reply_set = ("--reply" in argv) or ("--no-reply" in argv)
-    file_set = "--file-proposal" in argv
-
-    reindex_proposals = args.reindex_proposals if reindex_set else bool(dflags.get("reindex_proposals", True))
-    run_health_checks = args.run_health_checks if health_set else bool(dflags.get("run_health_checks", True))
-    reply_flag = args.reply if reply_set else bool(dflags.get("reply", True))
-    file_proposal_flag = args.file_proposal if file_set else bool(dflags.get("file_proposal", False))
+    # the toggles default to None so an unset flag falls back to the defaults file (argv is not re-read: main() runs in-process)
+    reindex_proposals = args.reindex_proposals if args.reindex_proposals is not None else bool(dflags.get("reindex_proposals", True))
+    run_health_checks = args.run_health_checks if args.run_health_checks is not None else bool(dflags.get("run_health_checks", True))
+    reply_flag = args.reply if args.reply is not None else bool(dflags.get("reply", True))
+    file_proposal_flag = args.file_proposal if args.file_proposal is not None else bool(dflags.get("file_proposal", False))
 
     expanded_sources, blocked_expand, auto_log, reg_sources = _expand_sources_for_health(
         args.sources, defaults, auto_register=args.auto_register, no_auto_update=args.no_auto_update, out=out
@@ -2033,71 +2966,31 @@ def cmd_daily_refresh(args):
         if broken_pre:
             blocked.extend([{"supplier": x.get("key"), "code": x.get("code"), "path": x.get("path")} for x in broken_pre])
 
-    for sid, stype, path, supplier_id in ([] if blocked else expanded_sources):
-        p = Path(path)
-        if not p.exists():
-            blocked.append({"supplier": sid, "code": "DAILY-SOURCE-NOT-FOUND", "path": path})
-            continue
-
-        profile_path = ROOT / "suppliers" / f"{supplier_id}.json"
-        if not profile_path.exists():
-            blocked.append({"supplier": sid, "code": "DAILY-SUPPLIER-PROFILE-NOT-FOUND", "path": str(profile_path)})
-            continue
+    prev_snap = _latest_run_file("daily_refresh", "daily_refresh_summary.json")
+    prev_counts = {}
+    if prev_snap:
+        prev = load_json(prev_snap)
+        if isinstance(prev, dict):
+            for x in prev.get("suppliers", []):
+                prev_counts[x.get("supplier")] = x.get("decisions")
+
+    tasks = [(sid, stype, path, supplier_id, str(args.policies)) for sid, stype, path, supplier_id in ([] if blocked else expanded_sources)]
+    jobs = max(1, int(getattr(args, "jobs", 1) or 1))
+    if jobs > 1 and len(tasks) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            results = list(pool.map(_daily_refresh_supplier, tasks))
+    else:
+        results = [_daily_refresh_supplier(t) for t in tasks]
 
-        if stype == "csv":
-            imp_dir = run([
-                sys.executable, str(SCRIPTS / "run_pipeline.py"), "import",
-                "--csv-input", str(p),
-                "--csv-profile", str(profile_path),
-            ])
-        elif stype == "xlsx":
-            imp_dir = run([
-                sys.executable, str(SCRIPTS / "run_pipeline.py"), "import",
-                "--xlsx-input", str(p),
-                "--xlsx-profile", str(profile_path),
-            ])
-        else:
-            blocked.append({"supplier": sid, "code": "DAILY-SOURCE-TYPE-NOT-SUPPORTED", "path": path})
+    # workers only produce rows; the digest and state/source_status.json are written here, in source order
+    for (sid, stype, path, supplier_id, _), (row, block) in zip(tasks, results):
+        if block:
+            blocked.append(block)
             continue
-
-        raw = Path(imp_dir) / "raw_merged.json"
-        prices_dir = run([
-            sys.executable, str(SCRIPTS / "run_pipeline.py"), "prices",
-            "--raw", str(raw),
-            "--phase", "3",
-            "--enable-phase2-rules",
-            "--policies", str(args.policies),
-        ])
-
-        imp_sum = _read_run_summary_map(Path(imp_dir) / "run_summary.txt")
-        pr_sum = _read_run_summary_map(Path(prices_dir) / "run_summary.txt")
-        decisions = load_json(Path(prices_dir) / "decisions.json")
-        dec_count = len(decisions)
-
-        prev_snap = sorted((ROOT / "runs").glob("*/daily_refresh/daily_refresh_summary.json"), key=lambda x: x.stat().st_mtime, reverse=True)
-        prev_count = None
-        if prev_snap:
-            prev = load_json(prev_snap[0])
-            if isinstance(prev, dict):
-                for x in prev.get("suppliers", []):
-                    if x.get("supplier") == sid:
-                        prev_count = x.get("decisions")
-        changed = None if prev_count is None else (dec_count - int(prev_count or 0))
-
-        row = {
-            "supplier": sid,
-            "source_type": stype,
-            "source_path": str(p),
-            "import_run": imp_dir,
-            "prices_run": prices_dir,
-            "rows_ok": int(imp_sum.get("lines_ok", 0) or 0),
-            "needs_review": int(imp_sum.get("needs_review", 0) or 0),
-            "issues_count": int(pr_sum.get("issues", 0) or 0),
-            "decisions": dec_count,
-            "decisions_changed": changed,
-        }
+        prev_count = prev_counts.get(sid)
+        row["decisions_changed"] = None if prev_count is None else (row["decisions"] - int(prev_count or 0))
         suppliers.append(row)
-        pointers.append({"supplier": sid, "import": imp_dir, "prices": prices_dir})
+        pointers.append({"supplier": sid, "import": row["import_run"], "prices": row["prices_run"]})
         if int(row.get("needs_review", 0)) == 0 and int(row.get("issues_count", 0)) == 0:
             _touch_source_status_success(sid, stype, [path], out.parent.name, str(out), "last_daily_refresh_ok_ts")
             _touch_source_status_success(sid, stype, [path], out.parent.name, str(out), "last_import_ok_ts")
@@ -2232,9 +3125,7 @@ def cmd_intake(args):
         selected_template = load_json(template_selection).get("template_type", "A")
         raw = args.raw
         if not raw:
-            candidates = list((ROOT / "runs").glob("*/prices/raw_merged.json"))
-            if candidates:
-                raw = str(sorted(candidates, key=lambda p: p.stat().st_mtime, reverse=True)[0])
+            raw = _latest_run_file("prices", "raw_merged.json")
         recipe = args.recipe or str(ROOT / "data" / "recipes" / "policy_cases_recipe.json")
         if not raw:
             raise RuntimeError("intake --run-offer requires --raw or an existing runs/*/prices/raw_merged.json")
@@ -2358,57 +3249,52 @@ def cmd_offer(args):
 
     final_output = out / ("final_output.html" if selected_template == "C" else "final_output.docx")
 
-    # deterministic chain
-    run([sys.executable, str(SCRIPTS / "normalize_prices.py"), "--input", args.raw, "--out", str(normalized_csv)])
-    run([
-        sys.executable,
-        str(SCRIPTS / "map_offers.py"),
-        "--raw",
-        args.raw,
-        "--catalog",
-        args.catalog,
-        "--out",
-        str(mapped_json),
-        "--needs-review",
-        str(needs_review),
-    ])
-    run([
-        sys.executable,
-        str(SCRIPTS / "optimize_sourcing.py"),
-        "--offers",
-        str(mapped_json),
-        "--overrides",
-        args.overrides,
-        "--defaults",
-        args.defaults,
-        "--out",
-        str(decisions),
-        "--issues-out",
-        str(sourcing_issues),
-        "--phase",
-        str(args.phase),
-        "--service-tag",
-        str(getattr(args, "service_tag", "CAT")),
-    ] + (["--policies", args.policies] if getattr(args, "policies", None) else [])
-      + (["--enable-phase2-rules"] if args.enable_phase2_rules else [])
-      + (["--enable-production-overrides"] if getattr(args, "enable_production_overrides", False) else [])
-      + (["--rollout-categories", args.rollout_categories] if getattr(args, "rollout_categories", None) else []))
-    run([
-        sys.executable,
-        str(SCRIPTS / "cost_recipe.py"),
-        "--recipe",
-        args.recipe,
-        "--offers",
-        str(mapped_json),
-        "--decisions",
-        str(decisions),
-        "--defaults",
-        args.defaults,
-        "--out",
-        str(cost_json),
-        "--issues-out",
-        str(cost_issues),
-    ] + (["--confirm-stale"] if args.confirm_stale else []))
+    # deterministic chain; --as-of replays the price history instead of --raw
+    if args.as_of:
+        chain = _as_of_chain(args, mapped_json, needs_review, decisions, sourcing_issues)
+        history_lines = [f"as_of={chain['as_of'].isoformat()}"]
+    elif args.raw:
+        chain = _prices_chain(args, normalized_csv, mapped_json, needs_review, decisions, sourcing_issues)
+        history_lines = _record_history(args, chain["offers"], out)
+    else:
+        raise RuntimeError("offer requires --raw unless --as-of is used")
+    cost_decisions, basket_lines = _basket(args, out, chain)
+    if STAGE_MODE == "subprocess":
+        run([
+            sys.executable,
+            str(SCRIPTS / "cost_recipe.py"),
+            "--recipe",
+            args.recipe,
+            "--offers",
+            str(mapped_json),
+            "--decisions",
+            str(out / "basket_decisions.json" if basket_lines else decisions),
+            "--defaults",
+            args.defaults,
+            "--out",
+            str(cost_json),
+            "--issues-out",
+            str(cost_issues),
+        ] + (["--confirm-stale"] if args.confirm_stale else [])
+          + (["--as-of", chain["as_of"].isoformat()] if chain.get("as_of") else []))
+    else:
+        cost_obj, cost_issue_rows = stage_cost.cost_recipe(
+            load_json(args.recipe), chain["offers"], cost_decisions, load_json(args.defaults), confirm_stale=args.confirm_stale,
+            now=chain.get("as_of"),
+        )
+        _write_json(cost_json, cost_obj)
+        _write_json(cost_issues, cost_issue_rows)
+
+    if not args.as_of:
+        _record_impact(args, [load_json(cost_json)], source=cost_json)
+
+    # purchase list: the whole event's (menu-offer passes recipe-cost's) or this recipe rounded on its own
+    purchase_list_json = out / "purchase_list.json"
+    if args.purchase_list and Path(args.purchase_list).exists():
+        purchase_rows = load_json(args.purchase_list)
+    else:
+        purchase_rows = stage_purchase.purchase_list(stage_purchase.aggregate_event([load_json(cost_json)]))
+    _write_json(purchase_list_json, purchase_rows)
 
     if selected_template in {"A", "B"}:
         # ensure request carries selected template type for payload validator
@@ -2480,10 +3366,10 @@ def cmd_offer(args):
             str(render_issues),
         ])
 
-    all_issues = []
-    for p in [sourcing_issues, cost_issues, proposal_issues, render_issues]:
+    all_issues = list(chain["issues"])
+    for p in [cost_issues, proposal_issues, render_issues]:
         all_issues.extend(load_json(p))
-    decisions_rows = load_json(decisions)
+    decisions_rows = chain["decisions"]
 
     filing_status = "SKIPPED"
     filing_note = "not_requested"
@@ -2501,7 +3387,11 @@ def cmd_offer(args):
         f"flags_stale={sum(1 for x in all_issues if 'STALE' in x.get('code',''))}",
         f"flags_anomaly={sum(1 for x in all_issues if 'ANOMALY' in x.get('code',''))}",
         f"locks_used={sum(1 for x in decisions_rows if x.get('rule_applied') == 'LOCK')}",
-    ]
+        f"stage_cache={getattr(args, 'stage_cache', 'off')}",
+        f"purchase_list={purchase_list_json}",
+        f"purchase_total={purchase_rows.get('total', 0)}",
+        f"purchase_suppliers={len(purchase_rows.get('suppliers', []))}",
+    ] + basket_lines + history_lines
     write_summary(out / "run_summary.txt", summary)
 
     if args.file_proposal:
@@ -2525,6 +3415,7 @@ def cmd_offer(args):
             if args.client:
                 cmd_file.extend(["--client", str(args.client)])
             run(cmd_file)
+            _record_impact(args, filed_dir=load_json(filed_manifest).get("target_dir"))
             filing_status = "FILED"
             filing_note = str(filed_manifest)
         else:
@@ -2537,7 +3428,7 @@ def cmd_offer(args):
     print(str(out))
 
 
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Evochia deterministic pipeline runner")
     sp = ap.add_subparsers(dest="command")
 
@@ -2552,6 +3443,11 @@ def main():
     imp.add_argument("--xlsx-profile", default=str(ROOT / "suppliers" / "alios.json"))
     imp.add_argument("--pdf-ocr-input", default=None)
     imp.add_argument("--pdf-ocr-profile", default=str(ROOT / "suppliers" / "alios.json"))
+    imp.add_argument("--delta", action="store_true", help="diff against the previous import per supplier_id (state/import_snapshots)")
+    imp.add_argument("--workers", type=int, default=0, help="importer processes (0 = one per source up to cpu count, 1 = sequential)")
+    imp.add_argument("--anomaly-stats-dir", default=str(ROOT / "state" / "price_stats"), help="rolling per-supplier price stats for anomaly flags")
+    imp.add_argument("--no-anomaly", action="store_true", help="skip price anomaly flags (the anomaly stats are not read or written)")
+    imp.add_argument("--no-anomaly-update", action="store_true", help="flag anomalies against the stats without folding this import into them")
     imp.set_defaults(func=cmd_import)
 
     review = sp.add_parser("review", help="resolve needs_review rows with deterministic patch")
@@ -2564,6 +3460,29 @@ def main():
     review.add_argument("--supplier-id", required=False, default=None)
     review.set_defaults(func=cmd_review)
 
+    boot = sp.add_parser("bootstrap-mapping", help="bulk auto-map a new supplier's imported catalog; only the residue goes to review")
+    boot.add_argument("--supplier-id", required=True, help="writes mappings/supplier_sku_map/<supplier-id>.json")
+    boot.add_argument("--raw", default=None, help="raw_merged.json (default: newest import run)")
+    boot.add_argument("--supplier", default=None, help="only rows with this supplier name")
+    boot.add_argument("--offers", default=None, help="mapped offers for price bands (default: newest prices run)")
+    boot.add_argument("--catalog", default=str(ROOT / "data" / "catalog.json"))
+    boot.add_argument("--sku-map", default=None)
+    boot.add_argument("--audit-log", default=str(stage_bootstrap.AUDIT_LOG))
+    boot.add_argument("--threshold", type=float, default=stage_bootstrap.THRESHOLD, help="minimum confidence to auto-accept")
+    boot.add_argument("--margin", type=float, default=stage_bootstrap.MARGIN, help="lead over the runner-up needed to auto-accept")
+    boot.add_argument("--workers", type=int, default=0, help="processes (0 = cpu count, 1 = sequential)")
+    boot.add_argument("--dry-run", action="store_true", help="report only; no SKU map or audit writes")
+    boot.set_defaults(func=cmd_bootstrap_mapping)
+
+    dec = sp.add_parser("decisions", help="prior mapping / alias / source-registry decisions for a key, from the indexed logs")
+    dec.add_argument("--sku", default=None, help="supplier::sku as in the SKU maps, e.g. Alios::D0028")
+    dec.add_argument("--supplier-sku", default=None, help="bare supplier sku (any supplier)")
+    dec.add_argument("--product-id", default=None)
+    dec.add_argument("--source-key", default=None)
+    dec.add_argument("--compact", action="store_true", help="rewrite every log snapshot now")
+    dec.add_argument("--top", type=int, default=10, help="newest records per query in decisions_reply.txt")
+    dec.set_defaults(func=cmd_decisions)
+
     prices = sp.add_parser("prices", help="price intake/export only")
     prices.add_argument("--raw", required=False, default=None)
     prices.add_argument("--catalog", default=str(ROOT / "data" / "catalog.json"))
@@ -2575,17 +3494,83 @@ def main():
     prices.add_argument("--rollout-categories", default="")
     prices.add_argument("--policies", default=None)
     prices.add_argument("--service-tag", default="CAT")
+    prices.add_argument("--sku-map-dir", default=str(ROOT / "mappings" / "supplier_sku_map"), help="supplier SKU maps used for mapping")
+    prices.add_argument("--no-cache", action="store_true", help="bypass state/stage_cache for the map -> optimize chain")
+    prices.add_argument("--incremental-from", default=None, help="previous prices run dir; only changed product groups are re-sourced")
+    prices.add_argument("--changed-offer-ids", default=None, help="comma list, JSON id list or import_delta.json")
+    prices.add_argument("--demand", default=None, help="event_purchase.json / recipes json: pick the cheapest pack spend for the needed qty")
+    prices.add_argument("--compare-presets", default=None, help="comma list of presets (policies/presets/<name>, a file, or 'current') evaluated in one pass")
+    prices.add_argument("--basket", action="store_true", help="with --demand: minimize event spend incl. supplier delivery fees / minimum orders")
+    prices.add_argument("--suppliers-dir", default=str(ROOT / "suppliers"), help="supplier profiles with optional 'ordering' terms")
     prices.add_argument("--refresh-needed", action="store_true")
+    prices.add_argument("--history-dir", default=str(stage_history.HISTORY_ROOT), help="append-only price history store")
+    prices.add_argument("--no-history", action="store_true", help="do not record this run's offers in the price history")
     prices.set_defaults(func=cmd_prices)
 
     cost = sp.add_parser("cost", help="recipe to cost only")
     cost.add_argument("--recipe", required=True)
-    cost.add_argument("--offers", required=True)
-    cost.add_argument("--decisions", required=True)
+    cost.add_argument("--offers", required=False, default=None)
+    cost.add_argument("--decisions", required=False, default=None)
     cost.add_argument("--defaults", default=str(ROOT / "config" / "defaults.json"))
     cost.add_argument("--confirm-stale", action="store_true")
+    cost.add_argument("--as-of", default=None, help="ISO time or YYYY-MM-DD: re-cost as of then; offers/decisions default to the price history")
+    cost.add_argument("--history-dir", default=str(stage_history.HISTORY_ROOT), help="append-only price history store")
+    cost.add_argument("--overrides", default=str(ROOT / "config" / "overrides.json"))
+    cost.add_argument("--policies", default=None)
+    cost.add_argument("--phase", type=int, default=1)
+    cost.add_argument("--enable-phase2-rules", action="store_true")
+    cost.add_argument("--service-tag", default="CAT")
+    cost.add_argument("--impact-index", default=str(stage_impact.INDEX_PATH), help="product -> recipes -> proposals reverse index")
     cost.set_defaults(func=cmd_cost)
 
+    imp_an = sp.add_parser("impact", help="cost/margin deltas of recipes and filed proposals if a product's unit price moves")
+    imp_an.add_argument("--product", required=True)
+    imp_an.add_argument("--new-price", required=True, type=float, help="new price_per_base_unit (EUR per kg/lt/pcs)")
+    imp_an.add_argument("--supplier", default=None, help="only lines currently sourced from this supplier")
+    imp_an.add_argument("--rebuild-proposals", action="store_true", help="re-derive proposal links from --proposals-root first")
+    imp_an.add_argument("--proposals-root", default=str(ROOT / "proposals"))
+    imp_an.add_argument("--impact-index", default=str(stage_impact.INDEX_PATH), help="product -> recipes -> proposals reverse index")
+    imp_an.set_defaults(func=cmd_impact)
+
+    rql = sp.add_parser("requote-library", help="re-cost every filed proposal against current decisions; rank by margin erosion")
+    rql.add_argument("--proposals-root", default=str(ROOT / "proposals"))
+    rql.add_argument("--reindex", action="store_true", help="rebuild <proposals-root>/index/proposals_index.json first")
+    rql.add_argument("--offers", default=None, help="mapped offers json (default: newest prices run)")
+    rql.add_argument("--decisions", default=None, help="sourcing decisions json (default: newest prices run)")
+    rql.add_argument("--cache", default=str(stage_requote.CACHE_PATH), help="per-proposal results reused while files and ingredient prices are unchanged")
+    rql.add_argument("--no-cache", action="store_true", help="re-quote everything (the cache is still refreshed)")
+    rql.add_argument("--workers", type=int, default=0, help="processes (0 = cpu count, 1 = sequential)")
+    rql.add_argument("--top", type=int, default=10, help="most eroded proposals listed in run_summary.txt")
+    rql.set_defaults(func=cmd_requote_library)
+
+    scn = sp.add_parser("scenarios", help="price-shock scenarios: per-portion cost distribution per recipe")
+    scn.add_argument("--recipes-mapped", required=True, help="mapped recipe list (or a single recipe) json")
+    scn.add_argument("--offers", default=None, help="mapped offers json (default: newest prices run)")
+    scn.add_argument("--decisions", default=None, help="sourcing decisions json (default: newest prices run)")
+    scn.add_argument("--defaults", default=str(ROOT / "config" / "defaults.json"))
+    scn.add_argument("--catalog", default=str(ROOT / "data" / "catalog.json"))
+    scn.add_argument("--scenarios", default=None, help="scenario file: named scenarios and/or a random block")
+    scn.add_argument("--shock", action="append", default=[], help="named scenario, e.g. 'category:Λαχανικά=-5,supplier:Alios=+8' (repeatable)")
+    scn.add_argument("--range", action="append", default=[], help="random draw range in pct, e.g. 'category:Λαχανικά=-5..15' (repeatable)")
+    scn.add_argument("--random", type=int, default=0, help="number of random scenarios drawn over --range")
+    scn.add_argument("--seed", type=int, default=None)
+    scn.add_argument("--confirm-stale", action="store_true")
+    scn.set_defaults(func=cmd_scenarios)
+
+    qc = sp.add_parser("quote-curve", help="per-person quote for a recipe set across a headcount range, with break-points")
+    qc.add_argument("--recipes-mapped", required=True, help="mapped recipe list (or a single recipe) json")
+    qc.add_argument("--request", required=True, help="proposal_request.json; its pricing block (markup/discount/vat/round_to) is used")
+    qc.add_argument("--offers", default=None, help="mapped offers json (default: newest prices run)")
+    qc.add_argument("--decisions", default=None, help="sourcing decisions json (default: newest prices run)")
+    qc.add_argument("--defaults", default=str(ROOT / "config" / "defaults.json"))
+    qc.add_argument("--from", dest="start", type=int, required=True, help="first headcount")
+    qc.add_argument("--to", dest="stop", type=int, required=True, help="last headcount (always included)")
+    qc.add_argument("--step", type=int, default=10)
+    qc.add_argument("--cost-basis", choices=stage_curve.COST_BASES, default="purchase",
+                    help="purchase = whole packs bought (non-linear), consumed = quantity used (as cost_breakdown.json)")
+    qc.add_argument("--confirm-stale", action="store_true")
+    qc.set_defaults(func=cmd_quote_curve)
+
     onboard = sp.add_parser("onboard-supplier", help="generate supplier onboarding skeleton and fixture tests")
     onboard.add_argument("--supplier-id", required=True)
     onboard.add_argument("--display-name", required=False, default=None)
@@ -2640,6 +3625,8 @@ def main():
     rc.add_argument("--decisions", default=None)
     rc.add_argument("--defaults", default=str(ROOT / "config" / "defaults.json"))
     rc.add_argument("--confirm-stale", action="store_true")
+    rc.add_argument("--workers", type=int, default=1, help="costing processes for large menus (1 = in-process)")
+    rc.add_argument("--impact-index", default=str(stage_impact.INDEX_PATH), help="product -> recipes -> proposals reverse index")
     rc.set_defaults(func=cmd_recipe_cost)
 
     mo = sp.add_parser("menu-offer", help="one-shot menu->offer deterministic chain")
@@ -2648,6 +3635,7 @@ def main():
     mo.add_argument("--policies", default=str(ROOT / "policies" / "sourcing_policies.json"))
     mo.add_argument("--template-hint", choices=["A", "B", "C"], default=None)
     mo.add_argument("--client", default=None)
+    mo.add_argument("--demand-sourcing", action="store_true", help="source by cheapest pack spend for the menu's quantities")
     mo.add_argument("--file-proposal", dest="file_proposal", action="store_true", default=True)
     mo.add_argument("--no-file-proposal", dest="file_proposal", action="store_false")
     mo.add_argument("--reply", dest="reply", action="store_true", default=True)
@@ -2676,7 +3664,8 @@ def main():
     dr.add_argument("--reply", dest="reply", action="store_true")
     dr.add_argument("--no-reply", dest="reply", action="store_false")
     dr.add_argument("--file-proposal", dest="file_proposal", action="store_true")
-    dr.set_defaults(func=cmd_daily_refresh, reindex_set=False, health_set=False, reply_set=False, file_proposal_set=False)
+    dr.add_argument("--jobs", type=int, default=1, help="suppliers refreshed concurrently (process pool)")
+    dr.set_defaults(func=cmd_daily_refresh, reindex_proposals=None, run_health_checks=None, reply=None, file_proposal=None)
 
     sh = sp.add_parser("source-health", help="preflight registry source health checks")
     sh.add_argument("--sources", action="append", default=[])
@@ -2694,6 +3683,13 @@ def main():
     ss.add_argument("--no-reply", dest="reply", action="store_false")
     ss.set_defaults(func=cmd_source_status)
 
+    ch = sp.add_parser("cache", help="inspect or clear the map -> optimize stage cache")
+    ch.add_argument("action", choices=["stats", "clear"])
+    ch.add_argument("--expired-only", action="store_true", default=False)
+    ch.add_argument("--reply", dest="reply", action="store_true", default=True)
+    ch.add_argument("--no-reply", dest="reply", action="store_false")
+    ch.set_defaults(func=cmd_cache)
+
     al = sp.add_parser("alias", help="print deterministic one-liner alias command")
     al.add_argument("--name", required=True, choices=["daily", "health", "status"])
     al.set_defaults(func=cmd_alias)
@@ -2754,7 +3750,7 @@ def main():
     offer = sp.add_parser("offer", help="cost + payload + render")
     offer.add_argument("--template-type", required=False, choices=["A", "B", "C"])
     offer.add_argument("--proposal-request", required=False)
-    offer.add_argument("--raw", required=True)
+    offer.add_argument("--raw", required=False, default=None, help="raw offers (not needed with --as-of)")
     offer.add_argument("--recipe", required=True)
     offer.add_argument("--request", required=False)
     offer.add_argument("--catalog", default=str(ROOT / "data" / "catalog.json"))
@@ -2766,13 +3762,25 @@ def main():
     offer.add_argument("--rollout-categories", default="")
     offer.add_argument("--policies", default=None)
     offer.add_argument("--service-tag", default="CAT")
+    offer.add_argument("--sku-map-dir", default=str(ROOT / "mappings" / "supplier_sku_map"), help="supplier SKU maps used for mapping")
+    offer.add_argument("--no-cache", action="store_true", help="bypass state/stage_cache for the map -> optimize chain")
+    offer.add_argument("--incremental-from", default=None, help="previous prices run dir; only changed product groups are re-sourced")
+    offer.add_argument("--changed-offer-ids", default=None, help="comma list, JSON id list or import_delta.json")
+    offer.add_argument("--demand", default=None, help="event_purchase.json / recipes json: pick the cheapest pack spend for the needed qty")
+    offer.add_argument("--basket", action="store_true", help="with --demand: minimize event spend incl. supplier delivery fees / minimum orders")
+    offer.add_argument("--suppliers-dir", default=str(ROOT / "suppliers"), help="supplier profiles with optional 'ordering' terms")
     offer.add_argument("--confirm-stale", action="store_true")
+    offer.add_argument("--as-of", default=None, help="ISO time or YYYY-MM-DD: cost from the price history as of then, reproducibly")
+    offer.add_argument("--history-dir", default=str(stage_history.HISTORY_ROOT), help="append-only price history store")
+    offer.add_argument("--no-history", action="store_true", help="do not record this run's offers in the price history")
+    offer.add_argument("--purchase-list", default=None, help="event purchase_list.json from recipe-cost (default: this recipe alone)")
     offer.add_argument("--file-proposal", action="store_true")
     offer.add_argument("--proposals-root", default=str(ROOT / "proposals"))
     offer.add_argument("--client", required=False, default=None)
+    offer.add_argument("--impact-index", default=str(stage_impact.INDEX_PATH), help="product -> recipes -> proposals reverse index")
     offer.set_defaults(func=cmd_offer)
 
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
     if not hasattr(args, "func"):
         print(
             "Usage examples:\n"
@@ -2783,7 +3791,17 @@ def main():
             "  offer:  python scripts/run_pipeline.py offer --template-type B --raw data/prices/sample_offers.json --recipe data/recipes/sample_recipe.json --request data/sample_proposal_request.json"
         )
         return
-    args.func(args)
+    mark = len(_OPEN_RUNS)
+    used = _track_inputs()
+    try:
+        try:
+            args.func(args)
+        except BaseException:
+            _finish_runs(mark, args, used, failed=True)
+            raise
+        _finish_runs(mark, args, used)
+    finally:
+        _USED_INPUTS.pop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import json
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def comparable(rows):
+    return [{k: v for k, v in r.items() if k != "decision_ts"} for r in rows]
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "preset_compare_demo"
+    out.mkdir(parents=True, exist_ok=True)
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    catalog = json.loads((ROOT / "data" / "catalog.json").read_text(encoding="utf-8"))
+    produce = [i for i in catalog["items"] if i.get("category") == "Λαχανικά"][:6]
+    # TheMart premium over Alios: 3% (both presets prefer TheMart), 7% (balanced only), 12% (neither)
+    premiums = [3, 7, 12, 3, 7, 12]
+    # map_offers indexes canonical_name next to the aliases; use an alias that differs from it so it maps uniquely
+    names = [next(a for a in i["aliases"] if a.strip().lower() != i["canonical_name"].strip().lower()) for i in produce]
+    raw = []
+    for n, (name, prem) in enumerate(zip(names, premiums)):
+        base = 2.0 + n
+        for sup, price in [("Alios", base), ("TheMart", round(base * (1 + prem / 100.0), 4))]:
+            raw.append({
+                "offer_id": f"OFF-PRESET-{n}-{sup}",
+                "supplier": sup,
+                "supplier_sku": f"{sup[:2].upper()}-{n}",
+                "product_name": name,
+                "category": "Λαχανικά",
+                "tier": "standard",
+                "pack_size": 1,
+                "pack_unit": "kg",
+                "price": price,
+                "price_per_base_unit": price,
+                "captured_at": cap,
+                "in_stock": True,
+            })
+    raw_path = out / "raw_offers.json"
+    raw_path.write_text(json.dumps(raw, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    run_dir = Path(run([
+        sys.executable,
+        str(S / "run_pipeline.py"),
+        "prices",
+        "--raw", str(raw_path),
+        "--phase", "3",
+        "--enable-phase2-rules",
+        "--compare-presets", "balanced,conservative",
+    ]).splitlines()[-1].strip())
+    sm = summary_map(run_dir)
+    assert sm.get("run_type") == "prices_compare" and sm.get("presets") == "balanced,conservative", sm
+    report = json.loads((run_dir / "preset_comparison.json").read_text(encoding="utf-8"))
+    assert report["products"] == 6 and report["comparable_products"] == 6, report
+    assert report["differing_products"] == 2, report
+    diff_pids = {d["product_id"] for d in report["differences"]}
+    assert diff_pids == {produce[1]["product_id"], produce[4]["product_id"]}, diff_pids
+    for d in report["differences"]:
+        assert d["choices"]["balanced"]["selected_supplier"] == "TheMart" and d["choices"]["balanced"]["rule_applied"] == "PREFER", d
+        assert d["choices"]["conservative"]["selected_supplier"] == "Alios", d
+        assert d["cost_delta_vs_base"]["conservative"] < 0, d
+    per = report["per_preset"]
+    expected_delta = round(sum(d["cost_delta_vs_base"]["conservative"] for d in report["differences"]), 6)
+    assert per["conservative"]["delta_vs_base"] == expected_delta and expected_delta < 0, per
+
+    # each preset's decisions equal a separate prices run with that preset
+    for name in ("balanced", "conservative"):
+        single = Path(run([
+            sys.executable,
+            str(S / "run_pipeline.py"),
+            "prices",
+            "--raw", str(raw_path),
+            "--phase", "3",
+            "--enable-phase2-rules",
+            "--policies", str(ROOT / "policies" / "presets" / f"{name}.json"),
+            "--no-cache",
+        ]).splitlines()[-1].strip())
+        a = comparable(json.loads((single / "decisions.json").read_text(encoding="utf-8")))
+        b = comparable(json.loads((run_dir / f"decisions_{name}.json").read_text(encoding="utf-8")))
+        assert a == b, f"{name}: single-pass decisions differ from a dedicated prices run"
+
+    print("PRESET_COMPARE_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+SUPPLIER_ID = "anomaly_demo"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def quote(sku, ppu, day, pack_size=1.0):
+    return {
+        "offer_id": f"Q-{sku}-{day}",
+        "supplier": "AnomalyCo",
+        "supplier_sku": sku,
+        "product_name": "Ντομάτες",
+        "pack_size": pack_size,
+        "pack_unit": "kg",
+        "price": round(ppu * pack_size, 4),
+        "price_per_base_unit": ppu,
+        "captured_at": f"2026-03-{day:02d}T08:00:00+00:00",
+    }
+
+
+def detect(out: Path, stats: Path, name, rows):
+    src = out / name
+    src.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+    run([
+        sys.executable, str(S / "detect_price_anomalies.py"),
+        "--input", str(src),
+        "--out", str(src),
+        "--issues-out", str(out / f"issues_{name}"),
+        "--stats-dir", str(stats),
+    ])
+    return json.loads(src.read_text(encoding="utf-8")), json.loads((out / f"issues_{name}").read_text(encoding="utf-8"))
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "price_anomaly_demo"
+    stats = out / "price_stats"
+    if stats.exists():
+        shutil.rmtree(stats)
+    out.mkdir(parents=True, exist_ok=True)
+
+    # steady history: no flags
+    for day, ppu in enumerate([2.00, 2.02, 1.98, 2.01, 1.99], start=1):
+        rows, issues = detect(out, stats, f"day{day}.json", [quote("A1", ppu, day)])
+        assert issues == [] and "anomaly_flags" not in rows[0], (day, issues)
+    # re-importing the same capture does not feed the window twice
+    detect(out, stats, "day5_again.json", [quote("A1", 1.99, 5)])
+    st = json.loads((stats / "anomalyco.json").read_text(encoding="utf-8"))
+    assert st["products"]["name:ντομάτες"]["window"] == [2.00, 2.02, 1.98, 2.01, 1.99], st
+
+    # jump + median/MAD outlier on the same SKU, pack-size outlier on a 0.5 kg SKU priced per g by mistake
+    rows, issues = detect(out, stats, "day6.json", [quote("A1", 2.9, 6), quote("A2", 20.0, 6, pack_size=0.5)])
+    flags = {r["supplier_sku"]: r.get("anomaly_flags", []) for r in rows}
+    assert flags["A1"] == ["PRICE_JUMP", "UNIT_PRICE_OUTLIER"], flags
+    assert "PACK_UNIT_PRICE_OUTLIER" in flags["A2"], flags
+    by_sku = {x["supplier_sku"]: x for x in issues}
+    assert by_sku["A1"]["code"] == "IMPORT-PRICE-ANOMALY" and by_sku["A1"]["reference"]["jump_pct"] == 45.73, by_sku
+    assert by_sku["A2"]["reference"]["pack_ratio"] >= 2.5, by_sku
+
+    # import path: flags land on price_quotes.json and raw_merged.json, and prices carries them to offers_mapped.json
+    profile = json.loads((ROOT / "suppliers" / "supplier_x.json").read_text(encoding="utf-8"))
+    profile["supplier_id"] = SUPPLIER_ID
+    profile_path = out / f"{SUPPLIER_ID}.json"
+    profile_path.write_text(json.dumps(profile, ensure_ascii=False, indent=2), encoding="utf-8")
+    lines = (ROOT / "data" / "prices" / "themart_round1.csv").read_text(encoding="utf-8").splitlines()
+    header, body = lines[0], lines[1:11]
+    v1 = out / "import_v1.csv"
+    v1.write_text("\n".join([header] + body) + "\n", encoding="utf-8")
+    cols = body[2].split(",")
+    sku = cols[0]
+    cols[5] = f"{float(cols[5]) * 3:.2f}"
+    v2 = out / "import_v2.csv"
+    v2.write_text("\n".join([header] + body[:2] + [",".join(cols)] + body[3:]) + "\n", encoding="utf-8")
+
+    def do_import(csv_path, *extra):
+        return Path(run([
+            sys.executable, str(S / "run_pipeline.py"), "import",
+            "--csv-input", str(csv_path),
+            "--csv-profile", str(profile_path),
+            "--anomaly-stats-dir", str(stats),
+        ] + list(extra)).splitlines()[-1].strip())
+
+    first = do_import(v1)
+    assert summary_map(first).get("flags_anomaly") == "0", summary_map(first)
+    assert "price_history" not in summary_map(first), "import quotes are unmapped; the price history is fed by prices runs"
+    # --no-anomaly-update flags against the stats but leaves them as they were; --no-anomaly does not touch them
+    def snapshot():
+        return {f.name: f.read_bytes() for f in stats.glob("*.json")}
+
+    before = snapshot()
+    check = summary_map(do_import(v2, "--no-anomaly-update"))
+    assert (check.get("flags_anomaly"), check.get("anomaly_stats")) == ("1", "check_only"), check
+    skipped = do_import(v2, "--no-anomaly")
+    assert (summary_map(skipped).get("flags_anomaly"), summary_map(skipped).get("anomaly_stats")) == ("0", "off"), summary_map(skipped)
+    assert not (skipped / "anomaly_issues.json").exists()
+    assert not any("anomaly_flags" in q for q in json.loads((skipped / "price_quotes.json").read_text(encoding="utf-8")))
+    assert snapshot() == before
+    second = do_import(v2)
+    assert summary_map(second).get("flags_anomaly") == "1", summary_map(second)
+    assert summary_map(second).get("anomaly_stats") == "updated" and snapshot() != before
+    quotes = {q["supplier_sku"]: q for q in json.loads((second / "price_quotes.json").read_text(encoding="utf-8"))}
+    assert quotes[sku].get("anomaly_flags") == ["PRICE_JUMP"], quotes[sku]
+    raw = {r["supplier_sku"]: r for r in json.loads((second / "raw_merged.json").read_text(encoding="utf-8"))}
+    assert raw[sku].get("anomaly_flags") == ["PRICE_JUMP"], raw[sku]
+    prices_dir = Path(run([
+        sys.executable, str(S / "run_pipeline.py"), "prices",
+        "--raw", str(second / "raw_merged.json"),
+        "--no-cache", "--no-history",
+    ]).splitlines()[-1].strip())
+    mapped = {r["supplier_sku"]: r for r in json.loads((prices_dir / "offers_mapped.json").read_text(encoding="utf-8"))}
+    assert mapped[sku].get("anomaly_flags") == ["PRICE_JUMP"], mapped[sku]
+
+    print("PRICE_ANOMALY_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def raw_batch(captured, prices):
+    rows = []
+    for sup, (sku, price) in prices.items():
+        rows.append({
+            "offer_id": f"OFF-HIST-{sup}-{captured[:10]}",
+            "supplier": sup,
+            "supplier_sku": sku,
+            "product_name": "patates kyprou",
+            "category": "Λαχανικά",
+            "tier": "standard",
+            "pack_size": 1,
+            "pack_unit": "kg",
+            "price": price,
+            "price_per_base_unit": price,
+            "captured_at": captured,
+            "in_stock": True,
+        })
+    return rows
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "price_history_demo"
+    hist = out / "history"
+    if hist.exists():
+        shutil.rmtree(hist)
+    out.mkdir(parents=True, exist_ok=True)
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    t1 = now - timedelta(days=20)
+    t2 = now - timedelta(days=2)
+    # batch 1: Alios cheapest; batch 2: prices moved and TheMart is cheapest
+    b1 = raw_batch(t1.isoformat(), {"Alios": ("AL-POT", 0.80), "TheMart": ("TM-POT", 0.90)})
+    b2 = raw_batch(t2.isoformat(), {"Alios": ("AL-POT", 0.95), "TheMart": ("TM-POT", 0.85)})
+    for name, rows in [("batch1.json", b1), ("batch2.json", b2)]:
+        (out / name).write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+    recipe = {
+        "recipe_id": "REC-HIST",
+        "name": "History recipe",
+        "tier": "standard",
+        "portions": 10,
+        "ingredients": [{"line_id": "L1", "product_id": "PROD-POTATO-STD", "gross_qty": 2000, "unit": "g", "yield_pct": 100, "waste_pct": 0}],
+    }
+    recipe_path = out / "recipe.json"
+    recipe_path.write_text(json.dumps(recipe, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # every prices run feeds the history; re-running an identical batch adds nothing
+    r1 = pipeline("prices", "--raw", str(out / "batch1.json"), "--history-dir", str(hist), "--no-cache")
+    assert summary_map(r1).get("price_history") == "added=2 duplicates=0 skipped=0", summary_map(r1)
+    r2 = pipeline("prices", "--raw", str(out / "batch2.json"), "--history-dir", str(hist), "--no-cache")
+    assert summary_map(r2).get("price_history") == "added=2 duplicates=0 skipped=0", summary_map(r2)
+    r3 = pipeline("prices", "--raw", str(out / "batch1.json"), "--history-dir", str(hist), "--no-cache")
+    assert summary_map(r3).get("price_history") == "added=0 duplicates=2 skipped=0", summary_map(r3)
+    stats = json.loads(run([sys.executable, str(S / "price_history.py"), "--root", str(hist)]))
+    assert stats["records"] == 4 and stats["keys"] == 2 and stats["products"] == 1, stats
+
+    # price of X at D: the observation in force per supplier/sku
+    def price_at(as_of):
+        return json.loads(run([sys.executable, str(S / "price_history.py"), "--root", str(hist), "--product", "PROD-POTATO-STD", "--as-of", as_of]))
+
+    assert price_at((t1 - timedelta(days=1)).isoformat()) == []
+    mid = (t1 + timedelta(days=1)).isoformat()
+    rows = {x["supplier"]: x for x in price_at(mid)}
+    assert rows["Alios"]["price"] == 0.80 and rows["TheMart"]["price"] == 0.90 and rows["Alios"]["valid_at_as_of"], rows
+    rows = {x["supplier"]: x for x in price_at(now.isoformat())}
+    assert rows["Alios"]["price"] == 0.95 and rows["TheMart"]["price"] == 0.85, rows
+
+    # decisions as of D
+    dec_path = out / "decisions_as_of.json"
+    run([sys.executable, str(S / "price_history.py"), "--root", str(hist), "--as-of", mid, "--decisions-out", str(dec_path)])
+    dec = json.loads(dec_path.read_text(encoding="utf-8"))
+    assert [d["selected_supplier"] for d in dec] == ["Alios"], dec
+
+    # cost --as-of re-costs against the history with ages judged at that time: reproducible, no stale flags
+    c1 = pipeline("cost", "--recipe", str(recipe_path), "--as-of", mid, "--history-dir", str(hist))
+    c2 = pipeline("cost", "--recipe", str(recipe_path), "--as-of", mid, "--history-dir", str(hist))
+    cost1 = json.loads((c1 / "cost_breakdown.json").read_text(encoding="utf-8"))
+    cost2 = json.loads((c2 / "cost_breakdown.json").read_text(encoding="utf-8"))
+    assert cost1 == cost2, "as-of re-cost is not reproducible"
+    assert cost1["status"] == "OK" and cost1["lines"][0]["supplier"] == "Alios" and abs(cost1["food_cost_total"] - 1.6) < 1e-9, cost1
+    assert summary_map(c1).get("flags_stale") == "0", summary_map(c1)
+    # the same historical offers costed today are stale
+    c_now = pipeline("cost", "--recipe", str(recipe_path), "--offers", str(c1 / "offers_mapped.json"), "--decisions", str(c1 / "decisions.json"))
+    assert summary_map(c_now).get("flags_stale") != "0", summary_map(c_now)
+    assert json.loads((c_now / "cost_breakdown.json").read_text(encoding="utf-8"))["status"] == "BLOCKED"
+
+    # cost_recipe --as-of takes a bare date (end of that day, UTC) and rejects what it cannot parse
+    direct = [sys.executable, str(S / "cost_recipe.py"), "--recipe", str(recipe_path), "--offers", str(c1 / "offers_mapped.json"),
+              "--decisions", str(c1 / "decisions.json"), "--defaults", str(ROOT / "config" / "defaults.json"),
+              "--out", str(out / "cost_direct.json"), "--issues-out", str(out / "cost_direct_issues.json")]
+    run(direct + ["--as-of", mid[:10]])
+    assert json.loads((out / "cost_direct.json").read_text(encoding="utf-8"))["status"] == "OK"
+    bad = subprocess.run(direct + ["--as-of", "last tuesday"], capture_output=True, text=True)
+    assert bad.returncode == 2 and "invalid --as-of" in bad.stderr, bad.stderr
+
+    # offer --as-of needs no --raw and matches the cost run
+    req = ROOT / "data" / "alios_top20_typec_request.json"
+    o1 = pipeline("offer", "--template-type", "C", "--as-of", mid, "--recipe", str(recipe_path), "--request", str(req), "--history-dir", str(hist))
+    sm = summary_map(o1)
+    assert sm.get("as_of", "").startswith(mid[:19]) and "price_history" not in sm, sm
+    ocost = json.loads((o1 / "cost_breakdown.json").read_text(encoding="utf-8"))
+    assert ocost == cost1, "offer --as-of cost differs from cost --as-of"
+    latest = pipeline("cost", "--recipe", str(recipe_path), "--as-of", now.isoformat(), "--history-dir", str(hist))
+    lcost = json.loads((latest / "cost_breakdown.json").read_text(encoding="utf-8"))
+    assert lcost["lines"][0]["supplier"] == "TheMart" and abs(lcost["food_cost_total"] - 1.7) < 1e-9, lcost
+
+    print("PRICE_HISTORY_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def recipe(rid, portions, lines, prep_minutes=0):
+    return {
+        "recipe_id": rid,
+        "name": rid,
+        "tier": "standard",
+        "portions": portions,
+        "prep_minutes": prep_minutes,
+        "ingredients": [
+            {"line_id": f"L{i}", "product_id": pid, "gross_qty": grams, "unit": "g", "yield_pct": 100, "waste_pct": 0}
+            for i, (pid, grams) in enumerate(lines, start=1)
+        ],
+    }
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "quote_curve_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    raw = [
+        {"offer_id": f"OFF-QC-{sku}", "supplier": "Alios", "supplier_sku": sku, "product_name": name, "category": "Λαχανικά",
+         "tier": "standard", "pack_size": pack, "pack_unit": "kg", "price": price, "price_per_base_unit": round(price / pack, 6),
+         "captured_at": cap, "in_stock": True}
+        for sku, name, pack, price in [("AL-POT5", "patates kyprou", 5, 4.0), ("AL-TOM2", "ντομάτες εγχώριες", 2, 3.0)]
+    ]
+    prices_dir = pipeline("prices", "--raw", write(out / "raw_offers.json", raw), "--no-history", "--no-cache")
+    offers, decisions = str(prices_dir / "offers_mapped.json"), str(prices_dir / "decisions.json")
+    # 0.2 kg potato + 0.1 kg tomato per guest, one hour of prep per event
+    recipes = [recipe("REC-QC-1", 10, [("PROD-POTATO-STD", 2000), ("PROD-TOMATO-STD", 1000)], prep_minutes=60)]
+    recipes_path = write(out / "recipes.json", recipes)
+    req_path = write(out / "request.json", json.loads((ROOT / "data" / "sample_proposal_request.json").read_text(encoding="utf-8")))
+
+    d = pipeline("quote-curve", "--recipes-mapped", recipes_path, "--request", req_path, "--offers", offers, "--decisions", decisions,
+                 "--from", "10", "--to", "100", "--step", "10")
+    sm = summary_map(d)
+    assert (sm["points"], sm["guests_range"], sm["cost_basis"], sm["issues"]) == ("10", "10..100", "purchase", "0"), sm
+    rep = json.loads((d / "quote_curve.json").read_text(encoding="utf-8"))
+    pts = {p["guests"]: p for p in rep["points"]}
+    # 20 guests: 4 kg potato -> one 5 kg pack, 2 kg tomato -> one 2 kg pack; 30 guests opens a second pack of each
+    assert (pts[20]["food_cost"], pts[20]["packs"], pts[30]["food_cost"], pts[30]["packs"]) == (7.0, 2, 14.0, 4), (pts[20], pts[30])
+    b30 = next(b for b in rep["break_points"] if b["guests"] == 30)
+    # one 2 kg tomato pack covers 20 guests, one 5 kg potato pack 25: the exact steps are at 21 and 26
+    assert sorted((x["product_id"], x["packs_from"], x["packs_to"], x["at_guests"]) for x in b30["packs_opened"]) == [
+        ("PROD-POTATO-STD", 1, 2, 26), ("PROD-TOMATO-STD", 1, 2, 21)], b30
+    assert (b30["first_guests"], b30["cost_step"], pts[30]["break_point"], pts[40]["break_point"]) == (21, 7.0, True, False), (b30, pts[40])
+    assert [b["guests"] for b in rep["break_points"]] == [30, 50, 60, 70, 80, 90], rep["break_points"]
+    assert all(p["labor_cost"] == 16.0 for p in rep["points"]), rep["points"]
+    lines = (d / "quote_curve.csv").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 11 and lines[0].startswith("guests,food_cost"), lines[:2]
+
+    # purchase basis matches the event purchase list of the recipe scaled to that headcount
+    scaled = write(out / "recipes_70.json", [recipe("REC-QC-1", 70, [("PROD-POTATO-STD", 14000), ("PROD-TOMATO-STD", 7000)], prep_minutes=60)])
+    rc = pipeline("recipe-cost", "--recipes-mapped", scaled, "--offers", offers, "--decisions", decisions,
+                  "--impact-index", str(out / "impact_index.json"))
+    ev = json.loads((rc / "event_purchase.json").read_text(encoding="utf-8"))
+    assert ev["totals"]["purchase_cost"] == pts[70]["food_cost"], (ev["totals"], pts[70])
+
+    # consumed basis at the recipe's own portions reproduces the payload generator on its cost breakdown
+    d = pipeline("quote-curve", "--recipes-mapped", recipes_path, "--request", req_path, "--offers", offers, "--decisions", decisions,
+                 "--from", "10", "--to", "40", "--step", "10", "--cost-basis", "consumed")
+    first = json.loads((d / "quote_curve.json").read_text(encoding="utf-8"))["points"][0]
+    c = pipeline("cost", "--recipe", write(out / "recipe_1.json", recipes[0]), "--offers", offers, "--decisions", decisions,
+                 "--impact-index", str(out / "impact_index.json"))
+    run([
+        sys.executable, str(S / "generate_proposal_payload.py"),
+        "--request", write(out / "request_10.json", {**json.loads(Path(req_path).read_text(encoding="utf-8")),
+                                                   "event": {**json.loads(Path(req_path).read_text(encoding="utf-8"))["event"], "guest_count": 10}}),
+        "--cost", str(c / "cost_breakdown.json"),
+        "--out", str(out / "payload_10.json"),
+        "--validation-out", str(out / "validation_10.json"),
+        "--issues-out", str(out / "issues_10.json"),
+    ])
+    pricing = json.loads((out / "payload_10.json").read_text(encoding="utf-8"))["pricing"]
+    assert (first["cost_total"], first["net_selling"], first["gross_total"], first["price_per_person"]) == (
+        pricing["cost_total"], pricing["net_selling"], pricing["gross_total"], pricing["price_per_person"]), (first, pricing)
+
+    # 20..500 step 10 in one pass
+    d = pipeline("quote-curve", "--recipes-mapped", recipes_path, "--request", req_path, "--offers", offers, "--decisions", decisions,
+                 "--from", "20", "--to", "500", "--step", "10")
+    sm = summary_map(d)
+    assert sm["points"] == "49" and int(sm["break_points"]) > 0 and float(sm["elapsed_ms"]) < 500, sm
+
+    print("QUOTE_CURVE_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
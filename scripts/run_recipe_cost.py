@@ -1,19 +1,21 @@
 import argparse
 import json
-import subprocess
 import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 SCRIPTS = ROOT / "scripts"
-RUNS = ROOT / "runs"
 
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
 
-def latest(path_glob):
-    c = list(RUNS.glob(path_glob))
-    if not c:
-        return None
-    return str(sorted(c, key=lambda p: p.stat().st_mtime, reverse=True)[0])
+import cost_recipe  # noqa: E402
+import event_purchase  # noqa: E402
+import run_registry  # noqa: E402
+
+
+def latest(kind, name):
+    return run_registry.latest_file(kind, name)
 
 
 def load_json(path, default):
@@ -29,14 +31,7 @@ def save_json(path, data):
     p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
-def run(cmd):
-    r = subprocess.run(cmd, capture_output=True, text=True)
-    if r.returncode != 0:
-        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
-    return r.stdout.strip()
-
-
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Cost mapped recipe list using latest or provided prices decisions")
     p.add_argument("--recipes-mapped", required=True)
     p.add_argument("--offers", default=None)
@@ -46,10 +41,13 @@ def main():
     p.add_argument("--out-issues", required=True)
     p.add_argument("--out-summary", required=True)
     p.add_argument("--confirm-stale", action="store_true")
-    args = p.parse_args()
+    p.add_argument("--workers", type=int, default=1, help="costing processes for large menus (1 = in-process)")
+    p.add_argument("--out-event", default=None, help="event_purchase.json: packs rounded once across all recipes")
+    p.add_argument("--out-purchase-list", default=None, help="per-supplier purchase_list.json for the whole menu")
+    args = p.parse_args(argv)
 
-    offers = args.offers or latest("*/prices/offers_mapped.json")
-    decisions = args.decisions or latest("*/prices/decisions.json")
+    offers = args.offers or latest("prices", "offers_mapped.json")
+    decisions = args.decisions or latest("prices", "decisions.json")
 
     issues = []
     if not offers:
@@ -61,32 +59,25 @@ def main():
     if issues:
         save_json(args.out_costs, [])
         save_json(args.out_issues, issues)
+        if args.out_event:
+            save_json(args.out_event, event_purchase.aggregate_event([]))
+        if args.out_purchase_list:
+            save_json(args.out_purchase_list, event_purchase.purchase_list(event_purchase.aggregate_event([])))
         save_json(args.out_summary, {"status": "BLOCKED", "recipes": len(recipes), "costed": 0, "issues": len(issues)})
         print(json.dumps({"status": "BLOCKED", "issues": len(issues)}, ensure_ascii=False))
         return
 
-    all_costs = []
-    all_issues = []
-    tmp = Path(args.out_costs).parent
-    tmp.mkdir(parents=True, exist_ok=True)
-
-    for i, recipe in enumerate(recipes, start=1):
-        rp = tmp / f"_recipe_{i}.json"
-        ro = tmp / f"_recipe_{i}_cost.json"
-        ri = tmp / f"_recipe_{i}_issues.json"
-        rp.write_text(json.dumps(recipe, ensure_ascii=False, indent=2), encoding="utf-8")
-        run([
-            sys.executable,
-            str(SCRIPTS / "cost_recipe.py"),
-            "--recipe", str(rp),
-            "--offers", str(offers),
-            "--decisions", str(decisions),
-            "--defaults", str(args.defaults),
-            "--out", str(ro),
-            "--issues-out", str(ri),
-        ] + (["--confirm-stale"] if args.confirm_stale else []))
-        all_costs.append(load_json(ro, {}))
-        all_issues.extend(load_json(ri, []))
+    # offers/decisions are read and indexed once for the whole menu
+    results = cost_recipe.cost_recipes(
+        recipes,
+        load_json(offers, []),
+        load_json(decisions, []),
+        load_json(args.defaults, {}),
+        confirm_stale=args.confirm_stale,
+        workers=args.workers,
+    )
+    all_costs = [r for r, _ in results]
+    all_issues = [i for _, rows in results for i in rows]
 
     save_json(args.out_costs, all_costs)
     save_json(args.out_issues, all_issues)
@@ -99,6 +90,18 @@ def main():
         "offers": offers,
         "decisions": decisions,
     }
+    if args.out_event or args.out_purchase_list:
+        event = event_purchase.aggregate_event(all_costs)
+        if args.out_event:
+            save_json(args.out_event, event)
+        if args.out_purchase_list:
+            save_json(args.out_purchase_list, event_purchase.purchase_list(event))
+        summary.update({
+            "purchase_cost": event["totals"]["purchase_cost"],
+            "standalone_purchase_cost": event["totals"]["standalone_purchase_cost"],
+            "pack_rounding_savings": event["totals"]["pack_rounding_savings"],
+            "purchase_suppliers": event["totals"]["suppliers"],
+        })
     save_json(args.out_summary, summary)
     print(json.dumps(summary, ensure_ascii=False))
 
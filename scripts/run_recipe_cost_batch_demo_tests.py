@@ -0,0 +1,80 @@
+import json
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def cost_menu(out: Path, tag: str, extra=None):
+    d = out / tag
+    run([
+        sys.executable,
+        str(S / "run_recipe_cost.py"),
+        "--recipes-mapped", str(out / "recipes_mapped.json"),
+        "--offers", str(out / "offers.json"),
+        "--decisions", str(out / "decisions.json"),
+        "--out-costs", str(d / "recipes_cost_breakdown.json"),
+        "--out-issues", str(d / "issues.json"),
+        "--out-summary", str(d / "recipe_cost_summary.json"),
+    ] + (extra or []))
+    return d
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "recipe_cost_batch_demo"
+    out.mkdir(parents=True, exist_ok=True)
+    captured = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
+    offers = [
+        {"offer_id": "OFF-B-1", "product_id": "P-FLOUR", "supplier": "s1", "pack_unit": "kg", "pack_size": 5, "price_per_base_unit": 1.2, "captured_at": captured},
+        {"offer_id": "OFF-B-2", "product_id": "P-OIL", "supplier": "s2", "pack_unit": "lt", "pack_size": 1, "price_per_base_unit": 6.5, "captured_at": captured},
+    ]
+    decisions = [
+        {"product_id": "P-FLOUR", "chosen_offer_id": "OFF-B-1"},
+        {"product_id": "P-OIL", "chosen_offer_id": "OFF-B-2"},
+    ]
+    recipes = []
+    for i in range(12):
+        ings = [
+            {"line_id": "L1", "product_id": "P-FLOUR", "gross_qty": 200 + 50 * i, "unit": "g"},
+            {"line_id": "L2", "product_id": "P-OIL", "gross_qty": 30, "unit": "ml", "waste_pct": 5},
+        ]
+        if i % 4 == 3:
+            ings.append({"line_id": "L3", "product_id": "P-MISSING", "gross_qty": 1, "unit": "pcs"})
+        recipes.append({"recipe_id": f"R-BATCH-{i:02d}", "portions": 10, "prep_minutes": 20, "ingredients": ings})
+    for name, obj in [("offers.json", offers), ("decisions.json", decisions), ("recipes_mapped.json", recipes)]:
+        (out / name).write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    seq = cost_menu(out, "sequential")
+    costs = json.loads((seq / "recipes_cost_breakdown.json").read_text(encoding="utf-8"))
+    issues = json.loads((seq / "issues.json").read_text(encoding="utf-8"))
+    summary = json.loads((seq / "recipe_cost_summary.json").read_text(encoding="utf-8"))
+    assert [c["recipe_id"] for c in costs] == [r["recipe_id"] for r in recipes], costs
+    assert summary["costed"] == 12 and summary["status"] == "BLOCKED", summary
+    assert sum(1 for i in issues if i.get("code") == "COST-NO-SOURCING-DECISION") == 3, issues
+    assert costs[0]["food_cost_total"] == round(0.2 * 1.2 + 0.03 / 0.95 * 6.5, 4), costs[0]
+    assert not list(seq.glob("_recipe_*")), "batch costing must not write per-recipe temp files"
+
+    pooled = cost_menu(out, "pooled", ["--workers", "3"])
+    for name in ["recipes_cost_breakdown.json", "issues.json"]:
+        a = json.loads((seq / name).read_text(encoding="utf-8"))
+        b = json.loads((pooled / name).read_text(encoding="utf-8"))
+        for x in a + b:
+            for ln in x.get("lines", []):
+                ln.pop("price_age_days", None)
+        assert a == b, f"{name} differs between in-process and --workers 3"
+
+    print("RECIPE_COST_BATCH_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
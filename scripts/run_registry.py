@@ -0,0 +1,166 @@
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+RUNS = ROOT / "runs"
+REGISTRY_NAME = "_run_registry.jsonl"
+
+# in-memory index per registry file: {"offset": bytes consumed, "runs": {rel: record}, "seq": n,
+# "by_kind": {kind: {rel: None}}}; each by_kind dict is kept in seq order (a re-registered run moves to the end)
+_INDEX = {}
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _registry_path(runs_root=None):
+    return Path(runs_root or RUNS) / REGISTRY_NAME
+
+
+def _rel(run_dir: Path, runs_root=None):
+    base = Path(runs_root or RUNS).resolve()
+    try:
+        return Path(run_dir).resolve().relative_to(base).as_posix()
+    except ValueError:
+        return Path(run_dir).resolve().as_posix()
+
+
+def file_digest(path):
+    p = Path(path)
+    if not p.is_file():
+        return None
+    return hashlib.sha1(p.read_bytes()).hexdigest()
+
+
+def _append(row: dict, runs_root=None):
+    p = _registry_path(runs_root)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+    # single O_APPEND write per event so concurrent runs (daily-refresh --jobs) never interleave lines
+    fd = os.open(str(p), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def _bootstrap(runs_root=None):
+    """One-time scan of runs/<ts>/<kind>/ created before the registry existed, oldest first."""
+    base = Path(runs_root or RUNS)
+    base.mkdir(parents=True, exist_ok=True)
+    _registry_path(base).touch()
+    dirs = [d for d in base.glob("*/*") if d.is_dir()]
+    for d in sorted(dirs, key=lambda x: x.stat().st_mtime):
+        ts = datetime.fromtimestamp(d.stat().st_mtime, timezone.utc).isoformat()
+        _append({
+            "event": "finish",
+            "run": _rel(d, base),
+            "kind": d.name,
+            "status": "UNKNOWN",
+            "ts": ts,
+            "artifacts": sorted(f.name for f in d.iterdir() if f.is_file()),
+            "bootstrap": True,
+        }, base)
+
+
+def _load_index(runs_root=None):
+    p = _registry_path(runs_root)
+    key = str(p)
+    if not p.exists():
+        _INDEX.pop(key, None)
+        ensure(runs_root)
+        if not p.exists():
+            return {"offset": 0, "runs": {}, "seq": 0, "by_kind": {}}
+    idx = _INDEX.get(key)
+    size = p.stat().st_size
+    if idx is None or size < idx["offset"]:
+        idx = {"offset": 0, "runs": {}, "seq": 0, "by_kind": {}}
+        _INDEX[key] = idx
+    if size > idx["offset"]:
+        with p.open("rb") as f:
+            f.seek(idx["offset"])
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        for raw in chunk[:end].splitlines():
+            try:
+                row = json.loads(raw.decode("utf-8"))
+            except Exception:
+                continue
+            rel = row.get("run")
+            rec = idx["runs"].setdefault(rel, {"run": rel})
+            idx["by_kind"].get(rec.get("kind"), {}).pop(rel, None)
+            rec.update({k: v for k, v in row.items() if k != "event"})
+            idx["seq"] += 1
+            rec["seq"] = idx["seq"]
+            idx["by_kind"].setdefault(rec.get("kind"), {})[rel] = None
+        idx["offset"] += end
+    return idx
+
+
+def ensure(runs_root=None):
+    """Create the registry (backfilled from existing run dirs) if it does not exist yet."""
+    if not _registry_path(runs_root).exists():
+        _bootstrap(runs_root)
+
+
+def record_start(run_dir: Path, kind: str, runs_root=None):
+    ensure(runs_root)
+    _append({"event": "start", "run": _rel(run_dir, runs_root), "kind": kind, "status": "RUNNING", "ts": _now_iso()}, runs_root)
+
+
+def record_finish(run_dir: Path, status: str = "DONE", inputs=None, runs_root=None):
+    d = Path(run_dir)
+    ensure(runs_root)
+    artifacts = sorted(f.name for f in d.iterdir() if f.is_file()) if d.exists() else []
+    _append({
+        "event": "finish",
+        "run": _rel(d, runs_root),
+        "kind": d.name,
+        "status": status,
+        "ts": _now_iso(),
+        "artifacts": artifacts,
+        "inputs": inputs or {},
+    }, runs_root)
+
+
+def runs(kind=None, runs_root=None):
+    """Registered runs, newest first (by last registry event)."""
+    idx = _load_index(runs_root)
+    if kind:
+        return [idx["runs"][rel] for rel in reversed(idx["by_kind"].get(kind, {}))]
+    return sorted(idx["runs"].values(), key=lambda r: r.get("seq", 0), reverse=True)
+
+
+def latest_file(kind: str, name: str, runs_root=None):
+    """Newest runs/<ts>/<kind>/<name> that still exists, or None."""
+    base = Path(runs_root or RUNS)
+    for rel in reversed(_load_index(runs_root)["by_kind"].get(kind, {})):
+        p = base / rel / name
+        if p.exists():
+            return str(p)
+    return None
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Query the append-only runs/ registry")
+    p.add_argument("--kind", default=None)
+    p.add_argument("--latest", default=None, help="artifact file name; prints newest existing path for --kind")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--runs-root", default=str(RUNS))
+    args = p.parse_args(argv)
+
+    if args.latest:
+        if not args.kind:
+            raise RuntimeError("--latest requires --kind")
+        print(latest_file(args.kind, args.latest, args.runs_root) or "")
+        return
+    print(json.dumps(runs(args.kind, args.runs_root)[: args.limit], ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -35,6 +35,28 @@ def main():
     run([sys.executable, str(S / "run_client_slug_regression_test.py")])
     run([sys.executable, str(S / "run_xlsx_demo_tests.py")])
     run([sys.executable, str(S / "run_pdf_ocr_demo_tests.py")])
+    run([sys.executable, str(S / "run_stage_cache_demo_tests.py")])
+    run([sys.executable, str(S / "run_stage_mode_demo_tests.py")])
+    run([sys.executable, str(S / "run_import_parallel_demo_tests.py")])
+    run([sys.executable, str(S / "run_run_registry_demo_tests.py")])
+    run([sys.executable, str(S / "run_delta_import_demo_tests.py")])
+    run([sys.executable, str(S / "run_incremental_sourcing_demo_tests.py")])
+    run([sys.executable, str(S / "run_recipe_cost_batch_demo_tests.py")])
+    run([sys.executable, str(S / "run_event_purchase_demo_tests.py")])
+    run([sys.executable, str(S / "run_demand_sourcing_demo_tests.py")])
+    run([sys.executable, str(S / "run_basket_demo_tests.py")])
+    run([sys.executable, str(S / "run_preset_compare_demo_tests.py")])
+    run([sys.executable, str(S / "run_price_history_demo_tests.py")])
+    run([sys.executable, str(S / "run_price_anomaly_demo_tests.py")])
+    run([sys.executable, str(S / "run_impact_index_demo_tests.py")])
+    run([sys.executable, str(S / "run_requote_library_demo_tests.py")])
+    run([sys.executable, str(S / "run_scenarios_demo_tests.py")])
+    run([sys.executable, str(S / "run_quote_curve_demo_tests.py")])
+    run([sys.executable, str(S / "run_alias_match_demo_tests.py")])
+    run([sys.executable, str(S / "run_lookup_index_demo_tests.py")])
+    run([sys.executable, str(S / "run_bootstrap_mapping_demo_tests.py")])
+    run([sys.executable, str(S / "run_log_index_demo_tests.py")])
+    run([sys.executable, str(S / "run_suggestion_ranker_demo_tests.py")])
     run([sys.executable, str(S / "run_onboarding_fixture_tests.py"), "--supplier-id", "demo_supplier_kappa"])
     run([sys.executable, str(S / "run_proposal_search_demo_tests.py")])
     run([sys.executable, str(S / "run_open_result_demo_tests.py")])
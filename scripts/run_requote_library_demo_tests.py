@@ -0,0 +1,151 @@
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def recipe(rid, lines):
+    return {
+        "recipe_id": rid,
+        "name": rid,
+        "tier": "standard",
+        "portions": 10,
+        "ingredients": [
+            {"line_id": f"L{i}", "product_id": pid, "gross_qty": grams, "unit": "g", "yield_pct": 100, "waste_pct": 0}
+            for i, (pid, grams) in enumerate(lines, start=1)
+        ],
+    }
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "requote_library_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+    props = out / "proposals"
+    cache = out / "requote_cache.json"
+
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+
+    def raw_offers(name, potato):
+        rows = [
+            {"offer_id": f"OFF-RQL-{sku}", "supplier": "Alios", "supplier_sku": sku, "product_name": pname, "category": "Λαχανικά",
+             "tier": "standard", "pack_size": 1, "pack_unit": "kg", "price": price, "price_per_base_unit": price, "captured_at": cap, "in_stock": True}
+            for sku, pname, price in [("AL-POT", "patates kyprou", potato), ("AL-TOM", "ντομάτες εγχώριες", 1.5)]
+        ]
+        return write(out / name, rows)
+
+    raw_path = raw_offers("raw_offers.json", 0.8)
+    base_req = json.loads((ROOT / "data" / "sample_proposal_request.json").read_text(encoding="utf-8"))
+
+    # three filings: potato+tomato, tomato only, and a legacy one whose cost breakdown was never kept
+    filed = []
+    for i, (lines, client, date) in enumerate([
+        ([("PROD-POTATO-STD", 2000), ("PROD-TOMATO-STD", 1000)], "Requote Alpha", "2026-05-10"),
+        ([("PROD-TOMATO-STD", 500)], "Requote Beta", "2026-05-11"),
+        ([("PROD-TOMATO-STD", 800)], "Requote Legacy", "2026-05-12"),
+    ], start=1):
+        req = json.loads(json.dumps(base_req))
+        req["proposal_id"] = f"PROP-RQL-{i}"
+        req["client"]["name"] = client
+        req["event"]["date"] = date
+        rp = write(out / f"recipe_{i}.json", recipe(f"REC-RQL-{i}", lines))
+        d = pipeline(
+            "offer", "--template-type", "A", "--raw", raw_path, "--recipe", rp, "--request", write(out / f"request_{i}.json", req),
+            "--file-proposal", "--proposals-root", str(props), "--impact-index", str(out / "impact_index.json"), "--no-history",
+        )
+        sm = summary_map(d)
+        assert sm.get("filing_status") == "FILED", sm
+        filed.append(d)
+    legacy = json.loads((filed[2] / "proposal_filing.json").read_text(encoding="utf-8"))["target_dir"]
+    for p in Path(legacy).glob("cost_breakdown*.json"):
+        p.unlink()
+
+    offers, decisions = str(filed[0] / "offers_mapped.json"), str(filed[0] / "decisions.json")
+
+    # first pass: everything is re-quoted; prices have not moved so nothing erodes
+    d1 = pipeline("requote-library", "--proposals-root", str(props), "--reindex", "--offers", offers, "--decisions", decisions,
+                  "--cache", str(cache), "--workers", "1")
+    sm = summary_map(d1)
+    assert (sm["proposals"], sm["requoted"], sm["cached"], sm["skipped_no_cost"], sm["eroding"]) == ("2", "2", "0", "1", "0"), sm
+    rep = json.loads((d1 / "requote_library.json").read_text(encoding="utf-8"))
+    for r in rep["proposals"]:
+        assert r["cost_delta"] == 0 and r["gross_delta"] == 0 and r["price_per_person_delta"] == 0, r
+
+    # nightly rerun with unchanged prices touches nothing
+    d2 = pipeline("requote-library", "--proposals-root", str(props), "--offers", offers, "--decisions", decisions, "--cache", str(cache))
+    sm = summary_map(d2)
+    assert (sm["requoted"], sm["cached"]) == ("0", "2"), sm
+
+    # potato 0.8 -> 1.6 EUR/kg: only the filing that uses potato is re-quoted
+    pr = pipeline("prices", "--raw", raw_offers("raw_offers_up.json", 1.6), "--no-history", "--no-cache")
+    d3 = pipeline("requote-library", "--proposals-root", str(props), "--offers", str(pr / "offers_mapped.json"),
+                  "--decisions", str(pr / "decisions.json"), "--cache", str(cache), "--workers", "2")
+    sm = summary_map(d3)
+    assert (sm["requoted"], sm["cached"], sm["eroding"], sm["margin_erosion_total"]) == ("1", "1", "1", "1.6"), sm
+    rep = json.loads((d3 / "requote_library.json").read_text(encoding="utf-8"))
+    top = rep["proposals"][0]
+    assert top["proposal_id"] == "PROP-RQL-1" and not top["cached"] and top["cost_delta"] == 1.6, top
+    assert [x["product_id"] for x in top["lines_moved"]] == ["PROD-POTATO-STD"], top
+    assert rep["proposals"][1]["cached"] and rep["proposals"][1]["cost_delta"] == 0, rep["proposals"][1]
+
+    # the re-quote matches the payload generator on the re-costed breakdown
+    cost = json.loads((filed[0] / "cost_breakdown.json").read_text(encoding="utf-8"))
+    cost["total_cost"] = round(cost["total_cost"] + 1.6, 4)
+    run([
+        sys.executable, str(S / "generate_proposal_payload.py"),
+        "--request", str(out / "request_1.json"),
+        "--cost", write(out / "cost_requote.json", cost),
+        "--out", str(out / "payload_requote.json"),
+        "--validation-out", str(out / "validation_requote.json"),
+        "--issues-out", str(out / "issues_requote.json"),
+    ])
+    requote = json.loads((out / "payload_requote.json").read_text(encoding="utf-8"))["pricing"]
+    filed_pricing = json.loads((filed[0] / "proposal_payload.json").read_text(encoding="utf-8"))["pricing"]
+    assert top["gross_total_requote"] == requote["gross_total"] and top["price_per_person_requote"] == requote["price_per_person"], (top, requote)
+    assert top["gross_delta"] == round(requote["gross_total"] - filed_pricing["gross_total"], 2), top
+    assert top["margin_erosion_pct"] > 0 and top["margin_pct_now"] < top["margin_pct_filed"], top
+
+    # parallel and sequential runs agree
+    seq = json.loads(run([sys.executable, str(S / "requote_library.py"), "--index", str(props / "index" / "proposals_index.json"),
+                          "--proposals-root", str(props), "--offers", str(pr / "offers_mapped.json"), "--decisions", str(pr / "decisions.json"),
+                          "--cache", str(out / "cache_seq.json"), "--no-cache", "--out", str(out / "seq.json")]))
+    assert seq["requoted"] == 2 and seq["margin_erosion_total"] == 1.6, seq
+    strip = lambda rows: [{k: v for k, v in r.items() if k != "cached"} for r in rows]
+    assert strip(json.loads((out / "seq.json").read_text(encoding="utf-8"))["proposals"]) == strip(rep["proposals"])
+
+    print("REQUOTE_LIBRARY_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+STATS = ROOT / "runs" / "phase30-demo" / "run_registry_demo" / "price_stats"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def main():
+    # 1) pipeline runs register themselves; latest lookup returns the newest run's artifact
+    imp_dir = Path(run([
+        sys.executable,
+        str(S / "run_pipeline.py"),
+        "import",
+        "--ocr-input",
+        str(ROOT / "data" / "imports" / "ocr_fixtures" / "4fsa_v1_complete.json"),
+        "--ocr-profile",
+        str(ROOT / "suppliers" / "4fsa.json"),
+        "--anomaly-stats-dir",
+        str(STATS),
+    ]).splitlines()[-1])
+    latest = run([sys.executable, str(S / "run_registry.py"), "--kind", "prices", "--latest", "raw_merged.json"])
+    if Path(latest) != imp_dir / "raw_merged.json":
+        raise AssertionError(f"Expected registry latest={imp_dir / 'raw_merged.json'}, got {latest}")
+    rows = json.loads(run([sys.executable, str(S / "run_registry.py"), "--kind", "prices", "--limit", "1"]))
+    if not rows or rows[0].get("status") != "DONE" or "raw_merged.json" not in rows[0].get("artifacts", []):
+        raise AssertionError("Expected finished prices run with artifacts in registry")
+    # only the files the import read are hashed: the default csv/xlsx/pdf profiles of an ocr-only import are not
+    if sorted(rows[0].get("inputs", {})) != ["ocr_input", "ocr_profile"]:
+        raise AssertionError(f"Expected only the ocr input and profile hashed, got {sorted(rows[0].get('inputs', {}))}")
+
+    # 2) pre-existing run dirs are backfilled oldest-first; missing artifacts fall back to older runs
+    root = ROOT / "runs" / "phase30-demo" / "run_registry_demo"
+    if root.exists():
+        shutil.rmtree(root)
+    old = root / "20260101-000000" / "prices"
+    new = root / "20260102-000000" / "prices"
+    for i, d in enumerate([old, new]):
+        d.mkdir(parents=True)
+        (d / "decisions.json").write_text("[]", encoding="utf-8")
+        os.utime(d, (1_700_000_000 + i, 1_700_000_000 + i))
+    got = run([sys.executable, str(S / "run_registry.py"), "--runs-root", str(root), "--kind", "prices", "--latest", "decisions.json"])
+    if Path(got) != new / "decisions.json":
+        raise AssertionError(f"Expected newest backfilled run, got {got}")
+    (new / "decisions.json").unlink()
+    got = run([sys.executable, str(S / "run_registry.py"), "--runs-root", str(root), "--kind", "prices", "--latest", "decisions.json"])
+    if Path(got) != old / "decisions.json":
+        raise AssertionError(f"Expected fallback to older run, got {got}")
+
+    print("RUN_REGISTRY_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def recipe(rid, lines):
+    return {
+        "recipe_id": rid,
+        "name": rid,
+        "tier": "standard",
+        "portions": 10,
+        "ingredients": [
+            {"line_id": f"L{i}", "product_id": pid, "gross_qty": grams, "unit": "g", "yield_pct": 100, "waste_pct": 0}
+            for i, (pid, grams) in enumerate(lines, start=1)
+        ],
+    }
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "scenarios_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    raw = [
+        {"offer_id": f"OFF-SCN-{sku}", "supplier": sup, "supplier_sku": sku, "product_name": name, "category": cat,
+         "tier": "standard", "pack_size": 1, "pack_unit": "kg", "price": price, "price_per_base_unit": price, "captured_at": cap, "in_stock": True}
+        for sup, sku, name, cat, price in [
+            ("Alios", "AL-POT", "patates kyprou", "Λαχανικά", 0.8),
+            ("Alios", "AL-TOM", "ντομάτες εγχώριες", "Λαχανικά", 1.5),
+            ("TheMart", "TM-MOZ", "mozzarella 1kg", "Γαλακτοκομικά", 8.0),
+        ]
+    ]
+    prices_dir = pipeline("prices", "--raw", write(out / "raw_offers.json", raw), "--no-history", "--no-cache")
+    offers, decisions = str(prices_dir / "offers_mapped.json"), str(prices_dir / "decisions.json")
+    recipes = write(out / "recipes.json", [
+        recipe("REC-SCN-1", [("PROD-POTATO-STD", 2000), ("PROD-MOZZARELLA-STD", 500)]),
+        recipe("REC-SCN-2", [("PROD-TOMATO-STD", 1000)]),
+    ])
+
+    # named scenario: dairy +15%, produce -5%, Alios +8% (produce from Alios moves by 0.95 * 1.08)
+    shock = "category:Γαλακτοκομικά=+15,category:Λαχανικά=-5,supplier:Alios=+8"
+    d = pipeline("scenarios", "--recipes-mapped", recipes, "--offers", offers, "--decisions", decisions, "--shock", shock)
+    sm = summary_map(d)
+    assert (sm["recipes"], sm["scenarios"], sm["named_scenarios"], sm["selectors"]) == ("2", "1", "1", "3"), sm
+    rep = json.loads((d / "scenarios.json").read_text(encoding="utf-8"))
+    named = rep["named_scenarios"][0]["per_portion"]
+    assert named == {"REC-SCN-1": 0.62416, "REC-SCN-2": 0.1539}, named
+
+    # same numbers as costing against the shocked offers
+    factor = {"OFF-SCN-AL-POT": 0.95 * 1.08, "OFF-SCN-AL-TOM": 0.95 * 1.08, "OFF-SCN-TM-MOZ": 1.15}
+    shocked = json.loads(Path(offers).read_text(encoding="utf-8"))
+    for o in shocked:
+        o["price_per_base_unit"] = o["price_per_base_unit"] * factor[o["offer_id"]]
+    shocked_path = write(out / "offers_shocked.json", shocked)
+    for i, rid in enumerate(["REC-SCN-1", "REC-SCN-2"]):
+        one = write(out / f"recipe_{rid}.json", json.loads(Path(recipes).read_text(encoding="utf-8"))[i])
+        c = pipeline("cost", "--recipe", one, "--offers", shocked_path, "--decisions", decisions)
+        cost = json.loads((c / "cost_breakdown.json").read_text(encoding="utf-8"))
+        assert round(cost["per_portion"], 6) == named[rid], (rid, cost["per_portion"], named)
+
+    # random draws: the distribution stays inside the shock bounds and is reproducible from the seed
+    scen_file = write(out / "scenarios.json", {
+        "scenarios": [{"name": "produce-spike", "shocks": "category:Λαχανικά=+20"}],
+        "random": {"n": 2000, "seed": 7, "ranges": ["category:Λαχανικά=-5..15", {"field": "supplier", "value": "TheMart", "min": 0, "max": 10}]},
+    })
+    d1 = pipeline("scenarios", "--recipes-mapped", recipes, "--offers", offers, "--decisions", decisions, "--scenarios", scen_file)
+    d2 = pipeline("scenarios", "--recipes-mapped", recipes, "--offers", offers, "--decisions", decisions, "--scenarios", scen_file)
+    r1 = json.loads((d1 / "scenarios.json").read_text(encoding="utf-8"))
+    r2 = json.loads((d2 / "scenarios.json").read_text(encoding="utf-8"))
+    assert r1["scenarios"] == 2001 and r1["random_scenarios"] == 2000, r1["scenarios"]
+    assert r1["recipes"] == r2["recipes"]
+    tom = {r["recipe_id"]: r for r in r1["recipes"]}["REC-SCN-2"]
+    assert 0.1425 <= tom["min"] <= tom["p5"] <= tom["p50"] <= tom["p95"] <= 0.1725 < tom["max"] == 0.18, tom
+    assert tom["worst_scenario"] == "produce-spike" and tom["worst_delta_pct"] == 20.0, tom
+
+    # scale: 100 recipes x 5000 scenarios evaluate well under a second
+    big = [recipe(f"REC-SCN-B{i}", [("PROD-POTATO-STD", 100 + i), ("PROD-TOMATO-STD", 50 + 2 * i), ("PROD-MOZZARELLA-STD", 10 + i % 40)])
+           for i in range(100)]
+    d = pipeline("scenarios", "--recipes-mapped", write(out / "recipes_big.json", big), "--offers", offers, "--decisions", decisions,
+                 "--range", "category:Λαχανικά=-10..20", "--range", "supplier:TheMart=-5..5", "--range", "product_id:PROD-TOMATO-STD=0..30",
+                 "--random", "5000", "--seed", "1")
+    sm = summary_map(d)
+    assert (sm["recipes"], sm["scenarios"]) == ("100", "5000"), sm
+    assert float(sm["eval_ms"]) < 500, sm
+
+    print("SCENARIOS_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def summary_map(run_dir: Path):
+    out = {}
+    for ln in (run_dir / "run_summary.txt").read_text(encoding="utf-8").splitlines():
+        if "=" in ln:
+            k, v = ln.split("=", 1)
+            out[k] = v
+    return out
+
+
+def pipeline(*args):
+    return Path(run([sys.executable, str(S / "run_pipeline.py")] + list(args)).splitlines()[-1].strip())
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def counters():
+    rows = json.loads((pipeline("cache", "stats", "--no-reply") / "cache_stats.json").read_text(encoding="utf-8"))
+    r = {r["stage"]: r for r in rows}.get("prices_chain", {})
+    return {k: r.get(k, 0) for k in ("entries", "hits", "misses", "stores")}
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "stage_cache_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    now = datetime.now(timezone.utc)
+    cap = (now - timedelta(days=1)).isoformat()
+
+    def row(sku, name, price, **extra):
+        return {"offer_id": f"OFF-SC-{sku}", "supplier": "Alios", "supplier_sku": sku, "product_name": name, "category": "Λαχανικά", "tier": "standard",
+                "pack_size": 1, "pack_unit": "kg", "price": price, "price_per_base_unit": price, "captured_at": cap, "in_stock": True, **extra}
+
+    raw = write(out / "raw_offers.json", [row("SC-POT", "patates kyprou", 0.8), row("SC-TOM", "ντομάτες εγχώριες", 1.5)])
+
+    pipeline("cache", "clear", "--no-reply")
+    assert counters() == {"entries": 0, "hits": 0, "misses": 0, "stores": 0}
+
+    # miss, then a byte-identical hit
+    p1 = pipeline("prices", "--raw", raw, "--no-history")
+    p2 = pipeline("prices", "--raw", raw, "--no-history")
+    assert (summary_map(p1)["stage_cache"], summary_map(p2)["stage_cache"]) == ("miss", "hit")
+    for name in ("offers_mapped.json", "decisions.json", "needs_review.json"):
+        assert (p1 / name).read_bytes() == (p2 / name).read_bytes(), name
+    c = counters()
+    assert (c["entries"], c["hits"], c["misses"], c["stores"]) == (1, 1, 1, 1), c
+    assert summary_map(pipeline("prices", "--raw", raw, "--no-history", "--no-cache"))["stage_cache"] == "off"
+
+    # offer writes the sourcing issues under its own name, on both store and hit
+    request = write(out / "request.json", json.loads((ROOT / "data" / "sample_proposal_request.json").read_text(encoding="utf-8")))
+    recipe = write(out / "recipe.json", {"recipe_id": "REC-SC-1", "name": "REC-SC-1", "tier": "standard", "portions": 10, "ingredients": [
+        {"line_id": "L1", "product_id": "PROD-POTATO-STD", "gross_qty": 2000, "unit": "g", "yield_pct": 100, "waste_pct": 0}]})
+    offer = ("offer", "--template-type", "A", "--raw", raw, "--recipe", recipe, "--request", request, "--no-history")
+    o1 = summary_map(pipeline(*offer))
+    o2d = pipeline(*offer)
+    o2 = summary_map(o2d)
+    assert o1["stage_cache"] in ("miss", "hit") and o2["stage_cache"] == "hit", (o1, o2)
+    assert (o2d / "sourcing_issues.json").exists() and not (o2d / "issues.json").exists()
+
+    # an entry expires at the earliest valid_until of the mapped offers
+    soon = now + timedelta(seconds=6)
+    raw_exp = write(out / "raw_expiring.json", [row("SC-POT", "patates kyprou", 0.8, valid_until=soon.isoformat())])
+    assert summary_map(pipeline("prices", "--raw", raw_exp, "--no-history"))["stage_cache"] == "miss"
+    entries = [json.loads(m.read_text(encoding="utf-8")) for m in (ROOT / "state" / "stage_cache" / "prices_chain").glob("*/meta.json")]
+    assert any(e["expires_at"] == soon.isoformat() for e in entries), [e["expires_at"] for e in entries]
+    assert summary_map(pipeline("prices", "--raw", raw_exp, "--no-history"))["stage_cache"] == "hit"
+    time.sleep(max(0.0, (soon - datetime.now(timezone.utc)).total_seconds()) + 0.5)
+    assert summary_map(pipeline("prices", "--raw", raw_exp, "--no-history"))["stage_cache"] == "miss"
+
+    # clear --expired-only keeps live entries; clear drops everything and resets the counters
+    live = counters()["entries"]
+    reply = run([sys.executable, str(S / "run_pipeline.py"), "cache", "clear", "--expired-only"])
+    assert reply.startswith("cache clear: removed=0 expired_only=true"), reply
+    assert counters()["entries"] == live
+    reply = run([sys.executable, str(S / "run_pipeline.py"), "cache", "clear"])
+    assert reply.startswith(f"cache clear: removed={live} expired_only=false"), reply
+    assert counters() == {"entries": 0, "hits": 0, "misses": 0, "stores": 0}
+
+    # concurrent runs never lose a counter increment
+    root = out / "cache_root"
+    bump = "import sys; sys.path.insert(0, sys.argv[1]); import stage_cache\nfor _ in range(200): stage_cache._bump('demo', 'hits', sys.argv[2])"
+    procs = [subprocess.Popen([sys.executable, "-c", bump, str(S), str(root)]) for _ in range(6)]
+    assert all(p.wait() == 0 for p in procs)
+    (root / "demo").mkdir()
+    rows = json.loads(run([sys.executable, str(S / "stage_cache.py"), "stats", "--cache-root", str(root)]))
+    assert rows == [{"stage": "demo", "entries": 0, "expired": 0, "bytes": 0, "hits": 1200, "misses": 0, "stores": 0}], rows
+
+    print("STAGE_CACHE_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd, env=None):
+    r = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def comparable(path: Path):
+    rows = json.loads(path.read_text(encoding="utf-8"))
+    return [{k: v for k, v in r.items() if k != "decision_ts"} for r in rows]
+
+
+# runs one stage through run_pipeline.run() under the given EVOCHIA_STAGE_MODE; prints {"ok", "stdout" | "error"}
+PROBE = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import run_pipeline
+try:
+    print(json.dumps({"ok": True, "stdout": run_pipeline.run([sys.executable] + sys.argv[2:])}))
+except RuntimeError as e:
+    print(json.dumps({"ok": False, "error": str(e)}))
+"""
+
+
+def probe(mode, *cmd):
+    env = {**os.environ, "EVOCHIA_STAGE_MODE": mode}
+    return json.loads(run([sys.executable, "-c", PROBE, str(S)] + [str(x) for x in cmd], env=env).splitlines()[-1])
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "stage_mode_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    cap = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    raw = write(out / "raw_offers.json", [
+        {"offer_id": f"OFF-SM-{i}", "supplier": "Alios", "supplier_sku": f"SM-{i}", "product_name": name, "category": "Λαχανικά", "tier": "standard",
+         "pack_size": 1, "pack_unit": "kg", "price": price, "price_per_base_unit": price, "captured_at": cap, "in_stock": True}
+        for i, (name, price) in enumerate([("patates kyprou", 0.8), ("ντομάτες εγχώριες", 1.5), ("xyz widget", 2.0)], start=1)
+    ])
+
+    # one stage, both modes: same stdout, same artifacts
+    results = {}
+    for mode in ("inprocess", "subprocess"):
+        d = out / mode
+        d.mkdir()
+        res = probe(mode, S / "map_offers.py", "--raw", raw, "--catalog", ROOT / "data" / "catalog.json",
+                    "--out", d / "mapped.json", "--needs-review", d / "needs_review.json")
+        assert res["ok"], res
+        results[mode] = res["stdout"]
+    assert results["inprocess"] == results["subprocess"] and json.loads(results["inprocess"])["total"] == 3, results
+    for name in ("mapped.json", "needs_review.json"):
+        assert (out / "inprocess" / name).read_bytes() == (out / "subprocess" / name).read_bytes(), name
+
+    # a failing stage (argparse exit 2) fails the same way, with the stage's stderr in the error
+    for mode in ("inprocess", "subprocess"):
+        res = probe(mode, S / "map_offers.py", "--raw", raw)
+        assert not res["ok"] and "the following arguments are required" in res["error"], (mode, res)
+    # an exception inside a stage is reported, not swallowed
+    for mode in ("inprocess", "subprocess"):
+        res = probe(mode, S / "map_offers.py", "--raw", write(out / "broken.json", {"not": "a list"}), "--catalog", ROOT / "data" / "catalog.json",
+                    "--out", out / "x.json", "--needs-review", out / "y.json")
+        assert not res["ok"] and "Traceback" in res["error"], (mode, res)
+
+    # a whole prices run gives the same result either way
+    runs = {}
+    for mode in ("inprocess", "subprocess"):
+        env = {**os.environ, "EVOCHIA_STAGE_MODE": mode}
+        runs[mode] = Path(run([sys.executable, str(S / "run_pipeline.py"), "prices", "--raw", raw, "--no-history", "--no-cache"], env=env).splitlines()[-1])
+    for name in ("offers_mapped.json", "needs_review.json", "issues.json"):
+        assert (runs["inprocess"] / name).read_bytes() == (runs["subprocess"] / name).read_bytes(), name
+    assert comparable(runs["inprocess"] / "decisions.json") == comparable(runs["subprocess"] / "decisions.json")
+
+    # main(argv) in-process reads its own argv, not the parent's: --no-reply wins over the defaults file's reply=true
+    defaults = write(out / "daily_defaults.json", {"sources": {}, "flags": {"reply": True, "reindex_proposals": False, "run_health_checks": False}})
+    call = ("import sys; sys.path.insert(0, sys.argv[1]); sys.argv = ['run_pipeline.py']; import run_pipeline; "
+            "run_pipeline.main(['daily-refresh', '--defaults', sys.argv[-1], '--sources', 'no_such_source', '--no-preflight', '--no-reply'])")
+    printed = run([sys.executable, "-c", call, str(S), defaults]).splitlines()[-1]
+    assert Path(printed).is_dir() and Path(printed).name == "daily_refresh", printed
+    call = call.replace("'--no-reply'", "'--no-preflight'")
+    printed = run([sys.executable, "-c", call, str(S), defaults])
+    assert printed.startswith("Daily refresh "), printed
+
+    print("STAGE_MODE_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import csv
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+S = ROOT / "scripts"
+
+
+def run(cmd):
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
+    return r.stdout.strip()
+
+
+def write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def append(path: Path, rows):
+    with path.open("a", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+
+def csv_rows(path: Path):
+    with path.open("r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def ago(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+
+def decision(sku_key, pid, days, raw_desc=None, code="REVIEW-SKU-MAP-PERSISTED"):
+    rec = {"severity": "INFO", "code": code, "sku_key": sku_key, "product_id": pid, "supplier_id": "nova", "ts": ago(days)}
+    if raw_desc:
+        rec["raw_desc"] = raw_desc
+    return rec
+
+
+def main():
+    out = ROOT / "runs" / "phase30-demo" / "suggestion_ranker_demo"
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    audit = out / "mapping_persist_log.jsonl"
+    aliases = out / "catalog_aliases.jsonl"
+    sku_dir = out / "supplier_sku_map"
+    sku_dir.mkdir()
+    recipe_aliases = write(out / "recipe_aliases.json", {"μελιτζανες φλασκες βιο": "PROD-EGGPLANT-STD"})
+    write(sku_dir / "nova.json", {"Nova::NV-50": "PROD-SPINACH-STD"})
+
+    append(audit, [
+        decision("Nova::NV-1", "PROD-POTATO-STD", 5, "ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 10kg"),
+        decision("Nova::NV-2", "PROD-POTATO-STD", 20, "Πατάτες Κύπρου 5kg"),
+        decision("Nova::NV-3", "PROD-POTATO-STD", 30, "patates kyprou", code="BOOTSTRAP-SKU-MAP-PERSISTED"),
+        # red was chosen more often, but long ago; yellow is the recent habit
+        *[decision(f"Nova::NV-R{i}", "PROD-ONION-RED-STD", 400, "κρεμμύδια ξερά") for i in range(3)],
+        *[decision(f"Nova::NV-Y{i}", "PROD-ONION-YELLOW-STD", 10, "κρεμμύδια ξερά") for i in range(2)],
+        # entries written before raw_desc was recorded still count for their SKU
+        decision("Nova::NV-9", "PROD-TOMATO-STD", 15),
+        # conflicts are not choices
+        {"severity": "BLOCK", "code": "REVIEW-SKU-MAP-CONFLICT", "sku_key": "Nova::NV-9", "existing_product_id": "PROD-TOMATO-STD",
+         "new_product_id": "PROD-ONION-RED-STD", "ts": ago(1)},
+    ])
+    append(aliases, [{"ts": ago(3), "supplier_id": "nova", "supplier_sku": "NV-40", "raw_desc": "Σπανάκι baby", "product_id": "PROD-SPINACH-STD"}])
+    ranker_dir = out / "ranker"
+
+    def rank(*extra):
+        return json.loads(run([sys.executable, str(S / "suggestion_ranker.py"), "--audit-log", str(audit), "--alias-log", str(aliases),
+                               "--sku-map-dir", str(sku_dir), "--recipe-aliases", recipe_aliases, "--ranker-dir", str(ranker_dir)] + list(extra)))
+
+    r = rank("--name", "Πατάτες Κύπρου", "--name", "κρεμμυδια ξερα 10kg", "--name", "Σπανακι baby", "--name", "patates kiprou")
+    assert r["learned"] == 11 and r["static_changed"], r
+    pot = r["ranked"]["Πατάτες Κύπρου"][0]
+    assert (pot["product_id"], pot["n"], pot["via"]) == ("PROD-POTATO-STD", 3, "desc"), pot
+    assert [x["product_id"] for x in r["ranked"]["κρεμμυδια ξερα 10kg"]] == ["PROD-ONION-YELLOW-STD", "PROD-ONION-RED-STD"], r["ranked"]
+    assert r["ranked"]["Σπανακι baby"][0]["product_id"] == "PROD-SPINACH-STD", r["ranked"]
+    assert r["ranked"]["patates kiprou"][0]["via"] == "similar", r["ranked"]["patates kiprou"]
+
+    tom = rank("--name", "unseen", "--sku", "Nova::NV-9")["ranked"]["unseen"]
+    assert [(x["product_id"], x["n"], x["via"]) for x in tom] == [("PROD-TOMATO-STD", 1, "sku")], tom
+    spin = rank("--name", "unseen", "--sku", "Nova::NV-50")["ranked"]["unseen"]
+    assert spin[0]["product_id"] == "PROD-SPINACH-STD" and spin[0]["last"] is None, spin
+
+    # the index is updated incrementally: nothing new, then only the appended records
+    r = rank()
+    assert r["learned"] == 0 and not r["relearned"] and not r["static_changed"], r
+    append(audit, [decision("Nova::NV-Y9", "PROD-ONION-YELLOW-STD", 0, "κρεμμύδια ξερά")])
+    r = rank("--name", "κρεμμύδια ξερά")
+    assert r["learned"] == 1 and not r["relearned"] and r["ranked"]["κρεμμύδια ξερά"][0]["n"] == 3, r
+
+    # a rewritten log is relearned from scratch; SKU map edits are picked up on the next load
+    lines = audit.read_text(encoding="utf-8").splitlines(keepends=True)
+    audit.write_text("".join(lines[:3]), encoding="utf-8")
+    r = rank("--name", "κρεμμύδια ξερά")
+    assert r["relearned"] and r["learned"] == 4 and r["ranked"]["κρεμμύδια ξερά"] == [], r
+    write(sku_dir / "nova.json", {"Nova::NV-50": "PROD-SPINACH-STD", "Nova::NV-51": "PROD-TOMATO-STD"})
+    r = rank("--sku", "Nova::NV-51")
+    assert r["static_changed"] and r["ranked"][""][0]["product_id"] == "PROD-TOMATO-STD", r
+
+    # review skeleton: the history pick is its own column and matching suggestions say how often they were chosen
+    raw = write(out / "raw.json", [
+        {"offer_id": "OFF-SR-1", "supplier": "Nova", "supplier_sku": "NV-60", "product_name": "ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 25kg", "pack_size": 25, "pack_unit": "kg", "price": 12.0},
+        {"offer_id": "OFF-SR-2", "supplier": "Nova", "supplier_sku": "NV-61", "product_name": "xyz widget", "pack_size": 1, "pack_unit": "pcs", "price": 2.0},
+    ])
+    needs = write(out / "needs.json", [{"offer_id": o, "supplier": "Nova", "supplier_sku": s, "product_name": n, "reason": "unmapped"}
+                                       for o, s, n in (("OFF-SR-1", "NV-60", "ΠΑΤΑΤΕΣ ΚΥΠΡΟΥ 25kg"), ("OFF-SR-2", "NV-61", "xyz widget"))])
+    sku_map = out / "nova_review.json"
+
+    def review(tag, *extra):
+        d = out / tag
+        d.mkdir()
+        run([sys.executable, str(S / "review_needs.py"), "--needs-review", needs, "--raw", raw, "--price-quotes", raw,
+             "--out-price-quotes", str(d / "price_quotes.json"), "--out-needs-review", str(d / "needs_review.json"),
+             "--out-issues", str(d / "issues.json"), "--mapping-patch-out", str(d / "patch.json"), "--summary-out", str(d / "summary.json"),
+             "--export-csv-skeleton", str(d / "skeleton.csv"), "--audit-log", str(audit), "--catalog-aliases", str(aliases),
+             "--supplier-id", "nova", "--sku-map", str(sku_map), "--unit-rules", str(out / "nova_unit_rules.json")] + list(extra))
+        return {x["needs_review_id"]: x for x in csv_rows(d / "skeleton.csv")}
+
+    rows = review("review1")
+    assert rows["OFF-SR-1"]["history_suggestion"].startswith("PROD-POTATO-STD | 3x | "), rows["OFF-SR-1"]
+    assert rows["OFF-SR-1"]["suggestion_1"].startswith("PROD-POTATO-STD | ") and rows["OFF-SR-1"]["suggestion_1"].endswith(" | chosen 3x"), rows["OFF-SR-1"]
+    assert rows["OFF-SR-2"]["history_suggestion"] == "", rows["OFF-SR-2"]
+
+    # a confirmed row is logged with its description and counts in the next round
+    patch = write(out / "patch.json", {"OFF-SR-2": {"product_id": "PROD-SPINACH-STD", "pack_unit": "pcs", "pack_size": 1, "price": 2.0, "persist_mode": "sku_map"}})
+    review("review2", "--patch", patch)
+    assert json.loads(audit.read_text(encoding="utf-8").splitlines()[-1])["raw_desc"] == "xyz widget"
+    rows = review("review3")
+    assert rows["OFF-SR-2"]["history_suggestion"].startswith("PROD-SPINACH-STD | 1x | "), rows["OFF-SR-2"]
+
+    # recipe ingredient review ranks against the recipe alias file it persists to
+    recipes = write(out / "recipes.json", [{"recipe_id": "REC-SR-1", "portions": 10, "ingredients": [
+        {"line_id": "L1", "product_id": None, "raw_ingredient": "Μελιτζάνες φλάσκες βιο", "gross_qty": 500, "unit": "g"}]}])
+    d = out / "recipe"
+    d.mkdir()
+    run([sys.executable, str(S / "review_recipe_ingredients.py"), "--recipes", recipes, "--catalog-aliases", recipe_aliases,
+         "--export-csv-skeleton", str(d / "skeleton.csv"), "--out-mapped", str(d / "mapped.json"), "--out-needs", str(d / "needs.json"),
+         "--out-issues", str(d / "issues.json"), "--out-summary", str(d / "summary.json")])
+    row = csv_rows(d / "skeleton.csv")
+    assert row and row[0]["history_suggestion"].startswith("PROD-EGGPLANT-STD | 1x | undated"), row
+
+    print("SUGGESTION_RANKER_DEMO_PASS")
+
+
+if __name__ == "__main__":
+    main()
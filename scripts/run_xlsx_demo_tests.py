@@ -1,10 +1,17 @@
 import json
 import subprocess
 import sys
+import xml.etree.ElementTree as ET
+import zipfile
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 S = ROOT / "scripts"
+sys.path.insert(0, str(S))
+
+import import_xlsx  # noqa: E402
+
+NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
 
 
 def run(cmd):
@@ -13,6 +20,58 @@ def run(cmd):
         raise RuntimeError(f"FAILED: {' '.join(cmd)}\nSTDOUT:\n{r.stdout}\nSTDERR:\n{r.stderr}")
 
 
+def full_load_rows(path: Path):
+    """The pre-streaming reader: parse the whole sheet into memory, keep non-empty rows."""
+    with zipfile.ZipFile(path, "r") as z:
+        shared = import_xlsx.parse_shared_strings(z)
+        root = ET.fromstring(z.read(import_xlsx.get_sheet_path(z)))
+    rows = []
+    for r in root.findall(".//x:sheetData/x:row", NS):
+        vals = {}
+        for c in r.findall("x:c", NS):
+            t = c.get("t")
+            v = c.find("x:v", NS)
+            if t == "inlineStr":
+                it = c.find("x:is/x:t", NS)
+                val = (it.text if it is not None else "") or ""
+            elif v is None:
+                val = ""
+            else:
+                raw = v.text or ""
+                val = (shared[int(raw)] if raw.isdigit() and int(raw) < len(shared) else "") if t == "s" else raw
+            vals[import_xlsx.col_to_idx(c.get("r"))] = val
+        if vals:
+            rows.append([vals.get(i, "") for i in range(max(vals.keys()) + 1)])
+    return rows
+
+
+def write_xlsx(path: Path, rows):
+    """Minimal one-sheet workbook with inline strings; a None row is written as an empty <row/>."""
+    def cell(ref, v):
+        if isinstance(v, (int, float)):
+            return f'<c r="{ref}"><v>{v}</v></c>'
+        return f'<c r="{ref}" t="inlineStr"><is><t>{v}</t></is></c>'
+
+    body = []
+    for n, row in enumerate(rows, start=1):
+        cells = "".join(cell(f"{chr(65 + j)}{n}", v) for j, v in enumerate(row or []) if v != "")
+        body.append(f'<row r="{n}">{cells}</row>')
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("xl/workbook.xml", '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                   'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets><sheet name="S" sheetId="1" r:id="rId1"/></sheets></workbook>')
+        z.writestr("xl/_rels/workbook.xml.rels", '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                   '<Relationship Id="rId1" Type="worksheet" Target="worksheets/sheet1.xml"/></Relationships>')
+        z.writestr("xl/worksheets/sheet1.xml", '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                   + "".join(body) + "</sheetData></worksheet>")
+
+
+def import_rows(src: Path, out: Path, tag, *extra):
+    run([sys.executable, str(S / "import_xlsx.py"), "--input", str(src), "--supplier-profile", str(ROOT / "suppliers" / "alios.json"),
+         "--captured-at", "2026-03-01T08:00:00+00:00", "--out", str(out / f"{tag}_raw.json"), "--batch-out", str(out / f"{tag}_batch.json"),
+         "--needs-review", str(out / f"{tag}_needs.json")] + list(extra))
+    return [json.loads((out / f"{tag}_{name}.json").read_text(encoding="utf-8")) for name in ("raw", "needs", "batch")]
+
+
 def main():
     out = ROOT / "runs" / "phase30-demo" / "xlsx_demo"
     out.mkdir(parents=True, exist_ok=True)
@@ -47,6 +106,44 @@ def main():
         if k not in rows[0]:
             raise AssertionError(f"Missing RawOffer key: {k}")
 
+    # streamed skip/limit windows match slices of the full in-memory parse
+    for src in sorted((ROOT / "data" / "prices" / "alios").glob("*.xlsx")):
+        full = full_load_rows(src)
+        n = len(full)
+        with zipfile.ZipFile(src, "r") as z:
+            shared = import_xlsx.parse_shared_strings(z)
+            sheet = import_xlsx.get_sheet_path(z)
+            if import_xlsx.parse_sheet_rows(z, sheet, shared) != full:
+                raise AssertionError(f"Streaming reader differs from the full load on {src.name}")
+            for skip in (0, 1, n - 1, n, n + 3):
+                for limit in (None, 0, 1, 5, n):
+                    got = list(import_xlsx.iter_sheet_rows(z, sheet, shared, skip=skip, limit=limit))
+                    want = full[skip:] if limit is None else full[skip:skip + limit]
+                    if got != want:
+                        raise AssertionError(f"{src.name} skip={skip} limit={limit}: {len(got)} rows, expected {len(want)}")
+
+    # --max-rows N gives the first N data rows of the full import; the stop rule ends the read unless --count-rows
+    header = ["ART NO", "ARTICLE", "PACKAGING", "NET_PRICE_EUR"]
+    data = [[f"A{k}", f"Item {k}", "1 KG", 2.5 + k] for k in range(1, 5)] + [None, ["A5", "", "1 KG", 9.0]] + [[f"A{k}", f"Item {k}", "1 KG", 1.0] for k in (6, 7)]
+    book = out / "stop_rule.xlsx"
+    write_xlsx(book, [header] + data)
+    if full_load_rows(book) != [header] + [[str(v) for v in r] for r in data if r]:
+        raise AssertionError("Synthetic workbook does not round-trip through the full load")
+    full_raw, full_needs, full_batch = import_rows(book, out, "full")
+    if [r["supplier_sku"] for r in full_raw] != ["A1", "A2", "A3", "A4"] or full_needs:
+        raise AssertionError(f"Expected the stop rule to end the import at the blank name: {full_raw}")
+    if full_batch["stats"]["rows_in"] != 5 or full_batch["stats"]["stopped_at_row"] != 5:
+        raise AssertionError(f"Expected rows_in=5 stopped_at_row=5 without --count-rows: {full_batch['stats']}")
+    _, _, counted = import_rows(book, out, "counted", "--count-rows")
+    if counted["stats"]["rows_in"] != 7 or counted["stats"]["stopped_at_row"] != 5:
+        raise AssertionError(f"Expected rows_in=7 with --count-rows: {counted['stats']}")
+    for max_rows in (0, 1, 3, 4, 5, 6, 50):
+        raw_n, needs_n, batch_n = import_rows(book, out, f"max{max_rows}", "--max-rows", str(max_rows))
+        if raw_n != full_raw[:max_rows] or needs_n != full_needs:
+            raise AssertionError(f"--max-rows {max_rows} differs from the full import: {raw_n}")
+        if batch_n["stats"]["rows_in"] != min(max_rows, 5):
+            raise AssertionError(f"--max-rows {max_rows}: rows_in={batch_n['stats']['rows_in']}")
+
     print("XLSX_DEMO_PASS")
 
 
@@ -25,11 +25,11 @@ def _pick(req: dict):
     return "A", "RULE_A_DEFAULT", service_type, event_style, req.get("template_hint")
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Deterministic template selector")
     p.add_argument("--request", required=True, help="proposal_request.json")
     p.add_argument("--out", required=True, help="selection output json")
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     req_path = Path(args.request)
     req = json.loads(req_path.read_text(encoding="utf-8"))
@@ -0,0 +1,194 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_ROOT = ROOT / "state" / "stage_cache"
+
+
+def parse_dt(v):
+    if not v:
+        return None
+    try:
+        return datetime.fromisoformat(str(v).replace("Z", "+00:00"))
+    except Exception:
+        return None
+
+
+def file_digest(path):
+    p = Path(path) if path else None
+    if p is None or not p.exists():
+        return None
+    return hashlib.sha1(p.read_bytes()).hexdigest()
+
+
+def dir_digest(path, pattern="*.json"):
+    d = Path(path)
+    if not d.exists():
+        return None
+    h = hashlib.sha1()
+    for f in sorted(d.glob(pattern)):
+        h.update(f.name.encode("utf-8"))
+        h.update(hashlib.sha1(f.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def cache_key(inputs: dict):
+    return hashlib.sha1(json.dumps(inputs, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _stage_dir(stage: str, key: str, root=None):
+    return Path(root or CACHE_ROOT) / stage / key
+
+
+def _bump(stage: str, field: str, root=None):
+    p = Path(root or CACHE_ROOT) / "counters.jsonl"
+    p.parent.mkdir(parents=True, exist_ok=True)
+    # one O_APPEND write per event: concurrent runs (daily-refresh --jobs) never lose or interleave an increment
+    fd = os.open(str(p), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (json.dumps({"stage": stage, "field": field}) + "\n").encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+def _counters(base: Path):
+    """stage -> {hits, misses, stores}, folded from counters.jsonl (a torn or foreign line is skipped)."""
+    out = {}
+    p = base / "counters.jsonl"
+    if not p.exists():
+        return out
+    for ln in p.read_text(encoding="utf-8").splitlines():
+        try:
+            ev = json.loads(ln)
+            row = out.setdefault(ev["stage"], {"hits": 0, "misses": 0, "stores": 0})
+            row[ev["field"]] = row.get(ev["field"], 0) + 1
+        except (ValueError, KeyError, TypeError):
+            continue
+    return out
+
+
+def lookup(stage: str, key: str, now=None, root=None):
+    """Return (meta, entry_dir) for a live entry, else None. Entries past expires_at count as misses."""
+    now = now or datetime.now(timezone.utc)
+    d = _stage_dir(stage, key, root)
+    meta_path = d / "meta.json"
+    if not meta_path.exists():
+        _bump(stage, "misses", root)
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except Exception:
+        _bump(stage, "misses", root)
+        return None
+    exp = parse_dt(meta.get("expires_at"))
+    if exp is not None and now >= exp:
+        _bump(stage, "misses", root)
+        return None
+    _bump(stage, "hits", root)
+    return meta, d
+
+
+def store(stage: str, key: str, files: dict, inputs: dict, expires_at=None, root=None):
+    """files maps artifact name -> source path; copied into the entry together with meta.json."""
+    d = _stage_dir(stage, key, root)
+    tmp = d.with_name(f"{d.name}.{os.getpid()}.tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    for name, src in files.items():
+        shutil.copyfile(src, tmp / name)
+    meta = {
+        "stage": stage,
+        "key": key,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "expires_at": expires_at.isoformat() if expires_at else None,
+        "files": sorted(files.keys()),
+        "inputs": inputs,
+    }
+    (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    if d.exists():
+        shutil.rmtree(d, ignore_errors=True)
+    try:
+        tmp.rename(d)
+    except OSError:
+        # another process stored the same key first; its entry is equivalent
+        shutil.rmtree(tmp, ignore_errors=True)
+    _bump(stage, "stores", root)
+    return d
+
+
+def stats(now=None, root=None):
+    now = now or datetime.now(timezone.utc)
+    base = Path(root or CACHE_ROOT)
+    counters = _counters(base)
+    rows = []
+    stages = sorted(p.name for p in base.iterdir() if p.is_dir()) if base.exists() else []
+    for stage in stages:
+        entries = expired = size = 0
+        for e in (base / stage).iterdir():
+            meta_path = e / "meta.json"
+            if not meta_path.exists():
+                continue
+            entries += 1
+            size += sum(f.stat().st_size for f in e.iterdir() if f.is_file())
+            try:
+                exp = parse_dt(json.loads(meta_path.read_text(encoding="utf-8")).get("expires_at"))
+            except Exception:
+                exp = None
+            if exp is not None and now >= exp:
+                expired += 1
+        c = counters.get(stage, {})
+        rows.append({
+            "stage": stage,
+            "entries": entries,
+            "expired": expired,
+            "bytes": size,
+            "hits": int(c.get("hits", 0) or 0),
+            "misses": int(c.get("misses", 0) or 0),
+            "stores": int(c.get("stores", 0) or 0),
+        })
+    return rows
+
+
+def clear(expired_only=False, now=None, root=None):
+    now = now or datetime.now(timezone.utc)
+    base = Path(root or CACHE_ROOT)
+    if not base.exists():
+        return 0
+    removed = 0
+    for stage_dir in [p for p in base.iterdir() if p.is_dir()]:
+        for e in [p for p in stage_dir.iterdir() if p.is_dir()]:
+            if expired_only:
+                try:
+                    exp = parse_dt(json.loads((e / "meta.json").read_text(encoding="utf-8")).get("expires_at"))
+                except Exception:
+                    exp = now
+                if exp is None or now < exp:
+                    continue
+            shutil.rmtree(e)
+            removed += 1
+    if not expired_only and (base / "counters.jsonl").exists():
+        (base / "counters.jsonl").unlink()
+    return removed
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Inspect or clear the content-addressed stage cache")
+    p.add_argument("action", choices=["stats", "clear"])
+    p.add_argument("--expired-only", action="store_true")
+    p.add_argument("--cache-root", default=str(CACHE_ROOT))
+    args = p.parse_args(argv)
+
+    if args.action == "stats":
+        print(json.dumps(stats(root=args.cache_root), ensure_ascii=False))
+    else:
+        print(json.dumps({"removed": clear(expired_only=args.expired_only, root=args.cache_root)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+RANKER_ROOT = ROOT / "state" / "suggestion_ranker"
+
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import alias_match  # noqa: E402
+import log_index  # noqa: E402
+import lookup_index  # noqa: E402
+
+# audit codes that record an operator (or bootstrap) choosing a product; conflicts are not choices, and alias
+# decisions are learned from the alias log they are written to
+DECISION_CODES = {"REVIEW-SKU-MAP-PERSISTED", "BOOTSTRAP-SKU-MAP-PERSISTED"}
+HALF_LIFE_DAYS = 90.0
+UNDATED_WEIGHT = 0.5
+MIN_SIMILARITY = 0.6
+FORMAT = 1
+
+# fuzzy index over historical descriptions, per ranker file and history version
+_FUZZY = {}
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def desc_key(s) -> str:
+    """Descriptions meet the way catalog aliases do: folded, transliterated, pack tokens dropped."""
+    return alias_match.fold(alias_match.split_pack(s)[0])
+
+
+def _bump(table, key, pid, ts=None):
+    e = table.setdefault(key, {}).setdefault(pid, {"n": 0, "last": None})
+    e["n"] += 1
+    if ts and (e["last"] is None or str(ts) > e["last"]):
+        e["last"] = str(ts)
+
+
+def _rec_hash(rec):
+    return hashlib.sha1(json.dumps(rec, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _empty():
+    return {"format": FORMAT, "version": 0, "logs": {}, "history": {"sku": {}, "desc": {}}, "static": {"stamps": {}, "sku": {}, "desc": {}}}
+
+
+def _learn(history, log, rec):
+    pid = rec.get("product_id")
+    if not pid:
+        return
+    if log == "mapping_persist":
+        if rec.get("code") not in DECISION_CODES:
+            return
+        if rec.get("sku_key"):
+            _bump(history["sku"], rec["sku_key"], pid, rec.get("ts"))
+        if rec.get("raw_desc") and desc_key(rec["raw_desc"]):
+            _bump(history["desc"], desc_key(rec["raw_desc"]), pid, rec.get("ts"))
+    elif log == "catalog_aliases" and rec.get("raw_desc") and desc_key(rec["raw_desc"]):
+        _bump(history["desc"], desc_key(rec["raw_desc"]), pid, rec.get("ts"))
+
+
+def _static(sku_map_dir, recipe_aliases):
+    """Current SKU maps and recipe aliases: undated decisions, recounted wholesale whenever one of the files changes."""
+    sku, desc = {}, {}
+    for k, pid in lookup_index.merge_sku_maps(lookup_index.sku_map_files(sku_map_dir)).items():
+        if pid:
+            _bump(sku, k, pid)
+    aliases = load_json(Path(recipe_aliases), {})
+    for raw, pid in (aliases.items() if isinstance(aliases, dict) else []):
+        if pid and desc_key(raw):
+            _bump(desc, desc_key(raw), pid)
+    return sku, desc
+
+
+def _stamps(sku_map_dir, recipe_aliases):
+    files = lookup_index.sku_map_files(sku_map_dir) + [Path(recipe_aliases)]
+    out = {}
+    for f in files:
+        try:
+            st = os.stat(f)
+        except OSError:
+            continue
+        out[str(f)] = [st.st_mtime_ns, st.st_size]
+    return out
+
+
+def _ranker_path(paths, ranker_dir):
+    key = hashlib.sha1("\n".join(str(Path(p).resolve()) for p in paths).encode("utf-8")).hexdigest()[:12]
+    return Path(ranker_dir or RANKER_ROOT) / f"ranker.{key}.json"
+
+
+def load(audit_log=None, alias_log=None, sku_map_dir=None, recipe_aliases=None, ranker_dir=None, stats=None):
+    """Decision history brought up to date: only log records appended since the last update are learned.
+
+    Logs are read through log_index snapshots. The ranker remembers how many records of each log it consumed and
+    a hash of the last one; if that record no longer matches (log rewritten) the history is relearned from scratch.
+    `stats`, when given, receives {"learned", "relearned", "static_changed", "path"}.
+    """
+    audit_log = Path(audit_log or log_index.LOGS["mapping_persist"]["path"])
+    alias_log = Path(alias_log or log_index.LOGS["catalog_aliases"]["path"])
+    sku_map_dir = Path(sku_map_dir or lookup_index.SKU_MAP_DIR)
+    recipe_aliases = Path(recipe_aliases or lookup_index.RECIPE_ALIASES_PATH)
+    path = _ranker_path((audit_log, alias_log, sku_map_dir, recipe_aliases), ranker_dir)
+    try:
+        model = load_json(path, None)
+    except ValueError:
+        model = None
+    if not isinstance(model, dict) or model.get("format") != FORMAT:
+        model = _empty()
+
+    learned, relearned, changed = 0, False, False
+    snaps = {"mapping_persist": log_index.load("mapping_persist", audit_log), "catalog_aliases": log_index.load("catalog_aliases", alias_log)}
+    cursors = model["logs"]
+    for log, snap in snaps.items():
+        cur = cursors.get(log) or {"consumed": 0, "last_hash": None}
+        n = cur["consumed"]
+        if n > len(snap["records"]) or (n and _rec_hash(log_index.read(snap, [n - 1])[0]) != cur["last_hash"]):
+            relearned = True
+            break
+    if relearned:
+        model = {**_empty(), "static": model["static"], "version": model["version"]}
+        cursors = model["logs"]
+    for log, snap in snaps.items():
+        n = (cursors.get(log) or {}).get("consumed", 0)
+        fresh = log_index.read(snap, range(n, len(snap["records"])))
+        for rec in fresh:
+            _learn(model["history"], log, rec)
+            learned += 1
+        if fresh or log not in cursors:
+            cursors[log] = {"consumed": len(snap["records"]), "last_hash": _rec_hash(fresh[-1]) if fresh else None}
+            changed = True
+
+    stamps = _stamps(sku_map_dir, recipe_aliases)
+    static_changed = stamps != model["static"]["stamps"]
+    if static_changed:
+        sku, desc = _static(sku_map_dir, recipe_aliases)
+        model["static"] = {"stamps": stamps, "sku": sku, "desc": desc}
+
+    if changed or relearned or static_changed:
+        model["version"] += 1
+        model["updated_at"] = datetime.now(timezone.utc).isoformat()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(model, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    model["_path"] = str(path)
+    if stats is not None:
+        stats.update({"learned": learned, "relearned": relearned, "static_changed": static_changed, "path": str(path)})
+    return model
+
+
+def _weight(e, now):
+    if not e["last"]:
+        return e["n"] * UNDATED_WEIGHT
+    try:
+        last = datetime.fromisoformat(e["last"].replace("Z", "+00:00"))
+        if last.tzinfo is None:
+            last = last.replace(tzinfo=timezone.utc)
+    except ValueError:
+        return e["n"] * UNDATED_WEIGHT
+    age = max(0.0, (now - last).total_seconds() / 86400.0)
+    return e["n"] * 0.5 ** (age / HALF_LIFE_DAYS)
+
+
+def _merged(model, table):
+    """Logged decisions plus the SKU map / alias file entries the logs do not already explain (those count once)."""
+    out = {key: {pid: dict(e) for pid, e in pids.items()} for key, pids in model["history"][table].items()}
+    for key, pids in model["static"][table].items():
+        dst = out.setdefault(key, {})
+        for pid, e in pids.items():
+            dst.setdefault(pid, dict(e))
+    return out
+
+
+def _tables(model):
+    key = (model.get("_path"), model["version"])
+    hit = _FUZZY.get(key)
+    if hit is None:
+        sku, desc = _merged(model, "sku"), _merged(model, "desc")
+        by_pid = {}
+        for k, pids in desc.items():
+            for pid in pids:
+                by_pid.setdefault(pid, []).append(k)
+        fuzzy = alias_match.build_index({"items": [{"product_id": pid, "canonical_name": "", "aliases": keys} for pid, keys in by_pid.items()]})
+        hit = _FUZZY[key] = (sku, desc, fuzzy)
+    return hit
+
+
+def rank(model, name, sku_key=None, k=3, now=None):
+    """Products operators chose before for this SKU or a description like this one, strongest first.
+
+    Each decision counts n x 0.5^(age / HALF_LIFE_DAYS) (undated SKU-map / alias-file entries count half); a
+    similar description (trigram match >= MIN_SIMILARITY) contributes in proportion to its similarity.
+    Returns [{"product_id", "score", "n", "last", "via"}].
+    """
+    now = now or datetime.now(timezone.utc)
+    sku, desc, fuzzy = _tables(model)
+    out = {}
+
+    def add(pid, e, factor, via):
+        r = out.setdefault(pid, {"product_id": pid, "score": 0.0, "n": 0, "last": None, "via": via})
+        r["score"] += _weight(e, now) * factor
+        # one decision usually shows up under both its SKU and its description: report the larger count, not the sum
+        r["n"] = max(r["n"], e["n"])
+        if e["last"] and (r["last"] is None or e["last"] > r["last"]):
+            r["last"] = e["last"]
+
+    for pid, e in (sku.get(sku_key, {}) if sku_key else {}).items():
+        add(pid, e, 1.0, "sku")
+    key = desc_key(name)
+    for pid, e in desc.get(key, {}).items():
+        add(pid, e, 1.0, "desc")
+    for s in alias_match.suggest(fuzzy, name, k=k * 2, min_score=MIN_SIMILARITY):
+        e = desc.get(s["alias"], {}).get(s["product_id"])
+        if e and s["alias"] != key:
+            add(s["product_id"], e, s["score"], "similar")
+    ranked = sorted(out.values(), key=lambda x: (-x["score"], x["product_id"]))[:k]
+    for r in ranked:
+        r["score"] = round(r["score"], 4)
+    return ranked
+
+
+def format_history(h):
+    """CSV cell: 'PROD-X | 3x | 2026-02-12 | sku' — product_id first so it can be copied into set_product_id."""
+    if not h:
+        return ""
+    return " | ".join([h["product_id"], f"{h['n']}x", str(h["last"] or "")[:10] or "undated", h["via"]])
+
+
+def annotate(cell, pid, history):
+    """Suffix a suggestion_N cell with how often that product was chosen before."""
+    hit = next((h for h in history if h["product_id"] == pid), None)
+    return f"{cell} | chosen {hit['n']}x" if cell and hit else cell
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Rank products by what operators chose before for a SKU or a similar description")
+    p.add_argument("--name", action="append", default=[], help="raw description (repeatable)")
+    p.add_argument("--sku", default=None, help="supplier::sku")
+    p.add_argument("--audit-log", default=None)
+    p.add_argument("--alias-log", default=None)
+    p.add_argument("--sku-map-dir", default=None)
+    p.add_argument("--recipe-aliases", default=None)
+    p.add_argument("--ranker-dir", default=str(RANKER_ROOT))
+    p.add_argument("--top", type=int, default=3)
+    args = p.parse_args(argv)
+
+    stats = {}
+    model = load(args.audit_log, args.alias_log, args.sku_map_dir, args.recipe_aliases, args.ranker_dir, stats=stats)
+    out = {**stats, "skus": len(model["history"]["sku"]) + len(model["static"]["sku"]),
+           "descriptions": len(model["history"]["desc"]) + len(model["static"]["desc"])}
+    out["ranked"] = {n: rank(model, n, args.sku, args.top) for n in (args.name or [""])}
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()